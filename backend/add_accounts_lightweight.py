@@ -49,11 +49,15 @@ def create_or_update_account(db: Session, username: str, followers: int, profile
     db.commit()
     db.refresh(account)
 
-    # Refresh stats from videos
-    videos = db.query(Video).filter(
+    # Link this author's videos to the account
+    db.query(Video).filter(
+        Video.account_id.is_(None),
         Video.author_username == account.username,
         Video.platform == 'tiktok'
-    ).all()
+    ).update({Video.account_id: account.id}, synchronize_session=False)
+
+    # Refresh stats from videos
+    videos = db.query(Video).filter(Video.account_id == account.id).all()
 
     account.total_videos = len(videos)
     account.total_views = sum(v.views for v in videos)
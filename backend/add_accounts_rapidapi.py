@@ -57,11 +57,15 @@ def create_or_update_account(db: Session, video: Video):
     db.commit()
     db.refresh(account)
 
-    # Refresh stats
-    videos = db.query(Video).filter(
+    # Link this author's videos to the account
+    db.query(Video).filter(
+        Video.account_id.is_(None),
         Video.author_username == account.username,
         Video.platform == account.platform
-    ).all()
+    ).update({Video.account_id: account.id}, synchronize_session=False)
+
+    # Refresh stats
+    videos = db.query(Video).filter(Video.account_id == account.id).all()
 
     account.total_videos = len(videos)
     account.total_views = sum(v.views for v in videos)
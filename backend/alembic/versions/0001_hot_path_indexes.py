@@ -0,0 +1,109 @@
+"""Unique keys and covering indexes for hot lookup paths
+
+- (username, platform) on accounts and the collection link tables get unique indexes,
+  so duplicates can't be inserted; ingestion links videos to the default collection with
+  ON CONFLICT DO NOTHING. Video lookups by (id, platform) use the primary key on id
+- Existing duplicates are merged first (lowest id wins)
+- Analytics filters on (platform, is_spark_ad, posted_at) / posted_at get covering
+  indexes that INCLUDE the stat columns (PostgreSQL) for index-only scans
+
+Written to be safe on databases created by init_db() with the current models:
+indexes that already exist are skipped.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Frozen copy of database.ANALYTICS_COVERING_COLUMNS as of this revision - not imported, so later changes
+# to the models' list don't change what this migration builds
+COVERING_COLUMNS = ['views', 'likes', 'comments', 'shares', 'bookmarks', 'duration']
+
+# Indexes replaced by the unique / covering ones below
+SUPERSEDED_INDEXES = [
+    ('idx_username_platform', 'accounts', ['username', 'platform']),
+    ('idx_video_collection', 'video_collections', ['video_id', 'collection_id']),
+    ('idx_account_collection', 'account_collections', ['account_id', 'collection_id']),
+    ('idx_posted_at', 'videos', ['posted_at']),
+    ('idx_platform_spark', 'videos', ['platform', 'is_spark_ad']),
+]
+
+NEW_INDEXES = [
+    ('uq_accounts_username_platform', 'accounts', ['username', 'platform'], True, None),
+    ('uq_video_collection', 'video_collections', ['video_id', 'collection_id'], True, None),
+    ('uq_account_collection', 'account_collections', ['account_id', 'collection_id'], True, None),
+    ('idx_collection_accounts', 'account_collections', ['collection_id', 'account_id'], False, None),
+    ('idx_posted_at_covering', 'videos', ['posted_at'], False, COVERING_COLUMNS),
+    ('idx_platform_spark_posted', 'videos', ['platform', 'is_spark_ad', 'posted_at'], False, COVERING_COLUMNS),
+]
+
+
+def _existing_indexes(table: str) -> set:
+    inspector = sa.inspect(op.get_bind())
+    return {index['name'] for index in inspector.get_indexes(table)}
+
+
+def _merge_duplicates():
+    """Remove duplicate rows that would violate the new unique indexes"""
+    # Duplicate accounts: point collection memberships at the lowest id, then drop the rest
+    op.execute("""
+        UPDATE account_collections
+        SET account_id = (
+            SELECT MIN(keeper.id)
+            FROM accounts keeper
+            JOIN accounts dup ON dup.username = keeper.username AND dup.platform = keeper.platform
+            WHERE dup.id = account_collections.account_id
+        )
+        WHERE account_id NOT IN (SELECT MIN(id) FROM accounts GROUP BY username, platform)
+          AND account_id IN (SELECT id FROM accounts)
+    """)
+    op.execute("""
+        DELETE FROM accounts
+        WHERE id NOT IN (SELECT MIN(id) FROM accounts GROUP BY username, platform)
+    """)
+
+    # Duplicate collection memberships
+    op.execute("""
+        DELETE FROM video_collections
+        WHERE id NOT IN (SELECT MIN(id) FROM video_collections GROUP BY video_id, collection_id)
+    """)
+    op.execute("""
+        DELETE FROM account_collections
+        WHERE id NOT IN (SELECT MIN(id) FROM account_collections GROUP BY account_id, collection_id)
+    """)
+
+
+def upgrade() -> None:
+    _merge_duplicates()
+
+    for name, table, columns in SUPERSEDED_INDEXES:
+        if name in _existing_indexes(table):
+            op.drop_index(name, table_name=table)
+
+    for name, table, columns, unique, include in NEW_INDEXES:
+        if name in _existing_indexes(table):
+            continue
+        kwargs = {'postgresql_include': include} if include else {}
+        op.create_index(name, table, columns, unique=unique, **kwargs)
+
+
+def downgrade() -> None:
+    for name, table, columns, unique, include in NEW_INDEXES:
+        if name in _existing_indexes(table):
+            op.drop_index(name, table_name=table)
+
+    for name, table, columns in SUPERSEDED_INDEXES:
+        if name not in _existing_indexes(table):
+            op.create_index(name, table, columns)
@@ -0,0 +1,67 @@
+"""Integer account_id foreign key on videos
+
+- videos.account_id references accounts.id, replacing the author_username + platform
+  string joins used for account-scoped queries
+- Backfilled from the existing (author_username, platform) -> accounts match
+- (account_id, scraped_at) index for the account videos listing
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _existing_columns(table: str) -> set:
+    inspector = sa.inspect(op.get_bind())
+    return {column['name'] for column in inspector.get_columns(table)}
+
+
+def _existing_indexes(table: str) -> set:
+    inspector = sa.inspect(op.get_bind())
+    return {index['name'] for index in inspector.get_indexes(table)}
+
+
+def upgrade() -> None:
+    if 'account_id' not in _existing_columns('videos'):
+        # Batch mode so SQLite can add the foreign key (plain ALTER TABLE elsewhere)
+        with op.batch_alter_table('videos') as batch_op:
+            batch_op.add_column(sa.Column('account_id', sa.Integer(), nullable=True))
+            batch_op.create_foreign_key(
+                'fk_videos_account_id', 'accounts', ['account_id'], ['id'], ondelete='SET NULL'
+            )
+
+    # Backfill from the old username/platform match (unique since 0001)
+    op.execute("""
+        UPDATE videos
+        SET account_id = (
+            SELECT accounts.id
+            FROM accounts
+            WHERE accounts.username = videos.author_username
+              AND accounts.platform = videos.platform
+        )
+        WHERE account_id IS NULL
+          AND author_username IS NOT NULL
+    """)
+
+    if 'idx_account_scraped' not in _existing_indexes('videos'):
+        op.create_index('idx_account_scraped', 'videos', ['account_id', 'scraped_at'])
+
+
+def downgrade() -> None:
+    if 'idx_account_scraped' in _existing_indexes('videos'):
+        op.drop_index('idx_account_scraped', table_name='videos')
+
+    with op.batch_alter_table('videos') as batch_op:
+        batch_op.drop_column('account_id')
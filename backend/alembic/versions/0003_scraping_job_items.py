@@ -0,0 +1,43 @@
+"""Per-URL status table for bulk URL scraping jobs
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # init_db() creates the table on startup, so it may already exist
+    if sa.inspect(op.get_bind()).has_table('scraping_job_items'):
+        return
+
+    op.create_table(
+        'scraping_job_items',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('job_id', sa.Integer(), sa.ForeignKey('scraping_jobs.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('url', sa.String(), nullable=False),
+        sa.Column('status', sa.String()),
+        sa.Column('videos_found', sa.Integer()),
+        sa.Column('video_ids', sa.JSON()),
+        sa.Column('error_message', sa.Text()),
+        sa.Column('completed_at', sa.DateTime()),
+        sa.Column('created_at', sa.DateTime()),
+    )
+    op.create_index('ix_scraping_job_items_job_id', 'scraping_job_items', ['job_id'])
+    op.create_index('idx_job_item_url_completed', 'scraping_job_items', ['url', 'completed_at'])
+
+
+def downgrade() -> None:
+    op.drop_table('scraping_job_items')
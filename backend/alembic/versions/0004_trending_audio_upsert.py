@@ -0,0 +1,72 @@
+"""One trending_audio row per audio, country and day, plus rank history
+
+- trending_date becomes the chart day (midnight UTC); every request used to insert a
+  fresh copy of the chart, so existing rows are collapsed to the latest one per
+  (music_id, country, day) first
+- Unique (music_id, country, trending_date) index so refreshes update rows in place
+- trending_audio_ranks: a row per rank / video count change, for audio momentum
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _existing_indexes(table: str) -> set:
+    inspector = sa.inspect(op.get_bind())
+    return {index['name'] for index in inspector.get_indexes(table)}
+
+
+def _chart_day_sql() -> str:
+    # SQLite stores DateTime as text - match SQLAlchemy's format so equality lookups still work
+    if op.get_bind().dialect.name == 'sqlite':
+        return "strftime('%Y-%m-%d 00:00:00.000000', trending_date)"
+    return "date_trunc('day', trending_date)"
+
+
+def upgrade() -> None:
+    chart_day = _chart_day_sql()
+
+    op.execute(f"""
+        DELETE FROM trending_audio
+        WHERE id NOT IN (
+            SELECT MAX(id) FROM trending_audio GROUP BY music_id, country, {chart_day}
+        )
+    """)
+    op.execute(f"UPDATE trending_audio SET trending_date = {chart_day}")
+
+    if 'uq_trending_audio_music_country_date' not in _existing_indexes('trending_audio'):
+        op.create_index('uq_trending_audio_music_country_date', 'trending_audio',
+                        ['music_id', 'country', 'trending_date'], unique=True)
+
+    # init_db() creates the table on startup, so it may already exist
+    if not sa.inspect(op.get_bind()).has_table('trending_audio_ranks'):
+        op.create_table(
+            'trending_audio_ranks',
+            sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column('music_id', sa.String(), nullable=False),
+            sa.Column('country', sa.String(), nullable=False),
+            sa.Column('rank', sa.Integer()),
+            sa.Column('total_videos', sa.BigInteger()),
+            sa.Column('recorded_at', sa.DateTime(), nullable=False),
+        )
+        op.create_index('idx_trending_rank_music_country', 'trending_audio_ranks',
+                        ['music_id', 'country', 'recorded_at'])
+
+
+def downgrade() -> None:
+    op.drop_table('trending_audio_ranks')
+    if 'uq_trending_audio_music_country_date' in _existing_indexes('trending_audio'):
+        op.drop_index('uq_trending_audio_music_country_date', table_name='trending_audio')
@@ -0,0 +1,68 @@
+"""Inverted hashtag index
+
+- hashtags gets a unique (name, platform) key (duplicates merged, lowest id wins) and a
+  (platform, total_views) index for top-N queries
+- video_hashtags(video_id, hashtag_id) links each video to its normalized hashtags
+- Backfilled from videos.hashtags, with hashtags.total_videos / total_views recomputed
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _existing_indexes(table: str) -> set:
+    inspector = sa.inspect(op.get_bind())
+    return {index['name'] for index in inspector.get_indexes(table)}
+
+
+def upgrade() -> None:
+    from hashtag_index import rebuild
+
+    op.execute("""
+        DELETE FROM hashtags
+        WHERE id NOT IN (SELECT MIN(id) FROM hashtags GROUP BY name, platform)
+    """)
+
+    existing = _existing_indexes('hashtags')
+    if 'idx_hashtag_platform' in existing:
+        op.drop_index('idx_hashtag_platform', table_name='hashtags')
+    if 'uq_hashtags_name_platform' not in existing:
+        op.create_index('uq_hashtags_name_platform', 'hashtags', ['name', 'platform'], unique=True)
+    if 'idx_hashtag_platform_views' not in existing:
+        op.create_index('idx_hashtag_platform_views', 'hashtags', ['platform', 'total_views'])
+
+    # init_db() creates the table on startup, so it may already exist
+    if not sa.inspect(op.get_bind()).has_table('video_hashtags'):
+        op.create_table(
+            'video_hashtags',
+            sa.Column('video_id', sa.String(), sa.ForeignKey('videos.id', ondelete='CASCADE'), primary_key=True),
+            sa.Column('hashtag_id', sa.Integer(), sa.ForeignKey('hashtags.id', ondelete='CASCADE'), primary_key=True),
+        )
+        op.create_index('idx_hashtag_videos', 'video_hashtags', ['hashtag_id', 'video_id'])
+
+    rebuild(op.get_bind())
+
+
+def downgrade() -> None:
+    op.drop_table('video_hashtags')
+
+    existing = _existing_indexes('hashtags')
+    if 'idx_hashtag_platform_views' in existing:
+        op.drop_index('idx_hashtag_platform_views', table_name='hashtags')
+    if 'uq_hashtags_name_platform' in existing:
+        op.drop_index('uq_hashtags_name_platform', table_name='hashtags')
+    if 'idx_hashtag_platform' not in existing:
+        op.create_index('idx_hashtag_platform', 'hashtags', ['name', 'platform'])
@@ -0,0 +1,40 @@
+"""Caption full-text search
+
+- PostgreSQL: videos.caption_tsv, a stored generated tsvector column (english config),
+  with a GIN index. Adding a stored column rewrites the videos table - run off-peak.
+- SQLite: videos_fts FTS5 external-content table with sync triggers, built from the
+  existing captions
+
+The column / table aren't on the Video model; caption_search.py owns the DDL.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    from caption_search import ensure_caption_search_index
+
+    ensure_caption_search_index(op.get_bind())
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS idx_videos_caption_tsv")
+        op.execute("ALTER TABLE videos DROP COLUMN IF EXISTS caption_tsv")
+    else:
+        for trigger in ('videos_fts_insert', 'videos_fts_delete', 'videos_fts_update'):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS videos_fts")
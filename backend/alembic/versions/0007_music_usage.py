@@ -0,0 +1,63 @@
+"""Music usage rollup
+
+- music_usage: one row per (music_id, platform) with video count, total / median views,
+  first / last used and top creators
+- music_usage_daily: videos posted with each sound and views gained, per day
+- Backfilled from videos and video_history
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    from music_rollup import rebuild
+
+    # init_db() creates the tables on startup, so they may already exist
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('music_usage'):
+        op.create_table(
+            'music_usage',
+            sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column('music_id', sa.String(), nullable=False),
+            sa.Column('platform', sa.String(), nullable=False),
+            sa.Column('music_title', sa.String()),
+            sa.Column('music_author', sa.String()),
+            sa.Column('total_videos', sa.BigInteger(), default=0),
+            sa.Column('total_views', sa.BigInteger(), default=0),
+            sa.Column('median_views', sa.BigInteger(), default=0),
+            sa.Column('top_creators', sa.JSON()),
+            sa.Column('first_used', sa.DateTime()),
+            sa.Column('last_used', sa.DateTime()),
+            sa.Column('last_updated', sa.DateTime()),
+        )
+        op.create_index('uq_music_usage_music_platform', 'music_usage', ['music_id', 'platform'], unique=True)
+        op.create_index('idx_music_usage_platform_views', 'music_usage', ['platform', 'total_views'])
+    if not inspector.has_table('music_usage_daily'):
+        op.create_table(
+            'music_usage_daily',
+            sa.Column('music_usage_id', sa.Integer(), sa.ForeignKey('music_usage.id', ondelete='CASCADE'), primary_key=True),
+            sa.Column('day', sa.DateTime(), primary_key=True),
+            sa.Column('videos_added', sa.Integer(), default=0),
+            sa.Column('views_gained', sa.BigInteger(), default=0),
+        )
+
+    rebuild(op.get_bind())
+
+
+def downgrade() -> None:
+    op.drop_table('music_usage_daily')
+    op.drop_table('music_usage')
@@ -0,0 +1,58 @@
+"""Search result cache on search_history
+
+- search_history.video_ids holds a search's result ids in scraper order, and
+  search_history.job_id the scraping job that produced them, so repeat hashtag / term
+  searches can be served from the table for SEARCH_CACHE_TTL_MINUTES
+- (query_type, platform, query, searched_at) index for the cache lookup
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _existing_columns(table: str) -> set:
+    inspector = sa.inspect(op.get_bind())
+    return {column['name'] for column in inspector.get_columns(table)}
+
+
+def _existing_indexes(table: str) -> set:
+    inspector = sa.inspect(op.get_bind())
+    return {index['name'] for index in inspector.get_indexes(table)}
+
+
+def upgrade() -> None:
+    columns = _existing_columns('search_history')
+    if 'video_ids' not in columns:
+        op.add_column('search_history', sa.Column('video_ids', sa.JSON(), nullable=True))
+    if 'job_id' not in columns:
+        # Batch mode so SQLite can add the foreign key (plain ALTER TABLE elsewhere)
+        with op.batch_alter_table('search_history') as batch_op:
+            batch_op.add_column(sa.Column('job_id', sa.Integer(), nullable=True))
+            batch_op.create_foreign_key(
+                'fk_search_history_job_id', 'scraping_jobs', ['job_id'], ['id'], ondelete='SET NULL'
+            )
+
+    if 'idx_search_cache' not in _existing_indexes('search_history'):
+        op.create_index('idx_search_cache', 'search_history', ['query_type', 'platform', 'query', 'searched_at'])
+
+
+def downgrade() -> None:
+    if 'idx_search_cache' in _existing_indexes('search_history'):
+        op.drop_index('idx_search_cache', table_name='search_history')
+
+    with op.batch_alter_table('search_history') as batch_op:
+        batch_op.drop_column('job_id')
+        batch_op.drop_column('video_ids')
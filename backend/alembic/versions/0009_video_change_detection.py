@@ -0,0 +1,46 @@
+"""Change detection columns on videos
+
+- videos.content_hash: hash of the stats / metadata last ingested (change_detection.py), so
+  refreshes that return an unchanged video skip its UPDATE
+- videos.last_seen_at: last time a scrape returned the video, touched instead of rewriting
+  the row; seeded from scraped_at. Neither column is indexed, so the touch can be a HOT update
+  on PostgreSQL
+
+Existing rows start without a hash and are written (and hashed) the next time they are seen.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0009'
+down_revision: Union[str, None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _existing_columns(table: str) -> set:
+    inspector = sa.inspect(op.get_bind())
+    return {column['name'] for column in inspector.get_columns(table)}
+
+
+def upgrade() -> None:
+    columns = _existing_columns('videos')
+    if 'content_hash' not in columns:
+        op.add_column('videos', sa.Column('content_hash', sa.String(16), nullable=True))
+    if 'last_seen_at' not in columns:
+        op.add_column('videos', sa.Column('last_seen_at', sa.DateTime(), nullable=True))
+        op.execute("UPDATE videos SET last_seen_at = scraped_at")
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('videos') as batch_op:
+        batch_op.drop_column('last_seen_at')
+        batch_op.drop_column('content_hash')
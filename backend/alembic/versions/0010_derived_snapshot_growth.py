@@ -0,0 +1,66 @@
+"""Drop the stored growth columns from video_history
+
+Growth is derived from consecutive snapshots at read time (growth.py, LAG() over
+(video_id, platform) ordered by snapshot_date, served by idx_video_snapshot), so
+views_growth / likes_growth / comments_growth are no longer written or read.
+
+The downgrade re-adds them and backfills each row with the clamped difference to the
+previous snapshot of the same video.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0010'
+down_revision: Union[str, None] = '0009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+GROWTH_COLUMNS = ('views_growth', 'likes_growth', 'comments_growth')
+
+
+def _existing_columns(table: str) -> set:
+    inspector = sa.inspect(op.get_bind())
+    return {column['name'] for column in inspector.get_columns(table)}
+
+
+def upgrade() -> None:
+    columns = [column for column in GROWTH_COLUMNS if column in _existing_columns('video_history')]
+    if columns:
+        with op.batch_alter_table('video_history') as batch_op:
+            for column in columns:
+                batch_op.drop_column(column)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('video_history') as batch_op:
+        for column in GROWTH_COLUMNS:
+            batch_op.add_column(sa.Column(column, sa.BigInteger(), server_default='0', nullable=True))
+
+    op.execute("""
+        UPDATE video_history
+        SET views_growth = CASE WHEN deltas.views_growth > 0 THEN deltas.views_growth ELSE 0 END,
+            likes_growth = CASE WHEN deltas.likes_growth > 0 THEN deltas.likes_growth ELSE 0 END,
+            comments_growth = CASE WHEN deltas.comments_growth > 0 THEN deltas.comments_growth ELSE 0 END
+        FROM (
+            SELECT
+                id,
+                snapshot_date,
+                views - LAG(views) OVER w AS views_growth,
+                likes - LAG(likes) OVER w AS likes_growth,
+                comments - LAG(comments) OVER w AS comments_growth
+            FROM video_history
+            WINDOW w AS (PARTITION BY video_id, platform ORDER BY snapshot_date)
+        ) AS deltas
+        WHERE video_history.id = deltas.id
+          AND video_history.snapshot_date = deltas.snapshot_date
+          AND deltas.views_growth IS NOT NULL
+    """)
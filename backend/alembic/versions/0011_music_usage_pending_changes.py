@@ -0,0 +1,35 @@
+"""Incremental music usage rollup
+
+- music_usage.pending_changes: video changes since the sound's median / top creators were
+  last recomputed. Flushes now only adjust the totals by delta and bump this counter; a
+  scheduled job (music_rollup.recompute_pending) recomputes the rest
+
+Existing rows were fully recomputed on write, so they start at 0.
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0011'
+down_revision: Union[str, None] = '0010'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if 'pending_changes' not in {column['name'] for column in inspector.get_columns('music_usage')}:
+        op.add_column('music_usage', sa.Column('pending_changes', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('music_usage') as batch_op:
+        batch_op.drop_column('pending_changes')
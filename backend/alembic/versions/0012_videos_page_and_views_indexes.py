@@ -0,0 +1,52 @@
+"""Indexes for the newest-first videos page and most viral
+
+- idx_scraped_at_id (scraped_at, id) replaces ix_videos_scraped_at: /api/videos picks a
+  page of ids from it with an index-only scan, then loads just those rows, so deep offsets
+  no longer fetch every skipped row from the (wider since 0006 / 0009) videos table
+- idx_views: most viral reads videos by views descending and stops after the top N,
+  instead of sorting every video posted in the date range
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0012'
+down_revision: Union[str, None] = '0011'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+NEW_INDEXES = [
+    ('idx_scraped_at_id', ['scraped_at', 'id']),
+    ('idx_views', ['views']),
+]
+
+
+def _existing_indexes(table: str) -> set:
+    inspector = sa.inspect(op.get_bind())
+    return {index['name'] for index in inspector.get_indexes(table)}
+
+
+def upgrade() -> None:
+    for name, columns in NEW_INDEXES:
+        if name not in _existing_indexes('videos'):
+            op.create_index(name, 'videos', columns)
+
+    if 'ix_videos_scraped_at' in _existing_indexes('videos'):
+        op.drop_index('ix_videos_scraped_at', table_name='videos')
+
+
+def downgrade() -> None:
+    if 'ix_videos_scraped_at' not in _existing_indexes('videos'):
+        op.create_index('ix_videos_scraped_at', 'videos', ['scraped_at'])
+
+    for name, columns in NEW_INDEXES:
+        if name in _existing_indexes('videos'):
+            op.drop_index(name, table_name='videos')
@@ -0,0 +1,36 @@
+"""Drop the redundant unique index on videos (id, platform)
+
+id is the primary key, so videos_pkey already makes (id, platform) unique and serves the
+lookups; uq_videos_id_platform (0001) only cost an extra index write per insert.
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0013'
+down_revision: Union[str, None] = '0012'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _existing_indexes(table: str) -> set:
+    inspector = sa.inspect(op.get_bind())
+    return {index['name'] for index in inspector.get_indexes(table)}
+
+
+def upgrade() -> None:
+    if 'uq_videos_id_platform' in _existing_indexes('videos'):
+        op.drop_index('uq_videos_id_platform', table_name='videos')
+
+
+def downgrade() -> None:
+    if 'uq_videos_id_platform' not in _existing_indexes('videos'):
+        op.create_index('uq_videos_id_platform', 'videos', ['id', 'platform'], unique=True)
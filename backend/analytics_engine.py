@@ -0,0 +1,619 @@
+"""
+In-memory column store of Video stats for the analytics endpoints.
+
+The virality, duration, timeseries, metrics-breakdown and video-stats panels only need a handful
+of numeric columns, so instead of loading ORM rows per request they are answered from NumPy
+arrays (views, likes, comments, shares, bookmarks, installs, trial_started, duration, posted_at,
+platform code, is_spark_ad, account_id) with vectorized masks, bincount and argpartition.
+
+Keeping the store current:
+- Writes through SessionLocal are applied on commit (after_flush captures the Video rows)
+- Bulk UPDATE/DELETE statements on videos mark the store stale -> full reload on next read
+- Rows written by other processes (cron scripts) are picked up by polling scraped_at every
+  ANALYTICS_STORE_CHECK_SECONDS, and everything is rebuilt every ANALYTICS_STORE_RELOAD_MINUTES
+
+Requests never wait on the database for the store: get_loaded_store() starts loads, reloads and
+polls in a background thread, and the current arrays keep answering until the new ones are
+swapped in. Before the first load has finished it returns None and the endpoints answer from the
+SQL FALLBACK queries (GROUP BY day / bucket, conditional aggregates) instead.
+"""
+
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, date
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import case, event, func, inspect, select
+
+from database import engine, SessionLocal, Video
+
+logger = logging.getLogger(__name__)
+
+ANALYTICS_STORE_CHECK_SECONDS = int(os.getenv("ANALYTICS_STORE_CHECK_SECONDS", "30"))
+ANALYTICS_STORE_RELOAD_MINUTES = int(os.getenv("ANALYTICS_STORE_RELOAD_MINUTES", "60"))
+
+# Columns read from the videos table, in row order
+STAT_COLUMNS = ("views", "likes", "comments", "shares", "bookmarks", "installs", "trial_started")
+SOURCE_COLUMNS = ("id",) + STAT_COLUMNS + ("duration", "posted_at", "scraped_at", "platform", "is_spark_ad", "account_id")
+
+VIRALITY_BUCKETS = ["below_1x", "1x_to_5x", "5x_to_10x", "10x_to_25x", "25x_to_50x", "50x_to_100x", "above_100x"]
+VIRALITY_EDGES = np.array([1, 5, 10, 25, 50, 100])
+DURATION_BUCKETS = ["0-5", "5-10", "10-20", "20-30", "30-45", "45-60", "60+"]
+DURATION_EDGES = np.array([5, 10, 20, 30, 45, 60])
+
+NO_ACCOUNT = -1
+
+# What load() swaps in from the freshly built store
+LOADED_ATTRIBUTES = ("size", "index", "ids", "stats", "duration", "posted_at", "platform", "is_spark_ad",
+                     "account_id", "alive", "platform_codes", "watermark")
+
+
+@dataclass
+class AnalyticsFilter:
+    """The collection / platform / organic-ads filters shared by the analytics endpoints"""
+    metric_type: str = "total"
+    platform: Optional[str] = None
+    account_ids: Optional[Sequence[int]] = None  # Accounts of the selected collection, None = no collection filter
+
+
+def _row_from_video(video: Video) -> dict:
+    """Loaded column values of a Video instance - expired attributes are left out rather than lazy loaded"""
+    values = inspect(video).dict
+    return {name: values[name] for name in SOURCE_COLUMNS if name in values}
+
+
+class VideoColumnStore:
+    def __init__(self):
+        self._lock = threading.RLock()  # Guards the arrays
+        self._refresh_lock = threading.Lock()  # One loader at a time
+        self._allocate(0)
+        self.platform_codes: Dict[str, int] = {}
+        self.loaded_at = None
+        self.checked_at = None
+        self.watermark = None  # Latest scraped_at seen
+        self._stale = True
+        self._loading = False
+        self._pending = []  # Changes committed while a full load was running
+
+    def _allocate(self, capacity: int):
+        self.size = 0
+        self.index: Dict[str, int] = {}
+        self.ids = np.empty(capacity, dtype=object)
+        self.stats = {name: np.zeros(capacity, dtype=np.int64) for name in STAT_COLUMNS}
+        self.duration = np.full(capacity, np.nan)
+        self.posted_at = np.full(capacity, np.datetime64("NaT"), dtype="datetime64[s]")
+        self.platform = np.full(capacity, -1, dtype=np.int16)
+        self.is_spark_ad = np.zeros(capacity, dtype=bool)
+        self.account_id = np.full(capacity, NO_ACCOUNT, dtype=np.int64)
+        self.alive = np.zeros(capacity, dtype=bool)
+
+    def _grow(self, needed: int):
+        capacity = len(self.ids)
+        if needed <= capacity:
+            return
+        new_capacity = max(needed, capacity * 2, 1024)
+
+        def grown(array, fill):
+            resized = np.full(new_capacity, fill, dtype=array.dtype)
+            resized[:capacity] = array
+            return resized
+
+        self.ids = grown(self.ids, None)
+        self.stats = {name: grown(array, 0) for name, array in self.stats.items()}
+        self.duration = grown(self.duration, np.nan)
+        self.posted_at = grown(self.posted_at, np.datetime64("NaT"))
+        self.platform = grown(self.platform, -1)
+        self.is_spark_ad = grown(self.is_spark_ad, False)
+        self.account_id = grown(self.account_id, NO_ACCOUNT)
+        self.alive = grown(self.alive, False)
+
+    def _platform_code(self, platform: Optional[str]) -> int:
+        if platform is None:
+            return -1
+        if platform not in self.platform_codes:
+            self.platform_codes[platform] = len(self.platform_codes)
+        return self.platform_codes[platform]
+
+    def _track_watermark(self, scraped_at: Optional[datetime]):
+        if scraped_at and (self.watermark is None or scraped_at > self.watermark):
+            self.watermark = scraped_at
+
+    # ============ LOADING ============
+
+    def load(self):
+        """Rebuild the whole store from the videos table - the current arrays answer until the swap"""
+        with self._lock:
+            self._loading = True
+            self._pending = []
+            self._stale = False  # Cleared up front so an invalidation during the load sticks
+
+        try:
+            started = time.perf_counter()
+            with engine.connect() as conn:
+                rows = conn.execute(select(*(getattr(Video, name) for name in SOURCE_COLUMNS))).all()
+
+            n = len(rows)
+            columns = list(zip(*rows)) if rows else [()] * len(SOURCE_COLUMNS)
+            values = dict(zip(SOURCE_COLUMNS, columns))
+
+            # Build the new arrays aside, so queries keep reading the current ones meanwhile
+            fresh = VideoColumnStore()
+            fresh._allocate(n)
+            fresh.size = n
+            fresh.ids[:] = values["id"]
+            fresh.index = {video_id: i for i, video_id in enumerate(values["id"])}
+            for name in STAT_COLUMNS:
+                fresh.stats[name][:] = np.fromiter((v or 0 for v in values[name]), dtype=np.int64, count=n)
+            fresh.duration[:] = np.array(values["duration"], dtype=float) if n else []
+            fresh.posted_at[:] = np.array(values["posted_at"], dtype="datetime64[s]") if n else []
+            fresh.platform[:] = np.fromiter((fresh._platform_code(p) for p in values["platform"]), dtype=np.int16, count=n)
+            fresh.is_spark_ad[:] = np.fromiter((bool(v) for v in values["is_spark_ad"]), dtype=bool, count=n)
+            fresh.account_id[:] = np.fromiter((NO_ACCOUNT if v is None else v for v in values["account_id"]),
+                                              dtype=np.int64, count=n)
+            fresh.alive[:n] = True
+            fresh.watermark = max((v for v in values["scraped_at"] if v), default=None)
+
+            with self._lock:
+                for name in LOADED_ATTRIBUTES:
+                    setattr(self, name, getattr(fresh, name))
+
+                # Replay commits that raced with the load
+                self._loading = False
+                for upserts, deleted in self._pending:
+                    self._apply(upserts, deleted)
+                self._pending = []
+
+                self.loaded_at = self.checked_at = time.monotonic()
+
+            logger.info(f"Analytics store loaded {n:,} videos in {time.perf_counter() - started:.2f}s")
+        except Exception:
+            self._stale = True
+            raise
+        finally:
+            with self._lock:
+                self._loading = False
+
+    def refresh(self):
+        """Pick up rows written by other processes since the last scraped_at we saw"""
+        query = select(*(getattr(Video, name) for name in SOURCE_COLUMNS))
+        if self.watermark is not None:
+            query = query.filter(Video.scraped_at >= self.watermark)
+        with engine.connect() as conn:
+            rows = conn.execute(query).all()
+
+        with self._lock:
+            self._apply([dict(row._mapping) for row in rows], [])
+            self.checked_at = time.monotonic()
+
+    def _reload_due(self) -> bool:
+        return self.needs_load() or time.monotonic() - self.loaded_at > ANALYTICS_STORE_RELOAD_MINUTES * 60
+
+    def _update(self):
+        if self._reload_due():
+            self.load()
+        elif time.monotonic() - self.checked_at > ANALYTICS_STORE_CHECK_SECONDS:
+            self.refresh()
+
+    def update(self):
+        """Load on first use, then poll for external writes and rebuild periodically. Blocks until done"""
+        with self._refresh_lock:
+            self._update()
+
+    def ensure_fresh(self) -> bool:
+        """
+        Run update() in a background thread if a load or poll is due, without waiting for it.
+        True when there are arrays to answer from - the previous ones while a reload runs.
+        """
+        due = self._reload_due() or time.monotonic() - self.checked_at > ANALYTICS_STORE_CHECK_SECONDS
+        if due and self._refresh_lock.acquire(blocking=False):
+            threading.Thread(target=self._update_in_background, name="analytics-store", daemon=True).start()
+        return self.loaded_at is not None
+
+    def _update_in_background(self):
+        try:
+            self._update()
+        except Exception as e:
+            logger.error(f"Analytics store update failed: {e}")
+        finally:
+            self._refresh_lock.release()
+
+    def invalidate(self):
+        self._stale = True
+
+    def needs_load(self) -> bool:
+        """A full load is due - before the first one, or after a bulk write"""
+        return self._stale or self.loaded_at is None
+
+    # ============ INCREMENTAL UPDATES ============
+
+    def apply_changes(self, upserts: List[dict], deleted: List[str]):
+        """Apply committed Video rows ({column: value}, possibly partial) and deletions"""
+        with self._lock:
+            if self._loading:
+                self._pending.append((upserts, deleted))
+                return
+            if self.loaded_at is None:
+                return  # Not loaded yet - the first load reads everything
+            self._apply(upserts, deleted)
+
+    def _apply(self, upserts: List[dict], deleted: List[str]):
+        new_ids = {values["id"] for values in upserts if values.get("id") not in self.index}
+        self._grow(self.size + len(new_ids))
+
+        for values in upserts:
+            if values.get("id") is None:
+                continue
+            i = self.index.get(values["id"])
+            if i is None:
+                i = self.size
+                self.size += 1
+                self.index[values["id"]] = i
+                self.ids[i] = values["id"]
+
+            # Rows from the session hooks may be partial (expired attributes) - only set what we have
+            for name in STAT_COLUMNS:
+                if name in values:
+                    self.stats[name][i] = values[name] or 0
+            if "duration" in values:
+                self.duration[i] = np.nan if values["duration"] is None else values["duration"]
+            if "posted_at" in values:
+                self.posted_at[i] = np.datetime64(values["posted_at"], "s") if values["posted_at"] else np.datetime64("NaT")
+            if "platform" in values:
+                self.platform[i] = self._platform_code(values["platform"])
+            if "is_spark_ad" in values:
+                self.is_spark_ad[i] = bool(values["is_spark_ad"])
+            if "account_id" in values:
+                self.account_id[i] = NO_ACCOUNT if values["account_id"] is None else values["account_id"]
+            self.alive[i] = True
+            self._track_watermark(values.get("scraped_at"))
+
+        for video_id in deleted:
+            i = self.index.get(video_id)
+            if i is not None:
+                self.alive[i] = False
+
+    # ============ QUERIES ============
+
+    def _mask(self, filters: AnalyticsFilter, start: Optional[datetime] = None, end: Optional[datetime] = None) -> np.ndarray:
+        n = self.size
+        mask = self.alive[:n].copy()
+
+        if start is not None:
+            mask &= self.posted_at[:n] >= np.datetime64(start, "s")
+        if end is not None:
+            mask &= self.posted_at[:n] <= np.datetime64(end, "s")
+
+        if filters.platform:
+            platforms = [p.strip().lower() for p in filters.platform.split(',')]
+            codes = [self.platform_codes[p] for p in platforms if p in self.platform_codes]
+            mask &= np.isin(self.platform[:n], codes)
+
+        if filters.metric_type == "organic":
+            mask &= ~self.is_spark_ad[:n]
+        elif filters.metric_type == "ads":
+            mask &= self.is_spark_ad[:n]
+
+        if filters.account_ids is not None:
+            mask &= np.isin(self.account_id[:n], np.asarray(filters.account_ids, dtype=np.int64))
+
+        return mask
+
+    def virality(self, filters: AnalyticsFilter, start: datetime, end: datetime) -> Dict[str, int]:
+        """Videos per multiple of the median view count"""
+        with self._lock:
+            views = self.stats["views"][:self.size][self._mask(filters, start, end)]
+
+        categories = dict.fromkeys(VIRALITY_BUCKETS, 0)
+        if not len(views):
+            return categories
+
+        # Upper median (sorted[n // 2]) without a full sort
+        middle = len(views) // 2
+        median_views = np.partition(views, middle)[middle]
+        if median_views == 0:
+            return categories
+
+        counts = np.bincount(np.digitize(views / median_views, VIRALITY_EDGES), minlength=len(VIRALITY_BUCKETS))
+        return {name: int(count) for name, count in zip(VIRALITY_BUCKETS, counts)}
+
+    def duration_analysis(self, filters: AnalyticsFilter, start: datetime, end: datetime) -> List[dict]:
+        """Average views per duration range"""
+        with self._lock:
+            mask = self._mask(filters, start, end)
+            mask &= ~np.isnan(self.duration[:self.size])
+            durations = self.duration[:self.size][mask]
+            views = self.stats["views"][:self.size][mask]
+
+        groups = np.digitize(durations, DURATION_EDGES)
+        counts = np.bincount(groups, minlength=len(DURATION_BUCKETS))
+        totals = np.bincount(groups, weights=views, minlength=len(DURATION_BUCKETS))
+
+        return [
+            {"range": name, "average_views": int(total / count), "video_count": int(count)}
+            for name, count, total in zip(DURATION_BUCKETS, counts, totals)
+            if count
+        ]
+
+    def timeseries(self, start_date: date, days: int) -> List[dict]:
+        """Views, installs and trials per posting day from start_date"""
+        start = np.datetime64(start_date, "D")
+        with self._lock:
+            n = self.size
+            day = (self.posted_at[:n].astype("datetime64[D]") - start).astype(np.int64)
+            mask = self.alive[:n] & ~np.isnat(self.posted_at[:n]) & (day >= 0) & (day < days)
+            day = day[mask]
+            totals = {
+                name: np.bincount(day, weights=self.stats[name][:n][mask], minlength=days).astype(np.int64)
+                for name in ("views", "installs", "trial_started")
+            }
+
+        return [
+            {
+                "date": (start_date + timedelta(days=i)).strftime('%Y-%m-%d'),
+                "views": int(totals["views"][i]),
+                "installs": int(totals["installs"][i]),
+                "trial_started": int(totals["trial_started"][i]),
+            }
+            for i in range(days)
+        ]
+
+    def averages(self, filters: AnalyticsFilter, start: datetime) -> Dict[str, int]:
+        """Average views / likes / comments of videos posted since start"""
+        with self._lock:
+            mask = self._mask(filters, start)
+            count = int(mask.sum())
+            totals = {name: int(self.stats[name][:self.size][mask].sum()) for name in ("views", "likes", "comments")}
+
+        return _averages(count, totals["views"], totals["likes"], totals["comments"])
+
+    def top_by_views(self, filters: AnalyticsFilter, start: datetime, end: datetime,
+                     offset: int, limit: int) -> tuple:
+        """(video ids of the requested page by views desc, average views of all matching videos)"""
+        with self._lock:
+            mask = self._mask(filters, start, end)
+            views = self.stats["views"][:self.size][mask]
+            ids = self.ids[:self.size][mask]
+
+        if not len(views) or offset >= len(views):
+            return [], float(views.mean()) if len(views) else 0
+
+        # Partition out the top offset+limit, then sort only those
+        k = min(offset + limit, len(views))
+        top = np.argpartition(-views, k - 1)[:k] if k < len(views) else np.arange(len(views))
+        top = top[np.argsort(-views[top], kind="stable")]
+        return list(ids[top[offset:offset + limit]]), float(views.mean())
+
+
+store = VideoColumnStore()
+
+
+def get_loaded_store() -> Optional[VideoColumnStore]:
+    """
+    The shared store, or None before its first load has finished - the caller then answers from
+    SQL (see SQL FALLBACK). Never waits: loads and polls due are started in the background.
+    """
+    return store if store.ensure_fresh() else None
+
+
+def _averages(count: int, views: int, likes: int, comments: int) -> Dict[str, int]:
+    if not count:
+        return {"avg_views": 0, "avg_views_gain": 0, "avg_comments_gain": 0, "avg_likes_gain": 0}
+
+    return {
+        "avg_views": int(views / count),
+        "avg_views_gain": int(views / count),
+        "avg_comments_gain": int(comments / count),
+        "avg_likes_gain": int(likes / count),
+    }
+
+
+# ============ SQL FALLBACK ============
+# Same answers as the store, bucketed and aggregated in the database - served while the store loads
+
+def posted_day():
+    """Video.posted_at truncated to the day: date_trunc on PostgreSQL, date() (a string) on SQLite"""
+    if engine.dialect.name == "postgresql":
+        return func.date_trunc("day", Video.posted_at)
+    return func.date(Video.posted_at)
+
+
+def parse_day(value) -> date:
+    return datetime.strptime(str(value)[:10], "%Y-%m-%d").date()
+
+
+def apply_filter(query, filters: AnalyticsFilter):
+    """The store's _mask as SQL filters"""
+    if filters.platform:
+        query = query.filter(Video.platform.in_([p.strip().lower() for p in filters.platform.split(',')]))
+
+    if filters.metric_type == "organic":
+        query = query.filter(Video.is_spark_ad == False)
+    elif filters.metric_type == "ads":
+        query = query.filter(Video.is_spark_ad == True)
+
+    if filters.account_ids is not None:
+        query = query.filter(Video.account_id.in_(filters.account_ids))
+
+    return query
+
+
+def timeseries_query(start_date: date, days: int):
+    """(day, views, installs, trial_started) per posting day"""
+    start = datetime.combine(start_date, datetime.min.time())
+    day = posted_day().label("day")
+    return (
+        select(day, func.sum(Video.views), func.sum(Video.installs), func.sum(Video.trial_started))
+        .filter(Video.posted_at >= start, Video.posted_at < start + timedelta(days=days))
+        .group_by(day)
+    )
+
+
+def averages_query(filters: AnalyticsFilter, starts: Dict[str, datetime]):
+    """Count and summed views / likes / comments since each start time, in one row"""
+    columns = []
+    for start in starts.values():
+        since = Video.posted_at >= start
+        columns += [
+            func.sum(case((since, 1), else_=0)),
+            *(func.sum(case((since, getattr(Video, name)), else_=0)) for name in ("views", "likes", "comments")),
+        ]
+    return apply_filter(select(*columns).filter(Video.posted_at >= min(starts.values())), filters)
+
+
+async def sql_timeseries(db, start_date: date, days: int) -> List[dict]:
+    """VideoColumnStore.timeseries with one GROUP BY day"""
+    rows = (await db.execute(timeseries_query(start_date, days))).all()
+    totals = {parse_day(row[0]): row[1:] for row in rows}
+
+    timeseries = []
+    for i in range(days):
+        views, installs, trial_started = totals.get(start_date + timedelta(days=i), (0, 0, 0))
+        timeseries.append({
+            "date": (start_date + timedelta(days=i)).strftime('%Y-%m-%d'),
+            "views": int(views or 0),
+            "installs": int(installs or 0),
+            "trial_started": int(trial_started or 0),
+        })
+    return timeseries
+
+
+async def sql_averages(db, filters: AnalyticsFilter, starts: Dict[str, datetime]) -> Dict[str, Dict[str, int]]:
+    """VideoColumnStore.averages for several start times ({name: start}) in one statement"""
+    row = (await db.execute(averages_query(filters, starts))).one()
+
+    return {
+        name: _averages(*(int(value or 0) for value in row[i * 4:i * 4 + 4]))
+        for i, name in enumerate(starts)
+    }
+
+
+def matching(query, filters: AnalyticsFilter, start: datetime, end: datetime):
+    """query restricted to the videos _mask(filters, start, end) selects"""
+    return apply_filter(query.filter(Video.posted_at >= start, Video.posted_at <= end), filters)
+
+
+def median_views_query(filters: AnalyticsFilter, start: datetime, end: datetime, count: int):
+    """Upper median (sorted[n // 2]) of the views of the `count` matching videos"""
+    views = func.coalesce(Video.views, 0)
+    return matching(select(views), filters, start, end).order_by(views).offset(count // 2).limit(1)
+
+
+def virality_query(filters: AnalyticsFilter, start: datetime, end: datetime, median_views: int):
+    """Matching videos per VIRALITY_BUCKETS index"""
+    views = func.coalesce(Video.views, 0)
+    bucket = case(
+        *((views < int(edge) * median_views, i) for i, edge in enumerate(VIRALITY_EDGES)), else_=len(VIRALITY_EDGES)
+    ).label("bucket")
+    return matching(select(bucket, func.count()), filters, start, end).group_by(bucket)
+
+
+def duration_query(filters: AnalyticsFilter, start: datetime, end: datetime):
+    """Matching videos and their total views per DURATION_BUCKETS index"""
+    bucket = case(
+        *((Video.duration < int(edge), i) for i, edge in enumerate(DURATION_EDGES)), else_=len(DURATION_EDGES)
+    ).label("bucket")
+    return matching(
+        select(bucket, func.count(), func.sum(func.coalesce(Video.views, 0))), filters, start, end
+    ).filter(Video.duration.isnot(None)).group_by(bucket)
+
+
+def top_by_views_query(filters: AnalyticsFilter, start: datetime, end: datetime):
+    """Matching video ids by views desc - page it with offset/limit"""
+    return matching(select(Video.id), filters, start, end).order_by(Video.views.desc())
+
+
+async def sql_virality(db, filters: AnalyticsFilter, start: datetime, end: datetime) -> Dict[str, int]:
+    """VideoColumnStore.virality: count, median, then one GROUP BY bucket"""
+    categories = dict.fromkeys(VIRALITY_BUCKETS, 0)
+    count = (await db.execute(matching(select(func.count()), filters, start, end))).scalar()
+    if not count:
+        return categories
+
+    median_views = (await db.execute(median_views_query(filters, start, end, count))).scalar()
+    if not median_views:
+        return categories
+
+    for bucket, videos in (await db.execute(virality_query(filters, start, end, median_views))).all():
+        categories[VIRALITY_BUCKETS[bucket]] = videos
+    return categories
+
+
+async def sql_duration_analysis(db, filters: AnalyticsFilter, start: datetime, end: datetime) -> List[dict]:
+    """VideoColumnStore.duration_analysis with one GROUP BY bucket"""
+    rows = (await db.execute(duration_query(filters, start, end))).all()
+    return [
+        {"range": DURATION_BUCKETS[bucket], "average_views": int(total / count), "video_count": count}
+        for bucket, count, total in sorted(rows)
+    ]
+
+
+async def sql_top_by_views(db, filters: AnalyticsFilter, start: datetime, end: datetime,
+                           offset: int, limit: int) -> tuple:
+    """VideoColumnStore.top_by_views: the page of ids, and the average over every matching video"""
+    average = (await db.execute(
+        matching(select(func.avg(func.coalesce(Video.views, 0))), filters, start, end)
+    )).scalar()
+    video_ids = (await db.execute(top_by_views_query(filters, start, end).offset(offset).limit(limit))).scalars().all()
+    return list(video_ids), float(average or 0)
+
+
+# ============ SESSION HOOKS ============
+
+def _after_flush(session, flush_context):
+    upserts = session.info.setdefault("analytics_upserts", {})
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, Video):
+            upserts[obj.id] = obj
+    deleted = session.info.setdefault("analytics_deleted", set())
+    for obj in session.deleted:
+        if isinstance(obj, Video):
+            deleted.add(obj.id)
+            upserts.pop(obj.id, None)
+
+
+def _after_flush_postexec(session, flush_context):
+    # Values are final (defaults applied) and not yet expired by the commit
+    upserts = session.info.get("analytics_upserts")
+    if upserts:
+        session.info["analytics_rows"] = {
+            **session.info.get("analytics_rows", {}),
+            **{video_id: _row_from_video(video) for video_id, video in upserts.items()},
+        }
+        upserts.clear()
+
+
+def _do_orm_execute(orm_execute_state):
+    if (orm_execute_state.is_update or orm_execute_state.is_delete) and any(
+        mapper.class_ is Video for mapper in orm_execute_state.all_mappers
+    ):
+        orm_execute_state.session.info["analytics_invalidate"] = True
+
+
+def _after_commit(session):
+    rows = session.info.pop("analytics_rows", {})
+    deleted = session.info.pop("analytics_deleted", set())
+    session.info.pop("analytics_upserts", None)
+    if session.info.pop("analytics_invalidate", False):
+        store.invalidate()
+    if rows or deleted:
+        store.apply_changes(list(rows.values()), list(deleted))
+
+
+def _after_rollback(session):
+    for key in ("analytics_rows", "analytics_deleted", "analytics_upserts", "analytics_invalidate"):
+        session.info.pop(key, None)
+
+
+def register_session_hooks(session_factory=SessionLocal):
+    """Keep the store in sync with commits made through this sessionmaker"""
+    if event.contains(session_factory, "after_commit", _after_commit):
+        return
+    event.listen(session_factory, "after_flush", _after_flush)
+    event.listen(session_factory, "after_flush_postexec", _after_flush_postexec)
+    event.listen(session_factory, "do_orm_execute", _do_orm_execute)
+    event.listen(session_factory, "after_commit", _after_commit)
+    event.listen(session_factory, "after_rollback", _after_rollback)
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Deterministic synthetic dataset for the benchmark suite.
+
+Generates Collection, Account, AccountCollection, Video, VideoCollection and VideoHistory
+rows shaped like real tracker data (skewed view counts, mostly-recent posts, a share of
+Spark Ads, daily snapshots for recent videos). The same seed and size always produce the
+same rows; dates are laid out relative to the day the data is generated so the
+analytics date windows (last 7/30 days) always have data.
+
+Point DATABASE_URL at a dedicated database - existing non-benchmark videos abort the run.
+
+Usage:
+    DATABASE_URL=sqlite:////tmp/bench_10k.db python benchmarks/generate_data.py --size 10k
+    DATABASE_URL=postgresql://localhost/bench python benchmarks/generate_data.py --size 100k
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert, delete, func, select, inspect
+
+from database import (
+    engine, init_db, Video, VideoHistory, Account, Collection, VideoCollection, AccountCollection, Hashtag, VideoHashtag,
+    MusicUsage, MusicUsageDaily
+)
+from video_history_storage import ensure_video_history_partitions
+from hashtag_index import rebuild as rebuild_hashtag_index
+from music_rollup import rebuild as rebuild_music_rollup
+
+SIZES = {
+    "10k": 10_000,
+    "100k": 100_000,
+    "1m": 1_000_000,
+}
+
+DEFAULT_SEED = 42
+VIDEO_ID_PREFIX = "bench_"
+VIDEOS_PER_ACCOUNT = 200
+HISTORY_DAYS = 14  # Daily snapshots kept for videos posted in the last HISTORY_WINDOW_DAYS
+HISTORY_WINDOW_DAYS = 60
+CHUNK_SIZE = 10_000
+
+PLATFORMS = [("tiktok", 0.6), ("instagram", 0.3), ("youtube", 0.1)]
+HASHTAGS = ["studytok", "fyp", "exam", "studytips", "college", "productivity", "notes", "learnontiktok",
+            "university", "motivation", "highschool", "studywithme", "apstudent", "mcat", "lsat"]
+COLLECTION_NAMES = ["Benchmark Creators A", "Benchmark Creators B", "Benchmark Creators C", "Benchmark Creators D"]
+
+
+def _chunks(rows, size=CHUNK_SIZE):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def _insert(conn, table, rows):
+    for chunk in _chunks(rows):
+        conn.execute(insert(table), chunk)
+
+
+def count_benchmark_videos(conn) -> int:
+    return conn.execute(
+        select(func.count()).select_from(Video).filter(Video.id.like(f"{VIDEO_ID_PREFIX}%"))
+    ).scalar()
+
+
+def dataset_exists(n_videos: int) -> bool:
+    """True if the database already holds a generated dataset of this size"""
+    if not inspect(engine).has_table(Video.__tablename__):
+        return False
+    with engine.connect() as conn:
+        return count_benchmark_videos(conn) == n_videos
+
+
+def clear_dataset(conn):
+    """Remove every table the generator writes to (only called on benchmark-only databases)"""
+    for model in (VideoHistory, VideoCollection, AccountCollection, VideoHashtag, Hashtag,
+                  MusicUsageDaily, MusicUsage, Video, Account, Collection):
+        conn.execute(delete(model))
+
+
+def build_rows(n_videos: int, seed: int = DEFAULT_SEED, anchor: datetime = None) -> dict:
+    """Build all rows in memory (ids are assigned explicitly so the links are deterministic)"""
+    rng = random.Random(seed)
+    anchor = anchor or datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+
+    collections = [{"id": 1, "name": "Default", "description": "All tracked videos", "is_default": True,
+                    "created_at": anchor, "updated_at": anchor}]
+    collections += [{"id": i + 2, "name": name, "description": "Synthetic benchmark collection", "is_default": False,
+                     "created_at": anchor, "updated_at": anchor}
+                    for i, name in enumerate(COLLECTION_NAMES)]
+
+    n_accounts = max(10, n_videos // VIDEOS_PER_ACCOUNT)
+    platform_names = [p for p, _ in PLATFORMS]
+    platform_weights = [w for _, w in PLATFORMS]
+
+    accounts = []
+    account_collections = []
+    secondary_collection = {}  # account id -> its non-default collection
+    for account_id in range(1, n_accounts + 1):
+        platform = rng.choices(platform_names, platform_weights)[0]
+        accounts.append({
+            "id": account_id,
+            "username": f"bench_{platform}_{account_id}",
+            "platform": platform,
+            "nickname": f"Benchmark Creator {account_id}",
+            "profile_url": None,
+            "total_videos": 0,
+            "total_views": 0,
+            "total_likes": 0,
+            "total_followers": int(rng.lognormvariate(9, 1.5)),
+            "is_active": True,
+            "created_at": anchor,
+            "last_scraped": anchor,
+        })
+        account_collections.append({"account_id": account_id, "collection_id": 1, "added_at": anchor})
+        secondary_collection[account_id] = rng.randint(2, len(collections))
+        account_collections.append({"account_id": account_id, "collection_id": secondary_collection[account_id],
+                                    "added_at": anchor})
+
+    videos = []
+    video_collections = []
+    history = []
+    for i in range(n_videos):
+        account = accounts[rng.randrange(n_accounts)]
+        video_id = f"{VIDEO_ID_PREFIX}{i}"
+
+        # Heavy-tailed views, engagement proportional to views
+        views = int(rng.lognormvariate(8.5, 2.0))
+        likes = int(views * rng.uniform(0.02, 0.12))
+        comments = int(likes * rng.uniform(0.005, 0.05))
+        shares = int(likes * rng.uniform(0.01, 0.08))
+        bookmarks = int(likes * rng.uniform(0.01, 0.1))
+
+        # Most posts are recent: age in days is exponential, capped at two years
+        age_days = min(rng.expovariate(1 / 45), 730)
+        posted_at = anchor - timedelta(days=age_days, seconds=rng.randrange(86400))
+        tags = rng.sample(HASHTAGS, rng.randint(1, 4))
+
+        videos.append({
+            "id": video_id,
+            "platform": account["platform"],
+            "url": f"https://example.com/{account['username']}/{i}",
+            "caption": f"{' '.join('#' + t for t in tags)} benchmark video {i}",
+            "author_username": account["username"],
+            "author_nickname": account["nickname"],
+            "account_id": account["id"],
+            "views": views,
+            "likes": likes,
+            "comments": comments,
+            "shares": shares,
+            "bookmarks": bookmarks,
+            "is_spark_ad": rng.random() < 0.08,
+            "installs": int(views * rng.uniform(0, 0.002)),
+            "trial_started": int(views * rng.uniform(0, 0.0005)),
+            "music_id": f"bench_music_{rng.randint(1, max(50, n_videos // 500))}",
+            "music_title": "Benchmark Sound",
+            "hashtags": tags,
+            "mentions": [],
+            "duration": rng.randint(5, 180),
+            "created_at": posted_at,
+            "posted_at": posted_at,
+            "scraped_at": anchor - timedelta(minutes=rng.randrange(1440)),
+        })
+        video_collections.append({"video_id": video_id, "collection_id": 1, "added_at": anchor})
+        video_collections.append({"video_id": video_id, "collection_id": secondary_collection[account["id"]],
+                                  "added_at": anchor})
+
+        account["total_videos"] += 1
+        account["total_views"] += views
+        account["total_likes"] += likes
+
+        # Daily snapshots for recent videos, growing towards today's totals
+        if age_days < HISTORY_WINDOW_DAYS:
+            days = min(int(age_days) + 1, HISTORY_DAYS)
+            for day in range(days - 1, -1, -1):
+                share = (days - day) / days
+                day_views, day_likes, day_comments = int(views * share), int(likes * share), int(comments * share)
+                history.append({
+                    "video_id": video_id,
+                    "platform": account["platform"],
+                    "views": day_views,
+                    "likes": day_likes,
+                    "comments": day_comments,
+                    "shares": int(shares * share),
+                    "saves": int(bookmarks * share),
+                    "snapshot_date": anchor - timedelta(days=day),
+                    "created_at": anchor,
+                })
+
+    # Denormalized counters shown on the collections page
+    for collection in collections:
+        collection["account_count"] = sum(1 for link in account_collections if link["collection_id"] == collection["id"])
+        collection["video_count"] = sum(1 for link in video_collections if link["collection_id"] == collection["id"])
+
+    return {
+        "collections": collections,
+        "accounts": accounts,
+        "account_collections": account_collections,
+        "videos": videos,
+        "video_collections": video_collections,
+        "history": history,
+    }
+
+
+def generate_dataset(n_videos: int, seed: int = DEFAULT_SEED) -> dict:
+    """Create the schema and load a fresh synthetic dataset. Returns row counts."""
+    init_db()
+    started = time.perf_counter()
+    rows = build_rows(n_videos, seed)
+
+    # Historical snapshots reach back into earlier months - make sure partitions exist (PostgreSQL)
+    ensure_video_history_partitions(engine, since=datetime.utcnow() - timedelta(days=HISTORY_DAYS))
+
+    with engine.begin() as conn:
+        total_videos = conn.execute(select(func.count()).select_from(Video)).scalar()
+        if total_videos != count_benchmark_videos(conn):
+            raise RuntimeError("Database contains non-benchmark videos - point DATABASE_URL at a dedicated database")
+
+        clear_dataset(conn)
+        _insert(conn, Collection, rows["collections"])
+        _insert(conn, Account, rows["accounts"])
+        _insert(conn, AccountCollection, rows["account_collections"])
+        _insert(conn, Video, rows["videos"])
+        _insert(conn, VideoCollection, rows["video_collections"])
+        _insert(conn, VideoHistory, rows["history"])
+
+        # Core inserts bypass the session hooks that maintain the hashtag index and music rollup
+        rebuild_hashtag_index(conn)
+        rebuild_music_rollup(conn)
+
+    # Explicit ids were inserted - move the PostgreSQL sequences past them
+    if engine.dialect.name == "postgresql":
+        with engine.begin() as conn:
+            for table in ("collections", "accounts", "account_collections", "video_collections", "video_history"):
+                conn.exec_driver_sql(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE((SELECT MAX(id) FROM {table}), 0) + 1, false)"
+                )
+            conn.exec_driver_sql("ANALYZE")
+
+    counts = {name: len(table_rows) for name, table_rows in rows.items()}
+    counts["seconds"] = round(time.perf_counter() - started, 1)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic benchmark dataset")
+    parser.add_argument("--size", choices=SIZES.keys(), default="10k")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    args = parser.parse_args()
+
+    n_videos = SIZES[args.size]
+    print(f"🔄 Generating {n_videos:,} videos ({engine.dialect.name}, seed {args.seed})...")
+    counts = generate_dataset(n_videos, args.seed)
+    print(f"✅ Generated in {counts.pop('seconds')}s: " + ", ".join(f"{k}={v:,}" for k, v in counts.items()))
+
+
+if __name__ == "__main__":
+    main()
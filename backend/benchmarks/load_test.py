@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Scrape-throughput load test against the local RapidAPI stand-in (mock_rapidapi.py).
+
+Starts the mock in-process (or uses --mock-url), points the RapidAPI scrapers at it and
+measures end-to-end ingestion for:
+- scrape-urls:    POST /api/scrape/urls with N profiles (through the ASGI app), polled to completion
+- daily-refresh:  daily_scrape_all_accounts() over the accounts created above
+
+Reports accounts/minute, video + snapshot rows written per second and the mock's 429 count.
+Runs on a throwaway SQLite file by default; --database-url with --reset wipes and uses that database.
+
+Usage (from backend/):
+    python benchmarks/load_test.py --accounts 50 --latency-ms 300 --rate-limit 0.02
+    python benchmarks/load_test.py --scenario daily-refresh --accounts 20 --pages 2
+    python benchmarks/load_test.py --database-url postgresql://localhost/loadtest --reset --output results.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BENCHMARKS_DIR, "data")
+
+
+def configure_environment(args):
+    """Environment for database.py and the scrapers - must run before they are imported"""
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        os.makedirs(DATA_DIR, exist_ok=True)
+        path = os.path.join(DATA_DIR, "load_test.db")
+        if os.path.exists(path):
+            os.remove(path)
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+
+    mock_url = args.mock_url or f"http://127.0.0.1:{args.port}"
+    os.environ["RAPIDAPI_KEY"] = "mock"
+    os.environ.pop("RAPIDAPI_KEY_TIKTOK", None)
+    os.environ.pop("RAPIDAPI_KEY_INSTAGRAM", None)
+    os.environ["RAPIDAPI_TIKTOK_BASE_URL"] = mock_url
+    os.environ["RAPIDAPI_INSTAGRAM_BASE_URL"] = f"{mock_url}/api/v1/instagram"
+    # Every run should really scrape - don't reuse recent results
+    os.environ["URL_SCRAPE_DEDUPE_MINUTES"] = "0"
+
+    sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+    sys.path.insert(0, BENCHMARKS_DIR)
+
+
+def start_mock_server(args):
+    """Run mock_rapidapi in a background thread and wait until it accepts requests"""
+    import uvicorn
+    import mock_rapidapi
+
+    mock_rapidapi.configure(args.latency_ms, args.jitter_ms, args.rate_limit, args.pages, args.instagram_posts)
+    server = uvicorn.Server(uvicorn.Config(mock_rapidapi.app, host="127.0.0.1", port=args.port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+
+    deadline = time.time() + 10
+    while not server.started:
+        if time.time() > deadline:
+            raise RuntimeError("Mock RapidAPI server did not start")
+        time.sleep(0.05)
+    return server
+
+
+def mock_counters(args) -> dict:
+    import httpx
+
+    mock_url = args.mock_url or f"http://127.0.0.1:{args.port}"
+    return httpx.get(f"{mock_url}/__stats").json()["counters"]
+
+
+def reset_database():
+    """Clear the tables this test writes to (only with --reset on a dedicated database)"""
+    from sqlalchemy import delete
+    from database import engine, ScrapingJobItem, ScrapingJob
+    from generate_data import clear_dataset
+
+    with engine.begin() as conn:
+        conn.execute(delete(ScrapingJobItem))
+        conn.execute(delete(ScrapingJob))
+        clear_dataset(conn)
+
+
+def count_rows(since: datetime) -> dict:
+    from sqlalchemy import select, func
+    from database import SessionLocal, Video, VideoHistory
+
+    db = SessionLocal()
+    try:
+        return {
+            "videos_total": db.execute(select(func.count()).select_from(Video)).scalar(),
+            "videos_written": db.execute(
+                select(func.count()).select_from(Video).filter(Video.scraped_at >= since)
+            ).scalar(),
+            "snapshots_total": db.execute(select(func.count()).select_from(VideoHistory)).scalar(),
+        }
+    finally:
+        db.close()
+
+
+def summarize(name: str, n_accounts: int, elapsed: float, rows: dict, counters_before: dict, counters_after: dict) -> dict:
+    requests_made = sum(v for k, v in counters_after.items() if k.startswith("requests:")) - \
+        sum(v for k, v in counters_before.items() if k.startswith("requests:"))
+    rate_limited = sum(v for k, v in counters_after.items() if k.startswith("429:")) - \
+        sum(v for k, v in counters_before.items() if k.startswith("429:"))
+
+    # Each written video also gets exactly one snapshot row for today
+    rows_written = rows["videos_written"] * 2
+    result = {
+        "scenario": name,
+        "accounts": n_accounts,
+        "seconds": round(elapsed, 2),
+        "accounts_per_minute": round(n_accounts / elapsed * 60, 1),
+        "videos_written": rows["videos_written"],
+        "rows_per_second": round(rows_written / elapsed, 1),
+        "api_requests": requests_made,
+        "rate_limited": rate_limited,
+        "videos_total": rows["videos_total"],
+        "snapshots_total": rows["snapshots_total"],
+    }
+
+    print(f"\n📈 {name}: {n_accounts} accounts in {result['seconds']}s")
+    print(f"   {result['accounts_per_minute']} accounts/min, {result['rows_per_second']} rows/s "
+          f"({result['videos_written']} videos), {requests_made} API calls, {rate_limited} x 429")
+    return result
+
+
+async def run_scrape_urls(args, app) -> dict:
+    """Submit all profiles in one /api/scrape/urls request and poll the job until it finishes"""
+    import httpx
+
+    n_instagram = int(args.accounts * args.instagram_share)
+    urls = [f"tiktok:load_tt_{i}" for i in range(args.accounts - n_instagram)]
+    urls += [f"instagram:load_ig_{i}" for i in range(n_instagram)]
+
+    counters_before = mock_counters(args)
+    started_at = datetime.utcnow()
+    started = time.perf_counter()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=None) as client:
+        response = await client.post("/api/scrape/urls", json={"urls": urls})
+        response.raise_for_status()
+        job_id = response.json()["job_id"]
+
+        while True:
+            job = (await client.get(f"/api/scrape/jobs/{job_id}")).json()
+            if job["status"] in ("completed", "failed"):
+                break
+            await asyncio.sleep(0.2)
+
+    elapsed = time.perf_counter() - started
+    result = summarize("scrape-urls", len(urls), elapsed, count_rows(started_at), counters_before, mock_counters(args))
+    result["failed_urls"] = sum(1 for item in job["urls"] if item["status"] == "failed")
+    return result
+
+
+def ensure_accounts(args):
+    """Create the load-test accounts directly when daily-refresh runs on its own"""
+    from database import SessionLocal, Account
+
+    db = SessionLocal()
+    try:
+        if db.query(Account).filter(Account.is_active == True).count():
+            return
+        n_instagram = int(args.accounts * args.instagram_share)
+        db.add_all([Account(username=f"load_tt_{i}", platform="tiktok", is_active=True)
+                    for i in range(args.accounts - n_instagram)])
+        db.add_all([Account(username=f"load_ig_{i}", platform="instagram", is_active=True)
+                    for i in range(n_instagram)])
+        db.commit()
+    finally:
+        db.close()
+
+
+async def run_daily_refresh(args) -> dict:
+    """Run the scheduled daily refresh job once over every active account"""
+    import main as app_module
+    from database import SessionLocal, Account
+
+    ensure_accounts(args)
+    db = SessionLocal()
+    n_accounts = db.query(Account).filter(Account.is_active == True).count()
+    db.close()
+
+    counters_before = mock_counters(args)
+    started_at = datetime.utcnow()
+    started = time.perf_counter()
+    # The job is synchronous and drives its own event loop, as it does in the scheduler thread
+    await asyncio.to_thread(app_module.daily_scrape_all_accounts)
+    elapsed = time.perf_counter() - started
+
+    return summarize("daily-refresh", n_accounts, elapsed, count_rows(started_at), counters_before, mock_counters(args))
+
+
+async def run(args):
+    from database import init_db
+    import main as app_module
+
+    # Tables first - a fresh database has nothing to reset yet
+    init_db()
+    if args.reset:
+        reset_database()
+
+    results = []
+    if args.scenario in ("scrape-urls", "all"):
+        results.append(await run_scrape_urls(args, app_module.app))
+    if args.scenario in ("daily-refresh", "all"):
+        results.append(await run_daily_refresh(args))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test scrape ingestion against a mock RapidAPI")
+    parser.add_argument("--scenario", choices=["scrape-urls", "daily-refresh", "all"], default="all")
+    parser.add_argument("--accounts", type=int, default=30)
+    parser.add_argument("--instagram-share", type=float, default=0.3)
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--jitter-ms", type=float, default=100.0)
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="Share of mock responses that are 429")
+    parser.add_argument("--pages", type=int, default=3, help="TikTok pages per profile")
+    parser.add_argument("--instagram-posts", type=int, default=24)
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--mock-url", help="Use an already running mock_rapidapi.py instead of starting one")
+    parser.add_argument("--database-url", help="Dedicated database (default: throwaway SQLite in benchmarks/data/)")
+    parser.add_argument("--reset", action="store_true", help="Wipe the tables in --database-url before running")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    if args.database_url and not args.reset:
+        parser.error("--database-url needs --reset (the load test wipes videos, accounts and collections)")
+
+    configure_environment(args)
+    if not args.mock_url:
+        start_mock_server(args)
+
+    print(f"🚀 Load test: {args.accounts} accounts, {args.latency_ms}ms latency, "
+          f"{args.rate_limit:.0%} 429s, {args.pages} TikTok pages/profile")
+    results = asyncio.run(run(args))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+        print(f"\n💾 Saved results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the RapidAPI hosts the scrapers call, for load tests without burning quota.
+
+Emulates:
+- tiktok-scraper7:   GET /user/posts (unique_id, count, cursor paging), GET /video/info (url)
+- instagram-social:  GET /api/v1/instagram/profile, /posts (username, pagination_token paging), /post (code)
+
+Responses have the same shape the real APIs return (only the fields the scrapers read) and are
+deterministic per username, so repeated refreshes see the same videos with growing stats.
+Latency, 429 rate and page counts are configurable; GET /__stats returns request counters.
+
+Point the scrapers at it with:
+    RAPIDAPI_KEY=mock
+    RAPIDAPI_TIKTOK_BASE_URL=http://127.0.0.1:8900
+    RAPIDAPI_INSTAGRAM_BASE_URL=http://127.0.0.1:8900/api/v1/instagram
+
+Usage:
+    python benchmarks/mock_rapidapi.py --port 8900 --latency-ms 300 --rate-limit 0.05 --pages 3
+"""
+
+import argparse
+import asyncio
+import hashlib
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass
+
+from fastapi import FastAPI, Query
+from fastapi.responses import JSONResponse
+
+
+@dataclass
+class MockConfig:
+    latency_ms: float = 200.0  # Mean added latency per request
+    jitter_ms: float = 100.0  # +/- uniform jitter around the mean
+    rate_limit: float = 0.0  # Probability of answering 429 Too Many Requests
+    pages: int = 3  # TikTok /user/posts pages per user (at the requested count per page)
+    instagram_posts: int = 24  # Posts per user across all Instagram /posts pages
+    instagram_page_size: int = 12  # Posts per Instagram /posts page
+    seed: int = 42
+
+
+config = MockConfig()
+stats = Counter()
+app = FastAPI(title="Mock RapidAPI")
+
+HASHTAGS = ["studytok", "fyp", "exam", "studytips", "college", "notes", "motivation", "studywithme"]
+
+
+def _rng(*parts) -> random.Random:
+    """Deterministic RNG per (seed, parts) so the same user always gets the same videos"""
+    digest = hashlib.sha256("|".join(str(p) for p in (config.seed, *parts)).encode()).hexdigest()
+    return random.Random(int(digest[:16], 16))
+
+
+def _stable_id(*parts, digits: int = 12) -> int:
+    """Stable numeric id (built-in hash() is randomized per process)"""
+    return int(hashlib.sha256("|".join(str(p) for p in parts).encode()).hexdigest()[:15], 16) % 10**digits
+
+
+def _growth_factor() -> float:
+    """Stats grow slowly with wall-clock time so refreshes produce non-zero growth"""
+    return 1 + (time.time() % 86400) / 86400
+
+
+async def _simulate_network(endpoint: str):
+    """Add latency and maybe rate limit. Returns a 429 response or None."""
+    stats[f"requests:{endpoint}"] += 1
+    delay = max(0.0, config.latency_ms + random.uniform(-config.jitter_ms, config.jitter_ms)) / 1000
+    await asyncio.sleep(delay)
+
+    if config.rate_limit and random.random() < config.rate_limit:
+        stats[f"429:{endpoint}"] += 1
+        return JSONResponse(status_code=429, content={"message": "Too many requests"})
+    return None
+
+
+def _tiktok_item(username: str, index: int) -> dict:
+    rng = _rng("tiktok", username, index)
+    video_id = str(7_000_000_000_000_000_000 + _stable_id(username, index, digits=15))
+    views = int(rng.lognormvariate(9, 1.8) * _growth_factor())
+    likes = int(views * rng.uniform(0.03, 0.12))
+    tags = rng.sample(HASHTAGS, rng.randint(1, 3))
+    return {
+        "video_id": video_id,
+        "aweme_id": video_id,
+        "title": f"{' '.join('#' + t for t in tags)} mock video {index}",
+        "cover": f"https://mock.local/cover/{video_id}.jpg",
+        "play_count": views,
+        "digg_count": likes,
+        "comment_count": int(likes * rng.uniform(0.01, 0.05)),
+        "share_count": int(likes * rng.uniform(0.01, 0.08)),
+        "collect_count": int(likes * rng.uniform(0.01, 0.1)),
+        "create_time": int(time.time()) - index * 86400 - rng.randrange(86400),
+        "duration": rng.randint(5, 120),
+        "music": f"Mock Sound {index % 7}",
+        "music_info": {"id": f"mock_music_{index % 7}", "title": f"Mock Sound {index % 7}", "author": "Mock Artist"},
+        "author": {
+            "unique_id": username,
+            "nickname": username.title(),
+            "uid": str(_stable_id(username)),
+            "avatar_thumb": {"url_list": [f"https://mock.local/avatar/{username}.jpg"]},
+        },
+    }
+
+
+def _instagram_item(username: str, index: int) -> dict:
+    rng = _rng("instagram", username, index)
+    shortcode = hashlib.sha256(f"{username}|{index}".encode()).hexdigest()[:11]
+    is_reel = rng.random() < 0.7
+    likes = int(rng.lognormvariate(7, 1.5) * _growth_factor())
+    return {
+        "id": str(3_000_000_000_000_000_000 + _stable_id(shortcode, digits=15)),
+        "shortcode": shortcode,
+        "media_type": 2 if is_reel else 1,
+        "product_type": "clips" if is_reel else "feed",
+        "like_count": likes,
+        "comment_count": int(likes * rng.uniform(0.01, 0.05)),
+        "play_count": int(likes * rng.uniform(10, 40)) if is_reel else 0,
+        "reshare_count": int(likes * rng.uniform(0, 0.05)),
+        "thumbnail_url": f"https://mock.local/ig/{shortcode}.jpg",
+        "caption": f"#{rng.choice(HASHTAGS)} mock post {index}",
+        "taken_at": int(time.time()) - index * 86400,
+        "permalink": f"https://www.instagram.com/p/{shortcode}/",
+        "user": {"username": username, "full_name": username.title(), "id": _stable_id(username, digits=10),
+                 "profile_pic": f"https://mock.local/avatar/{username}.jpg"},
+    }
+
+
+@app.get("/user/posts")
+async def tiktok_user_posts(unique_id: str, count: int = Query(10, le=35), cursor: int = 0):
+    limited = await _simulate_network("tiktok:/user/posts")
+    if limited:
+        return limited
+
+    total = config.pages * count
+    end = min(cursor + count, total)
+    return {
+        "code": 0,
+        "msg": "success",
+        "data": {
+            "videos": [_tiktok_item(unique_id, i) for i in range(cursor, end)],
+            "cursor": str(end),
+            "hasMore": end < total,
+        },
+    }
+
+
+@app.get("/video/info")
+async def tiktok_video_info(url: str):
+    limited = await _simulate_network("tiktok:/video/info")
+    if limited:
+        return limited
+
+    # https://www.tiktok.com/@username/video/<id> - map the id back onto a stable index
+    username = url.split("@")[1].split("/")[0] if "@" in url else "mock_user"
+    index = int(url.rstrip("/").split("/")[-1]) % 1000 if url.rstrip("/").split("/")[-1].isdigit() else 0
+    return {"code": 0, "msg": "success", "data": _tiktok_item(username, index)}
+
+
+@app.get("/api/v1/instagram/profile")
+async def instagram_profile(username: str):
+    limited = await _simulate_network("instagram:/profile")
+    if limited:
+        return limited
+
+    rng = _rng("instagram-profile", username)
+    return {
+        "success": True,
+        "body": {
+            "username": username,
+            "full_name": username.title(),
+            "profile_pic": f"https://mock.local/avatar/{username}.jpg",
+            "biography": "Mock profile",
+            "followers": int(rng.lognormvariate(9, 1.5)),
+            "following": rng.randint(10, 1000),
+            "posts": config.instagram_posts,
+            "is_verified": False,
+            "is_private": False,
+        },
+    }
+
+
+@app.get("/api/v1/instagram/posts")
+async def instagram_posts(username: str, pagination_token: int = 0):
+    limited = await _simulate_network("instagram:/posts")
+    if limited:
+        return limited
+
+    end = min(pagination_token + config.instagram_page_size, config.instagram_posts)
+    return {
+        "success": True,
+        "body": [_instagram_item(username, i) for i in range(pagination_token, end)],
+        "pagination_token": str(end) if end < config.instagram_posts else None,
+        "more_available": end < config.instagram_posts,
+    }
+
+
+@app.get("/api/v1/instagram/post")
+async def instagram_post(code: str):
+    limited = await _simulate_network("instagram:/post")
+    if limited:
+        return limited
+
+    item = _instagram_item("mock_user", int(hashlib.sha256(code.encode()).hexdigest()[:4], 16) % 1000)
+    item["shortcode"] = code
+    item["owner"] = item["user"]
+    return {"data": item}
+
+
+@app.get("/__stats")
+async def get_stats():
+    return {"config": config.__dict__, "counters": dict(stats)}
+
+
+@app.post("/__reset")
+async def reset_stats():
+    stats.clear()
+    return {"status": "ok"}
+
+
+def configure(latency_ms=None, jitter_ms=None, rate_limit=None, pages=None, instagram_posts=None, seed=None):
+    """Update the mock settings (used by the load test when running the server in-process)"""
+    settings = dict(latency_ms=latency_ms, jitter_ms=jitter_ms, rate_limit=rate_limit, pages=pages,
+                    instagram_posts=instagram_posts, seed=seed)
+    for name, value in settings.items():
+        if value is not None:
+            setattr(config, name, value)
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Local RapidAPI stand-in for load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=float, default=config.latency_ms)
+    parser.add_argument("--jitter-ms", type=float, default=config.jitter_ms)
+    parser.add_argument("--rate-limit", type=float, default=config.rate_limit, help="Share of requests answered with 429")
+    parser.add_argument("--pages", type=int, default=config.pages, help="TikTok /user/posts pages per user")
+    parser.add_argument("--instagram-posts", type=int, default=config.instagram_posts)
+    parser.add_argument("--seed", type=int, default=config.seed)
+    args = parser.parse_args()
+
+    configure(args.latency_ms, args.jitter_ms, args.rate_limit, args.pages, args.instagram_posts, args.seed)
+    print(f"🧪 Mock RapidAPI on http://{args.host}:{args.port} - {config}")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
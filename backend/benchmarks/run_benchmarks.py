@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the read API (/api/analytics/*, /api/videos, /api/collections, ...).
+
+Loads (or reuses) a synthetic dataset from generate_data.py, then times every endpoint
+in-process through the ASGI app with httpx - no server, no network, no scheduler.
+Results are compared against the JSON baseline for the same backend and size in
+benchmarks/baselines/; a median slower than the baseline by more than --threshold is
+reported as a regression (exit code 1).
+
+Usage (from backend/):
+    python benchmarks/run_benchmarks.py --size 10k                       # SQLite, benchmarks/data/bench_10k.db
+    python benchmarks/run_benchmarks.py --size 100k --database-url postgresql://localhost/bench
+    python benchmarks/run_benchmarks.py --size 10k --save-baseline       # record a new baseline
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform as platform_info
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINES_DIR = os.path.join(BENCHMARKS_DIR, "baselines")
+DATA_DIR = os.path.join(BENCHMARKS_DIR, "data")
+
+# Endpoint cases: (name, path, query params). {collection_id} / {account_id} are filled from the dataset.
+CASES = [
+    ("videos", "/api/videos", {"limit": 50}),
+    ("videos_deep_page", "/api/videos", {"limit": 50, "offset": 5000}),
+    ("videos_by_platform", "/api/videos", {"platform": "tiktok", "limit": 50}),
+    ("videos_search", "/api/videos", {"q": "mcat lsat", "limit": 50}),
+    ("videos_search_common_term", "/api/videos", {"q": "fyp", "platform": "youtube", "limit": 50}),
+    ("creators", "/api/creators", {}),
+    ("stats", "/api/stats", {}),
+    ("analytics_timeseries", "/api/analytics/timeseries", {"days": 30}),
+    ("analytics_overview", "/api/analytics/overview", {}),
+    ("analytics_overview_organic_collection", "/api/analytics/overview", {"metric_type": "organic", "collection_id": "{collection_id}"}),
+    ("analytics_views_over_time", "/api/analytics/views-over-time", {"days": 30}),
+    ("analytics_historical_growth", "/api/analytics/historical-growth", {"days": 30}),
+    ("analytics_historical_growth_collection", "/api/analytics/historical-growth", {"days": 30, "collection_id": "{collection_id}"}),
+    ("analytics_historical_growth_split", "/api/analytics/historical-growth-split", {"days": 30}),
+    ("analytics_most_viral", "/api/analytics/most-viral", {"days": 30}),
+    ("analytics_virality", "/api/analytics/virality-analysis", {"days": 30}),
+    ("analytics_duration", "/api/analytics/duration-analysis", {"days": 30}),
+    ("analytics_metrics_breakdown", "/api/analytics/metrics-breakdown", {}),
+    ("analytics_video_stats", "/api/analytics/video-stats", {"days": 30}),
+    ("analytics_video_stats_ads_tiktok", "/api/analytics/video-stats", {"days": 30, "metric_type": "ads", "platform": "tiktok"}),
+    ("analytics_hashtags", "/api/analytics/hashtags", {"limit": 20}),
+    ("analytics_hashtags_collection", "/api/analytics/hashtags", {"limit": 20, "collection_id": "{collection_id}"}),
+    ("analytics_hashtag_growth", "/api/analytics/hashtags/fyp/growth", {"days": 30}),
+    ("analytics_audio", "/api/analytics/audio", {"limit": 20}),
+    ("analytics_audio_growth", "/api/analytics/audio/bench_music_1/growth", {"days": 30}),
+    ("collections", "/api/collections", {}),
+    ("collection_videos", "/api/collections/{collection_id}/videos", {"limit": 50}),
+    ("collection_accounts", "/api/collections/{collection_id}/accounts", {}),
+    ("accounts", "/api/accounts", {}),
+    ("account_videos", "/api/accounts/{account_id}/videos", {"limit": 50}),
+]
+
+
+def configure_database(args):
+    """Point DATABASE_URL at the benchmark database before database.py is imported"""
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        os.makedirs(DATA_DIR, exist_ok=True)
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(DATA_DIR, f'bench_{args.size}.db')}"
+    sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=BENCHMARKS_DIR, text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+def fill_path(path: str, params: dict, ids: dict):
+    path = path.format(**ids)
+    params = {k: (v.format(**ids) if isinstance(v, str) else v) for k, v in params.items()}
+    return path, params
+
+
+async def time_case(client, path: str, params: dict, iterations: int, warmup: int) -> dict:
+    for _ in range(warmup):
+        await client.get(path, params=params)
+
+    timings = []
+    response = None
+    for _ in range(iterations):
+        started = time.perf_counter()
+        response = await client.get(path, params=params)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    timings.sort()
+    return {
+        "status": response.status_code,
+        "bytes": len(response.content),
+        "min_ms": round(timings[0], 2),
+        "median_ms": round(statistics.median(timings), 2),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 2),
+        "mean_ms": round(statistics.mean(timings), 2),
+    }
+
+
+async def run_cases(app, ids: dict, iterations: int, warmup: int, only=None) -> dict:
+    import httpx
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+        for name, path, params in CASES:
+            if only and name not in only:
+                continue
+            path, params = fill_path(path, params, ids)
+            results[name] = await time_case(client, path, params, iterations, warmup)
+            result = results[name]
+            print(f"  {name:<42} {result['median_ms']:>9.1f} ms  (p95 {result['p95_ms']:.1f}, status {result['status']})")
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float, min_delta_ms: float) -> list:
+    """Return (name, baseline_ms, current_ms) for cases that got slower than the threshold allows"""
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous:
+            continue
+        before, after = previous["median_ms"], result["median_ms"]
+        if after > before * (1 + threshold) and after - before > min_delta_ms:
+            regressions.append((name, before, after))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the analytics API on a synthetic dataset")
+    parser.add_argument("--size", choices=["10k", "100k", "1m"], default="10k")
+    parser.add_argument("--database-url", help="Dedicated benchmark database (default: SQLite file in benchmarks/data/)")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--regenerate", action="store_true", help="Reload the dataset even if it already exists")
+    parser.add_argument("--only", nargs="*", help="Run only these case names")
+    parser.add_argument("--save-baseline", action="store_true", help="Write the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown vs baseline (0.25 = 25%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=5.0, help="Ignore slowdowns smaller than this")
+    args = parser.parse_args()
+
+    configure_database(args)
+
+    from sqlalchemy import select
+    from database import engine, SessionLocal, Collection, Account
+    from generate_data import SIZES, dataset_exists, generate_dataset
+    import main as app_module
+
+    backend = engine.dialect.name
+    if args.database_url and backend == "sqlite" and not args.database_url.startswith("sqlite"):
+        print("❌ Could not connect to the benchmark database (database.py fell back to SQLite)")
+        sys.exit(1)
+
+    n_videos = SIZES[args.size]
+    if args.regenerate or not dataset_exists(n_videos):
+        print(f"🔄 Generating {n_videos:,} videos on {backend}...")
+        counts = generate_dataset(n_videos, args.seed)
+        print(f"✅ Dataset ready in {counts['seconds']}s ({counts['history']:,} snapshots)")
+
+    db = SessionLocal()
+    try:
+        ids = {
+            "collection_id": db.execute(
+                select(Collection.id).filter(Collection.is_default == False).order_by(Collection.id)
+            ).scalars().first(),
+            "account_id": db.execute(select(Account.id).order_by(Account.id)).scalars().first(),
+        }
+    finally:
+        db.close()
+
+    # The app loads the analytics store at startup - don't time the SQL fallback and a background load
+    import analytics_engine
+    analytics_engine.store.update()
+
+    print(f"\n⏱️  {backend} / {args.size} - {args.iterations} iterations per endpoint")
+    results = asyncio.run(run_cases(app_module.app, ids, args.iterations, args.warmup, args.only))
+
+    report = {
+        "meta": {
+            "backend": backend,
+            "size": args.size,
+            "videos": n_videos,
+            "seed": args.seed,
+            "iterations": args.iterations,
+            "git_commit": git_commit(),
+            "python": platform_info.python_version(),
+            "machine": f"{platform_info.system()} {platform_info.machine()}",
+            "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+        },
+        "results": results,
+    }
+
+    failed = [name for name, result in results.items() if result["status"] != 200]
+    if failed:
+        print(f"\n❌ Non-200 responses: {', '.join(failed)}")
+
+    baseline_path = os.path.join(BASELINES_DIR, f"{backend}_{args.size}.json")
+    regressions = []
+    if os.path.exists(baseline_path):
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold, args.min_delta_ms)
+        print(f"\n📊 Compared with baseline from {baseline['meta']['created_at']} ({baseline['meta']['git_commit']})")
+        for name, before, after in regressions:
+            print(f"  ⚠️  {name}: {before:.1f} ms -> {after:.1f} ms (+{(after / before - 1) * 100:.0f}%)")
+        if not regressions:
+            print("  ✅ No regressions")
+
+    if args.save_baseline:
+        os.makedirs(BASELINES_DIR, exist_ok=True)
+        with open(baseline_path, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"\n💾 Saved baseline to {os.path.relpath(baseline_path)}")
+
+    sys.exit(1 if failed or (regressions and not args.save_baseline) else 0)
+
+
+if __name__ == "__main__":
+    main()
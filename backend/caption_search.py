@@ -0,0 +1,164 @@
+"""
+Full-text search over video captions (GET /api/videos?q=...).
+
+- PostgreSQL: videos.caption_tsv, a stored generated tsvector column, with a GIN index.
+  Ranked with ts_rank_cd, highlighted with ts_headline.
+- SQLite: videos_fts, an FTS5 external-content table over videos.caption, kept in sync
+  by triggers. Ranked with bm25, highlighted with snippet.
+
+Both match every word of the query (stemmed, case-insensitive). Neither column is on the
+Video model (SQLite has no tsvector type); init_db() creates them.
+
+The FTS5 table is keyed by the videos rowid, which VACUUM may renumber - rebuild it after one:
+    python caption_search.py rebuild
+"""
+
+import re
+import sys
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import column, func, literal_column, select, table, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import Video
+
+# PostgreSQL text search configuration - part of the generated column, so changing it needs a migration
+TEXT_SEARCH_CONFIG = "english"
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_STOP = "</mark>"
+SNIPPET_WORDS = 32
+
+POSTGRES_DDL = [
+    f"""
+    ALTER TABLE videos ADD COLUMN IF NOT EXISTS caption_tsv tsvector
+    GENERATED ALWAYS AS (to_tsvector('{TEXT_SEARCH_CONFIG}', coalesce(caption, ''))) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_videos_caption_tsv ON videos USING GIN (caption_tsv)",
+]
+
+SQLITE_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS videos_fts
+    USING fts5(caption, content='videos', content_rowid='rowid', tokenize='porter unicode61')
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS videos_fts_insert AFTER INSERT ON videos BEGIN
+        INSERT INTO videos_fts(rowid, caption) VALUES (new.rowid, new.caption);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS videos_fts_delete AFTER DELETE ON videos BEGIN
+        INSERT INTO videos_fts(videos_fts, rowid, caption) VALUES ('delete', old.rowid, old.caption);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS videos_fts_update AFTER UPDATE OF caption ON videos BEGIN
+        INSERT INTO videos_fts(videos_fts, rowid, caption) VALUES ('delete', old.rowid, old.caption);
+        INSERT INTO videos_fts(rowid, caption) VALUES (new.rowid, new.caption);
+    END
+    """,
+]
+
+_WORDS = re.compile(r"\w+", re.UNICODE)
+
+videos_fts = table("videos_fts", column("rowid"))
+_VIDEOS_ROWID = literal_column("videos.rowid")
+_FTS_TABLE = literal_column("videos_fts")
+_CAPTION_TSV = literal_column("videos.caption_tsv")
+_CONFIG = literal_column(f"'{TEXT_SEARCH_CONFIG}'::regconfig")
+
+
+def ensure_caption_search_index(conn) -> bool:
+    """Create the search column / table on this connection's database if missing. Returns True if created here."""
+    if conn.dialect.name == "postgresql":
+        exists = conn.execute(text("""
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'videos' AND column_name = 'caption_tsv'
+        """)).scalar()
+        for statement in POSTGRES_DDL:
+            conn.execute(text(statement))
+        return not exists
+
+    if conn.dialect.name == "sqlite":
+        exists = conn.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'videos_fts'"
+        )).scalar()
+        for statement in SQLITE_DDL:
+            conn.execute(text(statement))
+        if not exists:
+            # Index the captions already in the table
+            conn.execute(text("INSERT INTO videos_fts(videos_fts) VALUES ('rebuild')"))
+        return not exists
+
+    return False
+
+
+def rebuild(engine: Engine):
+    """Re-index every caption (SQLite only - the PostgreSQL column is always current)"""
+    if engine.dialect.name == "sqlite":
+        with engine.begin() as conn:
+            conn.execute(text("INSERT INTO videos_fts(videos_fts) VALUES ('rebuild')"))
+
+
+def query_words(q: str) -> List[str]:
+    return _WORDS.findall(q or "")
+
+
+def _fts5_query(words: List[str]) -> str:
+    # Each word as a quoted string so FTS5 operators in user input (AND, NEAR, *, ^...) are literal
+    return " ".join('"' + word.replace('"', '""') + '"' for word in words)
+
+
+def apply_search(query, q: str, dialect: str) -> Tuple[object, object]:
+    """
+    Restrict a select(Video) query to captions matching every word of q.
+    Returns (query, score) - higher score is a better match. Call only when query_words(q) isn't empty.
+    """
+    if dialect == "postgresql":
+        tsquery = func.plainto_tsquery(_CONFIG, q)
+        return query.filter(_CAPTION_TSV.op("@@")(tsquery)), func.ts_rank_cd(_CAPTION_TSV, tsquery)
+
+    # Materialized so SQLite runs the FTS lookup once, instead of a MATCH per row when another
+    # filter (platform, creator) drives the join. bm25 is lower-is-better.
+    matches = (
+        select(videos_fts.c.rowid, (-func.bm25(_FTS_TABLE)).label("score"))
+        .filter(_FTS_TABLE.op("MATCH")(_fts5_query(query_words(q))))
+        .cte("caption_matches")
+        .prefix_with("MATERIALIZED")
+    )
+    return query.join(matches, matches.c.rowid == _VIDEOS_ROWID), matches.c.score
+
+
+async def highlights(db: AsyncSession, q: str, dialect: str, video_ids: List[str]) -> Dict[str, Optional[str]]:
+    """Caption excerpts with the matched words wrapped in <mark></mark>, for one page of results"""
+    if not video_ids:
+        return {}
+
+    if dialect == "postgresql":
+        options = f"StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}, MaxWords={SNIPPET_WORDS}, MinWords=10, MaxFragments=2"
+        headline = func.ts_headline(_CONFIG, Video.caption, func.plainto_tsquery(_CONFIG, q), options)
+        rows = await db.execute(select(Video.id, headline).filter(Video.id.in_(video_ids)))
+    else:
+        snippet = func.snippet(_FTS_TABLE, 0, HIGHLIGHT_START, HIGHLIGHT_STOP, "…", SNIPPET_WORDS)
+        rows = await db.execute(
+            select(Video.id, snippet)
+            .join(videos_fts, videos_fts.c.rowid == _VIDEOS_ROWID)
+            .filter(_FTS_TABLE.op("MATCH")(_fts5_query(query_words(q))), Video.id.in_(video_ids))
+        )
+
+    return dict(rows.all())
+
+
+if __name__ == "__main__":
+    from database import engine
+
+    if len(sys.argv) < 2 or sys.argv[1] != "rebuild":
+        print("Usage: python caption_search.py rebuild")
+        sys.exit(1)
+
+    with engine.begin() as conn:
+        ensure_caption_search_index(conn)
+    print("🔄 Rebuilding caption search index...")
+    rebuild(engine)
+    print("✅ Caption search index rebuilt")
@@ -0,0 +1,92 @@
+"""
+Change detection for video ingestion.
+
+Every scraped video gets a compact hash of its mutable stats and metadata (content_hash). On
+ingest the stored hashes are read with one narrow query per batch, and videos whose hash didn't
+move skip the UPDATE (and the session hooks, snapshots and account refresh behind it) - only
+their last_seen_at marker is touched, with a Core UPDATE that the ORM hooks don't see.
+
+Signed CDN URLs (thumbnail, avatar) change on every fetch and aren't hashed; they are rewritten
+whenever anything else about the video changes.
+
+Flushes through SessionLocal that change a hashed column without setting content_hash clear it,
+so the next ingest of that video is always written.
+"""
+
+import hashlib
+import json
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import event, select, update, inspect as sa_inspect
+
+from database import SessionLocal, Video
+
+HASHED_FIELDS = (
+    "views", "likes", "comments", "shares", "bookmarks",
+    "caption", "hashtags", "duration", "posted_at",
+    "author_nickname", "music_id", "music_title", "music_author",
+)
+BATCH_SIZE = 500
+
+Key = Tuple[str, str]  # (video id, platform)
+
+
+def content_hash(video_data: dict) -> str:
+    """16 hex chars over the HASHED_FIELDS of a scraped video dict"""
+    payload = json.dumps([video_data.get(field) for field in HASHED_FIELDS], default=str, separators=(",", ":"))
+    return hashlib.blake2b(payload.encode(), digest_size=8).hexdigest()
+
+
+def stored_hashes(session, keys: Iterable[Key]) -> Dict[Key, Optional[str]]:
+    """content_hash of the videos that exist (None for rows never hashed) - missing keys are new videos"""
+    keys = set(keys)
+    ids = sorted({video_id for video_id, _ in keys})
+    hashes = {}
+    for start in range(0, len(ids), BATCH_SIZE):
+        rows = session.execute(
+            select(Video.id, Video.platform, Video.content_hash).filter(Video.id.in_(ids[start:start + BATCH_SIZE]))
+        ).all()
+        for video_id, platform, stored in rows:
+            if (video_id, platform) in keys:
+                hashes[(video_id, platform)] = stored
+    return hashes
+
+
+def touch_last_seen(session, keys: Iterable[Key], seen_at: Optional[datetime] = None) -> int:
+    """Set last_seen_at on unchanged videos. Returns the number of rows touched."""
+    seen_at = seen_at or datetime.utcnow()
+    by_platform = {}
+    for video_id, platform in keys:
+        by_platform.setdefault(platform, []).append(video_id)
+
+    table = Video.__table__
+    touched = 0
+    for platform, ids in by_platform.items():
+        for start in range(0, len(ids), BATCH_SIZE):
+            result = session.execute(
+                update(table)
+                .where(table.c.platform == platform, table.c.id.in_(ids[start:start + BATCH_SIZE]))
+                .values(last_seen_at=seen_at)
+            )
+            touched += result.rowcount
+    return touched
+
+
+def _before_flush(session, flush_context, instances):
+    """Clear content_hash on videos whose hashed columns were changed by anything but ingestion"""
+    for obj in session.dirty:
+        if not isinstance(obj, Video) or obj.content_hash is None:
+            continue
+        attrs = sa_inspect(obj).attrs
+        if attrs.content_hash.history.has_changes():
+            continue
+        if any(attrs[field].history.has_changes() for field in HASHED_FIELDS):
+            obj.content_hash = None
+
+
+def register_session_hooks(session_factory=SessionLocal):
+    """Keep stored hashes honest for writes through this sessionmaker"""
+    if event.contains(session_factory, "before_flush", _before_flush):
+        return
+    event.listen(session_factory, "before_flush", _before_flush)
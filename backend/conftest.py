@@ -0,0 +1,36 @@
+"""
+pytest setup for the test_*.py scripts (they also run on their own: python test_growth.py).
+
+Every script gets an empty throwaway SQLite database (testing.py), and a script whose checks fail
+returns False - that fails the test instead of being ignored. The PostgreSQL-only scripts
+(test_query_plans.py, test_video_history_storage.py) skip here; run them directly with DATABASE_URL.
+"""
+
+import pytest
+
+import testing
+
+testing.use_temp_database("pytest")
+
+# Manual smoke scripts against a running API server or live Instagram - not part of the suite
+collect_ignore = [
+    "test_api_instagram.py",
+    "test_instagram_rapidapi.py",
+    "test_instagram_scraper.py",
+    "test_url_scraper_instagram.py",
+]
+
+
+@pytest.fixture(autouse=True, scope="module")
+def fresh_database():
+    testing.reset_temp_database()
+    yield
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_pyfunc_call(pyfuncitem):
+    """Run a script's test function, failing when it returns False"""
+    kwargs = {name: pyfuncitem.funcargs[name] for name in pyfuncitem._fixtureinfo.argnames}
+    if pyfuncitem.obj(**kwargs) is False:
+        pytest.fail(f"{pyfuncitem.name} reported failed checks (see the captured output)", pytrace=False)
+    return True
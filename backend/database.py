@@ -1,6 +1,8 @@
-from sqlalchemy import create_engine, Column, Integer, String, BigInteger, Float, DateTime, JSON, Text, Boolean, ForeignKey, Index
+from sqlalchemy import create_engine, Column, Integer, String, BigInteger, Float, DateTime, JSON, Text, Boolean, ForeignKey, Index, event, inspect as sa_inspect
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from datetime import datetime
 import os
 
@@ -23,6 +25,29 @@ except Exception as e:
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+
+def get_async_database_url(url: str) -> str:
+    """Map a sync DATABASE_URL onto its asyncio driver (asyncpg for PostgreSQL, aiosqlite for SQLite)"""
+    if url.startswith("sqlite"):
+        return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+
+    scheme, rest = url.split("://", 1)
+    if scheme in ("postgres", "postgresql", "postgresql+psycopg2"):
+        # asyncpg takes `ssl` rather than libpq's `sslmode` (Supabase URLs use sslmode=require)
+        rest = rest.replace("sslmode=", "ssl=")
+        return f"postgresql+asyncpg://{rest}"
+    return url
+
+
+# Async engine used by the read-heavy API handlers so DB round trips don't block the event loop
+ASYNC_DATABASE_URL = get_async_database_url(DATABASE_URL)
+async_engine = create_async_engine(ASYNC_DATABASE_URL, pool_pre_ping=True)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+# Stat columns carried in the analytics covering indexes so dashboard queries can use index-only scans
+ANALYTICS_COVERING_COLUMNS = ['views', 'likes', 'comments', 'shares', 'bookmarks', 'duration']
+
+
 # Models
 class Video(Base):
     __tablename__ = "videos"
@@ -38,6 +63,8 @@ class Video(Base):
     author_nickname = Column(String)
     author_avatar = Column(String)
     author_id = Column(String, index=True)
+    # Owning account - set during ingestion, replaces author_username/platform string joins
+    account_id = Column(Integer, ForeignKey('accounts.id', ondelete='SET NULL'), nullable=True)
 
     # Stats
     views = Column(BigInteger, default=0)
@@ -63,7 +90,13 @@ class Video(Base):
     # Timestamps
     created_at = Column(DateTime, default=datetime.utcnow)
     posted_at = Column(DateTime)
-    scraped_at = Column(DateTime, default=datetime.utcnow, index=True)
+    scraped_at = Column(DateTime, default=datetime.utcnow)  # Last time the row was written
+
+    # Change detection (change_detection.py): hash of the stats / metadata last ingested, and the
+    # last time a scrape returned the video (set even when nothing changed). Unindexed on purpose,
+    # so touching last_seen_at can be a HOT update on PostgreSQL.
+    content_hash = Column(String(16))
+    last_seen_at = Column(DateTime)
 
     # Indexes
     __table_args__ = (
@@ -71,8 +104,16 @@ class Video(Base):
         Index('idx_music_platform', 'music_id', 'platform'),
         # Performance indexes for common queries
         Index('idx_author_platform', 'author_username', 'platform'),
-        Index('idx_posted_at', 'posted_at'),
-        Index('idx_platform_spark', 'platform', 'is_spark_ad'),
+        Index('idx_account_scraped', 'account_id', 'scraped_at'),
+        # Newest-first pages of /api/videos pick their ids from this index alone (index-only scan)
+        Index('idx_scraped_at_id', 'scraped_at', 'id'),
+        # Most viral reads the top videos by views and stops, instead of sorting the posted_at range
+        Index('idx_views', 'views'),
+        # Covering indexes for the analytics endpoints (INCLUDE is PostgreSQL-only, ignored elsewhere)
+        Index('idx_posted_at_covering', 'posted_at',
+              postgresql_include=ANALYTICS_COVERING_COLUMNS),
+        Index('idx_platform_spark_posted', 'platform', 'is_spark_ad', 'posted_at',
+              postgresql_include=ANALYTICS_COVERING_COLUMNS),
     )
 
 
@@ -90,11 +131,7 @@ class VideoHistory(Base):
     comments = Column(BigInteger, default=0)
     shares = Column(BigInteger, default=0)
     saves = Column(BigInteger, default=0)
-
-    # Calculated growth (vs previous day)
-    views_growth = Column(BigInteger, default=0)
-    likes_growth = Column(BigInteger, default=0)
-    comments_growth = Column(BigInteger, default=0)
+    # Growth isn't stored - it's derived from consecutive snapshots at read time (growth.py)
 
     # Timestamp for this snapshot
     snapshot_date = Column(DateTime, nullable=False, index=True)
@@ -130,12 +167,30 @@ class TrendingAudio(Base):
     sample_video_ids = Column(JSON)  # Array of video IDs
 
     # Timestamps
-    trending_date = Column(DateTime, default=datetime.utcnow, index=True)
-    scraped_at = Column(DateTime, default=datetime.utcnow)
+    trending_date = Column(DateTime, default=datetime.utcnow, index=True)  # Day of the chart (midnight UTC)
+    scraped_at = Column(DateTime, default=datetime.utcnow)  # Last refresh that saw this audio
 
     __table_args__ = (
         Index('idx_country_trending', 'country', 'trending_date'),
         Index('idx_music_country', 'music_id', 'country'),
+        # One row per audio per country per day - refreshes update it in place
+        Index('uq_trending_audio_music_country_date', 'music_id', 'country', 'trending_date', unique=True),
+    )
+
+
+class TrendingAudioRank(Base):
+    """Rank history for trending audio - a row is only written when rank or video count changes"""
+    __tablename__ = "trending_audio_ranks"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    music_id = Column(String, nullable=False)
+    country = Column(String, nullable=False)
+    rank = Column(Integer)  # NULL when the audio dropped off the chart
+    total_videos = Column(BigInteger)
+    recorded_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index('idx_trending_rank_music_country', 'music_id', 'country', 'recorded_at'),
     )
 
 
@@ -158,10 +213,64 @@ class Hashtag(Base):
     last_updated = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     __table_args__ = (
-        Index('idx_hashtag_platform', 'name', 'platform'),
+        Index('uq_hashtags_name_platform', 'name', 'platform', unique=True),
+        Index('idx_hashtag_platform_views', 'platform', 'total_views'),
     )
 
 
+class VideoHashtag(Base):
+    """Inverted index of Video.hashtags - maintained by hashtag_index.py"""
+    __tablename__ = "video_hashtags"
+
+    video_id = Column(String, ForeignKey('videos.id', ondelete='CASCADE'), primary_key=True)
+    hashtag_id = Column(Integer, ForeignKey('hashtags.id', ondelete='CASCADE'), primary_key=True)
+
+    __table_args__ = (
+        Index('idx_hashtag_videos', 'hashtag_id', 'video_id'),
+    )
+
+
+class MusicUsage(Base):
+    """Per-sound rollup of tracked videos (Video.music_id) - maintained by music_rollup.py"""
+    __tablename__ = "music_usage"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    music_id = Column(String, nullable=False)
+    platform = Column(String, nullable=False)
+    music_title = Column(String)
+    music_author = Column(String)
+
+    # Stats over the videos currently using the sound
+    total_videos = Column(BigInteger, default=0)
+    total_views = Column(BigInteger, default=0)
+    median_views = Column(BigInteger, default=0)
+    top_creators = Column(JSON)  # [{"username", "videos", "views"}], most views first
+
+    # posted_at of the earliest / latest video using the sound
+    first_used = Column(DateTime)
+    last_used = Column(DateTime)
+    last_updated = Column(DateTime, default=datetime.utcnow)
+
+    # Video changes since median_views / top_creators / music_title were last recomputed
+    # (music_rollup.recompute_pending). Unindexed - the job scans this small table.
+    pending_changes = Column(Integer, server_default='0', nullable=False)
+
+    __table_args__ = (
+        Index('uq_music_usage_music_platform', 'music_id', 'platform', unique=True),
+        Index('idx_music_usage_platform_views', 'platform', 'total_views'),
+    )
+
+
+class MusicUsageDaily(Base):
+    """Per-sound daily growth: videos posted with the sound and views gained by its videos"""
+    __tablename__ = "music_usage_daily"
+
+    music_usage_id = Column(Integer, ForeignKey('music_usage.id', ondelete='CASCADE'), primary_key=True)
+    day = Column(DateTime, primary_key=True)  # Midnight UTC
+    videos_added = Column(Integer, default=0)
+    views_gained = Column(BigInteger, default=0)
+
+
 class SearchHistory(Base):
     __tablename__ = "search_history"
 
@@ -173,16 +282,23 @@ class SearchHistory(Base):
 
     # Results
     results_count = Column(Integer, default=0)
+    video_ids = Column(JSON)  # Result video ids in scraper order - the search cache
+    job_id = Column(Integer, ForeignKey('scraping_jobs.id', ondelete='SET NULL'), nullable=True)
 
     # Timestamps
     searched_at = Column(DateTime, default=datetime.utcnow, index=True)
 
+    __table_args__ = (
+        # Cache lookup: latest search for (type, platform, query) - country is compared after
+        Index('idx_search_cache', 'query_type', 'platform', 'query', 'searched_at'),
+    )
+
 
 class ScrapingJob(Base):
     __tablename__ = "scraping_jobs"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    job_type = Column(String, nullable=False)  # hashtag_search, trending_audio
+    job_type = Column(String, nullable=False)  # hashtag_search, term_search, url_scrape, trending_audio
     platform = Column(String, nullable=False)
     query = Column(String)
     country = Column(String)
@@ -199,6 +315,30 @@ class ScrapingJob(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
 
+class ScrapingJobItem(Base):
+    """Per-URL status of a bulk URL scraping job"""
+    __tablename__ = "scraping_job_items"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    job_id = Column(Integer, ForeignKey('scraping_jobs.id', ondelete='CASCADE'), nullable=False, index=True)
+    url = Column(String, nullable=False)
+
+    # Status
+    status = Column(String, default='pending')  # pending, running (pages streaming in), completed, skipped, failed
+    videos_found = Column(Integer, default=0)
+    video_ids = Column(JSON)  # Videos written (or reused) for this URL
+    error_message = Column(Text)
+
+    # Timestamps
+    completed_at = Column(DateTime)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Dedupe lookup: was this URL scraped recently?
+        Index('idx_job_item_url_completed', 'url', 'completed_at'),
+    )
+
+
 class Account(Base):
     """Track TikTok/YouTube/Instagram accounts separately"""
     __tablename__ = "accounts"
@@ -230,7 +370,7 @@ class Account(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     __table_args__ = (
-        Index('idx_username_platform', 'username', 'platform'),
+        Index('uq_accounts_username_platform', 'username', 'platform', unique=True),
     )
 
 
@@ -269,7 +409,7 @@ class VideoCollection(Base):
     added_by = Column(String)  # For future user system
 
     __table_args__ = (
-        Index('idx_video_collection', 'video_id', 'collection_id'),
+        Index('uq_video_collection', 'video_id', 'collection_id', unique=True),
         Index('idx_collection_videos', 'collection_id', 'added_at'),
     )
 
@@ -286,13 +426,24 @@ class AccountCollection(Base):
     added_at = Column(DateTime, default=datetime.utcnow)
 
     __table_args__ = (
-        Index('idx_account_collection', 'account_id', 'collection_id'),
+        Index('uq_account_collection', 'account_id', 'collection_id', unique=True),
+        Index('idx_collection_accounts', 'collection_id', 'account_id'),
     )
 
 
 def init_db():
     """Initialize database tables"""
+    # On PostgreSQL, video_history is range-partitioned by month - create it before create_all() does
+    from video_history_storage import create_partitioned_video_history, ensure_video_history_partitions
+    create_partitioned_video_history(engine)
+
     Base.metadata.create_all(bind=engine)
+    ensure_video_history_partitions(engine)
+
+    # Caption full-text search: tsvector column + GIN index (PostgreSQL) or FTS5 table (SQLite)
+    from caption_search import ensure_caption_search_index
+    with engine.begin() as conn:
+        ensure_caption_search_index(conn)
 
 
 def get_db():
@@ -302,3 +453,57 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """Get async database session"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def insert_ignore(connection, table):
+    """INSERT ... ON CONFLICT DO NOTHING for PostgreSQL and SQLite (connection: a Connection or Engine)"""
+    dialect = postgresql if connection.dialect.name == "postgresql" else sqlite
+    return dialect.insert(table).on_conflict_do_nothing()
+
+
+class VideoFlushHooks:
+    """
+    Session hooks for tables derived from videos (hashtag_index.py, music_rollup.py). Before a flush,
+    capture(session, written, deleted) returns the changes for the videos it inserts or changes (any
+    of tracked_attrs) and deletes - the old values are still in the database then. After the flush,
+    apply(connection, changes) writes them in the same transaction. Rolled back flushes are dropped.
+    """
+
+    def __init__(self, info_key: str, tracked_attrs, capture, apply):
+        self.info_key = info_key
+        self.tracked_attrs = tracked_attrs
+        self.capture = capture
+        self.apply = apply
+
+    def _changed(self, video) -> bool:
+        attrs = sa_inspect(video).attrs
+        return any(getattr(attrs, name).history.has_changes() for name in self.tracked_attrs)
+
+    def before_flush(self, session, flush_context, instances):
+        written = [obj for obj in session.new if isinstance(obj, Video)]
+        written += [obj for obj in session.dirty if isinstance(obj, Video) and self._changed(obj)]
+        deleted = [obj for obj in session.deleted if isinstance(obj, Video)]
+        if written or deleted:
+            session.info.setdefault(self.info_key, []).extend(self.capture(session, written, deleted))
+
+    def after_flush_postexec(self, session, flush_context):
+        changes = session.info.pop(self.info_key, None)
+        if changes:
+            self.apply(session.connection(), changes)
+
+    def after_rollback(self, session):
+        session.info.pop(self.info_key, None)
+
+    def register(self, session_factory):
+        """Listen on this sessionmaker - registering twice is a no-op"""
+        if event.contains(session_factory, "before_flush", self.before_flush):
+            return
+        event.listen(session_factory, "before_flush", self.before_flush)
+        event.listen(session_factory, "after_flush_postexec", self.after_flush_postexec)
+        event.listen(session_factory, "after_rollback", self.after_rollback)
@@ -0,0 +1,188 @@
+"""
+In-process event stream for the frontend (GET /api/events, Server-Sent Events).
+
+Events:
+- job_progress:  bulk scrape job status / progress counters
+- job_item:      one URL of a bulk scrape job finished (completed / skipped / failed)
+- daily_scrape:  daily refresh started / account finished / completed
+- data_version:  videos, snapshots or accounts changed - dashboards refetch only on this
+
+Publishing is safe from any thread (scrape writer, scheduler thread, sync handlers).
+data_version is bumped by SessionLocal commit hooks and coalesced so a bulk scrape
+committing every few hundred rows produces at most one event per DATA_VERSION_MIN_INTERVAL.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Optional, Set
+
+from sqlalchemy import event
+
+from database import SessionLocal, Video, VideoHistory, Account
+
+logger = logging.getLogger(__name__)
+
+DATA_VERSION_MIN_INTERVAL = float(os.getenv("DATA_VERSION_MIN_INTERVAL", "2"))  # Seconds between data_version events
+SUBSCRIBER_QUEUE_SIZE = 256
+KEEPALIVE_SECONDS = 15
+
+# Changes to these tables change what the dashboards show
+DATA_MODELS = (Video, VideoHistory, Account)
+
+
+class EventBroker:
+    def __init__(self):
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self._sequence = 0
+        self.data_version = 0
+        self.data_changed_at: Optional[datetime] = None
+        self._data_version_sent_at = 0.0
+        self._data_version_scheduled = False
+
+    def subscribe(self) -> asyncio.Queue:
+        # Subscribers live on the server's event loop - publishers on other threads hop onto it
+        self._loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+
+    def publish(self, event_type: str, data: dict):
+        """Send an event to every subscriber (no-op without subscribers)"""
+        if not self._subscribers or self._loop is None or self._loop.is_closed():
+            return
+
+        with self._lock:
+            self._sequence += 1
+            message = (self._sequence, event_type, data)
+
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+
+        if running is self._loop:
+            self._fan_out(message)
+        else:
+            self._loop.call_soon_threadsafe(self._fan_out, message)
+
+    def _fan_out(self, message: tuple):
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Slow client - end its stream rather than buffer without bound; EventSource reconnects
+                self._subscribers.discard(queue)
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+    # ============ DATA VERSION ============
+
+    def data_changed(self):
+        """Bump the data version and publish it, at most once per DATA_VERSION_MIN_INTERVAL"""
+        with self._lock:
+            self.data_version += 1
+            self.data_changed_at = datetime.utcnow()
+
+        if self._loop is None or self._loop.is_closed():
+            return
+        self._loop.call_soon_threadsafe(self._schedule_data_version)
+
+    def _schedule_data_version(self):
+        if self._data_version_scheduled:
+            return
+        delay = max(0.0, self._data_version_sent_at + DATA_VERSION_MIN_INTERVAL - time.monotonic())
+        self._data_version_scheduled = True
+        self._loop.call_later(delay, self._send_data_version)
+
+    def _send_data_version(self):
+        self._data_version_scheduled = False
+        self._data_version_sent_at = time.monotonic()
+        self.publish("data_version", self.data_version_payload())
+
+    def data_version_payload(self) -> dict:
+        return {
+            "version": self.data_version,
+            "changed_at": self.data_changed_at.isoformat() if self.data_changed_at else None,
+        }
+
+
+broker = EventBroker()
+
+
+def format_sse(sequence: Optional[int], event_type: str, data: dict) -> str:
+    lines = []
+    if sequence is not None:
+        lines.append(f"id: {sequence}")
+    lines.append(f"event: {event_type}")
+    lines.append(f"data: {json.dumps(data, default=str)}")
+    return "\n".join(lines) + "\n\n"
+
+
+async def event_stream(request, job_id: Optional[int] = None):
+    """SSE body: current data version first, then live events until the client disconnects"""
+    queue = broker.subscribe()
+    try:
+        yield "retry: 3000\n\n"
+        yield format_sse(None, "data_version", broker.data_version_payload())
+
+        while True:
+            try:
+                message = await asyncio.wait_for(queue.get(), timeout=KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    break
+                yield ": keepalive\n\n"
+                continue
+
+            if message is None:
+                break
+            sequence, event_type, data = message
+            if job_id is not None and event_type in ("job_progress", "job_item") and data.get("job_id") != job_id:
+                continue
+            yield format_sse(sequence, event_type, data)
+    finally:
+        broker.unsubscribe(queue)
+
+
+# ============ SESSION HOOKS ============
+
+def _after_flush(session, flush_context):
+    if any(isinstance(obj, DATA_MODELS) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info["data_changed"] = True
+
+
+def _do_orm_execute(orm_execute_state):
+    if (orm_execute_state.is_update or orm_execute_state.is_delete) and any(
+        mapper.class_ in DATA_MODELS for mapper in orm_execute_state.all_mappers
+    ):
+        orm_execute_state.session.info["data_changed"] = True
+
+
+def _after_commit(session):
+    if session.info.pop("data_changed", False):
+        broker.data_changed()
+
+
+def _after_rollback(session):
+    session.info.pop("data_changed", None)
+
+
+def register_session_hooks(session_factory=SessionLocal):
+    """Publish data_version when commits through this sessionmaker touch videos, snapshots or accounts"""
+    if event.contains(session_factory, "after_commit", _after_commit):
+        return
+    event.listen(session_factory, "after_flush", _after_flush)
+    event.listen(session_factory, "do_orm_execute", _do_orm_execute)
+    event.listen(session_factory, "after_commit", _after_commit)
+    event.listen(session_factory, "after_rollback", _after_rollback)
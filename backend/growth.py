@@ -0,0 +1,134 @@
+"""
+Growth derived from video_history snapshots at read time.
+
+Snapshots only store running totals. The growth of a video between two of its snapshots is the
+difference of the totals, taken with LAG() over (video_id, platform) ordered by snapshot_date -
+idx_video_snapshot serves the window. When snapshots are days apart (a missed daily scrape, or the
+weekly rows left by the retention downsampling) the difference is spread evenly over the days in
+between instead of landing on the day scraping resumed.
+
+- A video's first snapshot has no growth (there is no baseline)
+- Drops (views removed by the platform) count as zero growth
+- Differences across gaps longer than MAX_GAP_DAYS aren't interpolated - the snapshot after such a
+  gap is treated like a first one. This also bounds how much history a query reads before `start`.
+
+daily_totals_query() sums the snapshot totals themselves per day, for the same charts.
+"""
+
+import os
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from sqlalchemy import case, func, select
+
+from database import VideoHistory
+
+GROWTH_METRICS = ("views", "likes", "comments")
+SNAPSHOT_TOTALS = ("views", "likes", "comments", "shares", "saves")
+MAX_GAP_DAYS = int(os.getenv("GROWTH_MAX_GAP_DAYS", "31"))
+
+
+def _parse_day(value) -> date:
+    # date() is a string on SQLite and a date on PostgreSQL
+    return datetime.strptime(str(value)[:10], "%Y-%m-%d").date()
+
+
+def snapshot_deltas(video_ids=None, start: Optional[datetime] = None, end: Optional[datetime] = None):
+    """
+    Select of the growth since each video's previous snapshot: video_id, platform, snapshot_date,
+    previous_date and one column per GROWTH_METRICS. Only snapshot intervals overlapping [start, end)
+    are returned. `video_ids` is a list or a select of ids; None means every video.
+    """
+    window = {"partition_by": (VideoHistory.video_id, VideoHistory.platform), "order_by": VideoHistory.snapshot_date}
+    previous = select(
+        VideoHistory.video_id,
+        VideoHistory.platform,
+        VideoHistory.snapshot_date,
+        func.lag(VideoHistory.snapshot_date).over(**window).label("previous_date"),
+        *(getattr(VideoHistory, metric) for metric in GROWTH_METRICS),
+        *(func.lag(getattr(VideoHistory, metric)).over(**window).label(f"previous_{metric}")
+          for metric in GROWTH_METRICS)
+    )
+    if video_ids is not None:
+        previous = previous.filter(VideoHistory.video_id.in_(video_ids))
+    if start is not None:
+        previous = previous.filter(VideoHistory.snapshot_date >= start - timedelta(days=MAX_GAP_DAYS))
+    previous = previous.subquery()
+
+    deltas = []
+    for metric in GROWTH_METRICS:
+        delta = func.coalesce(previous.c[metric], 0) - func.coalesce(previous.c[f"previous_{metric}"], 0)
+        deltas.append(case((delta > 0, delta), else_=0).label(metric))
+
+    query = select(
+        previous.c.video_id, previous.c.platform, previous.c.snapshot_date, previous.c.previous_date, *deltas
+    ).filter(previous.c.previous_date.isnot(None))
+    if start is not None:
+        query = query.filter(previous.c.snapshot_date >= start)
+    if end is not None:
+        query = query.filter(previous.c.previous_date < end)
+    return query
+
+
+def daily_growth_query(video_ids=None, start: Optional[datetime] = None, end: Optional[datetime] = None):
+    """snapshot_deltas summed per (day, previous day) - feed the rows to daily_growth()"""
+    deltas = snapshot_deltas(video_ids, start, end).subquery()
+    day = func.date(deltas.c.snapshot_date)
+    previous_day = func.date(deltas.c.previous_date)
+    return select(
+        day, previous_day, *(func.sum(deltas.c[metric]) for metric in GROWTH_METRICS)
+    ).group_by(day, previous_day)
+
+
+def interpolate(day, previous_day, values: Tuple[int, ...]) -> Iterator[Tuple[date, Tuple[int, ...]]]:
+    """
+    Yield (day, share of each value) for every day after previous_day up to and including day.
+    Shares are whole numbers that add up to the values. Nothing for gaps over MAX_GAP_DAYS.
+    """
+    day, previous_day = _parse_day(day), _parse_day(previous_day)
+    gap = (day - previous_day).days
+    if gap < 1 or gap > MAX_GAP_DAYS:
+        return
+    values = [value or 0 for value in values]
+    for i in range(1, gap + 1):
+        yield previous_day + timedelta(days=i), tuple(
+            value * i // gap - value * (i - 1) // gap for value in values
+        )
+
+
+def daily_growth(rows: Iterable[tuple], start: Optional[datetime] = None,
+                 end: Optional[datetime] = None) -> Dict[date, Dict[str, int]]:
+    """{day: {metric: growth}} from daily_growth_query() / snapshot-delta rows, clipped to [start, end)"""
+    first = start.date() if start else None
+    last = end.date() if end else None
+    daily = {}
+    for day, previous_day, *values in rows:
+        for growth_day, shares in interpolate(day, previous_day, values):
+            if (first and growth_day < first) or (last and growth_day >= last):
+                continue
+            totals = daily.setdefault(growth_day, dict.fromkeys(GROWTH_METRICS, 0))
+            for metric, share in zip(GROWTH_METRICS, shares):
+                totals[metric] += share
+    return daily
+
+
+def daily_totals_query(video_ids=None, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                       metrics: Tuple[str, ...] = SNAPSHOT_TOTALS):
+    """Snapshot totals summed per day for snapshots taken in [start, end] - feed the rows to daily_totals()"""
+    day = func.date(VideoHistory.snapshot_date)
+    query = select(day, *(func.sum(getattr(VideoHistory, metric)) for metric in metrics)).group_by(day)
+    if video_ids is not None:
+        query = query.filter(VideoHistory.video_id.in_(video_ids))
+    if start is not None:
+        query = query.filter(VideoHistory.snapshot_date >= start)
+    if end is not None:
+        query = query.filter(VideoHistory.snapshot_date <= end)
+    return query
+
+
+def daily_totals(rows: Iterable[tuple], metrics: Tuple[str, ...] = SNAPSHOT_TOTALS) -> Dict[date, Dict[str, int]]:
+    """{day: {metric: total}} from daily_totals_query() rows"""
+    return {
+        _parse_day(day): {metric: value or 0 for metric, value in zip(metrics, values)}
+        for day, *values in rows
+    }
@@ -0,0 +1,194 @@
+"""
+Inverted hashtag index: video_hashtags(video_id, hashtag_id) plus per-hashtag totals.
+
+Video.hashtags stays the source of truth. Flushes through SessionLocal that insert a video,
+or change its hashtags or views, update the index in the same transaction:
+- links are added / removed for hashtags that appeared / disappeared
+- Hashtag.total_videos and total_views are adjusted by the delta (no rescans)
+
+Old hashtags come from the index itself and old views from the row before the flush, so
+updates through expired objects are counted correctly. Bulk query().update() and writes
+outside SessionLocal aren't seen - rebuild the index after those:
+    python hashtag_index.py rebuild
+"""
+
+import sys
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Set, Tuple
+
+from sqlalchemy import bindparam, delete, func, insert, select, update
+
+from database import SessionLocal, Video, Hashtag, VideoHashtag, VideoFlushHooks, insert_ignore
+
+REBUILD_BATCH_SIZE = 2000
+
+
+def normalize_hashtags(hashtags) -> Set[str]:
+    """["#FYP", "fyp", " Dance"] -> {"fyp", "dance"}"""
+    if not isinstance(hashtags, list):
+        return set()
+    names = set()
+    for tag in hashtags:
+        if isinstance(tag, str):
+            name = tag.strip().lstrip("#").lower()
+            if name:
+                names.add(name)
+    return names
+
+
+def _hashtag_ids(connection, keys: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], int]:
+    """(name, platform) -> hashtags.id, creating missing hashtags"""
+    keys = set(keys)
+    if not keys:
+        return {}
+
+    now = datetime.utcnow()
+    connection.execute(
+        insert_ignore(connection, Hashtag.__table__),
+        [{"name": name, "platform": platform, "total_videos": 0, "total_views": 0,
+          "first_seen": now, "last_updated": now} for name, platform in keys]
+    )
+
+    ids = {}
+    by_platform = defaultdict(list)
+    for name, platform in keys:
+        by_platform[platform].append(name)
+    for platform, names in by_platform.items():
+        rows = connection.execute(
+            select(Hashtag.id, Hashtag.name).filter(Hashtag.platform == platform, Hashtag.name.in_(names))
+        )
+        ids.update({(name, platform): hashtag_id for hashtag_id, name in rows})
+    return ids
+
+
+# ============ SESSION HOOKS ============
+
+def _capture(session, written: List[Video], deleted: List[Video]) -> List[tuple]:
+    """(old, new) hashtags and views of the videos a flush writes"""
+    existing_ids = [video.id for video in written + deleted if video not in session.new]
+    old_views, old_tags = {}, defaultdict(set)
+    if existing_ids:
+        connection = session.connection()
+        old_views = dict(connection.execute(select(Video.id, Video.views).filter(Video.id.in_(existing_ids))).all())
+        for video_id, name in connection.execute(
+            select(VideoHashtag.video_id, Hashtag.name)
+            .join(Hashtag, Hashtag.id == VideoHashtag.hashtag_id)
+            .filter(VideoHashtag.video_id.in_(existing_ids))
+        ):
+            old_tags[video_id].add(name)
+
+    changes = [(video.id, video.platform, old_tags.get(video.id, set()), old_views.get(video.id) or 0,
+                normalize_hashtags(video.hashtags), video.views or 0) for video in written]
+    changes += [(video.id, video.platform, old_tags.get(video.id, set()), old_views.get(video.id) or 0, set(), 0)
+                for video in deleted]
+    return changes
+
+
+def apply_changes(connection, changes: List[tuple]):
+    """Apply (video_id, platform, old_tags, old_views, new_tags, new_views) changes to the index"""
+    added_links, removed_links = [], []
+    deltas = defaultdict(lambda: [0, 0])  # (name, platform) -> [videos, views]
+
+    for video_id, platform, old_tags, old_views, new_tags, new_views in changes:
+        for name in new_tags - old_tags:
+            added_links.append((video_id, (name, platform)))
+            deltas[(name, platform)][0] += 1
+            deltas[(name, platform)][1] += new_views
+        for name in old_tags - new_tags:
+            removed_links.append((video_id, (name, platform)))
+            deltas[(name, platform)][0] -= 1
+            deltas[(name, platform)][1] -= old_views
+        if new_views != old_views:
+            for name in new_tags & old_tags:
+                deltas[(name, platform)][1] += new_views - old_views
+
+    # A tag moving between videos with the same views nets to no delta, but its links still change
+    deltas = {key: delta for key, delta in deltas.items() if delta != [0, 0]}
+    ids = _hashtag_ids(connection, set(deltas) | {key for _, key in added_links + removed_links})
+
+    if removed_links:
+        links = VideoHashtag.__table__
+        connection.execute(
+            delete(links).where(links.c.video_id == bindparam("video"), links.c.hashtag_id == bindparam("hashtag")),
+            [{"video": video_id, "hashtag": ids[key]} for video_id, key in removed_links]
+        )
+    if added_links:
+        connection.execute(
+            insert_ignore(connection, VideoHashtag.__table__),
+            [{"video_id": video_id, "hashtag_id": ids[key]} for video_id, key in added_links]
+        )
+    if not deltas:
+        return
+
+    hashtags = Hashtag.__table__
+    connection.execute(
+        update(hashtags)
+        .where(hashtags.c.id == bindparam("hashtag_id"))
+        .values(total_videos=hashtags.c.total_videos + bindparam("videos"),
+                total_views=hashtags.c.total_views + bindparam("views"),
+                last_updated=bindparam("now")),
+        [{"hashtag_id": ids[key], "videos": videos, "views": views, "now": datetime.utcnow()}
+         for key, (videos, views) in deltas.items()]
+    )
+
+
+_hooks = VideoFlushHooks("hashtag_changes", ("hashtags", "views"), _capture, apply_changes)
+
+
+def register_session_hooks(session_factory=SessionLocal):
+    """Keep the hashtag index in step with commits through this sessionmaker"""
+    _hooks.register(session_factory)
+
+
+# ============ REBUILD ============
+
+def rebuild(connection) -> int:
+    """Rebuild video_hashtags and the hashtag totals from Video.hashtags. Returns the number of links."""
+    links = 0
+    connection.execute(delete(VideoHashtag))
+
+    last_id = None
+    while True:
+        query = select(Video.id, Video.platform, Video.hashtags).order_by(Video.id).limit(REBUILD_BATCH_SIZE)
+        if last_id is not None:
+            query = query.filter(Video.id > last_id)
+        rows = connection.execute(query).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        video_tags = [(row.id, row.platform, normalize_hashtags(row.hashtags)) for row in rows]
+        ids = _hashtag_ids(connection, {(name, platform) for _, platform, tags in video_tags for name in tags})
+        batch = [{"video_id": video_id, "hashtag_id": ids[(name, platform)]}
+                 for video_id, platform, tags in video_tags for name in tags]
+        if batch:
+            connection.execute(insert(VideoHashtag), batch)
+            links += len(batch)
+
+    # Totals from the index in one statement
+    hashtags = Hashtag.__table__
+    counts = select(func.count()).select_from(VideoHashtag).filter(VideoHashtag.hashtag_id == hashtags.c.id)
+    views = (select(func.coalesce(func.sum(Video.views), 0))
+             .join(VideoHashtag, VideoHashtag.video_id == Video.id)
+             .filter(VideoHashtag.hashtag_id == hashtags.c.id))
+    connection.execute(update(hashtags).values(
+        total_videos=counts.scalar_subquery(),
+        total_views=views.scalar_subquery(),
+        last_updated=datetime.utcnow(),
+    ))
+    return links
+
+
+if __name__ == "__main__":
+    from database import engine
+
+    if len(sys.argv) < 2 or sys.argv[1] != "rebuild":
+        print("Usage: python hashtag_index.py rebuild")
+        sys.exit(1)
+
+    print("🔄 Rebuilding hashtag index from videos.hashtags...")
+    started = datetime.utcnow()
+    with engine.begin() as connection:
+        total = rebuild(connection)
+    print(f"✅ {total} video/hashtag links in {(datetime.utcnow() - started).total_seconds():.1f}s")
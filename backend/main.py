@@ -1,26 +1,44 @@
-from fastapi import FastAPI, HTTPException, Depends, Query, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Depends, Query, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
+from fastapi.encoders import jsonable_encoder
+from starlette.datastructures import Headers, MutableHeaders
 from sqlalchemy.orm import Session
-from sqlalchemy import func, distinct, or_
-from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, distinct, or_, select, update
+from typing import Callable, Dict, List, Optional
 from pydantic import BaseModel
 from datetime import datetime, timedelta
+from collections import defaultdict
 import asyncio
 import os
 from dotenv import load_dotenv
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 import logging
+import time
 
 # Load environment variables
 load_dotenv()
 
-from database import get_db, init_db, Video, VideoHistory, TrendingAudio, Hashtag, SearchHistory, ScrapingJob, Collection, Account, VideoCollection, AccountCollection
+from database import engine, async_engine, get_db, get_async_db, init_db, insert_ignore, Video, VideoHistory, TrendingAudio, Hashtag, VideoHashtag, MusicUsage, MusicUsageDaily, SearchHistory, ScrapingJob, ScrapingJobItem, Collection, Account, VideoCollection, AccountCollection
 from scrapers.tiktok_scraper import TikTokScraper
+from scrapers import tiktok_session_pool
 from scrapers.youtube_scraper import YouTubeScraper
-from scrapers.trending_audio_scraper import TrendingAudioScraper
 from scrapers.url_scraper import URLScraper
 from scrapers.mixpanel_scraper import MixpanelScraper
+from video_history_storage import run_video_history_maintenance
+import metrics
+import sql_profiler
+import analytics_engine
+import events
+import trending_audio_store
+import hashtag_index
+import caption_search
+import music_rollup
+import change_detection
+import growth
 
 app = FastAPI(title="Social Media Tracker API", version="1.0.0")
 
@@ -37,9 +55,79 @@ app.add_middleware(
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Prometheus metrics (GET /metrics) and the SQL profiler - one listener counts and times SQL on both engines
+metrics.instrument_engine(engine)
+metrics.instrument_engine(async_engine.sync_engine)
+
+# In-memory analytics column store follows commits made through SessionLocal
+analytics_engine.register_session_hooks()
+
+# data_version events (GET /api/events) on commits that touch videos, snapshots or accounts
+events.register_session_hooks()
+
+# video_hashtags index and hashtag totals follow video inserts / updates
+hashtag_index.register_session_hooks()
+
+# music_usage rollup (per-sound totals and daily growth) follows video inserts / updates
+music_rollup.register_session_hooks()
+
+# content_hash is cleared when a video's stats change outside ingestion
+change_detection.register_session_hooks()
+
+
+class RequestInstrumentationMiddleware:
+    """
+    Latency and SQL statement count/time per route (metrics.py), plus the opt-in SQL profiler
+    (X-SQL-Profile header or SQL_PROFILE=1) with its per-request counts, timings and N+1 suspects.
+    Plain ASGI rather than @app.middleware, which runs every request in an extra task.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        profile = None
+        if sql_profiler.is_requested(Headers(scope=scope)):
+            profile = sql_profiler.start_profile(f"{scope['method']} {scope['path']}")
+        stats = metrics.start_request_stats()
+        started = time.perf_counter()
+        status = 500
+
+        async def send_instrumented(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if profile is not None:
+                    sql_profiler.log_profile(profile)
+                    MutableHeaders(scope=message).update(sql_profiler.response_headers(profile))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_instrumented)
+        finally:
+            if scope["path"] != "/metrics":
+                metrics.observe_request(scope["method"], metrics.route_label(scope), status,
+                                        time.perf_counter() - started, stats)
+
+
+app.add_middleware(RequestInstrumentationMiddleware)
+
 # Initialize scheduler
 scheduler = BackgroundScheduler()
 
+# Bulk URL scraping (/api/scrape/urls)
+URL_SCRAPE_CONCURRENCY = int(os.getenv("URL_SCRAPE_CONCURRENCY", "8"))  # URLs scraped at once
+URL_SCRAPE_DEDUPE_MINUTES = int(os.getenv("URL_SCRAPE_DEDUPE_MINUTES", "30"))  # Skip URLs scraped this recently
+URL_SCRAPE_WRITE_BATCH = int(os.getenv("URL_SCRAPE_WRITE_BATCH", "200"))  # Videos per DB write batch
+URL_SCRAPE_WRITE_SECONDS = float(os.getenv("URL_SCRAPE_WRITE_SECONDS", "2"))  # Longest a result waits for a batch
+
+# Hashtag / term search jobs (/api/search/*)
+SEARCH_CACHE_TTL_MINUTES = int(os.getenv("SEARCH_CACHE_TTL_MINUTES", "60"))  # Repeat searches served from SearchHistory
+SEARCH_JOB_STALE_MINUTES = 30  # Older pending/running jobs aren't joined (e.g. the server restarted mid-job)
+
 # Pydantic models
 class SearchRequest(BaseModel):
     query: str
@@ -71,6 +159,16 @@ class VideoResponse(BaseModel):
         from_attributes = True
 
 
+class SearchResultsResponse(BaseModel):
+    job_id: int
+    status: str
+    videos: List[VideoResponse]
+    total: int
+    limit: int
+    offset: int
+    has_more: bool
+
+
 class TrendingAudioResponse(BaseModel):
     id: int
     music_id: str
@@ -127,187 +225,268 @@ async def root():
     return {"status": "ok", "message": "Social Media Tracker API is running"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Prometheus scrape endpoint"""
+    body, content_type = metrics.render_metrics()
+    return Response(content=body, headers={"Content-Type": content_type})
+
+
 # Search endpoints
-@app.post("/api/search/hashtag", response_model=List[VideoResponse])
-async def search_hashtag(
-    request: SearchRequest,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
-):
-    """Search for videos by hashtag"""
+SEARCH_PLATFORMS = ("tiktok", "youtube")
 
-    # Create scraping job
-    job = ScrapingJob(
-        job_type="hashtag_search",
-        platform=request.platform,
-        query=request.query,
-        country=request.country,
-        status="running",
-        started_at=datetime.utcnow()
-    )
-    db.add(job)
-    db.commit()
 
-    try:
-        videos_data = []
+def normalize_search_query(query: str, query_type: str) -> str:
+    """Cache key form of a search query: "#FYP" -> "fyp", "Study  Tips" -> "study tips\""""
+    query = " ".join(query.split()).lower()
+    return query.lstrip("#") if query_type == "hashtag" else query
 
-        if request.platform == "tiktok":
-            async with TikTokScraper() as scraper:
-                videos_data = await scraper.search_hashtag(request.query, request.limit)
 
-        elif request.platform == "youtube":
-            scraper = YouTubeScraper()
-            videos_data = await scraper.search_hashtag(request.query, request.limit)
+def save_search_results(db: Session, videos_data: List[dict]) -> List[Video]:
+    """Write searched videos through the batched ingestion path and link them to their accounts"""
+    videos, _, _ = upsert_scraped_videos(db, videos_data)
+    assign_account_ids(db, videos)
+    db.commit()
+    return videos
 
-        else:
-            job.status = "failed"
-            job.error_message = f"Platform {request.platform} not supported"
-            db.commit()
-            raise HTTPException(status_code=400, detail=f"Platform {request.platform} not supported")
 
-        # Save videos to database
-        video_models = []
-        for video_data in videos_data:
-            # Check if video already exists
-            existing = db.query(Video).filter(
-                Video.id == video_data['id'],
-                Video.platform == video_data['platform']
-            ).first()
+def find_cached_search(db: Session, query_type: str, platform: str, query: str,
+                       country: Optional[str], limit: int) -> Optional[SearchHistory]:
+    """Latest search for the same key within SEARCH_CACHE_TTL_MINUTES that asked for at least `limit` videos"""
+    cutoff = datetime.utcnow() - timedelta(minutes=SEARCH_CACHE_TTL_MINUTES)
+    return db.query(SearchHistory).join(ScrapingJob, ScrapingJob.id == SearchHistory.job_id).filter(
+        SearchHistory.query_type == query_type,
+        SearchHistory.platform == platform,
+        SearchHistory.query == query,
+        SearchHistory.country.is_(None) if country is None else SearchHistory.country == country,
+        SearchHistory.searched_at >= cutoff,
+        SearchHistory.video_ids.isnot(None),
+        ScrapingJob.total >= limit
+    ).order_by(SearchHistory.searched_at.desc()).first()
+
+
+def find_running_search(db: Session, job_type: str, platform: str, query: str,
+                        country: Optional[str], limit: int) -> Optional[ScrapingJob]:
+    """An identical search that is still pending or running - joined instead of scraping twice"""
+    cutoff = datetime.utcnow() - timedelta(minutes=SEARCH_JOB_STALE_MINUTES)
+    return db.query(ScrapingJob).filter(
+        ScrapingJob.job_type == job_type,
+        ScrapingJob.platform == platform,
+        ScrapingJob.query == query,
+        ScrapingJob.country.is_(None) if country is None else ScrapingJob.country == country,
+        ScrapingJob.status.in_(("pending", "running")),
+        ScrapingJob.created_at >= cutoff,
+        ScrapingJob.total >= limit
+    ).order_by(ScrapingJob.id.desc()).first()
+
+
+def submit_search(request: SearchRequest, query_type: str, background_tasks: BackgroundTasks, db: Session) -> dict:
+    """Serve a search from the cache, join an identical running search, or start a search job"""
+    if request.platform not in SEARCH_PLATFORMS:
+        raise HTTPException(status_code=400, detail=f"Platform {request.platform} not supported")
+
+    query = normalize_search_query(request.query, query_type)
+    if not query:
+        raise HTTPException(status_code=400, detail="Empty search query")
+    country = request.country.upper() if request.country else None
+    job_type = f"{query_type}_search"
+
+    cached = find_cached_search(db, query_type, request.platform, query, country, request.limit)
+    if cached:
+        return {"job_id": cached.job_id, "status": "completed", "cached": True,
+                "query": query, "results_count": cached.results_count}
+
+    job = find_running_search(db, job_type, request.platform, query, country, request.limit)
+    if not job:
+        job = ScrapingJob(
+            job_type=job_type,
+            platform=request.platform,
+            query=query,
+            country=country,
+            status="pending",
+            progress=0,
+            total=request.limit
+        )
+        db.add(job)
+        db.commit()
+        background_tasks.add_task(background_search_task, job.id)
+
+    return {"job_id": job.id, "status": job.status, "cached": False, "query": query, "results_count": None}
 
-            if existing:
-                # Update existing video
-                for key, value in video_data.items():
-                    setattr(existing, key, value)
-                video_models.append(existing)
-            else:
-                # Create new video
-                video = Video(**video_data)
-                db.add(video)
-                video_models.append(video)
 
+async def background_search_task(job_id: int):
+    """Run a hashtag / term search job and cache its results in SearchHistory"""
+    from database import SessionLocal
+    db = SessionLocal()
+
+    try:
+        job = db.query(ScrapingJob).filter(ScrapingJob.id == job_id).first()
+        job.status = "running"
+        job.started_at = datetime.utcnow()
+        running_event = job_progress_event(job)
         db.commit()
+        events.broker.publish("job_progress", running_event)
 
-        # Update job status
+        query_type = job.job_type.replace("_search", "")
+        if job.platform == "tiktok":
+            async with TikTokScraper() as scraper:
+                search = scraper.search_hashtag if query_type == "hashtag" else scraper.search_term
+                videos_data = await search(job.query, job.total)
+        else:
+            scraper = YouTubeScraper()
+            search = scraper.search_hashtag if query_type == "hashtag" else scraper.search_term
+            videos_data = await search(job.query, job.total)
+
+        await asyncio.to_thread(save_search_results, db, videos_data)
+        video_ids = list(dict.fromkeys(v['id'] for v in videos_data))
+
+        db.add(SearchHistory(
+            query=job.query,
+            query_type=query_type,
+            platform=job.platform,
+            country=job.country,
+            results_count=len(video_ids),
+            video_ids=video_ids,
+            job_id=job.id
+        ))
         job.status = "completed"
-        job.progress = len(videos_data)
-        job.total = request.limit
+        job.progress = len(video_ids)
         job.completed_at = datetime.utcnow()
+        completed_event = job_progress_event(job)
         db.commit()
+        events.broker.publish("job_progress", completed_event)
 
-        # Log search history
-        search_history = SearchHistory(
-            query=request.query,
-            query_type="hashtag",
-            platform=request.platform,
-            country=request.country,
-            results_count=len(videos_data)
-        )
-        db.add(search_history)
-        db.commit()
+    except Exception as e:
+        logger.error(f"Search job {job_id} failed: {str(e)}")
+        db.rollback()
+        job = db.query(ScrapingJob).filter(ScrapingJob.id == job_id).first()
+        if job:
+            job.status = "failed"
+            job.error_message = str(e)
+            job.completed_at = datetime.utcnow()
+            failed_event = job_progress_event(job)
+            db.commit()
+            events.broker.publish("job_progress", failed_event)
+    finally:
+        db.close()
 
-        return video_models
 
-    except Exception as e:
-        job.status = "failed"
-        job.error_message = str(e)
-        job.completed_at = datetime.utcnow()
-        db.commit()
-        raise HTTPException(status_code=500, detail=str(e))
+@app.post("/api/search/hashtag")
+async def search_hashtag(
+    request: SearchRequest,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db)
+):
+    """
+    Search for videos by hashtag (background processing)
+
+    Returns a job_id straight away - poll /api/search/jobs/{job_id} (or follow /api/events)
+    and page through /api/search/jobs/{job_id}/results. Repeat searches within
+    SEARCH_CACHE_TTL_MINUTES return the earlier completed job with cached=true.
+    """
+    return submit_search(request, "hashtag", background_tasks, db)
 
 
-@app.post("/api/search/term", response_model=List[VideoResponse])
+@app.post("/api/search/term")
 async def search_term(
     request: SearchRequest,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
 ):
-    """Search for videos by search term"""
+    """Search for videos by search term (background processing, same flow as /api/search/hashtag)"""
+    return submit_search(request, "term", background_tasks, db)
 
-    try:
-        videos_data = []
 
-        if request.platform == "tiktok":
-            async with TikTokScraper() as scraper:
-                videos_data = await scraper.search_term(request.query, request.limit)
+@app.get("/api/search/jobs/{job_id}")
+async def get_search_job(job_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Get the status of a hashtag / term search job"""
 
-        elif request.platform == "youtube":
-            scraper = YouTubeScraper()
-            videos_data = await scraper.search_term(request.query, request.limit)
+    job = await db.get(ScrapingJob, job_id)
+    if not job or job.job_type not in ("hashtag_search", "term_search"):
+        raise HTTPException(status_code=404, detail="Search job not found")
 
-        else:
-            raise HTTPException(status_code=400, detail=f"Platform {request.platform} not supported")
+    return {
+        "job_id": job.id,
+        "job_type": job.job_type,
+        "platform": job.platform,
+        "query": job.query,
+        "country": job.country,
+        "status": job.status,
+        "progress": job.progress,
+        "total": job.total,
+        "error_message": job.error_message,
+        "started_at": job.started_at,
+        "completed_at": job.completed_at
+    }
 
-        # Save videos to database
-        video_models = []
-        for video_data in videos_data:
-            existing = db.query(Video).filter(
-                Video.id == video_data['id'],
-                Video.platform == video_data['platform']
-            ).first()
 
-            if existing:
-                for key, value in video_data.items():
-                    setattr(existing, key, value)
-                video_models.append(existing)
-            else:
-                video = Video(**video_data)
-                db.add(video)
-                video_models.append(video)
+@app.get("/api/search/jobs/{job_id}/results", response_model=SearchResultsResponse)
+async def get_search_job_results(
+    job_id: int,
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Page through a search job's videos in the order the platform returned them"""
 
-        db.commit()
+    job = await db.get(ScrapingJob, job_id)
+    if not job or job.job_type not in ("hashtag_search", "term_search"):
+        raise HTTPException(status_code=404, detail="Search job not found")
 
-        # Log search history
-        search_history = SearchHistory(
-            query=request.query,
-            query_type="term",
-            platform=request.platform,
-            country=request.country,
-            results_count=len(videos_data)
-        )
-        db.add(search_history)
-        db.commit()
+    video_ids = (await db.execute(
+        select(SearchHistory.video_ids).filter(SearchHistory.job_id == job_id)
+    )).scalar() or []
+    page_ids = video_ids[offset:offset + limit]
 
-        return video_models
+    videos_by_id = {
+        video.id: video
+        for video in (await db.execute(select(Video).filter(Video.id.in_(page_ids)))).scalars().all()
+    } if page_ids else {}
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "videos": [videos_by_id[video_id] for video_id in page_ids if video_id in videos_by_id],
+        "total": len(video_ids),
+        "limit": limit,
+        "offset": offset,
+        "has_more": (offset + limit) < len(video_ids)
+    }
 
 
 @app.get("/api/trending/audio", response_model=List[TrendingAudioResponse])
 async def get_trending_audio(
     country: str = Query("US", description="Country code (e.g., US, UK, IN)"),
     limit: int = Query(50, ge=1, le=100),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get trending audio/music by country"""
+    """Get trending audio/music by country (refreshed from TikTok when the country's TTL expires)"""
 
+    country = country.upper()
     try:
-        # Check if we have recent cached data (less than 1 hour old)
-        one_hour_ago = datetime.utcnow() - timedelta(hours=1)
-        cached_audio = db.query(TrendingAudio).filter(
-            TrendingAudio.country == country,
-            TrendingAudio.trending_date >= one_hour_ago
-        ).order_by(TrendingAudio.rank).limit(limit).all()
+        await trending_audio_store.store.ensure_fresh(db, country)
+        return await trending_audio_store.store.latest_chart(db, country, limit)
 
-        if cached_audio and len(cached_audio) >= limit:
-            return cached_audio
-
-        # Scrape fresh data
-        scraper = TrendingAudioScraper(country=country)
-        trending_data = await scraper.get_trending_audio(limit=limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-        # Save to database
-        audio_models = []
-        for audio_data in trending_data:
-            audio = TrendingAudio(**audio_data)
-            db.add(audio)
-            audio_models.append(audio)
 
-        db.commit()
-
-        return audio_models
+@app.get("/api/trending/audio/{music_id}/history")
+async def get_trending_audio_history(
+    music_id: str,
+    country: str = Query("US", description="Country code (e.g., US, UK, IN)"),
+    days: int = Query(30, ge=1, le=365),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Rank history of a trending audio - one entry per rank or video count change"""
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    history = await trending_audio_store.store.rank_history(
+        db, music_id, country.upper(), datetime.utcnow() - timedelta(days=days)
+    )
+    return [
+        {"rank": entry.rank, "total_videos": entry.total_videos, "recorded_at": entry.recorded_at}
+        for entry in history
+    ]
 
 
 @app.get("/api/videos")
@@ -317,13 +496,14 @@ async def get_videos(
     date_from: Optional[str] = None,
     date_to: Optional[str] = None,
     is_spark_ad: Optional[bool] = None,
+    q: Optional[str] = Query(None, description="Caption search - every word must match, results ranked by relevance"),
     limit: int = Query(50, ge=1, le=200),
     offset: int = Query(0, ge=0),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get videos from database with optional filtering"""
 
-    query = db.query(Video)
+    query = select(Video)
 
     # Apply filters
     if platform:
@@ -345,11 +525,17 @@ async def get_videos(
     if is_spark_ad is not None:
         query = query.filter(Video.is_spark_ad == is_spark_ad)
 
+    if q is not None:
+        return await search_videos(db, query, q, limit, offset)
+
     # Get total count before pagination
-    total = query.count()
+    total = (await db.execute(select(func.count()).select_from(query.subquery()))).scalar()
 
-    # Apply pagination
-    videos = query.order_by(Video.scraped_at.desc()).offset(offset).limit(limit).all()
+    # Pick the page's ids first (index-only on idx_scraped_at_id when unfiltered), then load those rows
+    newest_first = (Video.scraped_at.desc(), Video.id.desc())
+    page = query.with_only_columns(Video.id).order_by(*newest_first).offset(offset).limit(limit).subquery()
+    result = await db.execute(select(Video).join(page, Video.id == page.c.id).order_by(*newest_first))
+    videos = result.scalars().all()
 
     # Return with pagination metadata
     return {
@@ -361,6 +547,48 @@ async def get_videos(
     }
 
 
+async def search_videos(db: AsyncSession, query, q: str, limit: int, offset: int):
+    """Caption full-text search for /api/videos - most relevant first, with highlighted excerpts"""
+    if not caption_search.query_words(q):
+        return {"videos": [], "total": 0, "limit": limit, "offset": offset, "has_more": False}
+
+    dialect = db.bind.dialect.name
+    query, score = caption_search.apply_search(query, q, dialect)
+
+    total = (await db.execute(select(func.count()).select_from(query.subquery()))).scalar()
+
+    # Rank on ids only, then load and highlight just this page
+    page = (await db.execute(
+        query.with_only_columns(Video.id, score.label('score'))
+        .order_by(score.desc(), Video.scraped_at.desc())
+        .offset(offset).limit(limit)
+    )).all()
+    video_ids = [row.id for row in page]
+
+    videos_by_id = {
+        video.id: video
+        for video in (await db.execute(select(Video).filter(Video.id.in_(video_ids)))).scalars().all()
+    }
+    excerpts = await caption_search.highlights(db, q, dialect, video_ids)
+
+    videos = [
+        {
+            **jsonable_encoder(videos_by_id[row.id]),
+            "search_rank": round(float(row.score), 6),
+            "caption_highlight": excerpts.get(row.id)
+        }
+        for row in page if row.id in videos_by_id
+    ]
+
+    return {
+        "videos": videos,
+        "total": total,
+        "limit": limit,
+        "offset": offset,
+        "has_more": (offset + limit) < total
+    }
+
+
 @app.get("/api/videos/{video_id}", response_model=VideoResponse)
 async def get_video(video_id: str, db: Session = Depends(get_db)):
     """Get a specific video by ID"""
@@ -373,6 +601,39 @@ async def get_video(video_id: str, db: Session = Depends(get_db)):
     return video
 
 
+@app.get("/api/videos/{video_id}/growth")
+async def get_video_growth(
+    video_id: str,
+    days: int = Query(30, ge=1, le=365),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Daily growth of a video from its snapshots, spread over the days missed between scrapes"""
+
+    exists = (await db.execute(select(Video.id).filter(Video.id == video_id))).first()
+    if not exists:
+        raise HTTPException(status_code=404, detail="Video not found")
+
+    end_date = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    start_date = end_date - timedelta(days=days)
+
+    rows = (await db.execute(growth.daily_growth_query([video_id], start_date, end_date))).all()
+    daily_growth = growth.daily_growth(rows, start_date, end_date)
+
+    daily = []
+    current_date = start_date.date()
+    while current_date < end_date.date():
+        day_growth = daily_growth.get(current_date, {})
+        daily.append({
+            "date": current_date.strftime('%Y-%m-%d'),
+            "views_growth": day_growth.get("views", 0),
+            "likes_growth": day_growth.get("likes", 0),
+            "comments_growth": day_growth.get("comments", 0)
+        })
+        current_date += timedelta(days=1)
+
+    return {"video_id": video_id, "daily": daily}
+
+
 @app.patch("/api/videos/{video_id}/spark-ad")
 async def update_spark_ad_status(
     video_id: str,
@@ -401,19 +662,16 @@ async def update_spark_ad_status(
 @app.get("/api/creators")
 async def get_creators(
     platform: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get list of unique creators/authors from videos (only from active accounts)"""
 
-    from sqlalchemy import func
-
     # Join with Account table to filter by is_active
-    query = db.query(
+    query = select(
         Video.author_username,
         func.max(Video.author_nickname).label('author_nickname')
     ).join(
-        Account,
-        (Video.author_username == Account.username) & (Video.platform == Account.platform)
+        Account, Video.account_id == Account.id
     ).filter(
         Account.is_active == True  # Only show creators from active accounts
     ).group_by(Video.author_username)
@@ -421,7 +679,7 @@ async def get_creators(
     if platform:
         query = query.filter(Video.platform == platform)
 
-    creators = query.filter(Video.author_username.isnot(None)).all()
+    creators = (await db.execute(query.filter(Video.author_username.isnot(None)))).all()
 
     return [
         {
@@ -433,14 +691,17 @@ async def get_creators(
 
 
 @app.get("/api/stats")
-async def get_stats(db: Session = Depends(get_db)):
+async def get_stats(db: AsyncSession = Depends(get_async_db)):
     """Get overall statistics"""
 
-    total_videos = db.query(Video).count()
-    total_tiktok = db.query(Video).filter(Video.platform == "tiktok").count()
-    total_youtube = db.query(Video).filter(Video.platform == "youtube").count()
-    total_trending_audio = db.query(TrendingAudio).count()
-    total_hashtags = db.query(Hashtag).count()
+    # One statement: the per-platform counts come from the same pass over videos
+    total_videos, total_tiktok, total_youtube, total_trending_audio, total_hashtags = (await db.execute(select(
+        func.count(Video.id),
+        func.count(Video.id).filter(Video.platform == "tiktok"),
+        func.count(Video.id).filter(Video.platform == "youtube"),
+        select(func.count(TrendingAudio.id)).scalar_subquery(),
+        select(func.count(Hashtag.id)).scalar_subquery()
+    ))).one()
 
     return {
         "total_videos": total_videos,
@@ -456,50 +717,19 @@ async def get_stats(db: Session = Depends(get_db)):
 @app.get("/api/analytics/timeseries")
 async def get_analytics_timeseries(
     days: int = Query(7, ge=1, le=365),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get time series data for views, installs, and trials"""
-    from sqlalchemy import func
-    from datetime import date
 
     # Get date range
     end_date = datetime.utcnow().date()
     start_date = end_date - timedelta(days=days - 1)
 
-    # Query videos within date range
-    videos = db.query(Video).filter(
-        Video.posted_at >= datetime.combine(start_date, datetime.min.time())
-    ).all()
-
-    # Group by date
-    data_by_date = {}
-    for i in range(days):
-        current_date = start_date + timedelta(days=i)
-        data_by_date[current_date] = {
-            'views': 0,
-            'installs': 0,
-            'trial_started': 0
-        }
-
-    # Aggregate data
-    for video in videos:
-        video_date = (video.posted_at or video.scraped_at).date()
-        if video_date in data_by_date:
-            data_by_date[video_date]['views'] += video.views or 0
-            data_by_date[video_date]['installs'] += video.installs or 0
-            data_by_date[video_date]['trial_started'] += video.trial_started or 0
-
-    # Format response
-    result = []
-    for date_key in sorted(data_by_date.keys()):
-        result.append({
-            'date': date_key.strftime('%Y-%m-%d'),
-            'views': data_by_date[date_key]['views'],
-            'installs': data_by_date[date_key]['installs'],
-            'trial_started': data_by_date[date_key]['trial_started']
-        })
-
-    return result
+    # Per-day sums from the in-memory column store, or GROUP BY day while it loads
+    store = analytics_engine.get_loaded_store()
+    if store is None:
+        return await analytics_engine.sql_timeseries(db, start_date, days)
+    return store.timeseries(start_date, days)
 
 
 # In-memory cache for Mixpanel data (1 hour TTL)
@@ -583,6 +813,7 @@ async def get_trending_videos(
                 db.add(video)
                 video_models.append(video)
 
+        assign_account_ids(db, video_models)
         db.commit()
 
         return video_models
@@ -591,26 +822,30 @@ async def get_trending_videos(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def assign_account_ids(db: Session, videos: List[Video]):
+    """Set account_id on videos whose author is already a tracked account (one query per batch)"""
+    unlinked = [v for v in videos if v.account_id is None and v.author_username]
+    if not unlinked:
+        return
+
+    accounts = db.query(Account.id, Account.username, Account.platform).filter(
+        Account.username.in_({v.author_username for v in unlinked})
+    ).all()
+    account_ids = {(a.username, a.platform): a.id for a in accounts}
+
+    for video in unlinked:
+        video.account_id = account_ids.get((video.author_username, video.platform))
+
+
 def create_or_update_account(db: Session, video: Video):
     """Create or update account from video data"""
     if not video.author_username:
         return None
 
-    # Check if account exists
-    account = db.query(Account).filter(
-        Account.username == video.author_username,
-        Account.platform == video.platform
-    ).first()
-
-    if account:
-        # Update last_scraped and reactivate if deleted
-        account.last_scraped = datetime.utcnow()
-        account.avatar = video.author_avatar or account.avatar
-        account.nickname = video.author_nickname or account.nickname
-        account.is_active = True  # Reactivate account if it was deleted
-    else:
-        # Create new account
-        account = Account(
+    # Create the account unless it exists - ON CONFLICT on uq_accounts_username_platform, so concurrent
+    # ingests of the same new author can't both insert it
+    created = db.execute(
+        insert_ignore(db.get_bind(), Account.__table__).values(
             username=video.author_username,
             platform=video.platform,
             nickname=video.author_nickname,
@@ -622,64 +857,75 @@ def create_or_update_account(db: Session, video: Video):
             total_followers=0,
             is_active=True
         )
-        db.add(account)
+    ).rowcount
+    account = db.query(Account).filter(
+        Account.username == video.author_username,
+        Account.platform == video.platform
+    ).one()
 
-    db.commit()
-    db.refresh(account)
+    if not created:
+        # Update last_scraped and reactivate if deleted
+        account.last_scraped = datetime.utcnow()
+        account.avatar = video.author_avatar or account.avatar
+        account.nickname = video.author_nickname or account.nickname
+        account.is_active = True  # Reactivate account if it was deleted
 
-    # Refresh account stats
-    videos = db.query(Video).filter(
+    # Link this video and any earlier unlinked ones by the same author to the account - usually none, as
+    # ingestion links videos of known accounts. Set on the loaded rows rather than with a bulk UPDATE, so
+    # the analytics store applies them instead of going stale (analytics_engine._do_orm_execute)
+    video.account_id = account.id
+    for unlinked in db.query(Video).filter(
+        Video.account_id.is_(None),
         Video.author_username == account.username,
         Video.platform == account.platform
-    ).all()
+    ):
+        unlinked.account_id = account.id
+    db.flush()
 
-    account.total_videos = len(videos)
-    account.total_views = sum(v.views for v in videos)
-    account.total_likes = sum(v.likes for v in videos)
+    # Refresh account stats
+    account.total_videos, account.total_views, account.total_likes = db.query(
+        func.count(Video.id),
+        func.coalesce(func.sum(Video.views), 0),
+        func.coalesce(func.sum(Video.likes), 0)
+    ).filter(Video.account_id == account.id).one()
     db.commit()
 
     return account
 
 
-def save_video_snapshot(db: Session, video: Video):
-    """Save a daily snapshot of video metrics for growth tracking"""
-    from datetime import date as date_type
+def save_video_snapshots(db: Session, videos: List[Video]):
+    """
+    Save today's snapshot for a batch of videos (one query per batch instead of one per video).
+    Does not commit - callers commit once per batch.
+    """
+    if not videos:
+        return
 
     today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    video_ids = list({video.id for video in videos})
+
+    # Snapshots already taken today - growth is derived from the totals at read time (growth.py)
+    todays_snapshots = {
+        (snapshot.video_id, snapshot.platform): snapshot
+        for snapshot in db.query(VideoHistory).filter(
+            VideoHistory.video_id.in_(video_ids),
+            VideoHistory.snapshot_date >= today
+        ).all()
+    }
 
-    # Check if snapshot already exists for today
-    existing_snapshot = db.query(VideoHistory).filter(
-        VideoHistory.video_id == video.id,
-        VideoHistory.platform == video.platform,
-        VideoHistory.snapshot_date >= today
-    ).first()
-
-    if existing_snapshot:
-        # Update existing snapshot with latest data
-        existing_snapshot.views = video.views
-        existing_snapshot.likes = video.likes
-        existing_snapshot.comments = video.comments
-        existing_snapshot.shares = video.shares
-        existing_snapshot.saves = video.bookmarks or 0
-    else:
-        # Get yesterday's snapshot to calculate growth
-        yesterday = today - timedelta(days=1)
-        previous_snapshot = db.query(VideoHistory).filter(
-            VideoHistory.video_id == video.id,
-            VideoHistory.platform == video.platform,
-            VideoHistory.snapshot_date >= yesterday,
-            VideoHistory.snapshot_date < today
-        ).first()
-
-        # Calculate growth
-        views_growth = 0
-        likes_growth = 0
-        comments_growth = 0
-
-        if previous_snapshot:
-            views_growth = video.views - previous_snapshot.views
-            likes_growth = video.likes - previous_snapshot.likes
-            comments_growth = video.comments - previous_snapshot.comments
+    for video in videos:
+        key = (video.id, video.platform)
+        existing_snapshot = todays_snapshots.get(key)
+
+        if existing_snapshot:
+            # Update existing snapshot with latest data
+            existing_snapshot.views = video.views
+            existing_snapshot.likes = video.likes
+            existing_snapshot.comments = video.comments
+            existing_snapshot.shares = video.shares
+            existing_snapshot.saves = video.bookmarks or 0
+            metrics.SNAPSHOT_ROWS_WRITTEN.labels("updated").inc()
+            continue
 
         # Create new snapshot
         snapshot = VideoHistory(
@@ -690,14 +936,11 @@ def save_video_snapshot(db: Session, video: Video):
             comments=video.comments,
             shares=video.shares,
             saves=video.bookmarks or 0,
-            views_growth=max(0, views_growth),  # Ensure non-negative
-            likes_growth=max(0, likes_growth),
-            comments_growth=max(0, comments_growth),
             snapshot_date=today
         )
         db.add(snapshot)
-
-    db.commit()
+        metrics.SNAPSHOT_ROWS_WRITTEN.labels("inserted").inc()
+        todays_snapshots[key] = snapshot
 
 
 def normalize_url_or_username(input_str: str) -> str:
@@ -736,138 +979,414 @@ def normalize_url_or_username(input_str: str) -> str:
     return f'https://www.tiktok.com/@{username}'
 
 
-async def background_scrape_task(normalized_urls: List[str]):
-    """Background task for scraping URLs"""
+def get_default_collection(db: Session) -> Collection:
+    """Get or create the default collection"""
+    default_collection = db.query(Collection).filter(Collection.is_default == True).first()
+    if not default_collection:
+        default_collection = Collection(name="Default", is_default=True, description="All tracked videos")
+        db.add(default_collection)
+        db.commit()
+        db.refresh(default_collection)
+    return default_collection
+
+
+def find_recently_scraped(db: Session, urls: List[str], cutoff: datetime) -> Dict[str, List[str]]:
+    """
+    Return {url: video ids} for the URLs already scraped after `cutoff` - the others need scraping.
+    Matches earlier bulk-scrape items for the same URL, and single videos updated by any other path.
+    One query per table for every change_detection.BATCH_SIZE URLs.
+    """
+    found = {}
+    for start in range(0, len(urls), change_detection.BATCH_SIZE):
+        batch = urls[start:start + change_detection.BATCH_SIZE]
+
+        # Oldest first, so the latest completed item for a URL wins
+        for url, video_ids in db.query(ScrapingJobItem.url, ScrapingJobItem.video_ids).filter(
+            ScrapingJobItem.url.in_(batch),
+            ScrapingJobItem.status == 'completed',
+            ScrapingJobItem.completed_at >= cutoff
+        ).order_by(ScrapingJobItem.completed_at):
+            found[url] = video_ids or []
+
+        # Unchanged re-scrapes only touch last_seen_at
+        remaining = [url for url in batch if url not in found]
+        if remaining:
+            for url, video_id in db.query(Video.url, Video.id).filter(
+                Video.url.in_(remaining),
+                or_(Video.scraped_at >= cutoff, Video.last_seen_at >= cutoff)
+            ):
+                found.setdefault(url, [video_id])
+
+    return found
+
+
+def upsert_scraped_videos(db: Session, videos_data: List[dict], account_id: Optional[int] = None):
+    """
+    Write a batch of scraped videos and today's snapshots, without committing.
+    Videos whose content_hash matches the stored one only get last_seen_at touched (change_detection.py);
+    the rest are loaded with one query per 500 ids. New videos get `account_id` when given.
+    Returns (inserted and updated videos, {(id, platform): video_data} of every video in the batch,
+    keys of the unchanged videos).
+    """
+    # Drop internal fields and duplicates (the same video can come from a profile and a video URL)
+    batch = {}
+    for video_data in videos_data:
+        video_data = {k: v for k, v in video_data.items() if not k.startswith('_')}
+        batch[(video_data['id'], video_data['platform'])] = video_data
+
+    if not batch:
+        return [], batch, []
+
+    now = datetime.utcnow()
+    hashes = {key: change_detection.content_hash(video_data) for key, video_data in batch.items()}
+    stored = change_detection.stored_hashes(db, batch)
+    unchanged = [key for key in batch if key in stored and stored[key] == hashes[key]]
+    changed = [key for key in batch if key not in unchanged]
+
+    existing_videos = {}
+    changed_ids = [key[0] for key in changed if key in stored]
+    for start in range(0, len(changed_ids), change_detection.BATCH_SIZE):
+        for video in db.query(Video).filter(Video.id.in_(changed_ids[start:start + change_detection.BATCH_SIZE])):
+            existing_videos[(video.id, video.platform)] = video
+
+    videos = []
+    for key in changed:
+        video_data = batch[key]
+        video = existing_videos.get(key)
+        if video:
+            for field, value in video_data.items():
+                setattr(video, field, value)
+            metrics.VIDEO_ROWS_INGESTED.labels("updated").inc()
+        else:
+            video = Video(**video_data)
+            if account_id is not None and video.account_id is None:
+                video.account_id = account_id
+            db.add(video)
+            metrics.VIDEO_ROWS_INGESTED.labels("inserted").inc()
+        video.content_hash = hashes[key]
+        video.last_seen_at = now
+        videos.append(video)
+
+    change_detection.touch_last_seen(db, unchanged, now)
+    metrics.VIDEO_ROWS_INGESTED.labels("unchanged").inc(len(unchanged))
+
+    db.flush()
+
+    # Save daily snapshots for growth tracking - unchanged videos only need one if today has none yet
+    snapshot_videos = list(videos)
+    if unchanged:
+        today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        unchanged_ids = [key[0] for key in unchanged]
+        have_snapshot = {
+            (row.video_id, row.platform) for row in db.query(VideoHistory.video_id, VideoHistory.platform).filter(
+                VideoHistory.video_id.in_(unchanged_ids),
+                VideoHistory.snapshot_date >= today
+            )
+        }
+        missing = [key for key in unchanged if key not in have_snapshot]
+        if missing:
+            missing = set(missing)
+            snapshot_videos += [
+                video for video in db.query(Video).filter(Video.id.in_({key[0] for key in missing}))
+                if (video.id, video.platform) in missing
+            ]
+    save_video_snapshots(db, snapshot_videos)
+
+    return videos, batch, unchanged
+
+
+def write_scraped_videos(db: Session, videos_data: List[dict], collection_id: int) -> List[Video]:
+    """
+    Upsert a batch of scraped videos (upsert_scraped_videos) with their accounts and default collection links.
+    Commits once (plus one per new/updated account). Returns the inserted and updated videos.
+    """
+    videos, batch, unchanged = upsert_scraped_videos(db, videos_data)
+    if not batch:
+        return []
+    now = datetime.utcnow()
+
+    # Add to default collection if not already there (uq_video_collection)
+    db.execute(
+        insert_ignore(db.get_bind(), VideoCollection.__table__),
+        [{"video_id": video_id, "collection_id": collection_id} for video_id in {key[0] for key in batch}]
+    )
+
+    db.commit()
+
+    # Create or update accounts - once per author rather than once per video, only where videos changed
+    authors = {}
+    for video in videos:
+        if video.author_username:
+            authors.setdefault((video.author_username, video.platform), video)
+    for video in authors.values():
+        create_or_update_account(db, video)
+
+    # Authors whose videos were all unchanged were still scraped just now
+    seen_authors = {
+        (batch[key].get('author_username'), key[1]) for key in unchanged if batch[key].get('author_username')
+    } - set(authors)
+    for platform in {platform for _, platform in seen_authors}:
+        usernames = [username for username, author_platform in seen_authors if author_platform == platform]
+        db.execute(
+            update(Account.__table__)
+            .where(Account.__table__.c.platform == platform, Account.__table__.c.username.in_(usernames))
+            .values(last_scraped=now, is_active=True)
+        )
+    if seen_authors:
+        db.commit()
+
+    return videos
+
+
+def job_progress_event(job: ScrapingJob) -> dict:
+    """job_progress payload - same fields as GET /api/scrape/jobs/{job_id}"""
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "progress": job.progress,
+        "total": job.total,
+        "error_message": job.error_message,
+    }
+
+
+def job_item_event(item: ScrapingJobItem) -> dict:
+    """job_item payload - same fields as the urls entries of GET /api/scrape/jobs/{job_id}"""
+    return {
+        "job_id": item.job_id,
+        "url": item.url,
+        "status": item.status,
+        "videos_found": item.videos_found,
+        "error": item.error_message,
+        "completed_at": item.completed_at,
+    }
+
+
+def flush_url_scrape_results(db: Session, job_id: int, results: List[tuple], collection_id: int):
+    """
+    Write buffered (item_id, videos_data, error, done) scrape results and update item/job status.
+    Results with done=False are pages streamed in while the URL is still being scraped: their videos
+    are written and the item stays 'running' until its done=True result.
+    """
+    items = {
+        item.id: item
+        for item in db.query(ScrapingJobItem).filter(
+            ScrapingJobItem.id.in_([item_id for item_id, _, _, _ in results])
+        ).all()
+    }
+
+    write_errors = {}
+    try:
+        write_scraped_videos(db, [v for _, videos_data, _, _ in results for v in videos_data], collection_id)
+    except Exception as e:
+        # One bad row shouldn't fail the whole batch - retry URL by URL to isolate it
+        logger.error(f"Error writing scraped videos for job {job_id}, retrying per URL: {str(e)}")
+        db.rollback()
+        for item_id, videos_data, error, _ in results:
+            if error or not videos_data:
+                continue
+            try:
+                write_scraped_videos(db, videos_data, collection_id)
+            except Exception as item_error:
+                db.rollback()
+                write_errors[item_id] = str(item_error)
+
+    now = datetime.utcnow()
+    finished = 0
+    for item_id, videos_data, error, done in results:
+        item = items[item_id]
+        if item_id in write_errors:
+            # Remembered on the item so a later page of the same URL can't clear it
+            item.error_message = write_errors[item_id]
+        else:
+            item.video_ids = list(dict.fromkeys((item.video_ids or []) + [v['id'] for v in videos_data]))
+        item.videos_found = len(item.video_ids or [])
+        if not done:
+            item.status = 'running'
+            continue
+        error = error or item.error_message
+        item.status = 'failed' if error else 'completed'
+        item.error_message = error
+        item.completed_at = now
+        finished += 1
+
+    job = db.query(ScrapingJob).filter(ScrapingJob.id == job_id).first()
+    job.progress = (job.progress or 0) + finished
+
+    # Build the event payloads before commit expires the rows
+    payloads = [job_item_event(items[item_id]) for item_id, _, _, _ in results] + [job_progress_event(job)]
+    db.commit()
+
+    for payload in payloads[:-1]:
+        events.broker.publish("job_item", payload)
+    events.broker.publish("job_progress", payloads[-1])
+
+
+async def url_scrape_writer(db: Session, job_id: int, queue: asyncio.Queue, collection_id: int):
+    """
+    Single writer for a bulk scrape job: scrape workers put (item_id, videos_data, error, done) on the
+    queue and this coroutine writes them in batches of up to URL_SCRAPE_WRITE_BATCH videos - or whatever
+    has arrived once the oldest buffered result has waited URL_SCRAPE_WRITE_SECONDS.
+    """
+    loop = asyncio.get_running_loop()
+    buffer = []
+    buffered_videos = 0
+    flush_at = None
+    done = False
+
+    while not done:
+        timed_out = False
+        try:
+            timeout = None if flush_at is None else max(flush_at - loop.time(), 0)
+            result = await asyncio.wait_for(queue.get(), timeout)
+        except asyncio.TimeoutError:
+            timed_out = True
+        else:
+            metrics.QUEUE_DEPTH.labels("url_scrape_writer").dec()
+            if result is None:
+                done = True
+            else:
+                if not buffer:
+                    flush_at = loop.time() + URL_SCRAPE_WRITE_SECONDS
+                buffer.append(result)
+                buffered_videos += len(result[1])
+
+        # Flush when the batch is full, when its oldest result has waited long enough, or at the end
+        if buffer and (done or timed_out or buffered_videos >= URL_SCRAPE_WRITE_BATCH):
+            await asyncio.to_thread(flush_url_scrape_results, db, job_id, buffer, collection_id)
+            buffer = []
+            buffered_videos = 0
+            flush_at = None
+
+
+async def scrape_single_url(scraper: URLScraper, url: str,
+                            on_videos: Optional[Callable[[List[dict]], None]] = None) -> List[dict]:
+    """
+    Scrape a profile or video URL and return the video dicts.
+    With on_videos, profiles that page (Instagram) hand each page's videos to it as they arrive
+    (from a worker thread) and only the videos not already handed over are returned.
+    """
+    url_type = scraper.detect_url_type(url)
+
+    if url_type == 'profile':
+        streamed = set()
+        on_page = None
+        if on_videos:
+            def on_page(posts):
+                videos = [p for p in posts if p.get('_is_video', False)]
+                if videos:
+                    streamed.update(v['id'] for v in videos)
+                    on_videos(videos)
+        profile_data = await scraper.scrape_profile(url, limit=100, on_page=on_page)
+        return [v for v in profile_data.get('videos', []) if v['id'] not in streamed]
+    elif url_type == 'video':
+        return [await scraper.scrape_url(url)]
+
+    raise ValueError(f"Could not determine URL type for: {url}")
+
+
+@sql_profiler.profiled("bulk scrape job")
+async def background_scrape_task(job_id: int):
+    """
+    Background task for a bulk URL scraping job.
+    URLs scraped within the last URL_SCRAPE_DEDUPE_MINUTES are skipped, the rest are scraped
+    with at most URL_SCRAPE_CONCURRENCY in flight and written through a single batched writer.
+    """
     from database import SessionLocal
     db = SessionLocal()
 
     try:
-        results = []
-        errors = []
-
-        # Get or create default collection
-        default_collection = db.query(Collection).filter(Collection.is_default == True).first()
-        if not default_collection:
-            default_collection = Collection(name="Default", is_default=True, description="All tracked videos")
-            db.add(default_collection)
-            db.commit()
-            db.refresh(default_collection)
+        job = db.query(ScrapingJob).filter(ScrapingJob.id == job_id).first()
+        job.status = "running"
+        job.started_at = datetime.utcnow()
+        running_event = job_progress_event(job)
+        db.commit()
+        events.broker.publish("job_progress", running_event)
+
+        default_collection = get_default_collection(db)
+        items = db.query(ScrapingJobItem).filter(ScrapingJobItem.job_id == job_id).all()
+
+        # Skip URLs that were scraped recently - looked up off the event loop, in one pass for the job
+        cutoff = datetime.utcnow() - timedelta(minutes=URL_SCRAPE_DEDUPE_MINUTES)
+        recently_scraped = await asyncio.to_thread(find_recently_scraped, db, [item.url for item in items], cutoff)
+        pending = []
+        skipped_events = []
+        for item in items:
+            video_ids = recently_scraped.get(item.url)
+            if video_ids is None:
+                pending.append((item.id, item.url))
+                continue
+            item.status = 'skipped'
+            item.video_ids = video_ids
+            item.videos_found = len(video_ids)
+            item.completed_at = datetime.utcnow()
+            job.progress = (job.progress or 0) + 1
+            skipped_events.append(job_item_event(item))
+        skipped_events.append(job_progress_event(job))
+        db.commit()
+        for payload in skipped_events[:-1]:
+            events.broker.publish("job_item", payload)
+        events.broker.publish("job_progress", skipped_events[-1])
+
+        queue = asyncio.Queue()
+        semaphore = asyncio.Semaphore(URL_SCRAPE_CONCURRENCY)
 
         # URLScraper will automatically use RAPIDAPI_KEY_INSTAGRAM and RAPIDAPI_KEY_TIKTOK
         async with URLScraper(rapidapi_key=None) as scraper:
-            for url in normalized_urls:
-                try:
-                    # Detect if this is a profile or video URL
-                    url_type = scraper.detect_url_type(url)
-
-                    if url_type == 'profile':
-                        # Scrape all videos from profile
-                        profile_data = await scraper.scrape_profile(url, limit=100)
-
-                        # Save all videos from profile to database (batched for performance)
-                        for video_data in profile_data['videos']:
-                            # Remove internal fields that aren't part of the Video model
-                            video_data.pop('_is_video', None)
-
-                            existing = db.query(Video).filter(
-                                Video.id == video_data['id'],
-                                Video.platform == video_data['platform']
-                            ).first()
-
-                            if existing:
-                                # Update existing
-                                for key, value in video_data.items():
-                                    setattr(existing, key, value)
-                                results.append(existing)
-                            else:
-                                # Create new
-                                video = Video(**video_data)
-                                db.add(video)
-                                results.append(video)
-
-                        # Batch commit all video updates/inserts
-                        db.commit()
-
-                        # Process post-video operations
-                        for video in results:
-                            # Save daily snapshot for growth tracking
-                            save_video_snapshot(db, video)
-
-                            # Create or update account
-                            account = create_or_update_account(db, video)
-
-                            # Add to default collection if not already there
-                            existing_vc = db.query(VideoCollection).filter(
-                                VideoCollection.video_id == video.id,
-                                VideoCollection.collection_id == default_collection.id
-                            ).first()
-
-                            if not existing_vc:
-                                vc = VideoCollection(video_id=video.id, collection_id=default_collection.id)
-                                db.add(vc)
-
-                        # Final commit for snapshots and collections
-                        db.commit()
-
-                    elif url_type == 'video':
-                        # Scrape single video
-                        video_data = await scraper.scrape_url(url)
-
-                        # Remove internal fields that aren't part of the Video model
-                        video_data.pop('_is_video', None)
-
-                        # Save to database
-                        existing = db.query(Video).filter(
-                            Video.id == video_data['id'],
-                            Video.platform == video_data['platform']
-                        ).first()
-
-                        if existing:
-                            # Update existing
-                            for key, value in video_data.items():
-                                setattr(existing, key, value)
-                            db.commit()
-                            results.append(existing)
-                        else:
-                            # Create new
-                            video = Video(**video_data)
-                            db.add(video)
-                            db.commit()
-                            results.append(video)
-
-                        # Create or update account
-                        account = create_or_update_account(db, results[-1])
-
-                        # Add to default collection if not already there
-                        existing_vc = db.query(VideoCollection).filter(
-                            VideoCollection.video_id == results[-1].id,
-                            VideoCollection.collection_id == default_collection.id
-                        ).first()
-
-                        if not existing_vc:
-                            vc = VideoCollection(video_id=results[-1].id, collection_id=default_collection.id)
-                            db.add(vc)
-                            db.commit()
-                    else:
-                        raise ValueError(f"Could not determine URL type for: {url}")
-
-                except Exception as e:
-                    import traceback
-                    error_details = {
-                        "url": url,
-                        "error": str(e),
-                        "traceback": traceback.format_exc()
-                    }
-                    print(f"ERROR scraping {url}: {str(e)}")
-                    print(f"Traceback: {traceback.format_exc()}")
-                    errors.append(error_details)
-
-        print(f"Background scraping completed. Results: {len(results)}, Errors: {len(errors)}")
+            writer = asyncio.create_task(url_scrape_writer(db, job_id, queue, default_collection.id))
+
+            loop = asyncio.get_running_loop()
+
+            def enqueue(result):
+                queue.put_nowait(result)
+                metrics.QUEUE_DEPTH.labels("url_scrape_writer").inc()
+
+            async def scrape_item(item_id: int, url: str):
+                async with semaphore:
+                    metrics.QUEUE_DEPTH.labels("url_scrape_pending").dec()
+
+                    # Pages arrive on the scraper's worker thread - hand them to the loop
+                    def on_videos(videos):
+                        loop.call_soon_threadsafe(enqueue, (item_id, videos, None, False))
+
+                    try:
+                        videos_data = await scrape_single_url(scraper, url, on_videos=on_videos)
+                        enqueue((item_id, videos_data, None, True))
+                    except Exception as e:
+                        logger.error(f"Error scraping {url}: {str(e)}")
+                        enqueue((item_id, [], str(e), True))
+
+            metrics.QUEUE_DEPTH.labels("url_scrape_pending").inc(len(pending))
+            await asyncio.gather(*(scrape_item(item_id, url) for item_id, url in pending))
+
+            enqueue(None)
+            await writer
+
+        db.expire_all()
+        job = db.query(ScrapingJob).filter(ScrapingJob.id == job_id).first()
+        failed = db.query(func.count(ScrapingJobItem.id)).filter(
+            ScrapingJobItem.job_id == job_id,
+            ScrapingJobItem.status == 'failed'
+        ).scalar()
+        job.status = "completed"
+        job.error_message = f"{failed} of {job.total} URLs failed" if failed else None
+        job.completed_at = datetime.utcnow()
+        completed_event = job_progress_event(job)
+        db.commit()
+        events.broker.publish("job_progress", completed_event)
+
+        logger.info(f"Bulk scrape job {job_id} completed: {len(pending)} scraped, {len(items) - len(pending)} skipped, {failed} failed")
 
     except Exception as e:
-        print(f"Background scraping error: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.error(f"Bulk scrape job {job_id} failed: {str(e)}")
+        db.rollback()
+        job = db.query(ScrapingJob).filter(ScrapingJob.id == job_id).first()
+        if job:
+            job.status = "failed"
+            job.error_message = str(e)
+            job.completed_at = datetime.utcnow()
+            failed_event = job_progress_event(job)
+            db.commit()
+            events.broker.publish("job_progress", failed_event)
     finally:
         db.close()
 
@@ -885,67 +1404,117 @@ async def scrape_urls(
     - Usernames: username or @username (defaults to TikTok)
     - Platform prefix: instagram:username or tiktok:username
 
-    Returns immediately and processes scraping in background.
+    Returns immediately with a job_id - poll /api/scrape/jobs/{job_id} for per-URL status.
     """
 
     if not request.urls:
         raise HTTPException(status_code=400, detail="No URLs provided")
 
-    # Normalize all inputs to full URLs
-    normalized_urls = [normalize_url_or_username(url) for url in request.urls]
+    # Normalize all inputs to full URLs (duplicates in the same request are scraped once)
+    normalized_urls = list(dict.fromkeys(normalize_url_or_username(url) for url in request.urls if url.strip()))
+
+    job = ScrapingJob(
+        job_type="url_scrape",
+        platform="mixed",
+        status="pending",
+        progress=0,
+        total=len(normalized_urls)
+    )
+    db.add(job)
+    db.flush()
+    db.add_all([ScrapingJobItem(job_id=job.id, url=url, status='pending') for url in normalized_urls])
+    db.commit()
 
     # Add background task
-    background_tasks.add_task(background_scrape_task, normalized_urls)
+    background_tasks.add_task(background_scrape_task, job.id)
 
     # Return immediately
     return {
         "message": "Scraping started in background",
+        "job_id": job.id,
         "urls": normalized_urls,
         "status": "processing"
     }
 
 
-def apply_collection_filter(query, collection_id: int, db: Session):
-    """Helper function to filter videos by collection"""
-    if not collection_id:
-        return query
+@app.get("/api/scrape/jobs/{job_id}")
+async def get_scrape_job(job_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Get the status of a bulk URL scraping job and each of its URLs"""
 
-    # Get account IDs in the collection
-    account_ids = db.query(AccountCollection.account_id).filter(
-        AccountCollection.collection_id == collection_id
-    ).all()
-    account_ids_list = [aid[0] for aid in account_ids]
+    job = await db.get(ScrapingJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
 
-    # Get accounts
-    accounts = db.query(Account).filter(Account.id.in_(account_ids_list)).all()
-    account_usernames = [acc.username for acc in accounts]
+    items = (await db.execute(
+        select(ScrapingJobItem).filter(ScrapingJobItem.job_id == job_id).order_by(ScrapingJobItem.id)
+    )).scalars().all()
 
-    # Filter videos by author username
-    if account_usernames:
-        query = query.filter(Video.author_username.in_(account_usernames))
-    else:
-        # No accounts in collection, return empty result
-        query = query.filter(Video.id == None)
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "progress": job.progress,
+        "total": job.total,
+        "error_message": job.error_message,
+        "started_at": job.started_at,
+        "completed_at": job.completed_at,
+        "urls": [
+            {
+                "url": item.url,
+                "status": item.status,
+                "videos_found": item.videos_found,
+                "error": item.error_message,
+                "completed_at": item.completed_at
+            }
+            for item in items
+        ]
+    }
 
-    return query
 
+@app.get("/api/scrape/jobs/{job_id}/videos", response_model=List[URLScrapeResponse])
+async def get_scrape_job_videos(job_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Get the videos scraped (or reused from a recent scrape) by a bulk URL scraping job"""
 
-@app.get("/api/analytics/overview")
-async def get_analytics_overview(
-    days: int = Query(7, ge=1, le=365),
-    metric_type: str = Query("total", regex="^(total|organic|ads)$"),
-    platform: str = Query(None),
-    collection_id: int = Query(None),
-    db: Session = Depends(get_db)
-):
-    """Get analytics overview for metrics cards - shows ALL videos' current stats"""
+    job = await db.get(ScrapingJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    items = (await db.execute(
+        select(ScrapingJobItem.video_ids).filter(ScrapingJobItem.job_id == job_id)
+    )).scalars().all()
+    video_ids = list(dict.fromkeys(video_id for ids in items for video_id in (ids or [])))
+
+    if not video_ids:
+        return []
+
+    videos = (await db.execute(
+        select(Video).filter(Video.id.in_(video_ids)).order_by(Video.views.desc())
+    )).scalars().all()
+
+    return videos
+
+
+def apply_collection_filter(query, collection_id: int):
+    """
+    Helper function to filter videos by collection.
+    Works on both ORM queries and select() statements - the collection's accounts
+    are resolved in a subquery so no extra DB round trip is needed.
+    """
+    if not collection_id:
+        return query
+
+    # Accounts in the collection (empty collection -> empty result)
+    account_ids = select(AccountCollection.account_id).filter(
+        AccountCollection.collection_id == collection_id
+    )
+
+    # Filter videos by owning account
+    return query.filter(Video.account_id.in_(account_ids))
 
-    # Don't filter by date for overview - show all videos' current cumulative stats
-    # The date filter only affects the historical growth chart
-    query = db.query(Video)
 
+def apply_analytics_filters(query, metric_type: str, platform: Optional[str], collection_id: Optional[int]):
+    """Apply the collection, platform and organic/ads filters shared by the analytics endpoints"""
     # Apply collection filter
-    query = apply_collection_filter(query, collection_id, db)
+    query = apply_collection_filter(query, collection_id)
 
     # Apply platform filter
     if platform:
@@ -959,15 +1528,118 @@ async def get_analytics_overview(
         query = query.filter(Video.is_spark_ad == True)
     # metric_type == "total" means no filter
 
-    # Use SQL aggregations instead of loading all videos into memory
-    # This is much faster and reduces memory usage
-    aggregates = query.with_entities(
+    return query
+
+
+async def get_analytics_filter(db: AsyncSession, metric_type: str, platform: Optional[str],
+                               collection_id: Optional[int]) -> analytics_engine.AnalyticsFilter:
+    """Same filters as apply_analytics_filters, for the in-memory analytics store"""
+    account_ids = None
+    if collection_id:
+        account_ids = (await db.execute(
+            select(AccountCollection.account_id).filter(AccountCollection.collection_id == collection_id)
+        )).scalars().all()
+
+    return analytics_engine.AnalyticsFilter(metric_type, platform, account_ids)
+
+
+# Queries of the analytics endpoints, built here so test_query_plans.py can EXPLAIN the same statements
+
+def overview_query(metric_type: str, platform: Optional[str], collection_id: Optional[int]):
+    """Summed stats of every matching video"""
+    query = select(
         func.sum(Video.views).label('total_views'),
         func.sum(Video.likes).label('total_likes'),
         func.sum(Video.comments).label('total_comments'),
         func.sum(Video.shares).label('total_shares'),
         func.sum(func.coalesce(Video.bookmarks, 0)).label('total_bookmarks')
-    ).first()
+    )
+    return apply_analytics_filters(query, metric_type, platform, collection_id)
+
+
+def views_over_time_query(start_date: datetime, end_date: datetime, metric_type: str,
+                          platform: Optional[str], collection_id: Optional[int]):
+    """(day, views posted up to that day) for the days in range with new videos"""
+    # Views per posting day, summed up to each day in the database
+    day = analytics_engine.posted_day().label('day')
+    daily = select(day, func.sum(Video.views).label('views')).filter(
+        Video.posted_at.isnot(None),
+        Video.posted_at >= start_date,
+        Video.posted_at <= end_date
+    )
+    daily = apply_analytics_filters(daily, metric_type, platform, collection_id).group_by(day).subquery()
+
+    return select(
+        daily.c.day,
+        func.sum(func.coalesce(daily.c.views, 0)).over(order_by=daily.c.day)
+    )
+
+
+def most_viral_query(start_date: datetime, end_date: datetime, limit: int, metric_type: str,
+                     platform: Optional[str], collection_id: Optional[int]):
+    """Top `limit` videos posted in range by views - ranked by engagement rate afterwards"""
+    query = select(Video).filter(
+        Video.posted_at.isnot(None),
+        Video.posted_at >= start_date,
+        Video.posted_at <= end_date
+    )
+    query = apply_analytics_filters(query, metric_type, platform, collection_id)
+    return query.order_by(Video.views.desc()).limit(limit)
+
+
+def tracked_videos_query(metric_type: str, platform: Optional[str], collection_id: Optional[int]):
+    """Ids of the videos whose snapshots historical-growth (and -split) sums - used as a subquery"""
+    video_query = select(Video.id)
+
+    # Apply collection filter
+    if collection_id:
+        video_ids_in_collection = select(VideoCollection.video_id).filter(
+            VideoCollection.collection_id == collection_id
+        )
+        video_query = video_query.filter(Video.id.in_(video_ids_in_collection))
+
+    # Apply platform filter
+    if platform:
+        platforms = [p.strip().lower() for p in platform.split(',')]
+        video_query = video_query.filter(Video.platform.in_(platforms))
+
+    # Apply metric type filter
+    if metric_type == "organic":
+        video_query = video_query.filter(Video.is_spark_ad == False)
+    elif metric_type == "ads":
+        video_query = video_query.filter(Video.is_spark_ad == True)
+
+    return video_query
+
+
+@app.get("/api/events")
+async def stream_events(request: Request, job_id: Optional[int] = Query(None)):
+    """
+    Server-Sent Events: job_progress / job_item for bulk scrape jobs (only job_id's if given),
+    daily_scrape progress and data_version whenever tracked data changes.
+    """
+    return StreamingResponse(
+        events.event_stream(request, job_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/api/analytics/overview")
+async def get_analytics_overview(
+    days: int = Query(7, ge=1, le=365),
+    metric_type: str = Query("total", regex="^(total|organic|ads)$"),
+    platform: str = Query(None),
+    collection_id: int = Query(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get analytics overview for metrics cards - shows ALL videos' current stats"""
+
+    # Don't filter by date for overview - show all videos' current cumulative stats
+    # The date filter only affects the historical growth chart
+    # Use SQL aggregations instead of loading all videos into memory
+    # This is much faster and reduces memory usage
+    aggregates = (await db.execute(overview_query(metric_type, platform, collection_id))).first()
 
     if not aggregates or aggregates.total_views is None:
         return {
@@ -1003,7 +1675,7 @@ async def get_views_over_time(
     metric_type: str = Query("total", regex="^(total|organic|ads)$"),
     platform: str = Query(None),
     collection_id: int = Query(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get cumulative views over time based on video posted dates"""
 
@@ -1011,65 +1683,26 @@ async def get_views_over_time(
     end_date = datetime.utcnow()
     start_date = end_date - timedelta(days=days)
 
-    # Get videos with posted_at dates within the specified range
-    query = db.query(Video).filter(
-        Video.posted_at.isnot(None),
-        Video.posted_at >= start_date,
-        Video.posted_at <= end_date
-    )
-
-    # Apply collection filter
-    query = apply_collection_filter(query, collection_id, db)
+    # Views per posting day, summed up to each day in the database
+    rows = (await db.execute(
+        views_over_time_query(start_date, end_date, metric_type, platform, collection_id)
+    )).all()
 
-    # Apply platform filter
-    if platform:
-        platforms = [p.strip().lower() for p in platform.split(',')]
-        query = query.filter(Video.platform.in_(platforms))
-
-    # Apply metric type filter
-    if metric_type == "organic":
-        query = query.filter(Video.is_spark_ad == False)
-    elif metric_type == "ads":
-        query = query.filter(Video.is_spark_ad == True)
-
-    videos = query.order_by(Video.posted_at).all()
-
-    if not videos:
+    if not rows:
         return []
 
-    # Use the query date range instead of finding from data
-    earliest_date = start_date
-    latest_date = end_date
-
-    # Generate all dates in the range
-    from datetime import date as date_type
-    current_date = earliest_date.date()
-    end_date = latest_date.date()
+    cumulative_by_date = {analytics_engine.parse_day(row[0]): int(row[1]) for row in rows}
 
+    # Carry the running total over days without new videos
     cumulative_data = []
     cumulative_views = 0
-    videos_by_date = {}
-
-    # Group videos by posted date
-    for video in videos:
-        if video.posted_at:
-            date_key = video.posted_at.date()
-            if date_key not in videos_by_date:
-                videos_by_date[date_key] = []
-            videos_by_date[date_key].append(video)
-
-    # Calculate cumulative views for each date
-    while current_date <= end_date:
-        # Add views from videos posted on this date
-        if current_date in videos_by_date:
-            for video in videos_by_date[current_date]:
-                cumulative_views += video.views
-
+    current_date = start_date.date()
+    while current_date <= end_date.date():
+        cumulative_views = cumulative_by_date.get(current_date, cumulative_views)
         cumulative_data.append({
             "date": current_date.strftime('%Y-%m-%d'),
             "views": cumulative_views
         })
-
         current_date += timedelta(days=1)
 
     return cumulative_data
@@ -1081,7 +1714,7 @@ async def get_historical_growth(
     metric_type: str = Query("total", regex="^(total|organic|ads)$"),
     platform: str = Query(None),
     collection_id: int = Query(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get true daily growth data from historical snapshots.
@@ -1092,45 +1725,15 @@ async def get_historical_growth(
     end_date = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
     start_date = end_date - timedelta(days=days)
 
-    # Get video IDs to track based on filters
-    video_query = db.query(Video.id)
-
-    # Apply collection filter
-    if collection_id:
-        video_ids_in_collection = db.query(VideoCollection.video_id).filter(
-            VideoCollection.collection_id == collection_id
-        ).all()
-        video_ids = [v[0] for v in video_ids_in_collection]
-        video_query = video_query.filter(Video.id.in_(video_ids))
+    # Videos to track based on filters, as a subquery of both queries below
+    tracked_videos = tracked_videos_query(metric_type, platform, collection_id)
 
-    # Apply platform filter
-    if platform:
-        platforms = [p.strip().lower() for p in platform.split(',')]
-        video_query = video_query.filter(Video.platform.in_(platforms))
+    # Snapshot totals per day
+    totals_rows = (await db.execute(growth.daily_totals_query(tracked_videos, start_date, end_date))).all()
 
-    # Apply metric type filter
-    if metric_type == "organic":
-        video_query = video_query.filter(Video.is_spark_ad == False)
-    elif metric_type == "ads":
-        video_query = video_query.filter(Video.is_spark_ad == True)
-
-    tracked_video_ids = [v[0] for v in video_query.all()]
-
-    if not tracked_video_ids:
-        return []
-
-    # Query historical snapshots
-    snapshots = db.query(VideoHistory).filter(
-        VideoHistory.video_id.in_(tracked_video_ids),
-        VideoHistory.snapshot_date >= start_date,
-        VideoHistory.snapshot_date <= end_date
-    ).order_by(VideoHistory.snapshot_date).all()
-
-    if not snapshots:
+    if not totals_rows:
         return []
 
-    # Group snapshots by date and aggregate
-    from collections import defaultdict
     daily_data = defaultdict(lambda: {
         'views': 0,
         'views_growth': 0,
@@ -1141,17 +1744,15 @@ async def get_historical_growth(
         'shares': 0,
         'saves': 0
     })
+    for date_key, totals in growth.daily_totals(totals_rows).items():
+        daily_data[date_key].update(totals)
 
-    for snapshot in snapshots:
-        date_key = snapshot.snapshot_date.date()
-        daily_data[date_key]['views'] += snapshot.views
-        daily_data[date_key]['views_growth'] += snapshot.views_growth
-        daily_data[date_key]['likes'] += snapshot.likes
-        daily_data[date_key]['likes_growth'] += snapshot.likes_growth
-        daily_data[date_key]['comments'] += snapshot.comments
-        daily_data[date_key]['comments_growth'] += snapshot.comments_growth
-        daily_data[date_key]['shares'] += snapshot.shares
-        daily_data[date_key]['saves'] += snapshot.saves
+    # Growth between snapshots, spread over the days a gap in scraping covers
+    growth_end = end_date + timedelta(days=1)
+    growth_rows = (await db.execute(growth.daily_growth_query(tracked_videos, start_date, growth_end))).all()
+    for date_key, day_growth in growth.daily_growth(growth_rows, start_date, growth_end).items():
+        for metric, value in day_growth.items():
+            daily_data[date_key][f'{metric}_growth'] += value
 
     # Generate complete date range
     result = []
@@ -1193,7 +1794,7 @@ async def get_historical_growth_split(
     days: int = Query(30, ge=1, le=365),
     platform: str = Query(None),
     collection_id: int = Query(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get historical growth data split by organic vs spark ads.
@@ -1204,63 +1805,32 @@ async def get_historical_growth_split(
     end_date = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
     start_date = end_date - timedelta(days=days)
 
-    # Helper function to get data for a specific type
-    def get_data_for_type(is_spark_ad_filter):
-        video_query = db.query(Video.id)
-
-        # Apply collection filter
-        if collection_id:
-            video_ids_in_collection = db.query(VideoCollection.video_id).filter(
-                VideoCollection.collection_id == collection_id
-            ).all()
-            video_ids = [v[0] for v in video_ids_in_collection]
-            video_query = video_query.filter(Video.id.in_(video_ids))
-
-        # Apply platform filter
-        if platform:
-            platforms = [p.strip().lower() for p in platform.split(',')]
-            video_query = video_query.filter(Video.platform.in_(platforms))
-
-        # Apply spark ad filter
-        video_query = video_query.filter(Video.is_spark_ad == is_spark_ad_filter)
-
-        tracked_video_ids = [v[0] for v in video_query.all()]
-
-        if not tracked_video_ids:
-            return []
-
-        # Query historical snapshots
-        snapshots = db.query(VideoHistory).filter(
-            VideoHistory.video_id.in_(tracked_video_ids),
-            VideoHistory.snapshot_date >= start_date,
-            VideoHistory.snapshot_date <= end_date
-        ).order_by(VideoHistory.snapshot_date).all()
+    # Helper function to get data for a specific type ("organic" or "ads")
+    async def get_data_for_type(metric_type):
+        tracked_videos = tracked_videos_query(metric_type, platform, collection_id)
 
-        from collections import defaultdict
-        daily_data = defaultdict(lambda: {'views_growth': 0})
+        # Sum up TOTAL VIEWS of the snapshots for each day (not growth)
+        rows = (await db.execute(
+            growth.daily_totals_query(tracked_videos, start_date, end_date, metrics=("views",))
+        )).all()
 
-        if not snapshots:
+        if not rows:
             # FALLBACK: If no historical snapshots exist, use posted_at date and current views
             # This provides a temporary visualization until historical data is compiled
             # Use current time (not midnight) to include videos posted today
             current_time = datetime.utcnow()
-            videos = db.query(Video).filter(
-                Video.id.in_(tracked_video_ids),
+            posted_day = func.date(Video.posted_at)
+            rows = (await db.execute(select(posted_day, func.sum(Video.views)).filter(
+                Video.id.in_(tracked_videos),
                 Video.posted_at.isnot(None),
                 Video.posted_at >= start_date,
                 Video.posted_at <= current_time
-            ).all()
+            ).group_by(posted_day))).all()
 
-            # Group videos by their posted_at date and sum their current views
-            for video in videos:
-                date_key = video.posted_at.date()
-                daily_data[date_key]['views_growth'] += video.views
-        else:
-            # Use historical snapshots (normal behavior)
-            # Sum up TOTAL VIEWS for each day (not growth)
-            for snapshot in snapshots:
-                date_key = snapshot.snapshot_date.date()
-                daily_data[date_key]['views_growth'] += snapshot.views
+        daily_data = {
+            date_key: {'views_growth': totals['views']}
+            for date_key, totals in growth.daily_totals(rows, metrics=("views",)).items()
+        }
 
         # Generate complete date range
         result = []
@@ -1278,8 +1848,8 @@ async def get_historical_growth_split(
         return result
 
     # Get organic and spark ad data separately
-    organic_data = get_data_for_type(False)
-    spark_ad_data = get_data_for_type(True)
+    organic_data = await get_data_for_type("organic")
+    spark_ad_data = await get_data_for_type("ads")
 
     return {
         'organic': organic_data,
@@ -1294,7 +1864,7 @@ async def get_most_viral_videos(
     metric_type: str = Query("total", regex="^(total|organic|ads)$"),
     platform: str = Query(None),
     collection_id: int = Query(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get most viral videos based on engagement rate"""
 
@@ -1303,27 +1873,9 @@ async def get_most_viral_videos(
     start_date = end_date - timedelta(days=days)
 
     # Query videos in date range
-    query = db.query(Video).filter(
-        Video.posted_at.isnot(None),
-        Video.posted_at >= start_date,
-        Video.posted_at <= end_date
-    )
-
-    # Apply collection filter
-    query = apply_collection_filter(query, collection_id, db)
-
-    # Apply platform filter
-    if platform:
-        platforms = [p.strip().lower() for p in platform.split(',')]
-        query = query.filter(Video.platform.in_(platforms))
-
-    # Apply metric type filter
-    if metric_type == "organic":
-        query = query.filter(Video.is_spark_ad == False)
-    elif metric_type == "ads":
-        query = query.filter(Video.is_spark_ad == True)
-
-    videos = query.order_by(Video.views.desc()).limit(limit * 2).all()
+    videos = (await db.execute(
+        most_viral_query(start_date, end_date, limit * 2, metric_type, platform, collection_id)
+    )).scalars().all()
 
     # Calculate engagement rate and sort
     video_stats = []
@@ -1362,7 +1914,7 @@ async def get_virality_analysis(
     metric_type: str = Query("total", regex="^(total|organic|ads)$"),
     platform: str = Query(None),
     collection_id: int = Query(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get virality median analysis data"""
 
@@ -1370,77 +1922,12 @@ async def get_virality_analysis(
     end_date = datetime.utcnow()
     start_date = end_date - timedelta(days=days)
 
-    # Only fetch the views column instead of full Video objects
-    query = db.query(Video.views).filter(
-        Video.posted_at.isnot(None),
-        Video.posted_at >= start_date,
-        Video.posted_at <= end_date
-    )
-
-    # Apply collection filter
-    query = apply_collection_filter(query, collection_id, db)
-
-    # Apply platform filter
-    if platform:
-        platforms = [p.strip().lower() for p in platform.split(',')]
-        query = query.filter(Video.platform.in_(platforms))
-
-    # Apply metric type filter
-    if metric_type == "organic":
-        query = query.filter(Video.is_spark_ad == False)
-    elif metric_type == "ads":
-        query = query.filter(Video.is_spark_ad == True)
-
-    view_rows = query.all()
-
-    if not view_rows:
-        return {
-            "below_1x": 0,
-            "1x_to_5x": 0,
-            "5x_to_10x": 0,
-            "10x_to_25x": 0,
-            "25x_to_50x": 0,
-            "50x_to_100x": 0,
-            "above_100x": 0
-        }
-
-    # Calculate median views
-    view_counts = sorted([r.views for r in view_rows])
-    median_views = view_counts[len(view_counts) // 2]
-
-    # Categorize videos by virality multiplier
-    categories = {
-        "below_1x": 0,
-        "1x_to_5x": 0,
-        "5x_to_10x": 0,
-        "10x_to_25x": 0,
-        "25x_to_50x": 0,
-        "50x_to_100x": 0,
-        "above_100x": 0
-    }
-
-    for row in view_rows:
-        if median_views == 0:
-            continue
-
-        multiplier = row.views / median_views
-
-        if multiplier < 1:
-            categories["below_1x"] += 1
-        elif multiplier < 5:
-            categories["1x_to_5x"] += 1
-        elif multiplier < 10:
-            categories["5x_to_10x"] += 1
-        elif multiplier < 25:
-            categories["10x_to_25x"] += 1
-        elif multiplier < 50:
-            categories["25x_to_50x"] += 1
-        elif multiplier < 100:
-            categories["50x_to_100x"] += 1
-        else:
-            categories["above_100x"] += 1
-
-    return categories
+    # Bucket videos by multiple of the median views in the column store, or in SQL while it loads
+    filters = await get_analytics_filter(db, metric_type, platform, collection_id)
+    store = analytics_engine.get_loaded_store()
+    if store is None:
+        return await analytics_engine.sql_virality(db, filters, start_date, end_date)
+    return store.virality(filters, start_date, end_date)
 
 
 @app.get("/api/analytics/duration-analysis")
@@ -1449,7 +1936,7 @@ async def get_duration_analysis(
     metric_type: str = Query("total", regex="^(total|organic|ads)$"),
     platform: str = Query(None),
     collection_id: int = Query(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get duration analysis data"""
 
@@ -1457,80 +1944,19 @@ async def get_duration_analysis(
     end_date = datetime.utcnow()
     start_date = end_date - timedelta(days=days)
 
-    # Only fetch duration and views instead of full Video objects
-    query = db.query(Video.duration, Video.views).filter(
-        Video.duration != None,
-        Video.posted_at.isnot(None),
-        Video.posted_at >= start_date,
-        Video.posted_at <= end_date
-    )
-
-    # Apply collection filter
-    query = apply_collection_filter(query, collection_id, db)
-
-    # Apply platform filter
-    if platform:
-        platforms = [p.strip().lower() for p in platform.split(',')]
-        query = query.filter(Video.platform.in_(platforms))
-
-    # Apply metric type filter
-    if metric_type == "organic":
-        query = query.filter(Video.is_spark_ad == False)
-    elif metric_type == "ads":
-        query = query.filter(Video.is_spark_ad == True)
-
-    video_rows = query.all()
-
-    if not video_rows:
-        return []
-
-    # Group by duration ranges
-    duration_groups = {
-        "0-5": [],
-        "5-10": [],
-        "10-20": [],
-        "20-30": [],
-        "30-45": [],
-        "45-60": [],
-        "60+": []
-    }
-
-    for row in video_rows:
-        duration = row.duration
-        if duration < 5:
-            duration_groups["0-5"].append(row.views)
-        elif duration < 10:
-            duration_groups["5-10"].append(row.views)
-        elif duration < 20:
-            duration_groups["10-20"].append(row.views)
-        elif duration < 30:
-            duration_groups["20-30"].append(row.views)
-        elif duration < 45:
-            duration_groups["30-45"].append(row.views)
-        elif duration < 60:
-            duration_groups["45-60"].append(row.views)
-        else:
-            duration_groups["60+"].append(row.views)
-
-    # Calculate average views per duration range
-    result = []
-    for range_name, views_list in duration_groups.items():
-        if views_list:
-            avg_views = sum(views_list) / len(views_list)
-            result.append({
-                "range": range_name,
-                "average_views": int(avg_views),
-                "video_count": len(views_list)
-            })
-
-    return result
+    # Average views per duration range from the column store, or in SQL while it loads
+    filters = await get_analytics_filter(db, metric_type, platform, collection_id)
+    store = analytics_engine.get_loaded_store()
+    if store is None:
+        return await analytics_engine.sql_duration_analysis(db, filters, start_date, end_date)
+    return store.duration_analysis(filters, start_date, end_date)
 
 
 @app.get("/api/analytics/metrics-breakdown")
 async def get_metrics_breakdown(
     metric_type: str = Query("total", regex="^(total|organic|ads)$"),
     platform: str = Query(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get daily and weekly metrics breakdown"""
 
@@ -1538,57 +1964,15 @@ async def get_metrics_breakdown(
     one_day_ago = now - timedelta(days=1)
     seven_days_ago = now - timedelta(days=7)
 
-    # Daily videos query - filter by posted_at instead of scraped_at
-    daily_query = db.query(Video).filter(
-        Video.posted_at.isnot(None),
-        Video.posted_at >= one_day_ago
-    )
-    if platform:
-        platforms = [p.strip().upper() for p in platform.split(',')]
-        daily_query = daily_query.filter(Video.platform.in_(platforms))
-    if metric_type == "organic":
-        daily_query = daily_query.filter(Video.is_spark_ad == False)
-    elif metric_type == "ads":
-        daily_query = daily_query.filter(Video.is_spark_ad == True)
-    daily_videos = daily_query.all()
-
-    # Weekly videos query - filter by posted_at instead of scraped_at
-    weekly_query = db.query(Video).filter(
-        Video.posted_at.isnot(None),
-        Video.posted_at >= seven_days_ago
-    )
-    if platform:
-        platforms = [p.strip().upper() for p in platform.split(',')]
-        weekly_query = weekly_query.filter(Video.platform.in_(platforms))
-    if metric_type == "organic":
-        weekly_query = weekly_query.filter(Video.is_spark_ad == False)
-    elif metric_type == "ads":
-        weekly_query = weekly_query.filter(Video.is_spark_ad == True)
-    weekly_videos = weekly_query.all()
-
-    def calculate_averages(videos):
-        if not videos:
-            return {
-                "avg_views": 0,
-                "avg_views_gain": 0,
-                "avg_comments_gain": 0,
-                "avg_likes_gain": 0
-            }
-
-        total_views = sum(v.views for v in videos)
-        total_likes = sum(v.likes for v in videos)
-        total_comments = sum(v.comments for v in videos)
-
-        return {
-            "avg_views": int(total_views / len(videos)),
-            "avg_views_gain": int(total_views / len(videos)),
-            "avg_comments_gain": int(total_comments / len(videos)),
-            "avg_likes_gain": int(total_likes / len(videos))
-        }
+    # Averages over videos posted in the last day / week (posted_at, not scraped_at)
+    filters = analytics_engine.AnalyticsFilter(metric_type, platform)
+    store = analytics_engine.get_loaded_store()
+    if store is None:
+        return await analytics_engine.sql_averages(db, filters, {"daily": one_day_ago, "weekly": seven_days_ago})
 
     return {
-        "daily": calculate_averages(daily_videos),
-        "weekly": calculate_averages(weekly_videos)
+        "daily": store.averages(filters, one_day_ago),
+        "weekly": store.averages(filters, seven_days_ago)
     }
 
 
@@ -1600,7 +1984,7 @@ async def get_video_stats(
     metric_type: str = Query("total", regex="^(total|organic|ads)$"),
     platform: str = Query(None),
     collection_id: int = Query(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get video stats with performance indicators"""
 
@@ -1608,50 +1992,22 @@ async def get_video_stats(
     end_date = datetime.utcnow()
     start_date = end_date - timedelta(days=days)
 
-    # Query videos in date range
-    query = db.query(Video).filter(
-        Video.posted_at.isnot(None),
-        Video.posted_at >= start_date,
-        Video.posted_at <= end_date
-    )
-
-    # Apply collection filter
-    query = apply_collection_filter(query, collection_id, db)
-
-    # Apply platform filter
-    if platform:
-        platforms = [p.strip().lower() for p in platform.split(',')]
-        query = query.filter(Video.platform.in_(platforms))
-
-    # Apply metric type filter
-    if metric_type == "organic":
-        query = query.filter(Video.is_spark_ad == False)
-    elif metric_type == "ads":
-        query = query.filter(Video.is_spark_ad == True)
-
-    videos = query.order_by(Video.views.desc()).offset(offset).limit(limit).all()
+    # Rank and average in the column store (in SQL while it loads), then load only the rows on this page
+    filters = await get_analytics_filter(db, metric_type, platform, collection_id)
+    store = analytics_engine.get_loaded_store()
+    if store is None:
+        video_ids, avg_views = await analytics_engine.sql_top_by_views(db, filters, start_date, end_date, offset, limit)
+    else:
+        video_ids, avg_views = store.top_by_views(filters, start_date, end_date, offset, limit)
 
-    if not videos:
+    if not video_ids:
         return []
 
-    # Calculate average views for baseline using SQL AVG() - much faster than loading all videos
-    avg_query = db.query(func.avg(Video.views)).filter(
-        Video.posted_at.isnot(None),
-        Video.posted_at >= start_date,
-        Video.posted_at <= end_date
-    )
-    # Apply collection filter
-    avg_query = apply_collection_filter(avg_query, collection_id, db)
-
-    if platform:
-        platforms = [p.strip().lower() for p in platform.split(',')]
-        avg_query = avg_query.filter(Video.platform.in_(platforms))
-    if metric_type == "organic":
-        avg_query = avg_query.filter(Video.is_spark_ad == False)
-    elif metric_type == "ads":
-        avg_query = avg_query.filter(Video.is_spark_ad == True)
-    
-    avg_views = avg_query.scalar() or 0
+    videos_by_id = {
+        video.id: video
+        for video in (await db.execute(select(Video).filter(Video.id.in_(video_ids)))).scalars().all()
+    }
+    videos = [videos_by_id[video_id] for video_id in video_ids if video_id in videos_by_id]
 
     result = []
     for video in videos:
@@ -1690,6 +2046,214 @@ async def get_video_stats(
     return result
 
 
+@app.get("/api/analytics/hashtags")
+async def get_hashtag_analytics(
+    limit: int = Query(20, ge=1, le=200),
+    sort: str = Query("views", regex="^(views|videos)$"),
+    metric_type: str = Query("total", regex="^(total|organic|ads)$"),
+    platform: str = Query(None),
+    collection_id: int = Query(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Top hashtags by total views or video count, from the hashtag index"""
+
+    if metric_type == "total" and not collection_id:
+        # Totals are kept on the hashtag rows - no per-video work
+        query = select(
+            Hashtag.name, Hashtag.platform,
+            Hashtag.total_videos.label('videos'), Hashtag.total_views.label('views')
+        ).filter(Hashtag.total_videos > 0)
+        if platform:
+            platforms = [p.strip().lower() for p in platform.split(',')]
+            query = query.filter(Hashtag.platform.in_(platforms))
+        order = Hashtag.total_views if sort == "views" else Hashtag.total_videos
+    else:
+        # Filtered: aggregate over the index for the matching videos only
+        videos = func.count(VideoHashtag.video_id).label('videos')
+        views = func.coalesce(func.sum(Video.views), 0).label('views')
+        query = select(Hashtag.name, Hashtag.platform, videos, views).join(
+            VideoHashtag, VideoHashtag.hashtag_id == Hashtag.id
+        ).join(Video, Video.id == VideoHashtag.video_id)
+        query = apply_analytics_filters(query, metric_type, platform, collection_id)
+        query = query.group_by(Hashtag.id, Hashtag.name, Hashtag.platform)
+        order = views if sort == "views" else videos
+
+    rows = (await db.execute(query.order_by(order.desc()).limit(limit))).all()
+
+    return [
+        {
+            "hashtag": row.name,
+            "platform": row.platform,
+            "videos": row.videos,
+            "views": row.views,
+            "avg_views": int(row.views / row.videos) if row.videos else 0
+        }
+        for row in rows
+    ]
+
+
+@app.get("/api/analytics/hashtags/{hashtag}/growth")
+async def get_hashtag_growth(
+    hashtag: str,
+    days: int = Query(30, ge=1, le=365),
+    platform: str = Query(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Daily snapshot growth of the videos using a hashtag"""
+
+    name = hashtag.strip().lstrip('#').lower()
+    hashtag_query = select(Hashtag).filter(Hashtag.name == name)
+    if platform:
+        platforms = [p.strip().lower() for p in platform.split(',')]
+        hashtag_query = hashtag_query.filter(Hashtag.platform.in_(platforms))
+    hashtags = (await db.execute(hashtag_query)).scalars().all()
+
+    if not hashtags:
+        raise HTTPException(status_code=404, detail="Hashtag not found")
+
+    end_date = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    start_date = end_date - timedelta(days=days)
+
+    hashtag_video_ids = select(VideoHashtag.video_id).filter(VideoHashtag.hashtag_id.in_([h.id for h in hashtags]))
+
+    day = func.date(VideoHistory.snapshot_date).label('day')
+    rows = (await db.execute(
+        select(
+            day,
+            func.count(distinct(VideoHistory.video_id)).label('videos'),
+            func.sum(VideoHistory.views).label('views')
+        )
+        .filter(
+            VideoHistory.video_id.in_(hashtag_video_ids),
+            VideoHistory.snapshot_date >= start_date,
+            VideoHistory.snapshot_date < end_date
+        )
+        .group_by(day)
+    )).all()
+
+    # date() is a string on SQLite and a date on PostgreSQL
+    daily_data = {str(row.day): row for row in rows}
+
+    growth_rows = (await db.execute(growth.daily_growth_query(hashtag_video_ids, start_date, end_date))).all()
+    daily_growth = growth.daily_growth(growth_rows, start_date, end_date)
+
+    daily = []
+    current_date = start_date.date()
+    while current_date < end_date.date():
+        row = daily_data.get(current_date.strftime('%Y-%m-%d'))
+        day_growth = daily_growth.get(current_date, {})
+        daily.append({
+            "date": current_date.strftime('%Y-%m-%d'),
+            "videos": row.videos if row else 0,
+            "views": (row.views or 0) if row else 0,
+            "views_growth": day_growth.get("views", 0),
+            "likes_growth": day_growth.get("likes", 0),
+            "comments_growth": day_growth.get("comments", 0)
+        })
+        current_date += timedelta(days=1)
+
+    return {
+        "hashtag": name,
+        "total_videos": sum(h.total_videos or 0 for h in hashtags),
+        "total_views": sum(h.total_views or 0 for h in hashtags),
+        "daily": daily
+    }
+
+
+@app.get("/api/analytics/audio")
+async def get_audio_analytics(
+    limit: int = Query(20, ge=1, le=200),
+    sort: str = Query("views", regex="^(views|videos|median)$"),
+    platform: str = Query(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Top sounds across tracked videos, from the music usage rollup"""
+
+    query = select(MusicUsage).filter(MusicUsage.total_videos > 0)
+    if platform:
+        platforms = [p.strip().lower() for p in platform.split(',')]
+        query = query.filter(MusicUsage.platform.in_(platforms))
+    order = {
+        "views": MusicUsage.total_views,
+        "videos": MusicUsage.total_videos,
+        "median": MusicUsage.median_views
+    }[sort]
+
+    sounds = (await db.execute(query.order_by(order.desc(), MusicUsage.id).limit(limit))).scalars().all()
+
+    return [
+        {
+            "music_id": sound.music_id,
+            "platform": sound.platform,
+            "title": sound.music_title,
+            "author": sound.music_author,
+            "videos": sound.total_videos,
+            "views": sound.total_views,
+            "avg_views": int(sound.total_views / sound.total_videos) if sound.total_videos else 0,
+            "median_views": sound.median_views,
+            "first_used": sound.first_used,
+            "last_used": sound.last_used,
+            "top_creators": sound.top_creators or []
+        }
+        for sound in sounds
+    ]
+
+
+@app.get("/api/analytics/audio/{music_id}/growth")
+async def get_audio_growth(
+    music_id: str,
+    days: int = Query(30, ge=1, le=365),
+    platform: str = Query(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Daily videos posted with a sound and views gained by its videos, from the music usage rollup"""
+
+    sound_query = select(MusicUsage).filter(MusicUsage.music_id == music_id)
+    if platform:
+        platforms = [p.strip().lower() for p in platform.split(',')]
+        sound_query = sound_query.filter(MusicUsage.platform.in_(platforms))
+    sounds = (await db.execute(sound_query)).scalars().all()
+
+    if not sounds:
+        raise HTTPException(status_code=404, detail="Sound not found")
+
+    end_date = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    start_date = end_date - timedelta(days=days)
+
+    rows = (await db.execute(
+        select(
+            MusicUsageDaily.day,
+            func.sum(MusicUsageDaily.videos_added).label('videos_added'),
+            func.sum(MusicUsageDaily.views_gained).label('views_gained')
+        )
+        .filter(
+            MusicUsageDaily.music_usage_id.in_([s.id for s in sounds]),
+            MusicUsageDaily.day >= start_date,
+            MusicUsageDaily.day < end_date
+        )
+        .group_by(MusicUsageDaily.day)
+    )).all()
+    daily_data = {row.day.date(): row for row in rows}
+
+    daily = []
+    current_date = start_date.date()
+    while current_date < end_date.date():
+        row = daily_data.get(current_date)
+        daily.append({
+            "date": current_date.strftime('%Y-%m-%d'),
+            "videos_added": (row.videos_added or 0) if row else 0,
+            "views_gained": (row.views_gained or 0) if row else 0
+        })
+        current_date += timedelta(days=1)
+
+    return {
+        "music_id": music_id,
+        "title": next((s.music_title for s in sounds if s.music_title), None),
+        "total_videos": sum(s.total_videos or 0 for s in sounds),
+        "total_views": sum(s.total_views or 0 for s in sounds),
+        "daily": daily
+    }
+
 # ============ COLLECTIONS ENDPOINTS ============
 
 class CollectionCreate(BaseModel):
@@ -1716,25 +2280,28 @@ class CollectionResponse(BaseModel):
 
 
 @app.get("/api/collections", response_model=List[CollectionResponse])
-async def get_collections(db: Session = Depends(get_db)):
+async def get_collections(db: AsyncSession = Depends(get_async_db)):
     """Get all collections with optimized query (single DB call instead of N+1)"""
-    # Single query with LEFT JOIN and GROUP BY to get counts efficiently
-    collections_query = db.query(
+    # Single query, each count a correlated subquery on its (collection_id, ...) index - joining both
+    # link tables would multiply every collection's videos by its accounts before counting
+    video_count = select(func.count()).where(
+        VideoCollection.collection_id == Collection.id
+    ).scalar_subquery()
+    account_count = select(func.count()).where(
+        AccountCollection.collection_id == Collection.id
+    ).scalar_subquery()
+    collections_query = select(
         Collection,
-        func.count(distinct(VideoCollection.video_id)).label('video_count'),
-        func.count(distinct(AccountCollection.account_id)).label('account_count')
-    ).outerjoin(
-        VideoCollection, Collection.id == VideoCollection.collection_id
-    ).outerjoin(
-        AccountCollection, Collection.id == AccountCollection.collection_id
-    ).group_by(Collection.id).order_by(
+        video_count.label('video_count'),
+        account_count.label('account_count')
+    ).order_by(
         Collection.is_default.desc(),
         Collection.created_at.desc()
-    ).all()
+    )
 
     # Map results to collection objects with counts
     result = []
-    for collection_obj, video_count, account_count in collections_query:
+    for collection_obj, video_count, account_count in (await db.execute(collections_query)).all():
         collection_obj.video_count = video_count
         collection_obj.account_count = account_count
         result.append(collection_obj)
@@ -1821,16 +2388,14 @@ async def get_collection_videos(
     collection_id: int,
     limit: int = Query(50, ge=1, le=200),
     offset: int = Query(0, ge=0),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all videos in a collection"""
-    video_ids = db.query(VideoCollection.video_id).filter(
+    video_ids = (await db.execute(select(VideoCollection.video_id).filter(
         VideoCollection.collection_id == collection_id
-    ).offset(offset).limit(limit).all()
+    ).offset(offset).limit(limit))).scalars().all()
 
-    video_ids = [v[0] for v in video_ids]
-
-    videos = db.query(Video).filter(Video.id.in_(video_ids)).all()
+    videos = (await db.execute(select(Video).filter(Video.id.in_(video_ids)))).scalars().all()
     return videos
 
 
@@ -1894,15 +2459,13 @@ async def remove_video_from_collection(
 @app.get("/api/collections/{collection_id}/accounts")
 async def get_collection_accounts(
     collection_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all accounts in a collection"""
-    account_ids = db.query(AccountCollection.account_id).filter(
+    account_ids = select(AccountCollection.account_id).filter(
         AccountCollection.collection_id == collection_id
-    ).all()
-
-    account_ids_list = [aid[0] for aid in account_ids]
-    accounts = db.query(Account).filter(Account.id.in_(account_ids_list)).all()
+    )
+    accounts = (await db.execute(select(Account).filter(Account.id.in_(account_ids)))).scalars().all()
 
     return accounts
 
@@ -1996,29 +2559,28 @@ async def get_accounts(
     collection_id: Optional[int] = None,
     limit: int = Query(100, ge=1, le=500),
     offset: int = Query(0, ge=0),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all tracked accounts"""
 
     if collection_id:
         # Get accounts in specific collection
-        account_ids = db.query(AccountCollection.account_id).filter(
+        account_ids = select(AccountCollection.account_id).filter(
             AccountCollection.collection_id == collection_id
-        ).all()
-        account_ids = [a[0] for a in account_ids]
+        )
 
-        query = db.query(Account).filter(
+        query = select(Account).filter(
             Account.id.in_(account_ids),
             Account.is_active == True  # Only show active accounts
         )
     else:
-        query = db.query(Account).filter(Account.is_active == True)  # Only show active accounts
+        query = select(Account).filter(Account.is_active == True)  # Only show active accounts
 
     if platform:
         query = query.filter(Account.platform == platform)
 
-    accounts = query.order_by(Account.total_views.desc()).offset(offset).limit(limit).all()
-    return accounts
+    result = await db.execute(query.order_by(Account.total_views.desc()).offset(offset).limit(limit))
+    return result.scalars().all()
 
 
 class AccountCreate(BaseModel):
@@ -2074,18 +2636,17 @@ async def get_account_videos(
     account_id: int,
     limit: int = Query(50, ge=1, le=200),
     offset: int = Query(0, ge=0),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all videos from an account"""
 
-    account = db.query(Account).filter(Account.id == account_id).first()
+    account = await db.get(Account, account_id)
     if not account:
         raise HTTPException(status_code=404, detail="Account not found")
 
-    videos = db.query(Video).filter(
-        Video.author_username == account.username,
-        Video.platform == account.platform
-    ).order_by(Video.scraped_at.desc()).offset(offset).limit(limit).all()
+    videos = (await db.execute(select(Video).filter(
+        Video.account_id == account.id
+    ).order_by(Video.scraped_at.desc()).offset(offset).limit(limit))).scalars().all()
 
     return videos
 
@@ -2099,10 +2660,7 @@ async def refresh_account(account_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Account not found")
 
     # Get all videos from this account
-    videos = db.query(Video).filter(
-        Video.author_username == account.username,
-        Video.platform == account.platform
-    ).all()
+    videos = db.query(Video).filter(Video.account_id == account.id).all()
 
     # Aggregate stats
     account.total_videos = len(videos)
@@ -2217,6 +2775,7 @@ async def seed_accounts(db: Session = Depends(get_db)):
 
 # ============ DAILY SCRAPING SCHEDULER ============
 
+@sql_profiler.profiled("daily scrape")
 def daily_scrape_all_accounts():
     """
     Daily job to re-scrape all active accounts and save historical snapshots.
@@ -2227,15 +2786,25 @@ def daily_scrape_all_accounts():
     from database import SessionLocal
     db = SessionLocal()
 
+    started = time.perf_counter()
+    succeeded = False
+
     try:
         # Get all active accounts
         accounts = db.query(Account).filter(Account.is_active == True).all()
         logger.info(f"Found {len(accounts)} active accounts to scrape")
+        events.broker.publish("daily_scrape", {"status": "running", "accounts_done": 0, "accounts_total": len(accounts)})
 
         scraper = URLScraper()
         total_videos = 0
 
-        for account in accounts:
+        for accounts_done, account in enumerate(accounts):
+            events.broker.publish("daily_scrape", {
+                "status": "running",
+                "accounts_done": accounts_done,
+                "accounts_total": len(accounts),
+                "account": f"{account.platform}/@{account.username}",
+            })
             try:
                 # Construct profile URL
                 if account.platform == 'tiktok':
@@ -2248,55 +2817,45 @@ def daily_scrape_all_accounts():
 
                 logger.info(f"Scraping {account.platform}/@{account.username}...")
 
-                # Scrape account
-                videos = scraper.scrape_url(url)
+                # Scrape account (this job runs in the scheduler thread, so drive the async scraper here)
+                result = asyncio.run(scraper.scrape_profile(url))
+                videos = result.get('videos', [])
 
                 if videos:
-                    # Process each video
-                    for video_data in videos:
-                        # Check if video exists
-                        video = db.query(Video).filter(Video.id == video_data['id']).first()
-
-                        if video:
-                            # Update existing video metrics
-                            video.views = video_data.get('views', video.views)
-                            video.likes = video_data.get('likes', video.likes)
-                            video.comments = video_data.get('comments', video.comments)
-                            video.shares = video_data.get('shares', video.shares)
-                            video.scraped_at = datetime.utcnow()
-
-                            # Save daily snapshot
-                            save_video_snapshot(db, video)
-                            total_videos += 1
-                        else:
-                            # Create new video if not exists
-                            new_video = Video(**video_data)
-                            db.add(new_video)
-                            db.commit()
-                            db.refresh(new_video)
-
-                            # Save initial snapshot
-                            save_video_snapshot(db, new_video)
-                            total_videos += 1
+                    # One batch per account: unchanged videos only get last_seen_at touched (change_detection.py)
+                    written, batch, unchanged = upsert_scraped_videos(db, videos, account_id=account.id)
+                    total_videos += len(batch)
 
                     # Update account last_scraped timestamp
                     account.last_scraped = datetime.utcnow()
                     db.commit()
 
-                    logger.info(f"✓ Scraped {len(videos)} videos from {account.platform}/@{account.username}")
+                    logger.info(f"✓ Scraped {len(videos)} videos from {account.platform}/@{account.username} "
+                                f"({len(written)} written, {len(unchanged)} unchanged)")
                 else:
                     logger.warning(f"No videos found for {account.platform}/@{account.username}")
 
             except Exception as e:
                 logger.error(f"Error scraping {account.platform}/@{account.username}: {str(e)}")
+                db.rollback()
                 continue
 
         logger.info(f"Daily scrape completed! Updated {total_videos} videos across {len(accounts)} accounts")
+        metrics.JOB_SNAPSHOT_ROWS.labels("daily_scrape").set(total_videos)  # One snapshot per updated video
+        events.broker.publish("daily_scrape", {
+            "status": "completed",
+            "accounts_done": len(accounts),
+            "accounts_total": len(accounts),
+            "videos_updated": total_videos,
+        })
+        succeeded = True
 
     except Exception as e:
         logger.error(f"Error in daily scrape job: {str(e)}")
+        events.broker.publish("daily_scrape", {"status": "failed", "error": str(e)})
     finally:
         db.close()
+        metrics.observe_job("daily_scrape", time.perf_counter() - started, succeeded)
 
 
 @app.post("/api/admin/fix-missing-accounts")
@@ -2306,67 +2865,64 @@ async def fix_missing_accounts(db: Session = Depends(get_db)):
     This fixes the bug where videos are saved but accounts aren't created during background scraping.
     """
     try:
-        # Get all unique (author_username, platform) combinations from videos
-        videos = db.query(Video).all()
-
-        unique_authors = {}
-        for video in videos:
-            if video.author_username:
-                key = (video.author_username, video.platform)
-                if key not in unique_authors:
-                    unique_authors[key] = video
-
-        # Check which ones don't have accounts
-        missing_accounts = []
-        created_accounts = []
-
-        for (username, platform), video in unique_authors.items():
-            account = db.query(Account).filter(
-                Account.username == username,
-                Account.platform == platform
-            ).first()
-
-            if not account:
-                missing_accounts.append((username, platform, video))
+        # Authors (username, platform) of videos without an account, with their aggregate stats
+        missing_accounts = db.query(
+            Video.author_username,
+            Video.platform,
+            func.max(Video.author_nickname).label('nickname'),
+            func.max(Video.author_avatar).label('avatar'),
+            func.count(Video.id).label('total_videos'),
+            func.coalesce(func.sum(Video.views), 0).label('total_views'),
+            func.coalesce(func.sum(Video.likes), 0).label('total_likes')
+        ).outerjoin(
+            Account, (Account.username == Video.author_username) & (Account.platform == Video.platform)
+        ).filter(
+            Video.author_username.isnot(None),
+            Account.id.is_(None)
+        ).group_by(Video.author_username, Video.platform).all()
 
         logger.info(f"Found {len(missing_accounts)} accounts that need to be created")
 
+        created_accounts = []
         if missing_accounts:
-            for username, platform, video in missing_accounts:
-                # Get all videos for this account to calculate aggregate stats
-                account_videos = db.query(Video).filter(
-                    Video.author_username == username,
-                    Video.platform == platform
-                ).all()
-
-                total_videos = len(account_videos)
-                total_views = sum(v.views or 0 for v in account_videos)
-                total_likes = sum(v.likes or 0 for v in account_videos)
-
-                # Create account with aggregated stats
-                account = Account(
+            now = datetime.utcnow()
+            for author in missing_accounts:
+                username, platform = author.author_username, author.platform
+                total_views, total_likes = int(author.total_views), int(author.total_likes)  # SUM is NUMERIC on PostgreSQL
+                db.add(Account(
                     username=username,
                     platform=platform,
-                    nickname=video.author_nickname,
-                    avatar=video.author_avatar,
+                    nickname=author.nickname,
+                    avatar=author.avatar,
                     profile_url=f"https://www.tiktok.com/@{username}" if platform == 'tiktok' else f"https://www.instagram.com/{username}/",
-                    total_videos=total_videos,
+                    total_videos=author.total_videos,
                     total_views=total_views,
                     total_likes=total_likes,
                     total_followers=0,
                     is_active=True,
-                    last_scraped=datetime.utcnow()
-                )
-                db.add(account)
+                    last_scraped=now
+                ))
                 created_accounts.append({
                     "username": username,
                     "platform": platform,
-                    "total_videos": total_videos,
+                    "total_videos": author.total_videos,
                     "total_views": total_views
                 })
 
-                logger.info(f"Created account: {platform}/@{username} with {total_videos} videos")
-
+                logger.info(f"Created account: {platform}/@{username} with {author.total_videos} videos")
+            db.flush()
+
+            # Link the unlinked videos of every author with an account in one correlated UPDATE
+            account_id = select(Account.id).where(
+                Account.username == Video.author_username,
+                Account.platform == Video.platform
+            ).scalar_subquery()
+            db.execute(
+                update(Video)
+                .where(Video.account_id.is_(None), Video.author_username.isnot(None), account_id.isnot(None))
+                .values(account_id=account_id)
+                .execution_options(synchronize_session=False)
+            )
             db.commit()
             logger.info(f"Successfully created {len(created_accounts)} missing accounts")
 
@@ -2437,35 +2993,9 @@ async def scrape_next_account(db: Session = Depends(get_db)):
                 "message": "No videos found"
             }
 
-        # Process each video
-        videos_updated = 0
-        for video_data in videos:
-            # Remove internal fields that aren't part of the Video model
-            video_data_clean = {k: v for k, v in video_data.items() if not k.startswith('_')}
-
-            video = db.query(Video).filter(Video.id == video_data_clean['id']).first()
-
-            if video:
-                # Update existing video
-                video.views = video_data_clean.get('views', video.views)
-                video.likes = video_data_clean.get('likes', video.likes)
-                video.comments = video_data_clean.get('comments', video.comments)
-                video.shares = video_data_clean.get('shares', video.shares)
-                video.scraped_at = datetime.utcnow()
-
-                # Save snapshot
-                save_video_snapshot(db, video)
-                videos_updated += 1
-            else:
-                # Create new video
-                new_video = Video(**video_data_clean)
-                db.add(new_video)
-                db.commit()
-                db.refresh(new_video)
-
-                # Save snapshot
-                save_video_snapshot(db, new_video)
-                videos_updated += 1
+        # One batch for the account: unchanged videos only get last_seen_at touched (change_detection.py)
+        written, batch, unchanged = upsert_scraped_videos(db, videos, account_id=account.id)
+        videos_updated = len(batch)
 
         # Mark account as scraped
         account.last_scraped = datetime.utcnow()
@@ -2495,19 +3025,19 @@ async def scrape_next_account(db: Session = Depends(get_db)):
 
 
 @app.get("/api/admin/scrape-status")
-async def get_scrape_status(db: Session = Depends(get_db)):
+async def get_scrape_status(db: AsyncSession = Depends(get_async_db)):
     """Check how many accounts still need scraping today"""
     today = datetime.utcnow().date()
 
-    total_accounts = db.query(func.count(Account.id)).filter(Account.is_active == True).scalar()
+    total_accounts = (await db.execute(select(func.count(Account.id)).filter(Account.is_active == True))).scalar()
 
-    remaining = db.query(func.count(Account.id)).filter(
+    remaining = (await db.execute(select(func.count(Account.id)).filter(
         Account.is_active == True,
         or_(
             Account.last_scraped.is_(None),
             func.date(Account.last_scraped) < today
         )
-    ).scalar()
+    ))).scalar()
 
     completed = total_accounts - remaining
 
@@ -2530,10 +3060,14 @@ async def get_snapshot_summary(db: Session = Depends(get_db)):
     # Get snapshots by date
     snapshots_by_date = db.query(
         VideoHistory.snapshot_date,
-        func.count(VideoHistory.id).label('count'),
-        func.sum(VideoHistory.views_growth).label('total_views_growth')
+        func.count(VideoHistory.id).label('count')
     ).group_by(VideoHistory.snapshot_date).order_by(VideoHistory.snapshot_date.desc()).limit(10).all()
 
+    daily_growth = {}
+    if snapshots_by_date:
+        start = snapshots_by_date[-1][0]
+        daily_growth = growth.daily_growth(db.execute(growth.daily_growth_query(start=start)).all(), start)
+
     # Get most recent snapshots
     recent_snapshots = db.query(VideoHistory).order_by(VideoHistory.snapshot_date.desc()).limit(5).all()
 
@@ -2543,7 +3077,7 @@ async def get_snapshot_summary(db: Session = Depends(get_db)):
             {
                 "date": str(s[0]),
                 "count": s[1],
-                "total_views_growth": s[2]
+                "total_views_growth": daily_growth.get(s[0].date(), {}).get("views", 0)
             }
             for s in snapshots_by_date
         ],
@@ -2551,8 +3085,7 @@ async def get_snapshot_summary(db: Session = Depends(get_db)):
             {
                 "video_id": s.video_id,
                 "snapshot_date": str(s.snapshot_date),
-                "views": s.views,
-                "views_growth": s.views_growth
+                "views": s.views
             }
             for s in recent_snapshots
         ]
@@ -2568,6 +3101,9 @@ async def startup_event():
     init_db()
     logger.info("Database initialized")
 
+    # Start loading the analytics column store in the background so it's ready for the first dashboard request
+    analytics_engine.store.ensure_fresh()
+
     # Check if today's scrape has run, if not run it immediately
     # This ensures scraping happens even if the app restarts after the scheduled time
     try:
@@ -2602,6 +3138,37 @@ async def startup_event():
         replace_existing=True
     )
 
+    # Create upcoming VideoHistory partitions and downsample old snapshots before the daily scrape
+    scheduler.add_job(
+        run_video_history_maintenance,
+        CronTrigger(hour=1, minute=30),  # Run at 1:30 AM UTC daily
+        id='video_history_maintenance_job',
+        name='VideoHistory partitions and retention',
+        replace_existing=True
+    )
+
+    # Recompute median / top creators of the sounds whose videos changed (music_rollup.py)
+    scheduler.add_job(
+        music_rollup.run_pending_recompute,
+        IntervalTrigger(minutes=music_rollup.MUSIC_ROLLUP_RECOMPUTE_MINUTES),
+        id='music_rollup_recompute_job',
+        name='Music rollup recompute',
+        replace_existing=True
+    )
+
+    # Refresh trending audio charts whose TTL has expired (runs on this loop to share in-flight refreshes)
+    trending_audio_store.store.loop = asyncio.get_running_loop()
+    scheduler.add_job(
+        trending_audio_store.store.run_scheduled_refresh,
+        IntervalTrigger(minutes=15),
+        id='trending_audio_refresh_job',
+        name='Trending audio refresh',
+        replace_existing=True
+    )
+
+    # Warm TikTokApi sessions shared by hashtag / term / trending searches (opened in the background)
+    await tiktok_session_pool.pool.start()
+
     # Start the scheduler
     scheduler.start()
     logger.info("Scheduler started - daily scraping will run at 2:00 AM UTC")
@@ -2614,6 +3181,8 @@ async def shutdown_event():
     scheduler.shutdown()
     logger.info("Scheduler stopped")
 
+    await tiktok_session_pool.pool.close()
+
 
 @app.post("/api/admin/daily-scrape")
 async def trigger_daily_scrape(background_tasks: BackgroundTasks):
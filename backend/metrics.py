@@ -0,0 +1,172 @@
+"""
+Prometheus metrics for the API, the database and the scrapers (served at GET /metrics).
+
+- HTTP request latency per route template (not per raw path, to keep label cardinality bounded)
+- SQL statements and SQL time per request, from SQLAlchemy cursor events on both engines
+- Scraper request latency, errors and 429s per provider and host
+- Snapshot rows written, daily job duration and scrape queue depth
+- TikTokApi session pool: idle and leased sessions
+"""
+
+import contextvars
+import time
+from dataclasses import dataclass
+from typing import Optional
+from urllib.parse import urlparse
+
+from prometheus_client import Counter, Gauge, Histogram, CONTENT_TYPE_LATEST, generate_latest
+from sqlalchemy import event
+
+import sql_profiler
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+HTTP_REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries", "SQL statements executed per HTTP request", ["route"],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 250, 500, 1000),
+)
+HTTP_REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds", "Time spent executing SQL per HTTP request", ["route"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+SCRAPER_REQUEST_DURATION = Histogram(
+    "scraper_request_duration_seconds", "Outbound scraper request latency", ["provider", "host"],
+    buckets=(0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30, 60),
+)
+SCRAPER_ERRORS = Counter(
+    "scraper_errors_total", "Failed scraper requests (HTTP status or exception type)", ["provider", "host", "reason"]
+)
+SCRAPER_RATE_LIMITED = Counter(
+    "scraper_rate_limited_total", "Scraper requests answered with 429 Too Many Requests", ["provider", "host"]
+)
+
+SNAPSHOT_ROWS_WRITTEN = Counter(
+    "snapshot_rows_written_total", "VideoHistory snapshot rows written", ["operation"]
+)
+VIDEO_ROWS_INGESTED = Counter(
+    "video_rows_ingested_total", "Scraped videos by ingest result (inserted, updated, unchanged)", ["result"]
+)
+JOB_SNAPSHOT_ROWS = Gauge(
+    "job_snapshot_rows", "Snapshot rows written by the last run of a scheduled job", ["job"]
+)
+JOB_DURATION = Histogram(
+    "job_duration_seconds", "Duration of scheduled jobs", ["job", "status"],
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1200, 1800, 3600, 7200),
+)
+JOB_LAST_SUCCESS = Gauge(
+    "job_last_success_timestamp_seconds", "Unix time of the last successful run of a scheduled job", ["job"]
+)
+
+QUEUE_DEPTH = Gauge(
+    "scrape_queue_depth", "Items waiting in the scrape pipeline", ["queue"]
+)
+TIKTOK_SESSIONS = Gauge(
+    "tiktok_sessions", "TikTokApi sessions in the session pool by state (idle, leased)", ["state"]
+)
+
+
+# ============ PER-REQUEST SQL STATS ============
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    seconds: float = 0.0
+
+
+# Set by the HTTP middleware; SQLAlchemy events for the same request add to it.
+# Sync handlers run in the threadpool and async sessions in greenlets - both inherit the context.
+_query_stats: contextvars.ContextVar[Optional[QueryStats]] = contextvars.ContextVar("query_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    stats = _query_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += elapsed
+    sql_profiler.record(statement, elapsed)
+
+
+def _handle_error(exception_context):
+    # after_cursor_execute doesn't fire for failed statements
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_started"):
+        connection.info["query_started"].pop()
+
+
+def instrument_engine(engine):
+    """Count and time every statement on this engine for the request histograms and the SQL profiler
+    (pass async_engine.sync_engine for the async one)"""
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+def start_request_stats() -> QueryStats:
+    stats = QueryStats()
+    _query_stats.set(stats)
+    return stats
+
+
+def route_label(scope: dict) -> str:
+    """Route template ("/api/accounts/{account_id}") rather than the raw path"""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+def observe_request(method: str, route: str, status: int, seconds: float, stats: QueryStats):
+    HTTP_REQUEST_DURATION.labels(method, route, str(status)).observe(seconds)
+    HTTP_REQUEST_DB_QUERIES.labels(route).observe(stats.count)
+    HTTP_REQUEST_DB_SECONDS.labels(route).observe(stats.seconds)
+
+
+# ============ SCRAPERS ============
+
+def observe_scraper_request(provider: str, url: str, seconds: float,
+                            status_code: Optional[int] = None, error: Optional[Exception] = None):
+    """Record one outbound request - pass the status code, or the exception if none came back"""
+    host = urlparse(url).hostname or "unknown"
+    SCRAPER_REQUEST_DURATION.labels(provider, host).observe(seconds)
+
+    if error is not None:
+        SCRAPER_ERRORS.labels(provider, host, type(error).__name__).inc()
+    elif status_code is not None and status_code >= 400:
+        SCRAPER_ERRORS.labels(provider, host, str(status_code)).inc()
+        if status_code == 429:
+            SCRAPER_RATE_LIMITED.labels(provider, host).inc()
+
+
+def httpx_event_hooks(provider: str) -> dict:
+    """event_hooks for an httpx.AsyncClient that record every request under this provider"""
+    async def on_request(request):
+        request.extensions["metrics_started"] = time.perf_counter()
+
+    async def on_response(response):
+        started = response.request.extensions.get("metrics_started", time.perf_counter())
+        observe_scraper_request(provider, str(response.request.url), time.perf_counter() - started,
+                                status_code=response.status_code)
+
+    return {"request": [on_request], "response": [on_response]}
+
+
+# ============ JOBS ============
+
+def observe_job(job: str, seconds: float, succeeded: bool):
+    """Record one run of a scheduled job"""
+    JOB_DURATION.labels(job, "success" if succeeded else "failed").observe(seconds)
+    if succeeded:
+        JOB_LAST_SUCCESS.labels(job).set_to_current_time()
+
+
+def render_metrics():
+    """Body and content type for the /metrics response"""
+    return generate_latest(), CONTENT_TYPE_LATEST
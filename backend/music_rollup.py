@@ -0,0 +1,337 @@
+"""
+Per-sound rollup of tracked videos: music_usage (one row per music_id and platform) and
+music_usage_daily (videos posted with the sound and views gained, per day).
+
+Flushes through SessionLocal that insert, delete or change a video's sound, views, author
+or posted_at update the rollup in the same transaction, without reading the sound's videos:
+- total_videos and total_views are adjusted by the delta, first_used / last_used widened
+  to the video's posted_at, and pending_changes incremented
+- the daily rows get +1 video on the video's posted_at day when it starts using the
+  sound, and the views delta on today's row when an existing video's views change
+
+The median, top creators and title need all of a sound's videos, so they are recomputed for
+sounds with pending_changes by a scheduled job (recompute_pending, every
+MUSIC_ROLLUP_RECOMPUTE_MINUTES) in batches, using idx_music_platform - never a full scan.
+It also narrows first_used / last_used after a video left the sound.
+
+Bulk query().update() and writes outside SessionLocal aren't seen - rebuild after those:
+    python music_rollup.py rebuild
+A rebuild takes the daily views from video_history snapshots (growth.py).
+"""
+
+import logging
+import os
+import statistics
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import bindparam, case, delete, func, or_, select, update
+
+from database import SessionLocal, Video, MusicUsage, MusicUsageDaily, VideoFlushHooks, insert_ignore
+import growth
+
+logger = logging.getLogger(__name__)
+
+TOP_CREATORS = 5
+RECOMPUTE_BATCH_SIZE = 500
+MUSIC_ROLLUP_RECOMPUTE_MINUTES = int(os.getenv("MUSIC_ROLLUP_RECOMPUTE_MINUTES", "5"))
+
+_TRACKED_ATTRS = ("music_id", "platform", "views", "author_username", "posted_at")
+
+
+def _day(value: Optional[datetime]) -> datetime:
+    return (value or datetime.utcnow()).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _usage_ids(connection, keys: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], int]:
+    """(music_id, platform) -> music_usage.id, creating missing rows"""
+    keys = set(keys)
+    if not keys:
+        return {}
+
+    connection.execute(
+        insert_ignore(connection, MusicUsage.__table__),
+        [{"music_id": music_id, "platform": platform, "total_videos": 0, "total_views": 0, "median_views": 0}
+         for music_id, platform in keys]
+    )
+
+    ids = {}
+    music_ids = sorted({music_id for music_id, _ in keys})
+    for start in range(0, len(music_ids), RECOMPUTE_BATCH_SIZE):
+        rows = connection.execute(
+            select(MusicUsage.id, MusicUsage.music_id, MusicUsage.platform)
+            .filter(MusicUsage.music_id.in_(music_ids[start:start + RECOMPUTE_BATCH_SIZE]))
+        )
+        ids.update({(music_id, platform): usage_id for usage_id, music_id, platform in rows
+                    if (music_id, platform) in keys})
+    return ids
+
+
+def _summarize(rows: List) -> dict:
+    """Rollup columns for one sound from its (views, author_username, posted_at, title, author, scraped_at) rows"""
+    views = [row.views or 0 for row in rows]
+    creators = defaultdict(lambda: [0, 0])
+    for row in rows:
+        if row.author_username:
+            creators[row.author_username][0] += 1
+            creators[row.author_username][1] += row.views or 0
+    top = sorted(creators.items(), key=lambda item: (item[1][1], item[1][0]), reverse=True)[:TOP_CREATORS]
+    posted = [row.posted_at for row in rows if row.posted_at]
+    latest = max((row for row in rows if row.music_title),
+                 key=lambda row: row.scraped_at or datetime.min, default=None)
+
+    return {
+        "total_videos": len(rows),
+        "total_views": sum(views),
+        "median_views": int(statistics.median(views)) if views else 0,
+        "top_creators": [{"username": username, "videos": count, "views": total}
+                         for username, (count, total) in top],
+        "first_used": min(posted) if posted else None,
+        "last_used": max(posted) if posted else None,
+        "music_title": latest.music_title if latest else None,
+        "music_author": latest.music_author if latest else None,
+    }
+
+
+def recompute(connection, ids: Dict[Tuple[str, str], int]):
+    """Recompute the music_usage rows for these (music_id, platform) keys from their videos (not pending_changes)"""
+    keys = sorted(ids)
+    now = datetime.utcnow()
+    for start in range(0, len(keys), RECOMPUTE_BATCH_SIZE):
+        batch = keys[start:start + RECOMPUTE_BATCH_SIZE]
+        videos = defaultdict(list)
+        for row in connection.execute(
+            select(Video.music_id, Video.platform, Video.views, Video.author_username, Video.posted_at,
+                   Video.music_title, Video.music_author, Video.scraped_at)
+            .filter(Video.music_id.in_(sorted({music_id for music_id, _ in batch})))
+        ):
+            videos[(row.music_id, row.platform)].append(row)
+
+        usage = MusicUsage.__table__
+        connection.execute(
+            update(usage).where(usage.c.id == bindparam("usage_id")).values(
+                **{column: bindparam(column) for column in (
+                    "total_videos", "total_views", "median_views", "top_creators",
+                    "first_used", "last_used", "music_title", "music_author")},
+                last_updated=now
+            ),
+            [{"usage_id": ids[key], **_summarize(videos.get(key, []))} for key in batch]
+        )
+
+
+def recompute_pending(connection, limit: int = RECOMPUTE_BATCH_SIZE * 20) -> int:
+    """
+    Recompute up to `limit` sounds with pending_changes, then reset their counter - unless
+    more changes landed meanwhile (the counter moved), so those get picked up next time.
+    Returns the number of sounds recomputed.
+    """
+    usage = MusicUsage.__table__
+    rows = connection.execute(
+        select(usage.c.id, usage.c.music_id, usage.c.platform, usage.c.pending_changes)
+        .where(usage.c.pending_changes > 0).limit(limit)
+    ).all()
+    if not rows:
+        return 0
+
+    recompute(connection, {(row.music_id, row.platform): row.id for row in rows})
+    connection.execute(
+        update(usage)
+        .where(usage.c.id == bindparam("usage_id"), usage.c.pending_changes == bindparam("seen"))
+        .values(pending_changes=0),
+        [{"usage_id": row.id, "seen": row.pending_changes} for row in rows]
+    )
+    return len(rows)
+
+
+def run_pending_recompute():
+    """Scheduled job: recompute the sounds changed since the last run, one transaction per batch"""
+    from database import engine
+    import metrics
+
+    started = time.perf_counter()
+    succeeded = False
+    total = 0
+    try:
+        while True:
+            with engine.begin() as connection:
+                recomputed = recompute_pending(connection, RECOMPUTE_BATCH_SIZE)
+            total += recomputed
+            if recomputed < RECOMPUTE_BATCH_SIZE:
+                break
+        if total:
+            logger.info(f"Recomputed {total} sounds in the music rollup")
+        succeeded = True
+    except Exception as e:
+        logger.error(f"Error recomputing the music rollup: {str(e)}")
+    finally:
+        metrics.observe_job("music_rollup_recompute", time.perf_counter() - started, succeeded)
+
+
+# ============ SESSION HOOKS ============
+
+def _capture(session, written: List[Video], deleted: List[Video]) -> List[tuple]:
+    """Old and new sound / views of the videos a flush writes"""
+    old = {}
+    existing_ids = [video.id for video in written + deleted if video not in session.new]
+    if existing_ids:
+        rows = session.connection().execute(
+            select(Video.id, Video.music_id, Video.platform, Video.views).filter(Video.id.in_(existing_ids))
+        )
+        old = {row.id: row for row in rows}
+
+    changes = []
+    for video, is_deleted in [(video, False) for video in written] + [(video, True) for video in deleted]:
+        before = old.get(video.id)
+        old_key = (before.music_id, before.platform) if before and before.music_id else None
+        new_key = (video.music_id, video.platform) if video.music_id and not is_deleted else None
+        if old_key or new_key:
+            changes.append((old_key, (before.views or 0) if before else 0,
+                            new_key, 0 if is_deleted else (video.views or 0), video.posted_at))
+    return changes
+
+
+def apply_changes(connection, changes: List[tuple]):
+    """Apply (old_key, old_views, new_key, new_views, posted_at) video changes to the rollup"""
+    totals = defaultdict(lambda: [0, 0, 0, None, None])  # key -> [videos, views, changes, first, last]
+    daily = defaultdict(lambda: [0, 0])  # (key, day) -> [videos_added, views_gained]
+    today = _day(None)
+
+    for old_key, old_views, new_key, new_views, posted_at in changes:
+        if old_key and old_key != new_key:
+            total = totals[old_key]
+            total[0] -= 1
+            total[1] -= old_views
+            total[2] += 1
+        if new_key:
+            total = totals[new_key]
+            if new_key != old_key:
+                total[0] += 1
+                total[1] += new_views
+                daily[(new_key, _day(posted_at))][0] += 1
+            else:
+                total[1] += new_views - old_views
+                if new_views != old_views:
+                    daily[(new_key, today)][1] += new_views - old_views
+            total[2] += 1
+            if posted_at:
+                total[3] = min(total[3] or posted_at, posted_at)
+                total[4] = max(total[4] or posted_at, posted_at)
+
+    ids = _usage_ids(connection, totals)
+    _add_totals(connection, [(ids[key], *total) for key, total in totals.items()])
+
+    daily = {key: delta for key, delta in daily.items() if delta != [0, 0]}
+    if daily:
+        _add_daily(connection, [(ids[key], day, videos, views) for (key, day), (videos, views) in daily.items()])
+
+
+def _add_totals(connection, rows: List[tuple]):
+    """Add (music_usage_id, videos, views, changes, first_used, last_used) to the music_usage rows"""
+    usage = MusicUsage.__table__
+    first = bindparam("first", type_=usage.c.first_used.type)
+    last = bindparam("last", type_=usage.c.last_used.type)
+    connection.execute(
+        update(usage)
+        .where(usage.c.id == bindparam("usage_id"))
+        .values(total_videos=usage.c.total_videos + bindparam("videos"),
+                total_views=usage.c.total_views + bindparam("views"),
+                pending_changes=usage.c.pending_changes + bindparam("changes"),
+                first_used=case((or_(usage.c.first_used.is_(None), usage.c.first_used > first), first),
+                                else_=usage.c.first_used),
+                last_used=case((or_(usage.c.last_used.is_(None), usage.c.last_used < last), last),
+                               else_=usage.c.last_used),
+                last_updated=bindparam("now")),
+        [{"usage_id": usage_id, "videos": videos, "views": views, "changes": changes,
+          "first": first_used, "last": last_used, "now": datetime.utcnow()}
+         for usage_id, videos, views, changes, first_used, last_used in rows]
+    )
+
+
+def _add_daily(connection, rows: List[Tuple[int, datetime, int, int]]):
+    """Add (music_usage_id, day, videos_added, views_gained) to the daily rows"""
+    connection.execute(
+        insert_ignore(connection, MusicUsageDaily.__table__),
+        [{"music_usage_id": usage_id, "day": day, "videos_added": 0, "views_gained": 0}
+         for usage_id, day, _, _ in rows]
+    )
+    daily = MusicUsageDaily.__table__
+    connection.execute(
+        update(daily)
+        .where(daily.c.music_usage_id == bindparam("usage_id"), daily.c.day == bindparam("bucket"))
+        .values(videos_added=daily.c.videos_added + bindparam("videos"),
+                views_gained=daily.c.views_gained + bindparam("views")),
+        [{"usage_id": usage_id, "bucket": day, "videos": videos, "views": views}
+         for usage_id, day, videos, views in rows]
+    )
+
+
+_hooks = VideoFlushHooks("music_changes", _TRACKED_ATTRS, _capture, apply_changes)
+
+
+def register_session_hooks(session_factory=SessionLocal):
+    """Keep the music rollup in step with commits through this sessionmaker"""
+    _hooks.register(session_factory)
+
+
+# ============ REBUILD ============
+
+def _parse_day(value) -> datetime:
+    # date() is a string on SQLite and a date on PostgreSQL
+    return datetime.strptime(str(value)[:10], "%Y-%m-%d")
+
+
+def rebuild(connection) -> int:
+    """Rebuild music_usage and music_usage_daily from videos and video_history. Returns the number of sounds."""
+    connection.execute(delete(MusicUsageDaily))
+    connection.execute(delete(MusicUsage))
+
+    keys = connection.execute(
+        select(Video.music_id, Video.platform).filter(Video.music_id.isnot(None)).distinct()
+    ).all()
+    ids = _usage_ids(connection, [tuple(key) for key in keys])
+    recompute(connection, ids)
+
+    daily = defaultdict(lambda: [0, 0])
+    # Videos without posted_at count on the day they were first tracked, as they do incrementally
+    posted_day = func.date(func.coalesce(Video.posted_at, Video.created_at))
+    for music_id, platform, day, videos in connection.execute(
+        select(Video.music_id, Video.platform, posted_day, func.count())
+        .filter(Video.music_id.isnot(None))
+        .group_by(Video.music_id, Video.platform, posted_day)
+    ):
+        daily[(ids[(music_id, platform)], _parse_day(day))][0] += videos
+
+    deltas = growth.snapshot_deltas(select(Video.id).filter(Video.music_id.isnot(None))).subquery()
+    snapshot_day, previous_day = func.date(deltas.c.snapshot_date), func.date(deltas.c.previous_date)
+    for music_id, platform, day, previous, views in connection.execute(
+        select(Video.music_id, Video.platform, snapshot_day, previous_day, func.sum(deltas.c.views))
+        .join(Video, (Video.id == deltas.c.video_id) & (Video.platform == deltas.c.platform))
+        .group_by(Video.music_id, Video.platform, snapshot_day, previous_day)
+    ):
+        for growth_day, (day_views,) in growth.interpolate(day, previous, (views,)):
+            daily[(ids[(music_id, platform)], datetime.combine(growth_day, datetime.min.time()))][1] += day_views
+
+    if daily:
+        connection.execute(
+            MusicUsageDaily.__table__.insert(),
+            [{"music_usage_id": usage_id, "day": day, "videos_added": videos, "views_gained": views}
+             for (usage_id, day), (videos, views) in daily.items()]
+        )
+    return len(ids)
+
+
+if __name__ == "__main__":
+    from database import engine
+
+    if len(sys.argv) < 2 or sys.argv[1] != "rebuild":
+        print("Usage: python music_rollup.py rebuild")
+        sys.exit(1)
+
+    print("🔄 Rebuilding music usage rollup from videos...")
+    started = datetime.utcnow()
+    with engine.begin() as connection:
+        total = rebuild(connection)
+    print(f"✅ {total} sounds in {(datetime.utcnow() - started).total_seconds():.1f}s")
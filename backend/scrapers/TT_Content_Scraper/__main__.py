@@ -12,6 +12,7 @@ from typing import Optional, List
 
 from .tt_content_scraper import TT_Content_Scraper
 from .src.object_tracker_db import ObjectTracker, ObjectStatus
+from .src.id_reader import iter_ids, FORMATS
 
 
 def setup_parser() -> argparse.ArgumentParser:
@@ -43,22 +44,41 @@ def setup_parser() -> argparse.ArgumentParser:
         default=0.35,
         help="Wait time between requests in seconds (default: 0.35)"
     )
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="Print the object counts per type and status and exit (no command needed)"
+    )
     
     # Create subparsers for different commands
     subparsers = parser.add_subparsers(
         dest="command",
-        help="Available commands",
-        required=True
+        help="Available commands"
     )
     
     # Add IDs from file command
     add_parser = subparsers.add_parser(
         "add",
-        help="Add IDs to the object tracker from a text file"
+        help="Add IDs to the object tracker from a text, CSV or NDJSON file (optionally gzipped)"
     )
     add_parser.add_argument(
         "file",
-        help="Text file containing IDs (one per line)"
+        help="File containing IDs - text (one per line), CSV or NDJSON, .gz supported"
+    )
+    add_parser.add_argument(
+        "--format",
+        choices=FORMATS,
+        help="File format (default: from the extension, e.g. .csv / .ndjson / .jsonl, otherwise text)"
+    )
+    add_parser.add_argument(
+        "--column",
+        help="CSV column / NDJSON field holding the ID (default: id)"
+    )
+    add_parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=50_000,
+        help="IDs inserted per transaction (default: 50000)"
     )
     add_parser.add_argument(
         "--type",
@@ -147,17 +167,16 @@ def setup_parser() -> argparse.ArgumentParser:
     return parser
 
 
-def load_ids_from_file(filepath: str) -> List[str]:
-    """Load IDs from a text file, one per line."""
+def import_ids_from_file(tracker: ObjectTracker, args) -> dict:
+    """Stream IDs from a file into the tracker in chunks."""
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            ids = [line.strip() for line in f if line.strip()]
-        return ids
+        ids = iter_ids(args.file, format=args.format, column=args.column)
+        return tracker.import_objects(ids, title=args.title, type=args.type, chunk_size=args.chunk_size)
     except FileNotFoundError:
-        print(f"Error: File '{filepath}' not found.", file=sys.stderr)
+        print(f"Error: File '{args.file}' not found.", file=sys.stderr)
         sys.exit(1)
-    except Exception as e:
-        print(f"Error reading file '{filepath}': {e}", file=sys.stderr)
+    except (ValueError, UnicodeDecodeError, OSError) as e:
+        print(f"Error reading file '{args.file}': {e}", file=sys.stderr)
         sys.exit(1)
 
 
@@ -170,6 +189,7 @@ def print_stats(tracker: ObjectTracker, obj_type: str = "all", detailed: bool =
     print(f"Pending:   {stats['pending']:,}")
     print(f"Errors:    {stats['errors']:,}")
     print(f"Retry:     {stats['retry']:,}")
+    print(f"Claimed:   {stats['in_progress']:,}")
     
     total = sum(stats.values())
     print(f"Total:     {total:,}")
@@ -188,26 +208,47 @@ def print_stats(tracker: ObjectTracker, obj_type: str = "all", detailed: bool =
             print(f"... and {len(error_objects) - 10} more errors")
 
 
+def print_status_counts(tracker: ObjectTracker):
+    """Print the trigger-maintained counters - instant even on multi-million-ID backlogs."""
+    counts = tracker.get_status_counts()
+    statuses = [status.value for status in ObjectStatus]
+    
+    print(f"\n{'type':<10}" + "".join(f"{status:>13}" for status in statuses) + f"{'total':>13}")
+    for obj_type, by_status in counts.items():
+        print(f"{obj_type or '-':<10}" + "".join(f"{by_status.get(status, 0):>13,}" for status in statuses)
+              + f"{sum(by_status.values()):>13,}")
+    if not counts:
+        print("No objects tracked.")
+
+
 def main():
     """Main entry point."""
     parser = setup_parser()
     args = parser.parse_args()
     
+    if args.stats:
+        tracker = ObjectTracker(args.progress_db)
+        print_status_counts(tracker)
+        tracker.close()
+        sys.exit(0)
+    if args.command is None:
+        parser.error("a command is required (or --stats)")
+    
     try:
         if args.command == "add":
-            # Load IDs from file and add to tracker
-            ids = load_ids_from_file(args.file)
+            # Stream IDs from file into the tracker
+            print(f"Loading IDs from {args.file}")
             
-            if not ids:
+            tracker = ObjectTracker(args.progress_db)
+            result = import_ids_from_file(tracker, args)
+            
+            if not result["read"]:
                 print("No IDs found in file.", file=sys.stderr)
+                tracker.close()
                 sys.exit(1)
             
-            print(f"Loading {len(ids)} IDs from {args.file}")
-            
-            tracker = ObjectTracker(args.progress_db)
-            tracker.add_objects(ids, title=args.title, type=args.type)
-            
-            print(f"Added {len(ids)} {args.type} objects to tracker")
+            print(f"Added {result['added']:,} new {args.type} objects to tracker "
+                  f"({result['read']:,} IDs read in {result['seconds']:.1f}s, {result['ids_per_second']:,.0f} IDs/s)")
             print_stats(tracker, args.type)
             tracker.close()
             
@@ -238,6 +279,9 @@ def main():
                 print("\nScraping interrupted by user.")
             except AssertionError as e:
                 print(f"Scraping completed: {e}")
+            finally:
+                # Write buffered progress and hand unfinished claims back to other workers
+                scraper.close()
             #except Exception as e:
             #    print(f"Error during scraping: {e}", file=sys.stderr)
             #    sys.exit(1)
@@ -0,0 +1,102 @@
+import csv
+import gzip
+import io
+import json
+import logging
+from pathlib import Path
+from typing import Iterator, Optional
+
+import TT_Content_Scraper.src.logger
+logger = logging.getLogger('TTCS.IdReader')
+
+FORMATS = ("text", "csv", "ndjson")
+
+
+def detect_format(filepath: str) -> str:
+    """Guess the format from the extension (ignoring a trailing .gz) - anything unknown is plain text."""
+    suffixes = [s.lower() for s in Path(filepath).suffixes]
+    if suffixes and suffixes[-1] == ".gz":
+        suffixes.pop()
+    suffix = suffixes[-1] if suffixes else ""
+    if suffix in (".csv", ".tsv"):
+        return "csv"
+    if suffix in (".ndjson", ".jsonl"):
+        return "ndjson"
+    return "text"
+
+
+def _open_text(filepath: str):
+    """Open a text file, transparently un-gzipping (detected by magic bytes, not the name)."""
+    with open(filepath, "rb") as f:
+        gzipped = f.read(2) == b"\x1f\x8b"
+    if gzipped:
+        return io.TextIOWrapper(gzip.open(filepath, "rb"), encoding="utf-8", newline="")
+    return open(filepath, "r", encoding="utf-8", newline="")
+
+
+def iter_ids(filepath: str, format: Optional[str] = None, column: Optional[str] = None) -> Iterator[str]:
+    """Lazily yield IDs from a text (one per line), CSV or NDJSON file, optionally gzipped.
+
+    CSV: the `column` (default "id") from the header. Without an "id" header the first column of
+    every row is used, header-less files included - pass `column` for differently named headers.
+    NDJSON: the `column` (default "id") of each object - lines holding a bare string/number are the ID.
+    Blank lines and rows without an ID are skipped.
+    """
+    format = format or detect_format(filepath)
+    if format not in FORMATS:
+        raise ValueError(f"Unknown ID file format '{format}' (expected one of {', '.join(FORMATS)})")
+    explicit_column = column is not None
+    column = column or "id"
+
+    with _open_text(filepath) as f:
+        if format == "text":
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield line
+
+        elif format == "csv":
+            sample = f.read(4096)
+            try:
+                dialect = csv.Sniffer().sniff(sample, delimiters=",;\t|")
+            except csv.Error:
+                dialect = csv.excel  # Single column (or empty) - nothing to sniff
+            rows = csv.reader(_chain(sample, f), dialect)
+            header = next(rows, None)
+            if header is None:
+                return
+            header = [h.strip() for h in header]
+            if column in header:
+                index = header.index(column)
+            elif explicit_column:
+                raise ValueError(f"Column '{column}' not in CSV header {header}")
+            else:
+                # No header with the column - the first row is data
+                index = 0
+                if header and header[0]:
+                    yield header[0]
+            for row in rows:
+                if len(row) > index and row[index].strip():
+                    yield row[index].strip()
+
+        else:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    value = json.loads(line)
+                except json.JSONDecodeError as e:
+                    logger.warning(f"Skipping invalid JSON on line {line_no}: {e}")
+                    continue
+                if isinstance(value, dict):
+                    value = value.get(column)
+                if value is not None and value != "":
+                    yield str(value)
+
+
+def _chain(sample: str, f) -> Iterator[str]:
+    """Lines of an already partially read file, starting with the sniffed sample"""
+    rest = f.readline()
+    yield from io.StringIO(sample + rest)
+    yield from f
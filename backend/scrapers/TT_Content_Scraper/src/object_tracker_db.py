@@ -1,10 +1,13 @@
 import sqlite3
 import os
-from datetime import datetime
+import socket
+import time
+from datetime import datetime, timedelta
 from enum import Enum
+from itertools import islice
 from pathlib import Path
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterable, Optional
 
 import TT_Content_Scraper.src.logger
 logger = logging.getLogger('TTCS.ObjTracker')
@@ -14,26 +17,56 @@ class ObjectStatus(Enum):
     COMPLETED = "completed"
     ERROR = "error"
     RETRY = "retry"
+    IN_PROGRESS = "in_progress"
+
+
+# Kept separate: import_objects swaps it for one counter update per chunk
+STATUS_COUNTS_INSERT_TRIGGER = """
+    CREATE TRIGGER IF NOT EXISTS status_counts_insert
+    AFTER INSERT ON objects
+    BEGIN
+        INSERT OR IGNORE INTO status_counts (type, status, n) VALUES (COALESCE(NEW.type, ''), NEW.status, 0);
+        UPDATE status_counts SET n = n + 1 WHERE type = COALESCE(NEW.type, '') AND status = NEW.status;
+    END;
+"""
 
 
 class ObjectTracker:
-    """Create an SQLite database that tracks whether an object (like a video id) was already processed or caused an error etc."""
+    """Create an SQLite database that tracks whether an object (like a video id) was already processed or caused an error etc.
+
+    add_object, mark_completed and mark_error are write-behind: they are buffered and written in one
+    transaction once flush_every ops are queued or the oldest queued op is flush_interval_ms old.
+    Every read flushes first, and so do close() and the context manager. flush_every=1 writes through.
+
+    Several processes can share one database by taking work with claim_pending(), which marks rows
+    in_progress under a lease - rows whose lease ran out (crashed worker) are handed out again.
+    """
     
-    def __init__(self, db_file="progress_tracking/scraping_progress.db"):
+    def __init__(self, db_file="progress_tracking/scraping_progress.db", flush_every: int = 50,
+                 flush_interval_ms: int = 1000, worker_id: Optional[str] = None):
         path_obj = Path(db_file)
         path_obj.parent.mkdir(parents=True, exist_ok=True)
 
+        self.flush_every = max(1, flush_every)
+        self.flush_interval = flush_interval_ms / 1000
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self._buffer = []  # (sql, params) in call order
+        self._buffer_started = 0.0
+
         if db_file is not None:
             self.db_file = db_file
             self.conn = None
             self._connect()
             self._create_tables()
+            self._migrate_columns()
+            self._create_status_counts()
             self._create_indexes()
     
     def _connect(self):
         """Establish connection to SQLite database."""
         try:
-            self.conn = sqlite3.connect(self.db_file, check_same_thread=False)
+            # Wait on writers from other processes instead of failing with "database is locked"
+            self.conn = sqlite3.connect(self.db_file, check_same_thread=False, timeout=30)
             # Enable foreign keys and set pragmas for better performance
             self.conn.execute("PRAGMA foreign_keys = ON")
             self.conn.execute("PRAGMA journal_mode = WAL")  # Better concurrent access
@@ -57,7 +90,9 @@ class ObjectTracker:
             last_error TEXT,
             last_attempt TIMESTAMP,
             file_path TEXT,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            lease_until TIMESTAMP,
+            claimed_by TEXT
         );
         """
         
@@ -90,12 +125,79 @@ class ObjectTracker:
             logger.error(f"Error creating tables: {e}")
             raise
     
+    def _migrate_columns(self):
+        """Add the claim columns to databases created before claim_pending existed."""
+        try:
+            columns = {row[1] for row in self.conn.execute("PRAGMA table_info(objects)")}
+            for column, column_type in (("lease_until", "TIMESTAMP"), ("claimed_by", "TEXT")):
+                if column not in columns:
+                    self.conn.execute(f"ALTER TABLE objects ADD COLUMN {column} {column_type}")
+            self.conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Error migrating columns: {e}")
+            raise
+    
+    def _create_status_counts(self):
+        """Per (type, status) row counts kept up to date by triggers, so get_stats doesn't scan objects.
+
+        Databases that predate the table are backfilled once, under the write lock so a second
+        process opening the same file can't count the rows twice. A NULL type is counted as ''.
+        """
+        triggers = [
+            STATUS_COUNTS_INSERT_TRIGGER,
+            """
+            CREATE TRIGGER IF NOT EXISTS status_counts_delete
+            AFTER DELETE ON objects
+            BEGIN
+                UPDATE status_counts SET n = n - 1 WHERE type = COALESCE(OLD.type, '') AND status = OLD.status;
+            END;
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS status_counts_update
+            AFTER UPDATE OF status, type ON objects
+            WHEN OLD.status IS NOT NEW.status OR OLD.type IS NOT NEW.type
+            BEGIN
+                UPDATE status_counts SET n = n - 1 WHERE type = COALESCE(OLD.type, '') AND status = OLD.status;
+                INSERT OR IGNORE INTO status_counts (type, status, n) VALUES (COALESCE(NEW.type, ''), NEW.status, 0);
+                UPDATE status_counts SET n = n + 1 WHERE type = COALESCE(NEW.type, '') AND status = NEW.status;
+            END;
+            """,
+        ]
+        
+        try:
+            self.conn.execute("BEGIN IMMEDIATE")
+            exists = self.conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'status_counts'"
+            ).fetchone()
+            if not exists:
+                self.conn.execute("""
+                    CREATE TABLE status_counts (
+                        type TEXT NOT NULL,
+                        status TEXT NOT NULL,
+                        n INTEGER NOT NULL DEFAULT 0,
+                        PRIMARY KEY (type, status)
+                    )
+                """)
+                self.conn.execute("""
+                    INSERT INTO status_counts (type, status, n)
+                    SELECT COALESCE(type, ''), status, COUNT(*) FROM objects GROUP BY COALESCE(type, ''), status
+                """)
+                logger.info("Status counters backfilled")
+            for trigger_sql in triggers:
+                self.conn.execute(trigger_sql)
+            self.conn.commit()
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            logger.error(f"Error creating status counters: {e}")
+            raise
+    
     def _create_indexes(self):
         """Create indexes for better query performance."""
         indexes = [
             "CREATE INDEX IF NOT EXISTS idx_status ON objects(status)",
             "CREATE INDEX IF NOT EXISTS idx_added_at ON objects(added_at)",
             "CREATE INDEX IF NOT EXISTS idx_completed_at ON objects(completed_at)",
+            "CREATE INDEX IF NOT EXISTS idx_status_lease ON objects(status, lease_until)",
         ]
         
         try:
@@ -107,6 +209,34 @@ class ObjectTracker:
             logger.error(f"Error creating indexes: {e}")
             raise
     
+    def _queue(self, sql: str, params: tuple):
+        """Buffer a write and flush once the buffer is full or old enough."""
+        if not self._buffer:
+            self._buffer_started = time.monotonic()
+        self._buffer.append((sql, params))
+        if len(self._buffer) >= self.flush_every or time.monotonic() - self._buffer_started >= self.flush_interval:
+            self.flush()
+    
+    def flush(self):
+        """Write all buffered ops in one transaction."""
+        if not self._buffer:
+            return
+        buffer, self._buffer = self._buffer, []
+        try:
+            # Consecutive ops with the same statement go through one executemany
+            start = 0
+            for i in range(1, len(buffer) + 1):
+                if i == len(buffer) or buffer[i][0] != buffer[start][0]:
+                    self.conn.executemany(buffer[start][0], [params for _, params in buffer[start:i]])
+                    start = i
+            self.conn.commit()
+            logger.debug(f"Flushed {len(buffer)} buffered ops")
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            self._buffer = buffer + self._buffer
+            logger.error(f"Error flushing {len(buffer)} buffered ops: {e}")
+            raise
+    
     def _update_metadata(self, key: str, value: str):
         """Update metadata table."""
         try:
@@ -120,14 +250,13 @@ class ObjectTracker:
             raise
             
     def add_object(self, id: str, title: Optional[str] = None, type: Optional[str] = None):
-        """Add a new object to track"""
+        """Add a new object to track (buffered)"""
         try:
-            self.conn.execute("""
+            self._queue("""
                 INSERT OR IGNORE INTO objects 
                 (id, status, title, type, added_at, attempts) 
                 VALUES (?, ?, ?, ?, ?, 0)
             """, (id, ObjectStatus.PENDING.value, title, type, datetime.now().isoformat()))
-            self.conn.commit()
             
         except sqlite3.Error as e:
             logger.error(f"Error adding object {id}: {e}")
@@ -136,6 +265,7 @@ class ObjectTracker:
     def add_objects(self, ids: List[str], title: Optional[str] = None, type: Optional[str] = None):
         """Add multiple objects to track"""
         try:
+            self.flush()
             current_time = datetime.now().isoformat()
             objects_data = [
                 (id, ObjectStatus.PENDING.value, title, type, current_time, 0) 
@@ -154,15 +284,71 @@ class ObjectTracker:
             logger.error(f"Error adding objects: {e}")
             raise
     
+    def import_objects(self, ids: Iterable[str], title: Optional[str] = None, type: Optional[str] = None,
+                       chunk_size: int = 50_000) -> Dict[str, Any]:
+        """Stream IDs into the tracker in chunked transactions - memory stays bounded by chunk_size.
+
+        For seeding large ID lists (see id_reader.iter_ids). Durability is relaxed while loading
+        (synchronous=OFF, bigger page cache): a crash mid-import can lose the last chunks, which a
+        re-run re-adds since existing IDs are ignored. Returns read/added counts and throughput.
+        """
+        self.flush()
+        ids = iter(ids)
+        stats = {"read": 0, "added": 0, "seconds": 0.0, "ids_per_second": 0.0}
+        started = time.monotonic()
+        
+        self.conn.execute("PRAGMA synchronous = OFF")
+        self.conn.execute("PRAGMA cache_size = -65536")  # 64 MB
+        self.conn.execute("PRAGMA temp_store = MEMORY")
+        try:
+            while True:
+                chunk = list(islice(ids, chunk_size))
+                if not chunk:
+                    break
+                current_time = datetime.now().isoformat()
+                # Per-row counter triggers halve the insert rate - the chunk's transaction drops the
+                # insert trigger, bumps the counter once and recreates it (other writers wait on the lock)
+                self.conn.execute("BEGIN IMMEDIATE")
+                self.conn.execute("DROP TRIGGER IF EXISTS status_counts_insert")
+                cursor = self.conn.executemany("""
+                    INSERT OR IGNORE INTO objects 
+                    (id, status, title, type, added_at, attempts) 
+                    VALUES (?, ?, ?, ?, ?, 0)
+                """, ((id, ObjectStatus.PENDING.value, title, type, current_time) for id in chunk))
+                self.conn.execute("""
+                    INSERT OR IGNORE INTO status_counts (type, status, n) VALUES (COALESCE(?, ''), ?, 0)
+                """, (type, ObjectStatus.PENDING.value))
+                self.conn.execute("""
+                    UPDATE status_counts SET n = n + ? WHERE type = COALESCE(?, '') AND status = ?
+                """, (cursor.rowcount, type, ObjectStatus.PENDING.value))
+                self.conn.execute(STATUS_COUNTS_INSERT_TRIGGER)
+                self.conn.commit()
+                
+                stats["read"] += len(chunk)
+                stats["added"] += cursor.rowcount
+                elapsed = time.monotonic() - started
+                logger.info(f"Imported {stats['read']:,} IDs ({stats['added']:,} new) - "
+                            f"{stats['read'] / max(elapsed, 1e-9):,.0f} IDs/s")
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            logger.error(f"Error importing objects after {stats['read']:,} IDs: {e}")
+            raise
+        finally:
+            self.conn.execute("PRAGMA synchronous = NORMAL")
+            self.conn.execute("PRAGMA cache_size = -2000")  # SQLite default
+        
+        stats["seconds"] = time.monotonic() - started
+        stats["ids_per_second"] = stats["read"] / max(stats["seconds"], 1e-9)
+        return stats
+    
     def mark_completed(self, id: str, file_path: Optional[str] = None):
-        """Mark object as successfully completed"""
+        """Mark object as successfully completed (buffered)"""
         try:
-            self.conn.execute("""
+            self._queue("""
                 UPDATE objects 
-                SET status = ?, completed_at = ?, file_path = ?
+                SET status = ?, completed_at = ?, file_path = ?, lease_until = NULL, claimed_by = NULL
                 WHERE id = ?
             """, (ObjectStatus.COMPLETED.value, datetime.now().isoformat(), file_path, id))
-            self.conn.commit()
             
         except sqlite3.Error as e:
             logger.error(f"Error marking object {id} as completed: {e}")
@@ -171,6 +357,7 @@ class ObjectTracker:
     def mark_completed_multi(self, ids: List[str], file_paths: Optional[List[str]] = None):
         """Mark multiple objects as successfully completed"""
         try:
+            self.flush()
             current_time = datetime.now().isoformat()
             
             if file_paths:
@@ -188,7 +375,7 @@ class ObjectTracker:
             
             self.conn.executemany("""
                 UPDATE objects 
-                SET status = ?, completed_at = ?, file_path = ?
+                SET status = ?, completed_at = ?, file_path = ?, lease_until = NULL, claimed_by = NULL
                 WHERE id = ?
             """, update_data)
             self.conn.commit()
@@ -198,32 +385,24 @@ class ObjectTracker:
             logger.error(f"Error marking objects as completed: {e}")
             raise
     
-    def mark_error(self, id: str, error_message: str):
-        """Mark object as error"""
+    def mark_error(self, id: str, error_message: Optional[str] = None):
+        """Mark object as error (buffered)"""
         try:
-            current_time = datetime.now().isoformat()
-            
-            # Get current attempts count
-            cursor = self.conn.execute(
-                "SELECT attempts FROM objects WHERE id = ?", (id,)
-            )
-            result = cursor.fetchone()
-            attempts = (result[0] + 1) if result else 1
-            
-            self.conn.execute("""
+            self._queue("""
                 UPDATE objects 
-                SET status = ?, attempts = ?, last_error = ?, last_attempt = ?
+                SET status = ?, attempts = COALESCE(attempts, 0) + 1, last_error = ?, last_attempt = ?,
+                    lease_until = NULL, claimed_by = NULL
                 WHERE id = ?
-            """, (ObjectStatus.ERROR.value, attempts, error_message, current_time, id))
-            self.conn.commit()
+            """, (ObjectStatus.ERROR.value, error_message, datetime.now().isoformat(), id))
             
         except sqlite3.Error as e:
             logger.error(f"Error marking object {id} as error: {e}")
             raise
     
     def get_pending_objects(self, type="all", limit:int=10**10) -> List[str]:
-        """Get all objects that need to be processed"""
+        """Get all objects that need to be processed (without claiming them - see claim_pending)"""
         try:
+            self.flush()
             if type == "all":
                 cursor = self.conn.execute("""
                     SELECT id, title, type 
@@ -250,9 +429,62 @@ class ObjectTracker:
             logger.error(f"Error getting pending objects: {e}")
             raise
     
+    def claim_pending(self, n: int, lease_seconds: float, type="all") -> Dict[str, Dict[str, Any]]:
+        """Atomically claim up to n pending/retry objects (or ones whose lease expired) for this worker.
+
+        Claimed objects are in_progress until mark_completed / mark_error, or until the lease runs out.
+        """
+        self.flush()
+        now = datetime.now()
+        lease_until = (now + timedelta(seconds=lease_seconds)).isoformat()
+        type_filter = "" if type == "all" else "AND type = ?"
+        params = [ObjectStatus.PENDING.value, ObjectStatus.RETRY.value, ObjectStatus.IN_PROGRESS.value, now.isoformat()]
+        if type != "all":
+            params.append(type)
+        try:
+            # Take the write lock before reading so no other process can claim the same rows
+            self.conn.execute("BEGIN IMMEDIATE")
+            rows = self.conn.execute(f"""
+                SELECT id, title, type 
+                FROM objects 
+                WHERE (status IN (?, ?) OR (status = ? AND lease_until < ?)) {type_filter}
+                LIMIT ? 
+            """, params + [n]).fetchall()
+            self.conn.executemany("""
+                UPDATE objects 
+                SET status = ?, lease_until = ?, claimed_by = ?, last_attempt = ?
+                WHERE id = ?
+            """, [(ObjectStatus.IN_PROGRESS.value, lease_until, self.worker_id, now.isoformat(), row[0]) for row in rows])
+            self.conn.commit()
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            logger.error(f"Error claiming pending objects: {e}")
+            raise
+        
+        return {row[0]: {"title": row[1], "type": row[2]} for row in rows}
+    
+    def release_claims(self) -> int:
+        """Return this worker's unfinished claims to pending"""
+        try:
+            self.flush()
+            cursor = self.conn.execute("""
+                UPDATE objects 
+                SET status = ?, lease_until = NULL, claimed_by = NULL
+                WHERE status = ? AND claimed_by = ?
+            """, (ObjectStatus.PENDING.value, ObjectStatus.IN_PROGRESS.value, self.worker_id))
+            self.conn.commit()
+            
+            if cursor.rowcount:
+                logger.info(f"Released {cursor.rowcount} claimed objects")
+            return cursor.rowcount
+        except sqlite3.Error as e:
+            logger.error(f"Error releasing claims: {e}")
+            raise
+    
     def get_error_objects(self) -> Dict[str, Dict[str, Any]]:
         """Get all objects that failed"""
         try:
+            self.flush()
             cursor = self.conn.execute("""
                 SELECT id, title, type, added_at, attempts, last_error, last_attempt, file_path
                 FROM objects 
@@ -281,6 +513,7 @@ class ObjectTracker:
     def get_completed_objects(self) -> Dict[str, Dict[str, Any]]:
         """Get all successfully completed objects"""
         try:
+            self.flush()
             cursor = self.conn.execute("""
                 SELECT id, title, type, added_at, completed_at, attempts, file_path
                 FROM objects 
@@ -306,23 +539,23 @@ class ObjectTracker:
             raise
     
     def get_stats(self, type="all") -> Dict[str, int]:
-        """Get processing statistics"""
+        """Get processing statistics (from the trigger-maintained status_counts, no table scan)"""
         try:
+            self.flush()
             if type == "all":
                 cursor = self.conn.execute("""
-                    SELECT status, COUNT(*) 
-                    FROM objects 
+                    SELECT status, SUM(n) 
+                    FROM status_counts 
                     GROUP BY status
                 """)
             else:
                 cursor = self.conn.execute("""
-                    SELECT status, COUNT(*) 
-                    FROM objects 
+                    SELECT status, n 
+                    FROM status_counts 
                     WHERE type = ?
-                    GROUP BY status
                 """, (type,))
             
-            stats = {"completed": 0, "errors": 0, "pending": 0, "retry": 0}
+            stats = {"completed": 0, "errors": 0, "pending": 0, "retry": 0, "in_progress": 0}
             for status, count in cursor.fetchall():
                 if status == ObjectStatus.COMPLETED.value:
                     stats["completed"] = count
@@ -332,15 +565,37 @@ class ObjectTracker:
                     stats["pending"] = count
                 elif status == ObjectStatus.RETRY.value:
                     stats["retry"] = count
+                elif status == ObjectStatus.IN_PROGRESS.value:
+                    stats["in_progress"] = count
             
             return stats
         except sqlite3.Error as e:
             logger.error(f"Error getting statistics: {e}")
             raise
     
+    def get_status_counts(self) -> Dict[str, Dict[str, int]]:
+        """Get the row count of every status per type, e.g. {"content": {"pending": 10, ...}}"""
+        try:
+            self.flush()
+            cursor = self.conn.execute("""
+                SELECT type, status, n 
+                FROM status_counts 
+                WHERE n > 0
+                ORDER BY type, status
+            """)
+            
+            result = {}
+            for type, status, count in cursor.fetchall():
+                result.setdefault(type, {})[status] = count
+            return result
+        except sqlite3.Error as e:
+            logger.error(f"Error getting status counts: {e}")
+            raise
+    
     def get_object_status(self, id: str) -> Optional[Dict[str, Any]]:
         """Get the status of a specific object"""
         try:
+            self.flush()
             cursor = self.conn.execute("""
                 SELECT status, title, type, added_at, completed_at, attempts, last_error, last_attempt, file_path
                 FROM objects 
@@ -368,6 +623,7 @@ class ObjectTracker:
     def is_completed(self, id: str) -> bool:
         """Check if an object is completed"""
         try:
+            self.flush()
             cursor = self.conn.execute(
                 "SELECT 1 FROM objects WHERE id = ? AND status = ?",
                 (id, ObjectStatus.COMPLETED.value)
@@ -380,6 +636,7 @@ class ObjectTracker:
     def reset_errors_to_pending(self):
         """Reset all error objects back to pending for retry"""
         try:
+            self.flush()
             cursor = self.conn.execute("""
                 UPDATE objects 
                 SET status = ?, last_error = NULL, last_attempt = NULL
@@ -396,9 +653,10 @@ class ObjectTracker:
     def reset_all_to_pending(self):
         """Reset all objects back to pending for retry"""
         try:
+            self.flush()
             cursor = self.conn.execute("""
                 UPDATE objects 
-                SET status = "pending", last_error = NULL, last_attempt = NULL
+                SET status = "pending", last_error = NULL, last_attempt = NULL, lease_until = NULL, claimed_by = NULL
             """)
             self.conn.commit()
             
@@ -411,6 +669,7 @@ class ObjectTracker:
     def clear_all_data(self):
         """Clear all tracking data (use with caution!)"""
         try:
+            self.flush()
             self.conn.execute("DELETE FROM objects")
             self.conn.execute("DELETE FROM metadata")
             self.conn.commit()
@@ -420,9 +679,11 @@ class ObjectTracker:
             raise
     
     def close(self):
-        """Close the database connection"""
+        """Flush buffered ops, release unfinished claims and close the database connection"""
         if self.conn:
+            self.release_claims()
             self.conn.close()
+            self.conn = None
             logger.info("Database connection closed")
     
     def __enter__(self):
@@ -21,10 +21,15 @@ class TT_Content_Scraper(ObjectTracker):
                 output_files_fp = "data/",
                 progress_file_fn = "progress_tracking/scraping_progress.db",
                 clear_console = False,
-                browser_name = None):
+                browser_name = None,
+                claim_size = 25,
+                lease_seconds = 900):
         
         # initialize object tracker (database of pending and finished objects (ids))
         super().__init__(progress_file_fn)
+        # ids are claimed in batches so several scraper processes can share one progress db
+        self.CLAIM_SIZE = claim_size
+        self.LEASE_SECONDS = lease_seconds
 
         # create output folder if doesnt exist
         Path(output_files_fp).mkdir(parents=True, exist_ok=True)
@@ -50,7 +55,7 @@ class TT_Content_Scraper(ObjectTracker):
         
         while True:
             #self._logging_queue_progress(type = seed_type)
-            seedlist = self.get_pending_objects(type=seed_type, limit=100)
+            seedlist = self.claim_pending(self.CLAIM_SIZE, self.LEASE_SECONDS, type=seed_type)
             assert len(seedlist) > 0, f"No more pending objects of type {seed_type} to scrape"
             for self.iterations, seed in enumerate(seedlist.items()):
                 start = time.time()
@@ -113,7 +118,7 @@ class TT_Content_Scraper(ObjectTracker):
                 binaries : dict = base_scraper.scrape_binaries(link_to_binaries)
             except ConnectionError as e:
                 logger.warning(f"ID {id} did not lead to any downloadable files - KeyError {e}")
-                self.mark_error(id=id)
+                self.mark_error(id, str(e))
                 self.n_errors_total += 1
                 self.n_pending -= 1
                 return None
@@ -146,7 +151,7 @@ class TT_Content_Scraper(ObjectTracker):
             self.n_errors_total = stats["errors"]
             self.n_pending = stats["pending"]
             self.n_retry= stats["retry"]     
-            self.n_total = self.n_scraped_total + self.n_errors_total + self.n_pending + self.n_retry  
+            self.n_total = self.n_scraped_total + self.n_errors_total + self.n_pending + self.n_retry + stats["in_progress"]
     
 
         # calculate ETA
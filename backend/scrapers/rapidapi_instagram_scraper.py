@@ -1,12 +1,35 @@
 """
 Instagram Scraper using RapidAPI
 Uses Instagram Bulk Profile Scraper API - more reliable and feature-rich
+
+scrape_profile requests the profile info and the first posts page at the same time, then follows
+the posts cursor up to `limit` posts, handing each page to `on_page` as it arrives. Profile info
+rarely changes, so it is cached in-process for INSTAGRAM_PROFILE_CACHE_SECONDS; posts are always
+fetched fresh (bulk jobs already skip URLs scraped within URL_SCRAPE_DEDUPE_MINUTES).
 """
 
 import requests
-from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 from datetime import datetime
 import os
+import threading
+import time
+
+from metrics import observe_scraper_request
+
+PROFILE_CACHE_SECONDS = int(os.getenv("INSTAGRAM_PROFILE_CACHE_SECONDS") or 6 * 3600)
+PROFILE_FETCH_THREADS = int(os.getenv("INSTAGRAM_PROFILE_FETCH_THREADS") or 8)  # Profile requests in flight
+POSTS_MAX_PAGES = 50  # Safety stop if the API keeps returning a cursor
+POSTS_PAGE_DELAY_SECONDS = 0.5  # Between posts pages, to stay under the rate limit
+POSTS_CURSOR_PARAM = "pagination_token"
+
+# Profile requests run here while the calling thread fetches the first posts page
+_executor = ThreadPoolExecutor(max_workers=PROFILE_FETCH_THREADS, thread_name_prefix="instagram-profile")
+
+# username -> (expires_at, profile) shared by every scraper instance in the process
+_profile_cache: Dict[str, Tuple[float, Dict]] = {}
+_profile_cache_lock = threading.Lock()
 
 
 class RapidAPIInstagramScraper:
@@ -22,12 +45,24 @@ class RapidAPIInstagramScraper:
         if not self.api_key:
             raise ValueError("RapidAPI key is required. Set RAPIDAPI_KEY_INSTAGRAM or RAPIDAPI_KEY environment variable or pass api_key parameter.")
 
-        self.base_url = "https://instagram-social.p.rapidapi.com/api/v1/instagram"
+        # Override to point at a local stand-in (benchmarks/mock_rapidapi.py) for load tests
+        self.base_url = os.getenv('RAPIDAPI_INSTAGRAM_BASE_URL', "https://instagram-social.p.rapidapi.com/api/v1/instagram")
         self.headers = {
             "x-rapidapi-key": self.api_key,
             "x-rapidapi-host": "instagram-social.p.rapidapi.com"
         }
 
+    def _get(self, url: str, params: Dict) -> requests.Response:
+        """GET with request metrics (latency, errors and 429s per host)"""
+        started = time.perf_counter()
+        try:
+            response = requests.get(url, headers=self.headers, params=params, timeout=30)
+        except requests.RequestException as e:
+            observe_scraper_request("rapidapi_instagram", url, time.perf_counter() - started, error=e)
+            raise
+        observe_scraper_request("rapidapi_instagram", url, time.perf_counter() - started, status_code=response.status_code)
+        return response
+
     def extract_username(self, url: str) -> str:
         """Extract username from Instagram URL"""
         # Remove trailing slash
@@ -41,21 +76,38 @@ class RapidAPIInstagramScraper:
                 return username
         return url
 
-    def get_user_info(self, username: str) -> Optional[Dict]:
+    def get_user_info(self, username: str, use_cache: bool = True) -> Optional[Dict]:
         """
         Get user profile information
 
         Args:
             username: Instagram username (without @)
+            use_cache: Serve from the profile cache if fetched within PROFILE_CACHE_SECONDS
 
         Returns:
             User profile data dictionary
         """
+        key = username.lower()
+        if use_cache:
+            with _profile_cache_lock:
+                cached = _profile_cache.get(key)
+            if cached and cached[0] > time.monotonic():
+                return dict(cached[1])
+
+        profile_info = self._fetch_user_info(username)
+        if profile_info:
+            with _profile_cache_lock:
+                _profile_cache[key] = (time.monotonic() + PROFILE_CACHE_SECONDS, profile_info)
+            profile_info = dict(profile_info)
+        return profile_info
+
+    def _fetch_user_info(self, username: str) -> Optional[Dict]:
+        """Request the profile endpoint (no cache)"""
         try:
             url = f"{self.base_url}/profile"
             params = {"username": username}
 
-            response = requests.get(url, headers=self.headers, params=params, timeout=30)
+            response = self._get(url, params)
             print(f"RapidAPI Response Status: {response.status_code}")
             response.raise_for_status()
 
@@ -104,7 +156,7 @@ class RapidAPIInstagramScraper:
 
     def get_user_posts(self, username: str, count: int = 12) -> List[Dict]:
         """
-        Get posts from a user
+        Get posts from a user, following the cursor until `count` posts
 
         Args:
             username: Instagram username (without @)
@@ -113,41 +165,65 @@ class RapidAPIInstagramScraper:
         Returns:
             List of post data dictionaries
         """
-        try:
-            url = f"{self.base_url}/posts"
-            params = {"username": username}
-
-            print(f"Fetching posts from: {url} with username={username}")
-            response = requests.get(url, headers=self.headers, params=params, timeout=30)
-            print(f"Posts Response Status: {response.status_code}")
-            response.raise_for_status()
+        return [post for page in self.iter_user_posts(username, count) for post in page]
 
-            data = response.json()
-            print(f"Posts Response Data keys: {list(data.keys()) if isinstance(data, dict) else 'Not a dict'}")
-            print(f"Posts Response preview: {str(data)[:500]}...")
+    def iter_user_posts(self, username: str, limit: int = 12) -> Iterator[List[Dict]]:
+        """
+        Yield parsed posts page by page until `limit` posts or the last page.
+        A failing page ends the iteration - pages already yielded are kept.
+        """
+        fetched = 0
+        cursor = None
 
-            if not data or 'body' not in data:
-                print(f"No posts found for @{username} - 'body' key missing")
-                print(f"Full response: {data}")
-                return []
+        for page in range(1, POSTS_MAX_PAGES + 1):
+            try:
+                items, cursor = self._fetch_posts_page(username, cursor)
+            except Exception as e:
+                print(f"Error fetching posts page {page} for @{username}: {e}")
+                return
 
             posts = []
-            items = data.get('body', [])[:count]
-            print(f"Found {len(items)} posts to parse")
-
-            for item in items:
+            for item in items[:limit - fetched]:
                 post_data = self._parse_post_data(item, username)
                 if post_data:
                     posts.append(post_data)
-                    print(f"  ✓ Parsed post: {post_data.get('id')} - Likes: {post_data.get('likes')}, Views: {post_data.get('views')}")
-
-            return posts
-
-        except Exception as e:
-            print(f"Error fetching user posts: {e}")
-            import traceback
-            traceback.print_exc()
-            return []
+            fetched += len(items[:limit - fetched])
+            print(f"Page {page}: parsed {len(posts)} posts for @{username} ({fetched}/{limit})")
+
+            if posts:
+                yield posts
+            if fetched >= limit or not cursor or not items:
+                return
+            # Small delay between requests to avoid rate limiting
+            time.sleep(POSTS_PAGE_DELAY_SECONDS)
+
+    def _fetch_posts_page(self, username: str, cursor: Optional[str]) -> Tuple[List[Dict], Optional[str]]:
+        """One posts request - returns the raw items and the cursor of the next page (None on the last)"""
+        url = f"{self.base_url}/posts"
+        params = {"username": username}
+        if cursor:
+            params[POSTS_CURSOR_PARAM] = cursor
+
+        response = self._get(url, params)
+        response.raise_for_status()
+        data = response.json()
+
+        if not data or 'body' not in data:
+            print(f"No posts found for @{username} - 'body' key missing")
+            return [], None
+
+        return data.get('body') or [], self._next_cursor(data)
+
+    @staticmethod
+    def _next_cursor(data: Dict) -> Optional[str]:
+        """Cursor of the next posts page, wherever this API version puts it"""
+        if data.get('more_available') is False or data.get('has_more') is False:
+            return None
+        for source in (data, data.get('pagination') or {}):
+            for key in (POSTS_CURSOR_PARAM, 'end_cursor', 'next_max_id', 'cursor'):
+                if source.get(key):
+                    return str(source[key])
+        return None
 
     def get_post_info(self, post_url: str) -> Optional[Dict]:
         """
@@ -171,7 +247,7 @@ class RapidAPIInstagramScraper:
             url = f"{self.base_url}/post"
             params = {"code": code}
 
-            response = requests.get(url, headers=self.headers, params=params, timeout=30)
+            response = self._get(url, params)
             response.raise_for_status()
 
             data = response.json()
@@ -269,13 +345,15 @@ class RapidAPIInstagramScraper:
             traceback.print_exc()
             return None
 
-    def scrape_profile(self, profile_url: str, limit: int = 12) -> Dict:
+    def scrape_profile(self, profile_url: str, limit: int = 12,
+                       on_page: Optional[Callable[[List[Dict]], None]] = None) -> Dict:
         """
         Scrape an Instagram profile
 
         Args:
             profile_url: Instagram profile URL
             limit: Number of posts to fetch
+            on_page: Called with each page of parsed posts as soon as it arrives
 
         Returns:
             Dict with user info and posts
@@ -283,10 +361,19 @@ class RapidAPIInstagramScraper:
         username = self.extract_username(profile_url)
         print(f"Fetching profile @{username} via RapidAPI...")
 
-        # Get profile info (optional - we can still get posts without it)
-        profile_info = self.get_user_info(username)
+        # Profile info (optional - we can still get posts without it) is fetched alongside the posts
+        profile_future = _executor.submit(self.get_user_info, username)
+
+        # Get posts - this is the critical endpoint with all engagement data
+        posts = []
+        for page in self.iter_user_posts(username, limit):
+            posts.extend(page)
+            if on_page:
+                on_page(page)
+
+        profile_info = profile_future.result()
         if not profile_info:
-            print(f"Warning: Failed to get profile info for @{username}, but continuing to fetch posts...")
+            print(f"Warning: Failed to get profile info for @{username}, using a basic profile with the fetched posts")
             # Create a basic profile with just username
             profile_info = {
                 'username': username,
@@ -300,9 +387,6 @@ class RapidAPIInstagramScraper:
                 'is_private': False,
             }
 
-        # Get posts - this is the critical endpoint with all engagement data
-        posts = self.get_user_posts(username, count=limit)
-
         print(f"✓ Got {len(posts)} posts for @{username}")
 
         # Separate videos from all posts (check internal flag)
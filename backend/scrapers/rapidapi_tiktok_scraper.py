@@ -7,6 +7,9 @@ import requests
 from typing import Dict, List, Optional
 from datetime import datetime
 import os
+import time
+
+from metrics import observe_scraper_request
 
 
 class RapidAPITikTokScraper:
@@ -22,12 +25,24 @@ class RapidAPITikTokScraper:
         if not self.api_key:
             raise ValueError("RapidAPI key is required. Set RAPIDAPI_KEY_TIKTOK or RAPIDAPI_KEY environment variable or pass api_key parameter.")
 
-        self.base_url = "https://tiktok-scraper7.p.rapidapi.com"
+        # Override to point at a local stand-in (benchmarks/mock_rapidapi.py) for load tests
+        self.base_url = os.getenv('RAPIDAPI_TIKTOK_BASE_URL', "https://tiktok-scraper7.p.rapidapi.com")
         self.headers = {
             "x-rapidapi-key": self.api_key,
             "x-rapidapi-host": "tiktok-scraper7.p.rapidapi.com"
         }
 
+    def _get(self, url: str, params: Dict) -> requests.Response:
+        """GET with request metrics (latency, errors and 429s per host)"""
+        started = time.perf_counter()
+        try:
+            response = requests.get(url, headers=self.headers, params=params, timeout=30)
+        except requests.RequestException as e:
+            observe_scraper_request("rapidapi_tiktok", url, time.perf_counter() - started, error=e)
+            raise
+        observe_scraper_request("rapidapi_tiktok", url, time.perf_counter() - started, status_code=response.status_code)
+        return response
+
     def extract_username(self, url: str) -> str:
         """Extract username from TikTok URL"""
         if '@' in url:
@@ -53,7 +68,7 @@ class RapidAPITikTokScraper:
                 "count": min(count, 35)  # API max is 35
             }
 
-            response = requests.get(url, headers=self.headers, params=params, timeout=30)
+            response = self._get(url, params)
             response.raise_for_status()
 
             data = response.json()
@@ -91,7 +106,7 @@ class RapidAPITikTokScraper:
             url = f"{self.base_url}/video/info"
             params = {"url": video_url}
 
-            response = requests.get(url, headers=self.headers, params=params, timeout=30)
+            response = self._get(url, params)
             response.raise_for_status()
 
             data = response.json()
@@ -211,7 +226,7 @@ class RapidAPITikTokScraper:
                 if cursor:
                     params['cursor'] = cursor
 
-                response = requests.get(url, headers=self.headers, params=params, timeout=30)
+                response = self._get(url, params)
                 response.raise_for_status()
 
                 data = response.json()
@@ -241,7 +256,6 @@ class RapidAPITikTokScraper:
 
                 page += 1
                 # Small delay between requests to avoid rate limiting
-                import time
                 time.sleep(0.5)
 
             return all_videos
@@ -1,18 +1,34 @@
 import asyncio
-import os
+import time
 from typing import List, Dict, Optional
 from datetime import datetime
 from TikTokApi import TikTokApi
 
+from metrics import observe_scraper_request
+from scrapers import tiktok_session_pool as session_pool
+
+TIKTOK_URL = "https://www.tiktok.com"
+
 
 class TikTokScraper:
     """TikTok scraper using davidteather/TikTok-Api"""
 
-    def __init__(self, ms_token: Optional[str] = None):
-        self.ms_token = ms_token or os.getenv("TIKTOK_MS_TOKEN")
+    def __init__(self, ms_token: Optional[str] = None, pool: Optional[session_pool.TikTokSessionPool] = None):
+        """
+        Leases a session from `pool`, or from the shared session pool when the API has started it.
+        With neither (standalone scripts) or an explicit ms_token, opens its own session.
+        """
+        self.ms_token = ms_token or next(iter(session_pool.configured_ms_tokens()), None)
+        self.pool = pool or (session_pool.pool if session_pool.pool.started and not ms_token else None)
         self.api = None
+        self._lease = None
 
     async def __aenter__(self):
+        if self.pool:
+            self._lease = self.pool.lease()
+            self.api = await self._lease.__aenter__()
+            return self
+
         self.api = await TikTokApi().__aenter__()
         if self.ms_token:
             await self.api.create_sessions(
@@ -23,6 +39,10 @@ class TikTokScraper:
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if self._lease:
+            # Back to the pool - an exception here replaces the session
+            lease, self._lease, self.api = self._lease, None, None
+            return await lease.__aexit__(exc_type, exc_val, exc_tb)
         if self.api:
             await self.api.__aexit__(exc_type, exc_val, exc_tb)
 
@@ -40,15 +60,8 @@ class TikTokScraper:
         if not self.api:
             raise RuntimeError("API not initialized. Use 'async with' context manager.")
 
-        videos = []
         try:
-            async for video in self.api.hashtag(name=hashtag).videos(count=limit):
-                video_data = await self._parse_video(video)
-                videos.append(video_data)
-
-                # Respect rate limits
-                await asyncio.sleep(0.5)
-
+            videos = await self._collect(self.api.hashtag(name=hashtag).videos(count=limit))
         except Exception as e:
             print(f"Error scraping hashtag {hashtag}: {e}")
             raise
@@ -69,13 +82,8 @@ class TikTokScraper:
         if not self.api:
             raise RuntimeError("API not initialized. Use 'async with' context manager.")
 
-        videos = []
         try:
-            async for video in self.api.search.videos(term, count=limit):
-                video_data = await self._parse_video(video)
-                videos.append(video_data)
-                await asyncio.sleep(0.5)
-
+            videos = await self._collect(self.api.search.videos(term, count=limit))
         except Exception as e:
             print(f"Error searching term {term}: {e}")
             raise
@@ -95,19 +103,43 @@ class TikTokScraper:
         if not self.api:
             raise RuntimeError("API not initialized. Use 'async with' context manager.")
 
-        videos = []
         try:
-            async for video in self.api.trending.videos(count=limit):
-                video_data = await self._parse_video(video)
-                videos.append(video_data)
-                await asyncio.sleep(0.5)
-
+            videos = await self._collect(self.api.trending.videos(count=limit))
         except Exception as e:
             print(f"Error getting trending videos: {e}")
             raise
 
         return videos
 
+    async def _collect(self, results) -> List[Dict]:
+        """
+        Parse every video from a TikTokApi result iterator, pausing between videos for rate limits.
+
+        The time spent waiting on TikTok (not the pauses) is recorded as one scraper request,
+        and a failed fetch as a scraper error.
+        """
+        videos = []
+        waited = 0.0
+        results = results.__aiter__()
+        while True:
+            started = time.perf_counter()
+            try:
+                video = await results.__anext__()
+            except StopAsyncIteration:
+                break
+            except Exception as e:
+                observe_scraper_request("tiktokapi", TIKTOK_URL, waited + time.perf_counter() - started, error=e)
+                raise
+            finally:
+                waited += time.perf_counter() - started
+            videos.append(await self._parse_video(video))
+
+            # Respect rate limits
+            await asyncio.sleep(0.5)
+
+        observe_scraper_request("tiktokapi", TIKTOK_URL, waited)
+        return videos
+
     async def _parse_video(self, video) -> Dict:
         """
         Parse TikTok video object into standardized format
@@ -0,0 +1,206 @@
+"""
+Long-lived pool of TikTokApi browser sessions shared by TikTokScraper.
+
+Creating a TikTokApi session launches Chromium and waits for TikTok to load (3+ s). The API
+starts the pool once per worker (main.py startup) and scrapers lease a warm session:
+
+    async with pool.lease() as api:
+        async for video in api.hashtag(name="travel").videos(count=30):
+            ...
+
+- Each slot is its own TikTokApi (browser + one session), so a broken session is replaced
+  without touching the others. The ms_tokens from TIKTOK_MS_TOKENS (comma separated, falls
+  back to TIKTOK_MS_TOKEN) are spread over the slots round-robin.
+- Up to TIKTOK_SESSION_POOL_SIZE fetches run in parallel; other callers wait for a free slot.
+- A slot is recycled in the background when a lease raises, after TIKTOK_SESSION_MAX_USES
+  leases, or when a session that sat idle fails its health check (a trivial script on its page).
+
+TIKTOK_SESSION_POOL_SIZE=0 disables the pool - TikTokScraper then opens a session per call.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional
+
+from TikTokApi import TikTokApi
+
+from metrics import TIKTOK_SESSIONS
+
+logger = logging.getLogger(__name__)
+
+
+def configured_ms_tokens() -> List[str]:
+    raw = os.getenv("TIKTOK_MS_TOKENS") or os.getenv("TIKTOK_MS_TOKEN") or ""
+    return [token.strip() for token in raw.split(",") if token.strip()]
+
+
+# Sessions per worker - defaults to one per ms_token
+SESSION_POOL_SIZE = int(os.getenv("TIKTOK_SESSION_POOL_SIZE") or max(1, len(configured_ms_tokens())))
+SESSION_MAX_USES = int(os.getenv("TIKTOK_SESSION_MAX_USES", "200"))  # Leases before a session is replaced
+LEASE_TIMEOUT_SECONDS = float(os.getenv("TIKTOK_SESSION_LEASE_TIMEOUT", "60"))  # Wait for a free session
+HEALTH_CHECK_IDLE_SECONDS = 120  # Sessions idle this long are checked before being leased
+HEALTH_CHECK_TIMEOUT_SECONDS = 5
+SESSION_WARMUP_SECONDS = 3  # create_sessions sleep_after
+
+
+@dataclass
+class _Slot:
+    index: int
+    ms_token: Optional[str]
+    api: Any = None
+    uses: int = 0
+    last_used: float = 0.0
+
+
+class TikTokSessionPool:
+    def __init__(self, ms_tokens: Optional[List[str]] = None, size: Optional[int] = None,
+                 api_factory: Callable[[], Any] = TikTokApi, max_uses: int = SESSION_MAX_USES,
+                 sleep_after: float = SESSION_WARMUP_SECONDS):
+        self.ms_tokens = configured_ms_tokens() if ms_tokens is None else ms_tokens
+        self.size = SESSION_POOL_SIZE if size is None else size
+        self.api_factory = api_factory
+        self.max_uses = max_uses
+        self.sleep_after = sleep_after
+        self.started = False
+        self._slots: List[_Slot] = []
+        self._idle: Optional[asyncio.Queue] = None
+        self._tasks = set()
+        self._leased = 0
+
+    # ============ LIFECYCLE ============
+
+    async def start(self):
+        """Create the slots and open their sessions in the background - leases wait for the first one"""
+        if self.started or self.size <= 0:
+            return
+        self._idle = asyncio.Queue()
+        self._slots = [
+            _Slot(index=i, ms_token=self.ms_tokens[i % len(self.ms_tokens)] if self.ms_tokens else None)
+            for i in range(self.size)
+        ]
+        self.started = True
+        for slot in self._slots:
+            self._spawn(self._replace(slot))
+        logger.info(f"TikTok session pool starting {self.size} sessions ({len(self.ms_tokens)} ms_tokens)")
+
+    async def ready(self):
+        """Wait until every slot has been opened (or has failed to open)"""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    async def close(self):
+        self.started = False
+        await self.ready()
+        while self._idle and not self._idle.empty():
+            await self._close(self._idle.get_nowait())
+        self._update_metrics()
+
+    # ============ LEASES ============
+
+    @asynccontextmanager
+    async def lease(self, timeout: float = LEASE_TIMEOUT_SECONDS):
+        """Lease a warm TikTokApi. Raising inside the block replaces its session."""
+        if not self.started:
+            raise RuntimeError("TikTok session pool is not started")
+
+        slot = await asyncio.wait_for(self._idle.get(), timeout)
+        try:
+            if not await self._healthy(slot):
+                await self._close(slot)
+                await self._open(slot)
+        except BaseException:
+            # Back in the pool without a session - the next lease tries to open it again
+            self._idle.put_nowait(slot)
+            raise
+
+        self._leased += 1
+        self._update_metrics()
+        failed = False
+        try:
+            yield slot.api
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            self._leased -= 1
+            slot.uses += 1
+            slot.last_used = time.monotonic()
+            if not self.started:
+                await self._close(slot)
+            elif failed or slot.uses >= self.max_uses:
+                self._spawn(self._replace(slot))
+            else:
+                self._idle.put_nowait(slot)
+            self._update_metrics()
+
+    # ============ SLOTS ============
+
+    def _spawn(self, coro):
+        task = asyncio.get_running_loop().create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _open(self, slot: _Slot):
+        api = self.api_factory()
+        try:
+            await api.create_sessions(
+                ms_tokens=[slot.ms_token] if slot.ms_token else None,
+                num_sessions=1,
+                sleep_after=self.sleep_after
+            )
+        except BaseException:
+            await self._close_api(api)
+            raise
+        slot.api = api
+        slot.uses = 0
+        slot.last_used = time.monotonic()
+
+    async def _close(self, slot: _Slot):
+        api, slot.api = slot.api, None
+        if api is not None:
+            await self._close_api(api)
+
+    @staticmethod
+    async def _close_api(api):
+        try:
+            await api.__aexit__(None, None, None)
+        except Exception as e:
+            logger.debug(f"Error closing TikTok session: {e}")
+
+    async def _replace(self, slot: _Slot):
+        """(Re)open a slot's session, then make it available again"""
+        await self._close(slot)
+        try:
+            if self.started:
+                await self._open(slot)
+        except Exception as e:
+            logger.warning(f"TikTok session {slot.index} failed to open, retrying on next lease: {e}")
+        if self.started:
+            self._idle.put_nowait(slot)
+        else:
+            await self._close(slot)
+        self._update_metrics()
+
+    async def _healthy(self, slot: _Slot) -> bool:
+        if slot.api is None or not slot.api.sessions:
+            return False
+        if time.monotonic() - slot.last_used < HEALTH_CHECK_IDLE_SECONDS:
+            return True
+        try:
+            await asyncio.wait_for(slot.api.sessions[0].page.evaluate("1"), HEALTH_CHECK_TIMEOUT_SECONDS)
+            return True
+        except Exception as e:
+            logger.info(f"TikTok session {slot.index} failed its health check, replacing: {e}")
+            return False
+
+    def _update_metrics(self):
+        TIKTOK_SESSIONS.labels("leased").set(self._leased)
+        TIKTOK_SESSIONS.labels("idle").set(self._idle.qsize() if self._idle else 0)
+
+
+# Shared by every TikTokScraper in the API process
+pool = TikTokSessionPool()
@@ -2,6 +2,8 @@ import httpx
 from typing import List, Dict, Optional
 from datetime import datetime
 
+from metrics import httpx_event_hooks
+
 
 class TrendingAudioScraper:
     """Scraper for TikTok trending audio/music"""
@@ -29,7 +31,7 @@ class TrendingAudioScraper:
         trending_audio = []
 
         try:
-            async with httpx.AsyncClient(proxies=self.proxies, timeout=30.0) as client:
+            async with httpx.AsyncClient(proxies=self.proxies, timeout=30.0, event_hooks=httpx_event_hooks("tiktok_web")) as client:
                 # Try multiple TikTok discover endpoints
                 endpoints = [
                     "https://www.tiktok.com/api/discover/music/",
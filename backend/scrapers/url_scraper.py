@@ -1,6 +1,6 @@
 import asyncio
 import re
-from typing import Dict, Optional
+from typing import Callable, Dict, List, Optional
 from datetime import datetime
 import httpx
 import os
@@ -73,10 +73,12 @@ class URLScraper:
         else:
             raise ValueError(f"Unsupported platform or invalid URL: {url}")
 
-    async def scrape_profile(self, url: str, limit: int = 100) -> Dict:
+    async def scrape_profile(self, url: str, limit: int = 100,
+                             on_page: Optional[Callable[[List[Dict]], None]] = None) -> Dict:
         """
         Scrape all videos from a profile URL
         Returns: {videos: [], profile: {}, aggregate_stats: {}}
+        Instagram calls on_page (from a worker thread) with each page of posts as it arrives.
         """
         platform = self.detect_platform(url)
         url_type = self.detect_url_type(url)
@@ -89,7 +91,7 @@ class URLScraper:
         elif platform == 'youtube':
             return await self.scrape_youtube_profile(url, limit)
         elif platform == 'instagram':
-            return await self.scrape_instagram_profile(url, limit)
+            return await self.scrape_instagram_profile(url, limit, on_page=on_page)
         else:
             raise ValueError(f"Unsupported platform or invalid URL: {url}")
 
@@ -99,8 +101,8 @@ class URLScraper:
             raise ValueError("RapidAPI key not configured for TikTok scraping")
 
         try:
-            # Use RapidAPI scraper synchronously (it's not async)
-            video_data = self.tiktok_scraper.get_video_info(url)
+            # RapidAPI scraper is synchronous - run it in a worker thread so concurrent scrapes don't block the event loop
+            video_data = await asyncio.to_thread(self.tiktok_scraper.get_video_info, url)
             if not video_data:
                 raise ValueError(f"Could not scrape TikTok video: {url}")
 
@@ -218,8 +220,8 @@ class URLScraper:
             raise ValueError("RapidAPI key not configured for Instagram scraping")
 
         try:
-            # Use RapidAPI scraper synchronously (it's not async)
-            post_data = self.instagram_scraper.get_post_info(url)
+            # RapidAPI scraper is synchronous - run it in a worker thread so concurrent scrapes don't block the event loop
+            post_data = await asyncio.to_thread(self.instagram_scraper.get_post_info, url)
             if not post_data:
                 raise ValueError(f"Could not scrape Instagram post: {url}")
 
@@ -242,9 +244,9 @@ class URLScraper:
             raise ValueError("RapidAPI key not configured for TikTok scraping")
 
         try:
-            # Use RapidAPI scraper with pagination to get all videos (synchronously)
-            # The scraper now supports pagination, so we can fetch all videos
-            profile_data = self.tiktok_scraper.scrape_profile_all(url, max_videos=limit)
+            # Use RapidAPI scraper with pagination to get all videos
+            # The scraper is synchronous, so it runs in a worker thread to keep the event loop free
+            profile_data = await asyncio.to_thread(self.tiktok_scraper.scrape_profile_all, url, max_videos=limit)
 
             videos_data = profile_data.get('videos', [])
 
@@ -300,14 +302,15 @@ class URLScraper:
             "message": "YouTube profile scraping requires API key - feature coming soon"
         }
 
-    async def scrape_instagram_profile(self, url: str, limit: int = 100) -> Dict:
+    async def scrape_instagram_profile(self, url: str, limit: int = 100,
+                                       on_page: Optional[Callable[[List[Dict]], None]] = None) -> Dict:
         """Scrape all videos from an Instagram profile using RapidAPI"""
         if not self.instagram_scraper:
             raise ValueError("RapidAPI key not configured for Instagram scraping")
 
         try:
-            # Use RapidAPI scraper synchronously (it's not async)
-            profile_data = self.instagram_scraper.scrape_profile(url, limit=limit)
+            # RapidAPI scraper is synchronous - run it in a worker thread so concurrent scrapes don't block the event loop
+            profile_data = await asyncio.to_thread(self.instagram_scraper.scrape_profile, url, limit=limit, on_page=on_page)
 
             return profile_data
 
@@ -1,7 +1,35 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from youtubesearchpython import VideosSearch, Hashtag
-from typing import List, Dict
+from typing import Callable, List, Dict
 from datetime import datetime
 
+from metrics import observe_scraper_request
+
+# youtube-search-python is synchronous - its requests run on this bounded pool, off the event loop
+YOUTUBE_SEARCH_THREADS = int(os.getenv("YOUTUBE_SEARCH_THREADS", "4"))
+YOUTUBE_SEARCH_TIMEOUT = int(os.getenv("YOUTUBE_SEARCH_TIMEOUT", "15"))  # Seconds per page request
+
+_executor = ThreadPoolExecutor(max_workers=YOUTUBE_SEARCH_THREADS, thread_name_prefix="youtube-search")
+
+YOUTUBE_URL = "https://www.youtube.com"
+
+
+def _observed(request: Callable) -> Callable:
+    """Wrap a blocking page request so the pool thread records its latency and errors"""
+    def run():
+        started = time.perf_counter()
+        try:
+            result = request()
+        except Exception as e:
+            observe_scraper_request("youtube", YOUTUBE_URL, time.perf_counter() - started, error=e)
+            raise
+        observe_scraper_request("youtube", YOUTUBE_URL, time.perf_counter() - started)
+        return result
+    return run
+
 
 class YouTubeScraper:
     """YouTube scraper using youtube-search-python"""
@@ -20,22 +48,11 @@ class YouTubeScraper:
         Returns:
             List of video dictionaries
         """
-        videos = []
-
         try:
-            # Use Hashtag class for hashtag search
-            hashtag_search = Hashtag(f"#{hashtag}", limit=limit)
-            results = hashtag_search.result()
-
-            if 'result' in results:
-                for video in results['result']:
-                    video_data = self._parse_video(video)
-                    videos.append(video_data)
-
+            return await self._paginate(lambda: Hashtag(f"#{hashtag}", limit=limit, timeout=YOUTUBE_SEARCH_TIMEOUT), limit)
         except Exception as e:
             print(f"Error searching YouTube hashtag {hashtag}: {e}")
-
-        return videos
+            raise
 
     async def search_term(self, term: str, limit: int = 50) -> List[Dict]:
         """
@@ -48,21 +65,39 @@ class YouTubeScraper:
         Returns:
             List of video dictionaries
         """
-        videos = []
-
         try:
-            videos_search = VideosSearch(term, limit=limit)
-            results = videos_search.result()
-
-            if 'result' in results:
-                for video in results['result']:
-                    video_data = self._parse_video(video)
-                    videos.append(video_data)
-
+            return await self._paginate(lambda: VideosSearch(term, limit=limit, timeout=YOUTUBE_SEARCH_TIMEOUT), limit)
         except Exception as e:
             print(f"Error searching YouTube term {term}: {e}")
+            raise
+
+    async def _paginate(self, create_search: Callable, limit: int) -> List[Dict]:
+        """
+        Fetch result pages until `limit` videos are collected or the results run out.
 
-        return videos
+        Each page needs the continuation token of the one before, so pages of one search
+        are fetched in order; every request runs on the thread pool, so searches run
+        concurrently with each other and with the rest of the API. A failed later page
+        returns what was collected so far; a failed first page raises.
+        """
+        loop = asyncio.get_running_loop()
+        search = await loop.run_in_executor(_executor, _observed(create_search))  # The constructor fetches page one
+
+        videos = {}
+        while True:
+            for video in search.result().get('result', []):
+                if video.get('id') and video['id'] not in videos:
+                    videos[video['id']] = self._parse_video(video)
+            if len(videos) >= limit:
+                break
+            try:
+                if not await loop.run_in_executor(_executor, _observed(search.next)):
+                    break
+            except Exception as e:
+                print(f"Error fetching next YouTube results page, returning {len(videos)} videos: {e}")
+                break
+
+        return list(videos.values())[:limit]
 
     def _parse_video(self, video: Dict) -> Dict:
         """
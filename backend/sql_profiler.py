@@ -0,0 +1,142 @@
+"""
+Opt-in SQL profiler and N+1 detector.
+
+Counts and times every statement per HTTP request (or per profiled block in a background job)
+and groups them by shape - the statement with literals and bound parameters replaced by "?".
+A shape executed SQL_PROFILE_N1_THRESHOLD times or more within one request is reported as an
+N+1 suspect: usually a query issued inside a loop that could be one batched query.
+
+Enable per request with the "X-SQL-Profile: 1" header, or for everything (including the
+bulk scrape and daily jobs) with SQL_PROFILE=1. Results go to response headers and the
+"sql_profiler" logger (debug; N+1 suspects are logged as warnings). Statements are timed by the
+same cursor listener that feeds the Prometheus SQL histograms (metrics.instrument_engine).
+"""
+
+import asyncio
+import contextvars
+import functools
+import logging
+import os
+import re
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+SQL_PROFILE = os.getenv("SQL_PROFILE", "").lower() in ("1", "true", "yes")
+SQL_PROFILE_N1_THRESHOLD = int(os.getenv("SQL_PROFILE_N1_THRESHOLD", "5"))
+PROFILE_HEADER = "x-sql-profile"
+
+logger = logging.getLogger("sql_profiler")
+
+_WHITESPACE = re.compile(r"\s+")
+_PARAMS = re.compile(r"%\(\w+\)s|\$\d+|(?<!:):\w+|\?")  # psycopg2, asyncpg, named and qmark placeholders
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_NUMBERS = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+
+@dataclass
+class StatementStats:
+    count: int = 0
+    seconds: float = 0.0
+
+
+@dataclass
+class SQLProfile:
+    label: str
+    statements: Dict[str, StatementStats] = field(default_factory=dict)
+    count: int = 0
+    seconds: float = 0.0
+
+    def suspects(self, threshold: int = SQL_PROFILE_N1_THRESHOLD) -> List[tuple]:
+        """(shape, stats) executed at least `threshold` times, most repeated first"""
+        repeated = [(shape, stats) for shape, stats in self.statements.items() if stats.count >= threshold]
+        return sorted(repeated, key=lambda item: item[1].count, reverse=True)
+
+
+_profile: contextvars.ContextVar[Optional[SQLProfile]] = contextvars.ContextVar("sql_profile", default=None)
+
+
+def statement_shape(statement: str) -> str:
+    """Normalize a statement so the same query with different values maps to one shape"""
+    shape = _STRINGS.sub("?", statement)
+    shape = _PARAMS.sub("?", shape)
+    shape = _NUMBERS.sub("?", shape)
+    shape = _IN_LISTS.sub("(?...)", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+def record(statement: str, seconds: float):
+    """Add one executed statement to the active profile - fed by the cursor listener in metrics.py"""
+    profile = _profile.get()
+    if profile is None:
+        return
+
+    stats = profile.statements.setdefault(statement_shape(statement), StatementStats())
+    stats.count += 1
+    stats.seconds += seconds
+    profile.count += 1
+    profile.seconds += seconds
+
+
+def start_profile(label: str) -> SQLProfile:
+    profile = SQLProfile(label)
+    _profile.set(profile)
+    return profile
+
+
+def log_profile(profile: SQLProfile):
+    logger.debug(f"{profile.label}: {profile.count} queries in {profile.seconds * 1000:.1f}ms, "
+                 f"{len(profile.statements)} distinct")
+    for shape, stats in profile.suspects():
+        logger.warning(f"Possible N+1 in {profile.label}: {stats.count}x ({stats.seconds * 1000:.1f}ms) {shape[:300]}")
+
+
+def response_headers(profile: SQLProfile) -> Dict[str, str]:
+    suspects = profile.suspects()
+    headers = {
+        "X-SQL-Query-Count": str(profile.count),
+        "X-SQL-Query-Time-Ms": f"{profile.seconds * 1000:.1f}",
+        "X-SQL-Distinct-Queries": str(len(profile.statements)),
+        "X-SQL-N-Plus-One": str(len(suspects)),
+    }
+    if suspects:
+        shape, stats = suspects[0]
+        headers["X-SQL-N-Plus-One-Top"] = f"{stats.count}x {shape[:200]}"
+    return headers
+
+
+def is_requested(headers) -> bool:
+    return SQL_PROFILE or headers.get(PROFILE_HEADER, "").lower() in ("1", "true", "yes")
+
+
+@contextmanager
+def _profiling(label: str):
+    token = _profile.set(SQLProfile(label))
+    try:
+        yield
+    finally:
+        log_profile(_profile.get())
+        _profile.reset(token)
+
+
+def profiled(label: str):
+    """Decorator: profile each run of a background job when SQL_PROFILE is set (no-op otherwise)"""
+    def decorator(func):
+        if not SQL_PROFILE:
+            return func
+
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with _profiling(label):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with _profiling(label):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Checks the in-memory analytics store (analytics_engine.py) against plain Python over the DB rows.
+
+Loads a small synthetic dataset into a throwaway SQLite database, compares every store query
+with the per-row computation the endpoints used to do, then checks that commits through
+SessionLocal (insert, update, bulk update) show up in the store. The SQL fallback queries and
+views-over-time are checked against the same references, and a cold or stale store never makes
+a request wait for the load.
+
+Usage:
+    python test_analytics_engine.py
+"""
+
+import asyncio
+import sys
+from datetime import datetime, timedelta
+
+from testing import check, use_temp_database
+
+use_temp_database("analytics_engine_test")
+
+import httpx
+from sqlalchemy import select
+
+from database import SessionLocal, AsyncSessionLocal, async_engine, Video, AccountCollection
+from benchmarks.generate_data import generate_dataset
+import analytics_engine
+from analytics_engine import AnalyticsFilter
+
+
+def matching_rows(db, filters: AnalyticsFilter, start=None, end=None):
+    """Videos matching the filters, selected row by row like the old endpoints did"""
+    rows = db.execute(select(Video)).scalars().all()
+    platforms = [p.strip().lower() for p in filters.platform.split(',')] if filters.platform else None
+    result = []
+    for video in rows:
+        if start and (video.posted_at is None or video.posted_at < start):
+            continue
+        if end and (video.posted_at is None or video.posted_at > end):
+            continue
+        if platforms and video.platform not in platforms:
+            continue
+        if filters.metric_type == "organic" and video.is_spark_ad:
+            continue
+        if filters.metric_type == "ads" and not video.is_spark_ad:
+            continue
+        if filters.account_ids is not None and video.account_id not in filters.account_ids:
+            continue
+        result.append(video)
+    return result
+
+
+def reference_virality(videos):
+    categories = dict.fromkeys(analytics_engine.VIRALITY_BUCKETS, 0)
+    if not videos:
+        return categories
+    views = sorted(v.views for v in videos)
+    median = views[len(views) // 2]
+    if median == 0:
+        return categories
+    for v in videos:
+        multiplier = v.views / median
+        bucket = sum(multiplier >= edge for edge in analytics_engine.VIRALITY_EDGES)
+        categories[analytics_engine.VIRALITY_BUCKETS[bucket]] += 1
+    return categories
+
+
+def reference_duration(videos):
+    groups = {name: [] for name in analytics_engine.DURATION_BUCKETS}
+    for v in videos:
+        if v.duration is None:
+            continue
+        bucket = sum(v.duration >= edge for edge in analytics_engine.DURATION_EDGES)
+        groups[analytics_engine.DURATION_BUCKETS[bucket]].append(v.views)
+    return [{"range": name, "average_views": int(sum(views) / len(views)), "video_count": len(views)}
+            for name, views in groups.items() if views]
+
+
+def reference_timeseries(db, start_date, days):
+    totals = {start_date + timedelta(days=i): [0, 0, 0] for i in range(days)}
+    for v in db.execute(select(Video)).scalars().all():
+        if v.posted_at and v.posted_at.date() in totals:
+            day = totals[v.posted_at.date()]
+            day[0] += v.views or 0
+            day[1] += v.installs or 0
+            day[2] += v.trial_started or 0
+    return [{"date": d.strftime('%Y-%m-%d'), "views": t[0], "installs": t[1], "trial_started": t[2]}
+            for d, t in sorted(totals.items())]
+
+
+def reference_views_over_time(videos, start, end):
+    cumulative, views = [], 0
+    current = start.date()
+    while current <= end.date():
+        views += sum(v.views or 0 for v in videos if v.posted_at.date() == current)
+        cumulative.append({"date": current.strftime('%Y-%m-%d'), "views": views})
+        current += timedelta(days=1)
+    return cumulative
+
+
+async def sql_fallback_checks(db, filter_cases, now) -> list:
+    """SQL fallback and views-over-time against the store / per-row references"""
+    import main
+    store = analytics_engine.store
+    results = []
+    async with AsyncSessionLocal() as session:
+        start_date = now.date() - timedelta(days=29)
+        results.append(check("sql timeseries 30d", await analytics_engine.sql_timeseries(session, start_date, 30),
+                             reference_timeseries(db, start_date, 30)))
+        for label, filters in filter_cases:
+            starts = {"daily": now - timedelta(days=1), "weekly": now - timedelta(days=7)}
+            results.append(check(f"sql averages {label}", await analytics_engine.sql_averages(session, filters, starts),
+                                 {name: store.averages(filters, start) for name, start in starts.items()}))
+            start = now - timedelta(days=30)
+            results.append(check(f"sql virality {label}", await analytics_engine.sql_virality(session, filters, start, now),
+                                 store.virality(filters, start, now)))
+            results.append(check(f"sql duration {label}",
+                                 await analytics_engine.sql_duration_analysis(session, filters, start, now),
+                                 store.duration_analysis(filters, start, now)))
+            ids, avg = await analytics_engine.sql_top_by_views(session, filters, start, now, 10, 20)
+            expected_ids, expected_avg = store.top_by_views(filters, start, now, 10, 20)
+            results.append(check(f"sql video-stats {label}",
+                                 ([int(store.stats["views"][store.index[i]]) for i in ids], round(avg, 6)),
+                                 ([int(store.stats["views"][store.index[i]]) for i in expected_ids], round(expected_avg, 6))))
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test") as client:
+        for params in ({"days": 30}, {"days": 7, "metric_type": "organic", "platform": "tiktok"},
+                       {"days": 30, "collection_id": 2}):
+            body = (await client.get("/api/analytics/views-over-time", params=params)).json()
+            end = datetime.utcnow()
+            start = end - timedelta(days=params["days"])
+            account_ids = db.execute(
+                select(AccountCollection.account_id).filter(AccountCollection.collection_id == params["collection_id"])
+            ).scalars().all() if "collection_id" in params else None
+            filters = AnalyticsFilter(params.get("metric_type", "total"), params.get("platform"), account_ids)
+            results.append(check(f"views-over-time {params}", body,
+                                 reference_views_over_time(matching_rows(db, filters, start, end), start, end)))
+
+        # Cold store (before the first load): every panel answered from SQL, the load started in the background
+        panels = [("/api/analytics/metrics-breakdown", {"metric_type": "ads"}),
+                  ("/api/analytics/timeseries", {"days": 30}),
+                  ("/api/analytics/virality-analysis", {"days": 30, "platform": "tiktok"}),
+                  ("/api/analytics/duration-analysis", {"days": 30, "metric_type": "organic"}),
+                  ("/api/analytics/video-stats", {"days": 30, "limit": 20})]
+        stored = [(await client.get(path, params=params)).json() for path, params in panels]
+        analytics_engine.store = cold = analytics_engine.VideoColumnStore()
+        try:
+            # Holding the refresh lock stands in for a load that takes a while
+            with cold._refresh_lock:
+                answers = [(await client.get(path, params=params)).json() for path, params in panels]
+            results.append(check("cold store -> SQL answers match the store", answers, stored))
+            await client.get(panels[0][0], params=panels[0][1])
+            await asyncio.to_thread(cold.update)  # Waits for the background load
+            results.append(check("background load finished", cold.needs_load(), False))
+        finally:
+            analytics_engine.store = store
+
+        # Stale store: the old arrays keep answering while the reload runs - even a slow one
+        store._refresh_lock.acquire()
+        try:
+            store.invalidate()
+            response = await asyncio.wait_for(client.get(panels[0][0], params=panels[0][1]), timeout=5)
+            results.append(check("stale store answers without waiting for the reload",
+                                 (response.status_code, response.json()), (200, stored[0])))
+        finally:
+            store._refresh_lock.release()
+        await client.get(panels[0][0], params=panels[0][1])
+        await asyncio.to_thread(store.update)
+        results.append(check("background reload finished", store.needs_load(), False))
+
+    await async_engine.dispose()
+    return results
+
+
+def test_analytics_engine() -> bool:
+    print("🔄 Generating 10k synthetic videos...")
+    generate_dataset(10_000)
+
+    store = analytics_engine.store
+    store.update()
+    analytics_engine.register_session_hooks()
+
+    db = SessionLocal()
+    results = []
+    now = datetime.utcnow()
+    collection_accounts = db.execute(
+        select(AccountCollection.account_id).filter(AccountCollection.collection_id == 2)
+    ).scalars().all()
+
+    filter_cases = [
+        ("total", AnalyticsFilter()),
+        ("organic tiktok", AnalyticsFilter("organic", "tiktok")),
+        ("ads", AnalyticsFilter("ads")),
+        ("collection", AnalyticsFilter(account_ids=collection_accounts)),
+        ("instagram,youtube in collection", AnalyticsFilter("total", "instagram, youtube", collection_accounts)),
+    ]
+    for label, filters in filter_cases:
+        for days in (7, 30):
+            start = now - timedelta(days=days)
+            videos = matching_rows(db, filters, start, now)
+            results.append(check(f"virality {label} {days}d", store.virality(filters, start, now), reference_virality(videos)))
+            results.append(check(f"duration {label} {days}d", store.duration_analysis(filters, start, now), reference_duration(videos)))
+
+            ids, avg = store.top_by_views(filters, start, now, 10, 20)
+            expected = sorted(videos, key=lambda v: v.views, reverse=True)[10:30]
+            results.append(check(f"video-stats page {label} {days}d",
+                                 [store.stats["views"][store.index[i]] for i in ids], [v.views for v in expected]))
+            expected_avg = sum(v.views for v in videos) / len(videos) if videos else 0
+            results.append(check(f"video-stats average {label} {days}d", round(avg, 6), round(expected_avg, 6)))
+
+        videos = matching_rows(db, filters, now - timedelta(days=7))
+        expected = {"avg_views": int(sum(v.views for v in videos) / len(videos)) if videos else 0}
+        results.append(check(f"weekly averages {label}",
+                             store.averages(filters, now - timedelta(days=7))["avg_views"], expected["avg_views"]))
+
+    start_date = now.date() - timedelta(days=29)
+    results.append(check("timeseries 30d", store.timeseries(start_date, 30), reference_timeseries(db, start_date, 30)))
+
+    results += asyncio.run(sql_fallback_checks(db, filter_cases, now))
+
+    # Commits through SessionLocal reach the store without a reload
+    video = db.execute(select(Video).order_by(Video.views)).scalars().first()
+    video.views = 10 ** 12
+    db.commit()
+    results.append(check("update applied on commit", int(store.stats["views"][store.index[video.id]]), 10 ** 12))
+
+    db.add(Video(id="engine_test_new", platform="tiktok", url="https://example.com/new", views=5,
+                 posted_at=now - timedelta(hours=1), duration=12))
+    db.commit()
+    results.append(check("insert applied on commit", "engine_test_new" in store.index, True))
+
+    db.add(Video(id="engine_test_rolled_back", platform="tiktok", url="https://example.com/rb", views=1))
+    db.flush()
+    db.rollback()
+    results.append(check("rolled back insert ignored", "engine_test_rolled_back" in store.index, False))
+
+    db.query(Video).filter(Video.id == "engine_test_new").update({Video.account_id: 1}, synchronize_session=False)
+    db.commit()
+    results.append(check("bulk update marks store stale", store._stale, True))
+    store.update()
+    results.append(check("reload picks up bulk update", int(store.account_id[store.index["engine_test_new"]]), 1))
+
+    # Ingestion's account refresh links earlier videos of a new author without staling the store
+    import main
+    db.add(Video(id="engine_test_unlinked", platform="tiktok", url="https://example.com/unlinked", views=3,
+                 author_username="engine_test_author"))
+    video = Video(id="engine_test_linked", platform="tiktok", url="https://example.com/linked", views=4,
+                  author_username="engine_test_author")
+    db.add(video)
+    db.commit()
+    account = main.create_or_update_account(db, video)
+    results.append(check("account refresh links earlier videos in the store",
+                         (store.needs_load(), int(store.account_id[store.index["engine_test_unlinked"]])),
+                         (False, account.id)))
+    results.append(check("account totals summed in SQL", (account.total_videos, account.total_views), (2, 7)))
+    main.create_or_update_account(db, video)
+    results.append(check("account refresh with nothing to link keeps the store loaded", store.needs_load(), False))
+
+    # The admin repair creates missing accounts with their totals and links their videos in one UPDATE
+    db.add_all([Video(id=f"engine_test_orphan_{i}", platform="youtube", url=f"https://example.com/orphan{i}",
+                      views=10 * i, likes=i, author_username="engine_test_orphan") for i in (1, 2)])
+    db.commit()
+    response = asyncio.run(main.fix_missing_accounts(db))
+    orphans = db.execute(select(Video.account_id).filter(Video.author_username == "engine_test_orphan")).scalars().all()
+    results.append(check("missing account created with its totals",
+                         [(a["username"], a["total_videos"], a["total_views"]) for a in response["created"]],
+                         [("engine_test_orphan", 2, 30)]))
+    results.append(check("missing account's videos linked",
+                         (len(set(orphans)), None in orphans, store.needs_load()), (1, False, True)))
+
+    db.close()
+    passed = sum(results)
+    print(f"\n{passed}/{len(results)} analytics store checks passed")
+    return all(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if test_analytics_engine() else 1)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Checks caption full-text search (caption_search.py, GET /api/videos?q=...).
+
+Creates a throwaway SQLite database (set DATABASE_URL to a PostgreSQL database to check
+the tsvector path instead), then checks matching, ranking, highlighting, filters and that
+inserts / caption updates / deletes are searchable straight away.
+
+Usage:
+    python test_caption_search.py
+"""
+
+import asyncio
+import os
+import sys
+
+from testing import check, use_temp_database
+
+if "DATABASE_URL" not in os.environ:
+    use_temp_database("caption_search_test")
+
+import httpx
+
+from database import SessionLocal, engine, init_db, async_engine, Video
+
+CAPTIONS = {
+    "cs_1": ("tiktok", "Study with me for the MCAT - pomodoro study session #studytok"),
+    "cs_2": ("tiktok", "My morning routine before exams"),
+    "cs_3": ("instagram", "Studying organic chemistry for the mcat #premed"),
+    "cs_4": ("tiktok", "Cooking pasta <script>alert(1)</script>"),
+    "cs_5": ("youtube", None),
+}
+
+
+async def search(client, q, **params):
+    response = await client.get("/api/videos", params={"q": q, **params})
+    return response.json()
+
+
+async def run_checks() -> list:
+    import main
+    results = []
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test") as client:
+        body = await search(client, "mcat study")
+        results.append(check("every word must match (stemmed)", sorted(v["id"] for v in body["videos"]), ["cs_1", "cs_3"]))
+        results.append(check("more occurrences rank first", body["videos"][0]["id"], "cs_1"))
+        results.append(check("total counts matches", body["total"], 2))
+        results.append(check("matches highlighted", "<mark>" in (body["videos"][0]["caption_highlight"] or ""), True))
+
+        body = await search(client, "MCAT", platform="instagram")
+        results.append(check("combined with platform filter", [v["id"] for v in body["videos"]], ["cs_3"]))
+
+        body = await search(client, "mcat", limit=1, offset=1)
+        results.append(check("paging", (len(body["videos"]), body["total"], body["has_more"]), (1, 2, False)))
+
+        body = await search(client, 'NEAR( "mcat" OR * ^')
+        results.append(check("query syntax in input is literal", body["total"], 0))
+
+        body = await search(client, "  !! ")
+        results.append(check("no words -> empty result", body["total"], 0))
+
+        # Index follows inserts, caption updates and deletes
+        db = SessionLocal()
+        db.add(Video(id="cs_6", platform="tiktok", url="https://example.com/6", caption="Flashcards for the mcat"))
+        db.get(Video, "cs_2").caption = "Morning mcat flashcards"
+        db.delete(db.get(Video, "cs_3"))
+        db.commit()
+        db.close()
+
+        body = await search(client, "mcat")
+        results.append(check("insert / update / delete reflected", sorted(v["id"] for v in body["videos"]), ["cs_1", "cs_2", "cs_6"]))
+        body = await search(client, "routine")
+        results.append(check("old caption no longer matches", body["total"], 0))
+
+        body = (await client.get("/api/videos", params={"limit": 10})).json()
+        results.append(check("listing without q unchanged", (body["total"], "search_rank" in body["videos"][0]), (5, False)))
+
+    await async_engine.dispose()
+    return results
+
+
+def test_caption_search() -> bool:
+    init_db()
+    db = SessionLocal()
+    for video_id, (platform, caption) in CAPTIONS.items():
+        db.add(Video(id=video_id, platform=platform, url=f"https://example.com/{video_id}", caption=caption))
+    db.commit()
+    db.close()
+
+    # Running the DDL again (app restart, migration) is a no-op
+    from caption_search import ensure_caption_search_index
+    with engine.begin() as conn:
+        results = [check("index DDL is idempotent", ensure_caption_search_index(conn), False)]
+
+    results += asyncio.run(run_checks())
+    passed = sum(results)
+    print(f"\n{passed}/{len(results)} caption search checks passed")
+    return all(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if test_caption_search() else 1)
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Checks change detection on ingestion (change_detection.py, main.write_scraped_videos): re-ingesting
+unchanged videos only touches last_seen_at - no videos UPDATE through the ORM, no new snapshot, no
+analytics store invalidation - while changed stats are written, and edits made outside ingestion
+clear the stored hash. The daily account refresh goes through the same path. Bulk URL scraping's
+dedupe lookup and batched writer are checked too.
+
+Usage:
+    python test_change_detection.py
+"""
+
+import asyncio
+import sys
+from datetime import datetime, timedelta
+
+from testing import check, use_temp_database
+
+use_temp_database("change_detection_test")
+
+from sqlalchemy import event
+
+from database import SessionLocal, engine, init_db, Video, VideoHistory, Account, VideoCollection
+import analytics_engine
+import change_detection
+import main
+
+
+def scraped_video(i: int, views: int = 1000) -> dict:
+    return {
+        "id": f"v{i}", "platform": "tiktok", "url": f"https://www.tiktok.com/@alice/video/v{i}",
+        "caption": f"video {i} #study", "hashtags": ["study"], "views": views, "likes": 10, "comments": 1,
+        "shares": 0, "bookmarks": 0, "duration": 30, "author_username": "alice", "author_nickname": "Alice",
+        "thumbnail": f"https://cdn.example.com/v{i}.jpg?signature={views}-{datetime.utcnow().timestamp()}",
+        "posted_at": datetime(2026, 1, 1) + timedelta(days=i), "scraped_at": datetime.utcnow(),
+    }
+
+
+def ingest(videos_data, collection_id):
+    """write_scraped_videos in a fresh session, returning the ids it wrote and the UPDATE statements on videos"""
+    def write():
+        db = SessionLocal()
+        try:
+            return sorted(video.id for video in main.write_scraped_videos(db, videos_data, collection_id))
+        finally:
+            db.close()
+
+    return ingest_with(write)
+
+
+class FakeURLScraper:
+    """Stands in for URLScraper in the daily refresh: alice's profile returns `videos`"""
+    videos = []
+
+    async def scrape_profile(self, url):
+        return {"videos": [dict(video) for video in FakeURLScraper.videos]}
+
+
+async def writer_batches() -> list:
+    """Results per write of the bulk scrape writer: two results a moment apart, then four at once and the end"""
+    batches = []
+
+    def record_flush(db, job_id, results, collection_id):
+        batches.append(len(results))
+
+    flush, main.flush_url_scrape_results = main.flush_url_scrape_results, record_flush
+    batch_size, main.URL_SCRAPE_WRITE_BATCH = main.URL_SCRAPE_WRITE_BATCH, 3
+    seconds, main.URL_SCRAPE_WRITE_SECONDS = main.URL_SCRAPE_WRITE_SECONDS, 0.1
+    try:
+        queue = asyncio.Queue()
+        writer = asyncio.create_task(main.url_scrape_writer(None, 1, queue, 1))
+        for i in range(2):
+            queue.put_nowait((i, [scraped_video(i)], None, True))
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.3)
+        for i in range(2, 6):
+            queue.put_nowait((i, [scraped_video(i)], None, True))
+        queue.put_nowait(None)
+        await writer
+    finally:
+        main.flush_url_scrape_results = flush
+        main.URL_SCRAPE_WRITE_BATCH = batch_size
+        main.URL_SCRAPE_WRITE_SECONDS = seconds
+    return batches
+
+
+def daily_scrape_checks() -> list:
+    """The daily refresh goes through the same change detection, one commit per account"""
+    results = []
+    url_scraper, main.URLScraper = main.URLScraper, FakeURLScraper
+    FakeURLScraper.videos = [scraped_video(i) for i in range(10, 14)]
+
+    commits = []
+
+    def record_commit(session):
+        commits.append(session)
+
+    event.listen(SessionLocal, "after_commit", record_commit)
+    try:
+        main.daily_scrape_all_accounts()
+        db = SessionLocal()
+        new_rows = db.query(Video).filter(Video.id.in_(["v10", "v11", "v12", "v13"])).all()
+        alice = db.query(Account).filter(Account.username == "alice").one()
+        results.append(check("daily refresh inserts new videos with a hash and the account",
+                             sorted((v.id, bool(v.content_hash), v.account_id) for v in new_rows),
+                             [(f"v{i}", True, alice.id) for i in range(10, 14)]))
+        db.close()
+
+        commits.clear()
+        _, statements = ingest_with(main.daily_scrape_all_accounts)
+        results.append(check("unchanged daily refresh only touches last_seen_at",
+                             updated_columns(statements), [["last_seen_at"]]))
+        results.append(check("one commit per account", len(commits), 1))
+
+        FakeURLScraper.videos[0] = scraped_video(10, views=9000)
+        main.daily_scrape_all_accounts()
+        db = SessionLocal()
+        v10 = db.get(Video, "v10")
+        results.append(check("changed video written with a fresh hash",
+                             (v10.views, v10.content_hash), (9000, change_detection.content_hash(FakeURLScraper.videos[0]))))
+        db.close()
+    finally:
+        event.remove(SessionLocal, "after_commit", record_commit)
+        main.URLScraper = url_scraper
+    return results
+
+
+def updated_columns(statements) -> list:
+    """Columns SET by each UPDATE statement, whatever the driver's paramstyle"""
+    return [[assignment.split("=")[0].strip() for assignment in s.split("SET")[1].split("WHERE")[0].split(",")]
+            for s in statements]
+
+
+def ingest_with(run):
+    """Run `run()`, returning its result and the UPDATE statements it issued on videos"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("UPDATE VIDEOS"):
+            statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        result = run()
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    return result, statements
+
+
+def test_change_detection() -> bool:
+    init_db()
+    results = []
+    db = SessionLocal()
+    collection_id = main.get_default_collection(db).id
+    db.close()
+
+    written, _ = ingest([scraped_video(i) for i in range(5)], collection_id)
+    results.append(check("new videos inserted with a hash", len(written), 5))
+
+    db = SessionLocal()
+    first = {v.id: (v.content_hash, v.last_seen_at, v.thumbnail) for v in db.query(Video)}
+    db.close()
+    results.append(check("every row hashed", all(h for h, _, _ in first.values()), True))
+
+    # Same stats (only the signed thumbnail URL differs) -> skipped
+    analytics_engine.store._stale = False
+    written, statements = ingest([scraped_video(i) for i in range(5)], collection_id)
+    results.append(check("unchanged videos not rewritten", written, []))
+    results.append(check("only last_seen_at touched",
+                         updated_columns(statements), [["last_seen_at"]]))
+    results.append(check("analytics store not invalidated", analytics_engine.store._stale, False))
+
+    db = SessionLocal()
+    second = {v.id: (v.content_hash, v.last_seen_at, v.thumbnail) for v in db.query(Video)}
+    snapshots = db.query(VideoHistory).count()
+    links = db.query(VideoCollection).filter(VideoCollection.collection_id == collection_id).count()
+    account = db.query(Account).filter(Account.username == "alice").one()
+    db.close()
+    results.append(check("last_seen_at bumped, hash and thumbnail kept",
+                         all(second[k][1] > first[k][1] and second[k][0] == first[k][0] and second[k][2] == first[k][2]
+                             for k in first), True))
+    results.append(check("one snapshot per video per day", snapshots, 5))
+    results.append(check("collection links not duplicated", links, 5))
+    results.append(check("account still marked scraped", account.last_scraped is not None, True))
+
+    # Changed stats on one video, plus one new video
+    batch = [scraped_video(i) for i in range(5)] + [scraped_video(5)]
+    batch[2] = scraped_video(2, views=5000)
+    written, statements = ingest(batch, collection_id)
+    results.append(check("changed and new videos written", written, ["v2", "v5"]))
+
+    db = SessionLocal()
+    v2 = db.get(Video, "v2")
+    v2_snapshot = db.query(VideoHistory).filter(VideoHistory.video_id == "v2").one()
+    results.append(check("changed stats stored and snapshotted", (v2.views, v2_snapshot.views), (5000, 5000)))
+    results.append(check("hash follows the new stats", v2.content_hash, change_detection.content_hash(batch[2])))
+
+    # An edit outside ingestion clears the hash, so the next scrape is written even with old stats
+    v3 = db.get(Video, "v3")
+    v3.views = 1
+    db.commit()
+    results.append(check("manual edit clears the hash", db.get(Video, "v3").content_hash, None))
+    db.close()
+
+    written, _ = ingest([scraped_video(3)], collection_id)
+    db = SessionLocal()
+    results.append(check("next ingest rewrites the edited video", (len(written), db.get(Video, "v3").views), (1, 1000)))
+
+    # Dedupe for bulk URL scraping sees unchanged re-scrapes
+    day_ago = datetime.utcnow() - timedelta(days=1)
+    db.query(Video).update({Video.scraped_at: day_ago, Video.last_seen_at: day_ago}, synchronize_session=False)
+    db.commit()
+    change_detection.touch_last_seen(db, [("v4", "tiktok")])
+    db.commit()
+    cutoff = datetime.utcnow() - timedelta(minutes=30)
+    results.append(check("recently seen URL not rescraped",
+                         main.find_recently_scraped(db, [scraped_video(4)["url"], scraped_video(1)["url"]], cutoff),
+                         {scraped_video(4)["url"]: ["v4"]}))
+    db.close()
+
+    results += daily_scrape_checks()
+    results.append(check("bulk scrape writer batches by size and time", asyncio.run(writer_batches()), [2, 3, 1]))
+
+    passed = sum(results)
+    print(f"\n{passed}/{len(results)} change detection checks passed")
+    return all(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if test_change_detection() else 1)
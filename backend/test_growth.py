@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Checks growth derived from video_history at read time (growth.py): deltas between consecutive
+snapshots with LAG(), gaps in scraping spread evenly over the missed days, drops counted as zero,
+the per-video, aggregate and organic / ads split endpoints, and that downsampled weeks keep their growth.
+
+Usage:
+    python test_growth.py
+"""
+
+import asyncio
+import sys
+from datetime import datetime, timedelta
+
+from testing import check, use_temp_database
+
+use_temp_database("growth_test")
+
+import httpx
+from sqlalchemy import event
+
+from database import SessionLocal, engine, async_engine, init_db, Video, VideoHistory
+from video_history_storage import downsample_video_history, ensure_video_history_partitions
+import growth
+
+TODAY = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def day(offset: int) -> str:
+    return (TODAY - timedelta(days=offset)).strftime('%Y-%m-%d')
+
+
+def seed():
+    """v1: scraped 6 days ago, 5 days ago, then not until 2 days ago (3-day gap), a drop yesterday.
+    v2: a single snapshot. v3: two snapshots 40 days apart."""
+    db = SessionLocal()
+    for video_id in ("v1", "v2", "v3"):
+        db.add(Video(id=video_id, platform="tiktok", url=f"https://www.tiktok.com/@alice/video/{video_id}",
+                     author_username="alice", views=0, likes=0, comments=0))
+    for video_id, offset, views, likes in (
+        ("v1", 6, 100, 10), ("v1", 5, 200, 20), ("v1", 2, 500, 50), ("v1", 1, 450, 50),
+        ("v2", 3, 1000, 100),
+        ("v3", 45, 100, 0), ("v3", 5, 4100, 0),
+    ):
+        db.add(VideoHistory(video_id=video_id, platform="tiktok", views=views, likes=likes, comments=0,
+                            shares=0, saves=0, snapshot_date=TODAY - timedelta(days=offset)))
+    db.commit()
+    db.close()
+
+
+def query_checks() -> list:
+    results = []
+    results.append(check("shares add up to the delta", [shares for _, shares in growth.interpolate(day(3), day(6), (100,))],
+                         [(33,), (33,), (34,)]))
+    results.append(check("gaps over MAX_GAP_DAYS not interpolated",
+                         list(growth.interpolate(day(0), day(growth.MAX_GAP_DAYS + 1), (100,))), []))
+
+    db = SessionLocal()
+    deltas = db.execute(growth.snapshot_deltas(["v1"])).all()
+    results.append(check("LAG deltas per snapshot, drop clamped",
+                         [(row.snapshot_date.strftime('%Y-%m-%d'), row.views, row.likes) for row in deltas],
+                         [(day(5), 100, 10), (day(2), 300, 30), (day(1), 0, 0)]))
+
+    start = TODAY - timedelta(days=7)
+    daily = growth.daily_growth(db.execute(growth.daily_growth_query(None, start)).all(), start)
+    results.append(check("gap spread over the missed days",
+                         {d.strftime('%Y-%m-%d'): values["views"] for d, values in daily.items()},
+                         {day(5): 100, day(4): 100, day(3): 100, day(2): 100, day(1): 0}))
+
+    # Range starting inside the gap only gets the days it covers
+    start = TODAY - timedelta(days=3)
+    daily = growth.daily_growth(db.execute(growth.daily_growth_query(["v1"], start)).all(), start)
+    results.append(check("range clips interpolated days",
+                         {d.strftime('%Y-%m-%d'): values["views"] for d, values in daily.items()},
+                         {day(3): 100, day(2): 100, day(1): 0}))
+    db.close()
+    return results
+
+
+def snapshot_write_checks() -> list:
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if "FROM video_history" in statement and statement.lstrip().upper().startswith("SELECT"):
+            statements.append(statement)
+
+    import main
+    db = SessionLocal()
+    videos = db.query(Video).all()
+    event.listen(engine, "before_cursor_execute", record)
+    main.save_video_snapshots(db, videos)
+    db.commit()
+    event.remove(engine, "before_cursor_execute", record)
+    today_rows = db.query(VideoHistory).filter(VideoHistory.snapshot_date >= TODAY).count()
+    db.close()
+    return [check("one snapshot lookup per batch (no previous-day read)", (len(statements), today_rows), (1, 3))]
+
+
+async def endpoint_checks() -> list:
+    import main
+    results = []
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test") as client:
+        body = (await client.get("/api/videos/v1/growth", params={"days": 7})).json()
+        growth_by_day = {row["date"]: row["views_growth"] for row in body["daily"]}
+        results.append(check("per-video growth", [growth_by_day[day(i)] for i in range(6, -1, -1)],
+                             [0, 100, 100, 100, 100, 0, 0]))
+        results.append(check("unknown video -> 404", (await client.get("/api/videos/nope/growth")).status_code, 404))
+
+        rows = (await client.get("/api/analytics/historical-growth", params={"days": 7})).json()
+        by_day = {row["date"]: row for row in rows}
+        # v3's 40-day gap has no growth; today is left out (the snapshots saved above dropped to 0 views)
+        results.append(check("aggregate growth", [by_day[day(i)]["views_growth"] for i in range(6, 0, -1)],
+                             [0, 100, 100, 100, 100, 0]))
+        results.append(check("aggregate likes growth", by_day[day(3)]["likes_growth"], 10))
+        results.append(check("aggregate snapshot totals", [by_day[day(i)]["views"] for i in (6, 5, 4, 3, 2, 1)],
+                             [100, 4300, 0, 1000, 500, 450]))
+
+        split = (await client.get("/api/analytics/historical-growth-split", params={"days": 7})).json()
+        organic = {row["date"]: row["views_growth"] for row in split["organic"]}
+        results.append(check("split: organic snapshot totals, no ads",
+                             ([organic[day(i)] for i in (6, 5, 4, 3, 2, 1)], sum(r["views_growth"] for r in split["spark_ads"])),
+                             ([100, 4300, 0, 1000, 500, 450], 0)))
+    await async_engine.dispose()
+    return results
+
+
+def downsample_checks() -> list:
+    db = SessionLocal()
+    start = TODAY - timedelta(days=30)
+    # 20 daily snapshots, 10 views a day, three weeks back
+    for offset in range(27, 7, -1):
+        db.add(VideoHistory(video_id="v4", platform="tiktok", views=(28 - offset) * 10, likes=0, comments=0,
+                            shares=0, saves=0, snapshot_date=TODAY - timedelta(days=offset)))
+    db.commit()
+    before = growth.daily_growth(db.execute(growth.daily_growth_query(["v4"], start)).all(), start)
+    deleted = downsample_video_history(db, older_than_days=7)
+    after = growth.daily_growth(db.execute(growth.daily_growth_query(["v4"], start)).all(), start)
+    db.close()
+    return [
+        check("downsampling removed daily rows", deleted > 0, True),
+        check("growth total kept after downsampling",
+              sum(v["views"] for v in after.values()), sum(v["views"] for v in before.values())),
+    ]
+
+
+def test_growth() -> bool:
+    init_db()
+    ensure_video_history_partitions(engine, since=TODAY - timedelta(days=60))
+    seed()
+    results = query_checks() + snapshot_write_checks() + asyncio.run(endpoint_checks()) + downsample_checks()
+    passed = sum(results)
+    print(f"\n{passed}/{len(results)} growth checks passed")
+    return all(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if test_growth() else 1)
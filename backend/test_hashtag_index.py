@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Checks the inverted hashtag index (hashtag_index.py) against Video.hashtags.
+
+Loads a small synthetic dataset into a throwaway SQLite database, then makes changes through
+SessionLocal (new videos, view updates, hashtag edits on expired objects, deletes, rollbacks)
+and after each one compares the index and the hashtag totals with a full recomputation.
+Finishes with the /api/analytics/hashtags endpoints.
+
+Usage:
+    python test_hashtag_index.py
+"""
+
+import asyncio
+import sys
+from collections import defaultdict
+from datetime import datetime
+
+from testing import check, use_temp_database
+
+use_temp_database("hashtag_index_test")
+
+import httpx
+from sqlalchemy import select
+
+from database import SessionLocal, async_engine, Video, Hashtag, VideoHashtag
+from benchmarks.generate_data import generate_dataset
+import hashtag_index
+
+
+def reference_index(db):
+    """(name, platform) -> [videos, views] and the set of links, straight from Video.hashtags"""
+    totals = defaultdict(lambda: [0, 0])
+    links = set()
+    for video in db.execute(select(Video)).scalars().all():
+        for name in hashtag_index.normalize_hashtags(video.hashtags):
+            totals[(name, video.platform)][0] += 1
+            totals[(name, video.platform)][1] += video.views or 0
+            links.add((video.id, name))
+    return dict(totals), links
+
+
+def stored_index(db):
+    totals = {
+        (h.name, h.platform): [h.total_videos, h.total_views]
+        for h in db.execute(select(Hashtag)).scalars().all() if h.total_videos
+    }
+    links = set(db.execute(
+        select(VideoHashtag.video_id, Hashtag.name).join(Hashtag, Hashtag.id == VideoHashtag.hashtag_id)
+    ).all())
+    return totals, links
+
+
+def check_index(name: str) -> list:
+    db = SessionLocal()
+    try:
+        expected_totals, expected_links = reference_index(db)
+        totals, links = stored_index(db)
+        return [check(f"{name}: links", links == expected_links, True),
+                check(f"{name}: totals", totals, expected_totals)]
+    finally:
+        db.close()
+
+
+async def check_endpoints() -> list:
+    import main
+    results = []
+    db = SessionLocal()
+    expected_totals, _ = reference_index(db)
+    db.close()
+    top = sorted(expected_totals.items(), key=lambda item: item[1][1], reverse=True)[:5]
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test") as client:
+        response = (await client.get("/api/analytics/hashtags", params={"limit": 5})).json()
+        results.append(check("top hashtags by views",
+                             [(r["hashtag"], r["platform"], r["views"]) for r in response],
+                             [(name, platform, views) for (name, platform), (_, views) in top]))
+
+        response = (await client.get("/api/analytics/hashtags", params={"limit": 5, "metric_type": "organic"})).json()
+        results.append(check("filtered top hashtags aggregate over the index", len(response), 5))
+
+        response = await client.get("/api/analytics/hashtags/%23FYP/growth", params={"days": 7})
+        body = response.json()
+        results.append(check("growth endpoint", (response.status_code, body["hashtag"], len(body["daily"])), (200, "fyp", 7)))
+        results.append(check("growth has snapshot data", any(day["views_growth"] for day in body["daily"]), True))
+
+        response = await client.get("/api/analytics/hashtags/nosuchtag/growth")
+        results.append(check("unknown hashtag -> 404", response.status_code, 404))
+
+    await async_engine.dispose()
+    return results
+
+
+def test_hashtag_index() -> bool:
+    print("🔄 Generating 2k synthetic videos...")
+    generate_dataset(2_000)
+    hashtag_index.register_session_hooks()
+    results = check_index("rebuilt from generated data")
+
+    db = SessionLocal()
+    db.add(Video(id="tag_test_1", platform="tiktok", url="https://example.com/1", views=500,
+                 hashtags=["#FYP", "newtag", "fyp"], posted_at=datetime.utcnow()))
+    db.add(Video(id="tag_test_2", platform="instagram", url="https://example.com/2", views=70, hashtags=["newtag"]))
+    db.commit()
+    results += check_index("new videos")
+
+    # Existing video loaded and committed (expired), then views and hashtags change
+    video = db.get(Video, "tag_test_1")
+    db.commit()
+    video.views = 1500
+    db.commit()
+    results += check_index("views update on expired object")
+
+    video.hashtags = ["newtag", "another"]
+    video.views = 2000
+    db.commit()
+    results += check_index("hashtags and views changed together")
+
+    benchmark_video = db.execute(select(Video).filter(Video.id.like("bench_%")).limit(1)).scalars().first()
+    benchmark_video.hashtags = []
+    db.commit()
+    results += check_index("all hashtags removed")
+
+    # A tag moving between two videos with the same views leaves the totals as they were
+    first = Video(id="tag_test_swap_1", platform="tiktok", url="https://example.com/s1", views=40, hashtags=["swaptag"])
+    second = Video(id="tag_test_swap_2", platform="tiktok", url="https://example.com/s2", views=40, hashtags=[])
+    db.add_all([first, second])
+    db.commit()
+    first.hashtags, second.hashtags = [], ["swaptag"]
+    db.commit()
+    results += check_index("hashtag swapped between videos with equal views")
+
+    first.hashtags, second.hashtags = ["swaptag", "freshtag"], []
+    db.commit()
+    results += check_index("hashtag swapped back alongside another change")
+
+    video.views = 10 ** 9
+    db.flush()
+    db.rollback()
+    results += check_index("rolled back update ignored")
+
+    db.delete(db.get(Video, "tag_test_2"))
+    db.commit()
+    results += check_index("video deleted")
+    db.close()
+
+    results += asyncio.run(check_endpoints())
+
+    passed = sum(results)
+    print(f"\n{passed}/{len(results)} hashtag index checks passed")
+    return all(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if test_hashtag_index() else 1)
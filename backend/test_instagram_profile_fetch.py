@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Checks Instagram profile scraping (scrapers/rapidapi_instagram_scraper.py) against a fake RapidAPI:
+profile info and the first posts page fetched concurrently, cursor paging up to the limit, the
+profile cache, failing pages, and a bulk scrape job (POST /api/scrape/urls) writing posts pages
+as they stream in.
+
+Usage:
+    python test_instagram_profile_fetch.py
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+from testing import check, use_temp_database
+
+use_temp_database("instagram_fetch_test")
+os.environ.setdefault("RAPIDAPI_KEY", "test")
+
+import httpx
+
+from database import SessionLocal, init_db, async_engine, Video, ScrapingJobItem
+from scrapers import rapidapi_instagram_scraper
+from scrapers.rapidapi_instagram_scraper import RapidAPIInstagramScraper
+
+PAGE_SIZE = 12
+TOTAL_POSTS = 40
+REQUEST_SECONDS = 0.1
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.status_code = 200
+        self._data = data
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._data
+
+
+class FakeAPI:
+    """Stands in for RapidAPIInstagramScraper._get: instagram-social responses, 2 of 3 posts are reels"""
+    calls = []
+    fail_cursor = None
+
+    @staticmethod
+    def get(scraper, url, params):
+        endpoint = url.rsplit("/", 1)[-1]
+        FakeAPI.calls.append((endpoint, params.get("username"), time.monotonic()))
+        time.sleep(REQUEST_SECONDS)
+        username = params["username"]
+
+        if endpoint == "profile":
+            return FakeResponse({"success": True, "body": {"username": username, "full_name": username.title(),
+                                                           "followers": 1000, "posts": TOTAL_POSTS}})
+
+        start = int(params.get("pagination_token") or 0)
+        if FakeAPI.fail_cursor is not None and start == FakeAPI.fail_cursor:
+            raise ConnectionError("connection reset")
+        end = min(start + PAGE_SIZE, TOTAL_POSTS)
+        return FakeResponse({
+            "success": True,
+            "body": [{"id": f"{username}{i}", "shortcode": f"{username}_{i}", "media_type": 2 if i % 3 else 1,
+                      "like_count": 10, "play_count": 100 + i, "caption": f"post {i} #study",
+                      "user": {"username": username}} for i in range(start, end)],
+            "pagination_token": str(end) if end < TOTAL_POSTS else None,
+            "more_available": end < TOTAL_POSTS,
+        })
+
+
+def scraper_checks() -> list:
+    results = []
+    scraper = RapidAPIInstagramScraper(api_key="test")
+
+    pages = []
+    started = time.monotonic()
+    data = scraper.scrape_profile("https://www.instagram.com/alice/", limit=30, on_page=pages.append)
+    elapsed = time.monotonic() - started
+    results.append(check("posts paged up to the limit", (len(data["posts"]), [len(p) for p in pages]), (30, [12, 12, 6])))
+    results.append(check("profile info parsed", (data["profile"]["nickname"], data["profile"]["follower_count"]),
+                         ("Alice", 1000)))
+    results.append(check("videos filtered from posts", len(data["videos"]), 20))
+
+    # 3 posts pages + 1 profile request, sequential would take 4 round trips
+    profile_call = next(c for c in FakeAPI.calls if c[0] == "profile" and c[1] == "alice")
+    first_page = next(c for c in FakeAPI.calls if c[0] == "posts" and c[1] == "alice")
+    results.append(check("profile and first page requested together",
+                         (abs(profile_call[2] - first_page[2]) < REQUEST_SECONDS / 2, elapsed < 4 * REQUEST_SECONDS),
+                         (True, True)))
+
+    posts = scraper.get_user_posts("bob", count=100)
+    results.append(check("stops at the last page", len(posts), TOTAL_POSTS))
+
+    FakeAPI.calls.clear()
+    scraper.scrape_profile("alice", limit=5)
+    results.append(check("profile served from cache", [c[0] for c in FakeAPI.calls], ["posts"]))
+
+    rapidapi_instagram_scraper._profile_cache["alice"] = (time.monotonic() - 1, {})
+    FakeAPI.calls.clear()
+    scraper.scrape_profile("alice", limit=5)
+    results.append(check("expired profile refetched", sorted(c[0] for c in FakeAPI.calls), ["posts", "profile"]))
+
+    FakeAPI.fail_cursor = PAGE_SIZE
+    posts = scraper.get_user_posts("carol", count=100)
+    results.append(check("failed later page keeps earlier pages", len(posts), PAGE_SIZE))
+    FakeAPI.fail_cursor = 0
+    results.append(check("failed first page -> no posts", scraper.get_user_posts("dave", count=100), []))
+    FakeAPI.fail_cursor = None
+
+    return results
+
+
+async def bulk_job_checks() -> list:
+    import main
+    results = []
+
+    flushes = []
+    flush = main.flush_url_scrape_results
+
+    def recording_flush(db, job_id, batch, collection_id):
+        flushes.append([(done, len(videos)) for _, videos, _, done in batch])
+        return flush(db, job_id, batch, collection_id)
+
+    main.flush_url_scrape_results = recording_flush
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test") as client:
+        response = await client.post("/api/scrape/urls", json={"urls": ["instagram:erin"]})
+        job = (await client.get(f"/api/scrape/jobs/{response.json()['job_id']}")).json()
+    main.flush_url_scrape_results = flush
+
+    streamed = [videos for batch in flushes for done, videos in batch if not done]
+    results.append(check("pages written while the profile is still paging", len(streamed) >= 2, True))
+    results.append(check("final result only carries unstreamed videos",
+                         sum(videos for batch in flushes for done, videos in batch if done), 0))
+
+    db = SessionLocal()
+    item = db.query(ScrapingJobItem).first()
+    stored = db.query(Video).filter(Video.author_username == "erin").count()
+    db.close()
+    # limit=100 in bulk jobs: all 40 posts, 26 of them reels
+    results.append(check("job item completed with every video", (job["progress"], job["urls"][0]["status"],
+                                                                 item.videos_found, len(item.video_ids), stored),
+                         (1, "completed", 26, 26, 26)))
+
+    await async_engine.dispose()
+    return results
+
+
+def test_instagram_profile_fetch() -> bool:
+    RapidAPIInstagramScraper._get = FakeAPI.get
+    rapidapi_instagram_scraper.POSTS_PAGE_DELAY_SECONDS = 0
+    init_db()
+    results = scraper_checks() + asyncio.run(bulk_job_checks())
+    passed = sum(results)
+    print(f"\n{passed}/{len(results)} Instagram profile fetch checks passed")
+    return all(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if test_instagram_profile_fetch() else 1)
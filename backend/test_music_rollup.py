@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Checks the music usage rollup (music_rollup.py) against Video.music_id.
+
+Loads a small synthetic dataset into a throwaway SQLite database, then makes changes through
+SessionLocal (new videos, view updates, sound changes, deletes, rollbacks) and after each one
+compares music_usage with a full recomputation: the totals right after the commit, everything
+else once the deferred recompute of the changed sounds has run. Also checks the daily growth
+rows and the /api/analytics/audio endpoints.
+
+Usage:
+    python test_music_rollup.py
+"""
+
+import asyncio
+import statistics
+import sys
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from testing import check, use_temp_database
+
+use_temp_database("music_rollup_test")
+
+import httpx
+from sqlalchemy import event, func, select
+
+from database import SessionLocal, engine, async_engine, Video, MusicUsage, MusicUsageDaily
+from benchmarks.generate_data import generate_dataset
+import music_rollup
+
+
+def reference_rollup(db):
+    """(music_id, platform) -> (videos, views, median, first_used, last_used, top creator), straight from videos"""
+    videos = defaultdict(list)
+    for video in db.execute(select(Video).filter(Video.music_id.isnot(None))).scalars().all():
+        videos[(video.music_id, video.platform)].append(video)
+
+    rollup = {}
+    for key, rows in videos.items():
+        views = [v.views or 0 for v in rows]
+        creators = defaultdict(int)
+        for v in rows:
+            if v.author_username:
+                creators[v.author_username] += v.views or 0
+        posted = [v.posted_at for v in rows if v.posted_at]
+        rollup[key] = (len(rows), sum(views), int(statistics.median(views)),
+                       min(posted, default=None), max(posted, default=None),
+                       max(creators, key=creators.get) if creators else None)
+    return rollup
+
+
+def stored_rollup(db):
+    return {
+        (u.music_id, u.platform): (u.total_videos, u.total_views, u.median_views, u.first_used, u.last_used,
+                                   u.top_creators[0]["username"] if u.top_creators else None)
+        for u in db.execute(select(MusicUsage)).scalars().all() if u.total_videos
+    }
+
+
+def daily_row(db, music_id, platform, day):
+    row = db.execute(
+        select(MusicUsageDaily.videos_added, MusicUsageDaily.views_gained)
+        .join(MusicUsage, MusicUsage.id == MusicUsageDaily.music_usage_id)
+        .filter(MusicUsage.music_id == music_id, MusicUsage.platform == platform, MusicUsageDaily.day == day)
+    ).first()
+    return tuple(row) if row else (0, 0)
+
+
+def compare(name: str, expected: dict, stored: dict) -> bool:
+    mismatched = {key: (stored.get(key), value) for key, value in expected.items() if stored.get(key) != value}
+    extra = set(stored) - set(expected)
+    return check(name, (mismatched, extra), ({}, set()))
+
+
+def check_rollup(name: str) -> list:
+    """Totals as committed, then the whole rollup after recompute_pending"""
+    db = SessionLocal()
+    try:
+        expected = reference_rollup(db)
+        totals = lambda rollup: {key: value[:2] for key, value in rollup.items()}
+        results = [compare(f"{name}: totals", totals(expected), totals(stored_rollup(db)))]
+        db.commit()
+
+        with engine.begin() as connection:
+            music_rollup.recompute_pending(connection)
+        pending = db.execute(select(func.count()).filter(MusicUsage.pending_changes > 0)).scalar()
+        results.append(compare(f"{name}: recomputed", expected, stored_rollup(db)) and pending == 0)
+        return results
+    finally:
+        db.close()
+
+
+def sound_scans(run) -> int:
+    """SELECTs over videos by music_id issued while running `run()`"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and "videos.music_id IN" in statement:
+            statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        run()
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    return len(statements)
+
+
+async def check_endpoints() -> list:
+    import main
+    results = []
+    db = SessionLocal()
+    expected = reference_rollup(db)
+    db.close()
+    top = sorted(expected.items(), key=lambda item: item[1][1], reverse=True)[:5]
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test") as client:
+        response = (await client.get("/api/analytics/audio", params={"limit": 5})).json()
+        results.append(check("top sounds by views",
+                             [(r["music_id"], r["platform"], r["views"]) for r in response],
+                             [(music_id, platform, stats[1]) for (music_id, platform), stats in top]))
+        results.append(check("top creators listed", bool(response[0]["top_creators"]), True))
+
+        response = (await client.get("/api/analytics/audio", params={"limit": 3, "sort": "median"})).json()
+        medians = [r["median_views"] for r in response]
+        results.append(check("sort by median", medians, sorted(medians, reverse=True)))
+
+        response = await client.get("/api/analytics/audio/music_test_a/growth", params={"days": 7})
+        body = response.json()
+        today = body["daily"][-1] if response.status_code == 200 else {}
+        results.append(check("growth endpoint", (response.status_code, len(body.get("daily", []))), (200, 7)))
+        results.append(check("growth shows today's views", today.get("views_gained", 0) > 0, True))
+
+        response = await client.get("/api/analytics/audio/nosuchsound/growth")
+        results.append(check("unknown sound -> 404", response.status_code, 404))
+
+    await async_engine.dispose()
+    return results
+
+
+def test_music_rollup() -> bool:
+    print("🔄 Generating 2k synthetic videos...")
+    generate_dataset(2_000)
+    music_rollup.register_session_hooks()
+    results = check_rollup("rebuilt from generated data")
+
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    posted = today - timedelta(days=2)
+
+    db = SessionLocal()
+    db.add(Video(id="music_test_1", platform="tiktok", url="https://example.com/1", views=500,
+                 author_username="alice", music_id="music_test_a", posted_at=posted))
+    db.add(Video(id="music_test_2", platform="tiktok", url="https://example.com/2", views=70,
+                 author_username="bob", music_id="music_test_a", posted_at=posted))
+    db.add(Video(id="music_test_3", platform="instagram", url="https://example.com/3", views=10,
+                 music_id="music_test_a"))
+    results.append(check("flush doesn't read the sound's videos", sound_scans(db.commit), 0))
+    results += check_rollup("new videos")
+    results.append(check("videos added on their posted day", daily_row(db, "music_test_a", "tiktok", posted), (2, 0)))
+
+    # Existing video loaded and committed (expired), then views change
+    video = db.get(Video, "music_test_1")
+    db.commit()
+    video.views = 1500
+    db.commit()
+    results += check_rollup("views update on expired object")
+    results.append(check("views gained today", daily_row(db, "music_test_a", "tiktok", today), (0, 1000)))
+
+    benchmark_video = db.execute(select(Video).filter(Video.id.like("bench_%")).limit(1)).scalars().first()
+    benchmark_video.music_id = "music_test_a"
+    benchmark_video.platform = "tiktok"
+    db.commit()
+    results += check_rollup("video moved to another sound")
+
+    video.views = 10 ** 9
+    db.flush()
+    db.rollback()
+    results += check_rollup("rolled back update ignored")
+
+    db.delete(db.get(Video, "music_test_2"))
+    db.commit()
+    results += check_rollup("video deleted")
+    db.close()
+
+    results += asyncio.run(check_endpoints())
+
+    passed = sum(results)
+    print(f"\n{passed}/{len(results)} music rollup checks passed")
+    return all(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if test_music_rollup() else 1)
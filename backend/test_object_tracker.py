@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Checks the TT_Content_Scraper progress tracker (scrapers/TT_Content_Scraper/src/object_tracker_db.py):
+write-behind flushing by op count and age, reads seeing buffered writes, error attempts, leased
+claims shared between two trackers (processes) on one database, expired leases, the trigger-maintained
+status counters, old databases without the claim columns / counters, and streaming ID imports from
+text / CSV / NDJSON (gzipped) files in bounded memory.
+
+Usage:
+    python test_object_tracker.py
+"""
+
+import gzip
+import json
+import multiprocessing
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+
+from testing import check
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "scrapers"))
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore")  # The package __init__ warns about optional scraper deps
+    from TT_Content_Scraper.src.object_tracker_db import ObjectTracker
+    from TT_Content_Scraper.src.id_reader import iter_ids
+
+
+def count_rows(db_file: str, where: str = "1") -> int:
+    conn = sqlite3.connect(db_file)
+    try:
+        return conn.execute(f"SELECT COUNT(*) FROM objects WHERE {where}").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def scanned_counts(db_file: str) -> dict:
+    """What status_counts should hold, counted the slow way"""
+    conn = sqlite3.connect(db_file)
+    try:
+        rows = conn.execute("SELECT COALESCE(type, ''), status, COUNT(*) FROM objects GROUP BY 1, 2").fetchall()
+    finally:
+        conn.close()
+    result = {}
+    for type, status, n in rows:
+        result.setdefault(type, {})[status] = n
+    return result
+
+
+def claim_worker(db_file: str, queue):
+    """Claim and complete batches until nothing is left, reporting every id it got"""
+    tracker = ObjectTracker(db_file, flush_every=10)
+    got = []
+    while True:
+        batch = tracker.claim_pending(7, lease_seconds=60)
+        if not batch:
+            break
+        for id in batch:
+            tracker.mark_completed(id, f"{id}.json")
+        got.extend(batch)
+    tracker.close()
+    queue.put(got)
+
+
+def run_checks(tmp: str) -> list:
+    results = []
+    db_file = os.path.join(tmp, "progress.db")
+
+    tracker = ObjectTracker(db_file, flush_every=5, flush_interval_ms=60_000)
+    for i in range(4):
+        tracker.add_object(f"v{i}", type="content")
+    results.append(check("writes buffered below flush_every", count_rows(db_file), 0))
+    tracker.add_object("v4", type="content")
+    results.append(check("flushed in one go at flush_every", count_rows(db_file), 5))
+
+    tracker.mark_completed("v0", "v0.json")
+    results.append(check("reads flush the buffer first", tracker.is_completed("v0"), True))
+
+    tracker.flush_interval = 0.05
+    tracker.add_object("v5", type="content")
+    time.sleep(0.06)
+    tracker.add_object("v6", type="user")
+    results.append(check("buffer older than flush_interval flushed", count_rows(db_file), 7))
+
+    tracker.mark_error("v1", "KeyError 'itemInfo'")
+    tracker.mark_error("v1", "KeyError 'itemInfo'")
+    status = tracker.get_object_status("v1")
+    results.append(check("mark_error counts attempts", (status["status"], status["attempts"]), ("error", 2)))
+
+    # Claims
+    claimed = tracker.claim_pending(2, lease_seconds=60, type="content")
+    results.append(check("claim_pending returns pending rows", (len(claimed), set(t["type"] for t in claimed.values())),
+                         (2, {"content"})))
+    results.append(check("claimed rows are in_progress", tracker.get_stats()["in_progress"], 2))
+    other = ObjectTracker(db_file, worker_id="other")
+    second = other.claim_pending(10, lease_seconds=60)
+    results.append(check("second worker gets different rows", (set(second) & set(claimed), len(second)), (set(), 3)))
+    results.append(check("nothing left to claim", other.claim_pending(10, lease_seconds=60), {}))
+
+    # A crashed worker: its lease runs out and the rows are handed out again
+    conn = sqlite3.connect(db_file)
+    conn.execute("UPDATE objects SET lease_until = '2000-01-01T00:00:00' WHERE claimed_by = 'other'")
+    conn.commit()
+    conn.close()
+    reclaimed = tracker.claim_pending(10, lease_seconds=60)
+    results.append(check("expired leases reclaimed", set(reclaimed), set(second)))
+
+    results.append(check("status counters match a full count", tracker.get_status_counts(), scanned_counts(db_file)))
+    stats = tracker.get_stats("content")
+    results.append(check("get_stats per type from counters", (stats["completed"], stats["errors"], stats["in_progress"]),
+                         (1, 1, 4)))
+
+    tracker.mark_completed(next(iter(claimed)), "done.json")
+    tracker.close()
+    results.append(check("close flushes and releases unfinished claims",
+                         (count_rows(db_file, "status = 'in_progress'"), count_rows(db_file, "status = 'completed'")),
+                         (0, 2)))
+    other.close()
+
+    # Two processes draining one database never scrape the same id
+    shared = os.path.join(tmp, "shared.db")
+    tracker = ObjectTracker(shared)
+    tracker.add_objects([str(i) for i in range(300)], type="content")
+    tracker.close()
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    workers = [ctx.Process(target=claim_worker, args=(shared, queue)) for _ in range(2)]
+    for worker in workers:
+        worker.start()
+    got = queue.get(timeout=60) + queue.get(timeout=60)
+    for worker in workers:
+        worker.join()
+    results.append(check("two processes share the work without duplicates", (len(got), len(set(got))), (300, 300)))
+    results.append(check("all completed", count_rows(shared, "status = 'completed'"), 300))
+    tracker = ObjectTracker(shared)
+    results.append(check("counters exact after concurrent workers", tracker.get_status_counts(), {"content": {"completed": 300}}))
+    tracker.reset_all_to_pending()
+    tracker.add_object("untyped")
+    conn = sqlite3.connect(shared)
+    conn.execute("DELETE FROM objects WHERE CAST(id AS INTEGER) >= 100")
+    conn.commit()
+    conn.close()
+    results.append(check("counters follow resets, deletes and NULL types", tracker.get_status_counts(),
+                         {"": {"pending": 1}, "content": {"pending": 100}}))
+    tracker.close()
+
+    # Databases created before the claim columns existed get them added
+    old = os.path.join(tmp, "old.db")
+    conn = sqlite3.connect(old)
+    conn.execute("CREATE TABLE objects (id TEXT PRIMARY KEY, status TEXT NOT NULL, title TEXT, type TEXT, "
+                 "added_at TIMESTAMP, completed_at TIMESTAMP, attempts INTEGER DEFAULT 0, last_error TEXT, "
+                 "last_attempt TIMESTAMP, file_path TEXT, updated_at TIMESTAMP)")
+    conn.execute("INSERT INTO objects (id, status, type) VALUES ('a', 'pending', 'user')")
+    conn.commit()
+    conn.close()
+    tracker = ObjectTracker(old)
+    results.append(check("old database counters backfilled", tracker.get_stats("user")["pending"], 1))
+    results.append(check("old database migrated and claimable", list(tracker.claim_pending(5, 60)), ["a"]))
+    tracker.close()
+
+    # ID files
+    def write(name, text, compress=False):
+        path = os.path.join(tmp, name)
+        with (gzip.open(path, "wt") if compress else open(path, "w")) as f:
+            f.write(text)
+        return path
+
+    results.append(check("text ids, blank lines skipped", list(iter_ids(write("a.txt", "1\n\n 2 \n3\n"))), ["1", "2", "3"]))
+    results.append(check("gzipped text", list(iter_ids(write("a.txt.gz", "4\n5\n", compress=True))), ["4", "5"]))
+    results.append(check("csv id column", list(iter_ids(write("a.csv", "url,id\nu1,10\nu2,11\n"))), ["10", "11"]))
+    results.append(check("csv without header", list(iter_ids(write("b.csv", "12,x\n13,y\n"))), ["12", "13"]))
+    results.append(check("csv named column", list(iter_ids(write("c.csv", "video_id;views\n14;1\n"), column="video_id")),
+                         ["14"]))
+    ndjson = "\n".join([json.dumps({"id": 20}), "not json", json.dumps("21"), json.dumps({"other": 1})])
+    results.append(check("gzipped ndjson, bad lines skipped", list(iter_ids(write("a.ndjson.gz", ndjson, compress=True))),
+                         ["20", "21"]))
+
+    seeded = os.path.join(tmp, "seeded.db")
+    tracker = ObjectTracker(seeded)
+    tracker.add_object("5")
+    result = tracker.import_objects(iter_ids(os.path.join(tmp, "a.txt.gz")), type="content", chunk_size=1)
+    results.append(check("import counts new ids only", (result["read"], result["added"]), (2, 1)))
+
+    n = 300_000
+    path = os.path.join(tmp, "big.txt.gz")
+    with gzip.open(path, "wt") as f:
+        for i in range(n):
+            f.write(f"{7_000_000_000_000_000_000 + i}\n")
+    tracemalloc.start()
+    result = tracker.import_objects(iter_ids(path), type="content", chunk_size=10_000)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"   imported {result['read']:,} ids at {result['ids_per_second']:,.0f} ids/s, peak {peak / 1e6:.1f} MB")
+    results.append(check("large import complete", (result["added"], tracker.get_stats("content")["pending"]), (n, n + 1)))
+    results.append(check("large import memory bounded by the chunk", peak < 20_000_000, True))
+    tracker.close()
+
+    return results
+
+
+def test_object_tracker() -> bool:
+    with tempfile.TemporaryDirectory() as tmp:
+        results = run_checks(tmp)
+    passed = sum(results)
+    print(f"\n{passed}/{len(results)} object tracker checks passed")
+    return all(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if test_object_tracker() else 1)
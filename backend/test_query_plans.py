@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Query plan regression tests for the analytics hot paths.
+
+Runs EXPLAIN on the statements the analytics endpoints execute - built by the same query helpers
+(main.py, analytics_engine.py SQL fallback, growth.py) - and checks that they use the covering /
+unique indexes instead of scanning the videos or video_history tables.
+PostgreSQL only - sequential scans are disabled so the planner picks an index even
+on a small database. Synthetic rows are inserted and analyzed inside a transaction
+that is rolled back, so the database is left untouched.
+
+Usage:
+    DATABASE_URL=postgresql://... python test_query_plans.py
+"""
+
+from datetime import datetime, timedelta
+import sys
+
+from sqlalchemy import select, text
+from sqlalchemy.dialects import postgresql
+
+from database import engine, init_db, Video, Account
+from main import overview_query, views_over_time_query, most_viral_query, tracked_videos_query
+from analytics_engine import (AnalyticsFilter, timeseries_query, averages_query, median_views_query,
+                              virality_query, duration_query, top_by_views_query)
+from video_history_storage import ensure_video_history_partitions
+import growth
+
+
+SEED_VIDEOS_SQL = """
+    INSERT INTO videos (id, platform, url, author_username, views, likes, comments, shares, bookmarks,
+                        duration, is_spark_ad, posted_at, scraped_at)
+    SELECT
+        'plan_test_' || n,
+        CASE n % 3 WHEN 0 THEN 'tiktok' WHEN 1 THEN 'instagram' ELSE 'youtube' END,
+        'https://example.com/' || n,
+        'plan_test_author_' || (n % 500),
+        n * 10, n, n % 100, n % 50, n % 20,
+        (n % 120)::float,
+        n % 10 = 0,
+        now() - (n % 730) * interval '1 day',
+        now()
+    FROM generate_series(1, :rows) AS n
+"""
+
+SEED_ACCOUNTS_SQL = """
+    INSERT INTO accounts (username, platform)
+    SELECT 'plan_test_author_' || n, CASE n % 3 WHEN 0 THEN 'tiktok' WHEN 1 THEN 'instagram' ELSE 'youtube' END
+    FROM generate_series(1, :rows) AS n
+"""
+
+# Daily snapshots of the first :videos videos over the last :days days
+SEED_HISTORY_SQL = """
+    INSERT INTO video_history (video_id, platform, views, likes, comments, shares, saves, snapshot_date)
+    SELECT
+        'plan_test_' || n,
+        CASE n % 3 WHEN 0 THEN 'tiktok' WHEN 1 THEN 'instagram' ELSE 'youtube' END,
+        n * 10 + d * 100, n, 0, 0, 0,
+        date_trunc('day', now()) - d * interval '1 day'
+    FROM generate_series(1, :videos) AS n, generate_series(0, :days - 1) AS d
+"""
+
+HISTORY_DAYS = 30
+
+# Undated filters on (platform, is_spark_ad) - the seeded rows aren't all-visible inside the test
+# transaction, so the covering index has no index-only edge and the planner picks any index
+# leading with platform
+PLATFORM_INDEXES = ("idx_platform_spark_posted", "idx_platform_scraped", "ix_videos_platform")
+
+# video_history is partitioned on PostgreSQL - its indexes show up under per-partition names
+# (video_history_y2026m10_video_id_idx, ..._video_id_platform_snapshot_date_idx)
+VIDEO_HISTORY_BY_VIDEO = ("idx_video_snapshot", "ix_video_history_video_id", "_video_id_idx",
+                          "_video_id_platform_snapshot_date_idx")
+
+
+def explain(conn, query) -> str:
+    """Return the EXPLAIN output of a select() as a single string"""
+    compiled = query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+    rows = conn.execute(text(f"EXPLAIN {compiled}")).fetchall()
+    return "\n".join(row[0] for row in rows)
+
+
+def check_plan(conn, name, query, expected_indexes):
+    """expected_indexes: an index name, or a tuple of names any of which will do"""
+    if isinstance(expected_indexes, str):
+        expected_indexes = (expected_indexes,)
+    plan = explain(conn, query)
+    # "Seq Scan on video_history" also matches its partitions (video_history_y2026m10)
+    ok = (any(index in plan for index in expected_indexes)
+          and "Seq Scan on videos" not in plan and "Seq Scan on video_history" not in plan)
+    print(f"{'✓' if ok else '✗'} {name}: expected {' / '.join(expected_indexes)}")
+    if not ok:
+        print(plan)
+    return ok
+
+
+def test_query_plans():
+    if engine.dialect.name != "postgresql":
+        print("⚠️  Query plan tests only run against PostgreSQL - skipping")
+        return True
+
+    init_db()
+    now = datetime.utcnow()
+    start_date = now - timedelta(days=30)
+    ensure_video_history_partitions(engine, since=now - timedelta(days=HISTORY_DAYS))
+    organic_tiktok = AnalyticsFilter("organic", "tiktok")
+    tracked_videos = tracked_videos_query("organic", "tiktok", 2)
+
+    cases = [
+        (
+            "overview / organic, single platform",
+            overview_query("organic", "tiktok", None),
+            PLATFORM_INDEXES,
+        ),
+        (
+            "views over time / all platforms",
+            views_over_time_query(start_date, now, "total", None, None),
+            "idx_posted_at_covering",
+        ),
+        (
+            "most viral / all platforms",
+            most_viral_query(start_date, now, 20, "total", None, None),
+            "idx_views",
+        ),
+        (
+            "timeseries (SQL fallback)",
+            timeseries_query(start_date.date(), 30),
+            "idx_posted_at_covering",
+        ),
+        (
+            "metrics breakdown / ads, single platform (SQL fallback)",
+            averages_query(AnalyticsFilter("ads", "tiktok"), {"daily": now - timedelta(days=1),
+                                                              "weekly": now - timedelta(days=7)}),
+            "idx_platform_spark_posted",
+        ),
+        (
+            "virality median / organic, single platform (SQL fallback)",
+            median_views_query(organic_tiktok, start_date, now, 1000),
+            "idx_platform_spark_posted",
+        ),
+        (
+            "virality buckets / organic, single platform (SQL fallback)",
+            virality_query(organic_tiktok, start_date, now, 5000),
+            "idx_platform_spark_posted",
+        ),
+        (
+            "duration analysis / ads, single platform (SQL fallback)",
+            duration_query(AnalyticsFilter("ads", "instagram"), start_date, now),
+            "idx_platform_spark_posted",
+        ),
+        (
+            "video stats page ORDER BY views / organic, single platform (SQL fallback)",
+            top_by_views_query(organic_tiktok, start_date, now).offset(50).limit(50),
+            # Either filter on the covering index and sort, or walk idx_views and stop at the page
+            ("idx_platform_spark_posted", "idx_views"),
+        ),
+        (
+            "historical growth / tracked videos, organic single platform",
+            tracked_videos_query("organic", "tiktok", None),
+            PLATFORM_INDEXES,
+        ),
+        (
+            "historical growth / daily snapshot totals of tracked videos",
+            growth.daily_totals_query(tracked_videos, start_date, now),
+            VIDEO_HISTORY_BY_VIDEO,
+        ),
+        (
+            "historical growth / daily growth (LAG over snapshots)",
+            growth.daily_growth_query(tracked_videos, start_date, now),
+            VIDEO_HISTORY_BY_VIDEO,
+        ),
+        (
+            "videos page / ids newest first at a deep offset",
+            select(Video.id).order_by(Video.scraped_at.desc(), Video.id.desc()).offset(5000).limit(50),
+            "idx_scraped_at_id",
+        ),
+        (
+            "video lookup by (id, platform)",
+            select(Video.id).filter(Video.id == "123", Video.platform == "tiktok"),
+            "videos_pkey",
+        ),
+        (
+            "account lookup by (username, platform)",
+            select(Account.id).filter(Account.username == "someone", Account.platform == "tiktok"),
+            # Usernames are near-unique, so the plain username index costs the same
+            ("uq_accounts_username_platform", "ix_accounts_username"),
+        ),
+    ]
+
+    with engine.connect() as conn:
+        trans = conn.begin()
+        conn.execute(text(SEED_VIDEOS_SQL), {"rows": 50000})
+        conn.execute(text(SEED_ACCOUNTS_SQL), {"rows": 5000})
+        conn.execute(text(SEED_HISTORY_SQL), {"videos": 2000, "days": HISTORY_DAYS})
+        for table in ("videos", "accounts", "video_history"):
+            conn.execute(text(f"ANALYZE {table}"))
+        conn.execute(text("SET LOCAL enable_seqscan = off"))
+        results = [check_plan(conn, name, query, index) for name, query, index in cases]
+        trans.rollback()
+
+    passed = sum(results)
+    print(f"\n{passed}/{len(results)} query plans use the expected indexes")
+    return all(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if test_query_plans() else 1)
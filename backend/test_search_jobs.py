@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Checks the hashtag / term search jobs (POST /api/search/*, GET /api/search/jobs/...) with a
+fake scraper: results paging and serialization, the SearchHistory cache and its TTL, joining an
+identical running search, failed jobs, and batched writes of the found videos.
+
+Usage:
+    python test_search_jobs.py
+"""
+
+import asyncio
+import sys
+from datetime import timedelta
+
+from testing import check, use_temp_database
+
+use_temp_database("search_jobs_test")
+
+import httpx
+
+from sqlalchemy import event
+
+from database import SessionLocal, engine, init_db, async_engine, SearchHistory, Video
+
+
+class FakeScraper:
+    calls = 0
+    fail = False
+
+    async def _search(self, query: str, limit: int):
+        FakeScraper.calls += 1
+        await asyncio.sleep(0.05)
+        if FakeScraper.fail:
+            raise RuntimeError("rate limited")
+        return [
+            {"id": f"{query.replace(' ', '_')}_{i}", "platform": "youtube",
+             "url": f"https://youtube.com/watch?v={i}", "views": 100 - i}
+            for i in range(min(limit, 5))
+        ]
+
+    async def search_hashtag(self, hashtag: str, limit: int = 50):
+        return await self._search(hashtag, limit)
+
+    async def search_term(self, term: str, limit: int = 50):
+        return await self._search(term, limit)
+
+
+def video_selects(videos_data) -> int:
+    """SELECTs on videos issued by save_search_results for one batch"""
+    import main
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and "FROM videos" in statement:
+            statements.append(statement)
+
+    db = SessionLocal()
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        main.save_search_results(db, videos_data)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+        db.close()
+    return len(statements)
+
+
+def save_checks() -> list:
+    """Search results go through the batched ingestion path instead of a query per video"""
+    results = []
+    def batch(prefix, size, bump=0):
+        return [{"id": f"{prefix}_{i}", "platform": "youtube", "url": f"https://youtube.com/watch?v={prefix}{i}",
+                 "views": i + bump, "author_username": "someone"} for i in range(size)]
+
+    results.append(check("new results: SELECTs don't grow with the batch",
+                         video_selects(batch("batch", 40)), video_selects(batch("small", 4))))
+    results.append(check("changed results: SELECTs don't grow with the batch",
+                         video_selects(batch("batch", 40, bump=1)), video_selects(batch("small", 4, bump=1))))
+
+    db = SessionLocal()
+    stored = db.query(Video).filter(Video.id.like("batch_%")).all()
+    results.append(check("changed results stored with their hash",
+                         (len(stored), all(v.views == int(v.id.split("_")[1]) + 1 and v.content_hash for v in stored)),
+                         (40, True)))
+    db.close()
+    return results
+
+
+async def run_checks() -> list:
+    import main
+    youtube_scraper, main.YouTubeScraper = main.YouTubeScraper, FakeScraper
+    results = []
+
+    async def search(client, kind, query, limit=3, platform="youtube"):
+        return await client.post(f"/api/search/{kind}", json={"query": query, "platform": platform, "limit": limit})
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test") as client:
+        body = (await search(client, "hashtag", "#StudyTok")).json()
+        job_id = body["job_id"]
+        results.append(check("new search starts a job", (body["cached"], body["query"]), (False, "studytok")))
+
+        job = (await client.get(f"/api/search/jobs/{job_id}")).json()
+        results.append(check("job completed", (job["status"], job["progress"]), ("completed", 3)))
+
+        page = (await client.get(f"/api/search/jobs/{job_id}/results")).json()
+        results.append(check("results in scraper order", [v["id"] for v in page["videos"]],
+                             ["studytok_0", "studytok_1", "studytok_2"]))
+        results.append(check("results serialized without internal columns",
+                             sorted({"content_hash", "last_seen_at", "account_id"} & set(page["videos"][0])), []))
+        page = (await client.get(f"/api/search/jobs/{job_id}/results", params={"limit": 2, "offset": 2})).json()
+        results.append(check("results paging", ([v["id"] for v in page["videos"]], page["total"], page["has_more"]),
+                             (["studytok_2"], 3, False)))
+
+        calls = FakeScraper.calls
+        body = (await search(client, "hashtag", "studytok", limit=2)).json()
+        results.append(check("repeat search served from cache", (body["cached"], body["job_id"], FakeScraper.calls),
+                             (True, job_id, calls)))
+
+        body = (await search(client, "hashtag", "studytok", limit=10)).json()
+        results.append(check("larger limit than cached -> new job", (body["cached"], FakeScraper.calls), (False, calls + 1)))
+
+        body = (await search(client, "term", "studytok")).json()
+        results.append(check("term search cached separately", body["cached"], False))
+
+        # Two identical searches at once share one job
+        calls = FakeScraper.calls
+        first, second = await asyncio.gather(search(client, "term", "study tips"), search(client, "term", "Study  Tips"))
+        results.append(check("identical concurrent searches -> 1 scrape",
+                             (first.json()["job_id"] == second.json()["job_id"], FakeScraper.calls), (True, calls + 1)))
+
+        # Expired cache entries are scraped again
+        db = SessionLocal()
+        for history in db.query(SearchHistory).filter(SearchHistory.query == "study tips").all():
+            history.searched_at -= timedelta(minutes=main.SEARCH_CACHE_TTL_MINUTES + 1)
+        db.commit()
+        db.close()
+        calls = FakeScraper.calls
+        body = (await search(client, "term", "study tips")).json()
+        results.append(check("expired cache -> new job", (body["cached"], FakeScraper.calls), (False, calls + 1)))
+
+        FakeScraper.fail = True
+        body = (await search(client, "hashtag", "broken")).json()
+        job = (await client.get(f"/api/search/jobs/{body['job_id']}")).json()
+        results.append(check("scraper error fails the job", (job["status"], job["error_message"]), ("failed", "rate limited")))
+        FakeScraper.fail = False
+        body = (await search(client, "hashtag", "broken")).json()
+        results.append(check("failed search isn't cached", body["cached"], False))
+
+        response = await search(client, "hashtag", "x", platform="snapchat")
+        results.append(check("unsupported platform -> 400", response.status_code, 400))
+        response = await client.get("/api/search/jobs/999999/results")
+        results.append(check("unknown job -> 404", response.status_code, 404))
+
+    main.YouTubeScraper = youtube_scraper
+    await async_engine.dispose()
+    return results
+
+
+def test_search_jobs() -> bool:
+    init_db()
+    results = asyncio.run(run_checks()) + save_checks()
+    passed = sum(results)
+    print(f"\n{passed}/{len(results)} search job checks passed")
+    return all(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if test_search_jobs() else 1)
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Checks the SQL profiler (sql_profiler.py): a query issued in a loop is reported as an N+1 suspect
+while the same lookup batched into one IN query isn't, both fed by the single cursor listener that
+also counts statements for the Prometheus histograms (metrics.instrument_engine), and the request
+middleware reports both.
+
+Usage:
+    python test_sql_profiler.py
+"""
+
+import asyncio
+import sys
+
+from testing import check, use_temp_database
+
+use_temp_database("sql_profiler_test")
+
+import httpx
+from prometheus_client import REGISTRY
+
+from database import SessionLocal, init_db, async_engine, Video
+import metrics
+import sql_profiler
+
+VIDEO_IDS = [f"profiled_{i}" for i in range(10)]
+
+
+def observed_queries(route: str) -> float:
+    return REGISTRY.get_sample_value("http_request_db_queries_sum", {"route": route}) or 0.0
+
+
+async def header_checks() -> list:
+    import main
+    before = observed_queries("/api/accounts")
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test") as client:
+        plain = await client.get("/api/accounts")
+        profiled = await client.get("/api/accounts", headers={"X-SQL-Profile": "1"})
+    await async_engine.dispose()
+    return [
+        check("no profile headers unless asked", "X-SQL-Query-Count" in plain.headers, False),
+        check("profiled request reports its queries",
+              (int(profiled.headers["X-SQL-Query-Count"]) > 0, profiled.headers["X-SQL-N-Plus-One"]), (True, "0")),
+        check("route histogram counts the same statements",
+              observed_queries("/api/accounts") - before, 2 * float(profiled.headers["X-SQL-Query-Count"])),
+    ]
+
+
+def test_sql_profiler() -> bool:
+    init_db()
+    import main  # Instruments both engines
+    results = []
+
+    db = SessionLocal()
+    db.add_all([Video(id=video_id, platform="tiktok", url=f"https://example.com/{video_id}", views=i)
+                for i, video_id in enumerate(VIDEO_IDS)])
+    db.commit()
+
+    profile = sql_profiler.start_profile("looped")
+    stats = metrics.start_request_stats()
+    for video_id in VIDEO_IDS:
+        db.query(Video).filter(Video.id == video_id).first()
+    suspects = profile.suspects()
+    results.append(check("looped query flagged as N+1",
+                         [(repeated.count, "WHERE videos.id = ?" in shape) for shape, repeated in suspects], [(10, True)]))
+    results.append(check("profiler and Prometheus stats count the same statements", profile.count, stats.count))
+
+    profile = sql_profiler.start_profile("batched")
+    db.query(Video).filter(Video.id.in_(VIDEO_IDS)).all()
+    results.append(check("batched query not flagged", (profile.count, profile.suspects()), (1, [])))
+    db.close()
+
+    results += asyncio.run(header_checks())
+
+    passed = sum(results)
+    print(f"\n{passed}/{len(results)} SQL profiler checks passed")
+    return all(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if test_sql_profiler() else 1)
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Checks the TikTokApi session pool (scrapers/tiktok_session_pool.py) with a fake TikTokApi:
+token spreading, parallel leases, recycling after errors / max uses / failed health checks,
+lazy retry of sessions that failed to open, and TikTokScraper leasing from the pool and
+recording scraper metrics for its searches.
+
+Usage:
+    python test_tiktok_session_pool.py
+"""
+
+import asyncio
+import sys
+import time
+
+from prometheus_client import REGISTRY
+
+from scrapers import tiktok_session_pool
+from scrapers.tiktok_session_pool import TikTokSessionPool
+from scrapers.tiktok_scraper import TikTokScraper
+from testing import check
+
+
+class FakePage:
+    def __init__(self):
+        self.broken = False
+
+    async def evaluate(self, script):
+        if self.broken:
+            raise RuntimeError("Target page, context or browser has been closed")
+        return 1
+
+
+class FakeSession:
+    def __init__(self, ms_token):
+        self.ms_token = ms_token
+        self.page = FakePage()
+
+
+class FakeVideo:
+    def __init__(self, video_id):
+        self.as_dict = {"id": video_id, "desc": "fake", "stats": {"playCount": 10}}
+
+
+class FakeSearch:
+    async def videos(self, term, count=30):
+        for i in range(2):
+            await asyncio.sleep(0.01)
+            if term == "broken" and i == 1:
+                raise ConnectionError("connection reset")
+            yield FakeVideo(f"{term}_{i}")
+
+
+class FakeApi:
+    created = []
+    fail_next = 0
+
+    def __init__(self):
+        self.sessions = []
+        self.closed = False
+        self.search = FakeSearch()
+        FakeApi.created.append(self)
+
+    async def create_sessions(self, ms_tokens=None, num_sessions=1, sleep_after=1):
+        await asyncio.sleep(0.01)
+        if FakeApi.fail_next:
+            FakeApi.fail_next -= 1
+            raise RuntimeError("browser failed to launch")
+        self.sessions = [FakeSession(ms_tokens[0] if ms_tokens else None) for _ in range(num_sessions)]
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.closed = True
+
+
+async def run_checks() -> list:
+    results = []
+    pool = TikTokSessionPool(ms_tokens=["tok_a", "tok_b"], size=3, api_factory=FakeApi, max_uses=3, sleep_after=0)
+    await pool.start()
+    await pool.ready()
+    results.append(check("sessions opened at start with tokens round-robin",
+                         sorted(api.sessions[0].ms_token for api in FakeApi.created), ["tok_a", "tok_a", "tok_b"]))
+
+    # Parallel leases: three at once, a fourth waits for one to be returned
+    leased = []
+
+    async def hold(seconds):
+        async with pool.lease() as api:
+            leased.append(api)
+            await asyncio.sleep(seconds)
+
+    started = time.monotonic()
+    await asyncio.gather(hold(0.2), hold(0.2), hold(0.2))
+    results.append(check("3 sessions leased in parallel",
+                         (len(set(map(id, leased))), time.monotonic() - started < 0.35), (3, True)))
+    try:
+        async with pool.lease():
+            async with pool.lease():
+                async with pool.lease():
+                    async with pool.lease(timeout=0.1):
+                        pass
+        results.append(check("lease beyond pool size waits", "no timeout", "timeout"))
+    except asyncio.TimeoutError:
+        results.append(check("lease beyond pool size waits", "timeout", "timeout"))
+
+    # An error inside the lease replaces that session (the timeout above just did so for three)
+    await pool.ready()
+    created = len(FakeApi.created)
+    try:
+        async with pool.lease() as api:
+            broken = api
+            raise RuntimeError("EmptyResponseException")
+    except RuntimeError:
+        pass
+    await pool.ready()
+    results.append(check("failed lease recycles its session", (broken.closed, len(FakeApi.created)), (True, created + 1)))
+
+    # max_uses: the fourth lease of a session is never the same object
+    for slot in pool._slots:
+        slot.uses = 0
+    apis = []
+    for _ in range(9):
+        async with pool.lease() as api:
+            apis.append(api)
+    await pool.ready()
+    results.append(check("sessions replaced after max uses", all(api.closed for api in apis), True))
+
+    # Idle session failing its health check is replaced before being leased
+    tiktok_session_pool.HEALTH_CHECK_IDLE_SECONDS = 0
+    for slot in pool._slots:
+        if slot.api:
+            slot.api.sessions[0].page.broken = True
+    async with pool.lease() as api:
+        results.append(check("unhealthy idle session replaced", api.sessions[0].page.broken, False))
+    tiktok_session_pool.HEALTH_CHECK_IDLE_SECONDS = 120
+
+    # TikTokScraper leases from the given pool and returns the session
+    async with TikTokScraper(pool=pool) as scraper:
+        results.append(check("scraper uses a pool session", scraper.api in [s.api for s in pool._slots], True))
+    results.append(check("scraper returns its session", pool._idle.qsize(), 3))
+
+    # Searches record one scraper request each, and a failed fetch as an error
+    labels = {"provider": "tiktokapi", "host": "www.tiktok.com"}
+    requests_before = REGISTRY.get_sample_value("scraper_request_duration_seconds_count", labels) or 0.0
+    errors_before = REGISTRY.get_sample_value("scraper_errors_total", {**labels, "reason": "ConnectionError"}) or 0.0
+    async with TikTokScraper(pool=pool) as scraper:
+        videos = await scraper.search_term("cats", limit=2)
+        try:
+            await scraper.search_term("broken", limit=2)
+        except ConnectionError:
+            pass
+    results.append(check("search results parsed", [v["id"] for v in videos], ["cats_0", "cats_1"]))
+    results.append(check("searches recorded", (
+        REGISTRY.get_sample_value("scraper_request_duration_seconds_count", labels) - requests_before,
+        REGISTRY.get_sample_value("scraper_errors_total", {**labels, "reason": "ConnectionError"}) - errors_before,
+    ), (2, 1)))
+
+    await pool.close()
+    results.append(check("close shuts every session", all(api.closed for api in FakeApi.created), True))
+
+    # A session that fails to open is retried on the next lease
+    FakeApi.fail_next = 1
+    lazy = TikTokSessionPool(ms_tokens=[], size=1, api_factory=FakeApi, sleep_after=0)
+    await lazy.start()
+    await lazy.ready()
+    results.append(check("failed open leaves slot without a session", lazy._slots[0].api, None))
+    async with lazy.lease() as api:
+        results.append(check("next lease opens it", bool(api.sessions), True))
+    await lazy.close()
+
+    disabled = TikTokSessionPool(size=0, api_factory=FakeApi)
+    await disabled.start()
+    results.append(check("size 0 leaves the pool disabled", disabled.started, False))
+
+    return results
+
+
+def test_tiktok_session_pool() -> bool:
+    results = asyncio.run(run_checks())
+    passed = sum(results)
+    print(f"\n{passed}/{len(results)} session pool checks passed")
+    return all(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if test_tiktok_session_pool() else 1)
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Checks the trending audio cache (trending_audio_store.py) with a fake scraper.
+
+- concurrent requests for a country share one refresh, and reads within the TTL don't scrape
+- refreshes upsert one row per (music_id, country, day) instead of inserting a new chart
+- rank history only grows when a rank or video count changes
+- a failed refresh keeps serving the previous chart and backs off
+
+Usage:
+    python test_trending_audio_store.py
+"""
+
+import asyncio
+import sys
+
+from testing import check, use_temp_database
+
+use_temp_database("trending_audio_test")
+
+from sqlalchemy import func, select
+
+from database import init_db, async_engine, AsyncSessionLocal, TrendingAudio, TrendingAudioRank
+from trending_audio_store import TrendingAudioStore
+
+
+class FakeScraper:
+    calls = 0
+    chart = []
+
+    def __init__(self, country: str):
+        self.country = country
+
+    async def get_trending_audio(self, limit: int = 50):
+        FakeScraper.calls += 1
+        await asyncio.sleep(0.05)
+        return [dict(audio, country=self.country) for audio in FakeScraper.chart[:limit]]
+
+
+def audio(music_id: str, total_videos: int) -> dict:
+    return {"music_id": music_id, "platform": "tiktok", "title": f"Sound {music_id}", "author": "someone",
+            "play_url": f"https://example.com/{music_id}.mp3", "total_videos": total_videos}
+
+
+async def count(db, model) -> int:
+    return (await db.execute(select(func.count()).select_from(model))).scalar()
+
+
+async def run_checks() -> list:
+    init_db()
+    store = TrendingAudioStore(scraper_factory=FakeScraper)
+    results = []
+
+    async with AsyncSessionLocal() as db:
+        FakeScraper.chart = [audio("a", 100), audio("b", 50), audio("c", 10)]
+
+        async def request():
+            async with AsyncSessionLocal() as session:
+                await store.ensure_fresh(session, "US")
+                return await store.latest_chart(session, "US", 2)
+
+        charts = await asyncio.gather(*(request() for _ in range(10)))
+        results.append(check("10 concurrent requests -> 1 scrape", FakeScraper.calls, 1))
+        results.append(check("chart served in rank order", [a.music_id for a in charts[0]], ["a", "b"]))
+
+        await store.ensure_fresh(db, "US")
+        results.append(check("read within TTL doesn't scrape", FakeScraper.calls, 1))
+
+        # Same chart again: rows are updated in place, no new rank history
+        await store.refresh("US")
+        results.append(check("refresh upserts instead of inserting", await count(db, TrendingAudio), 3))
+        results.append(check("unchanged chart adds no rank history", await count(db, TrendingAudioRank), 3))
+
+        # b overtakes a, c drops off the chart
+        FakeScraper.chart = [audio("b", 80), audio("a", 100)]
+        await store.refresh("US")
+        chart = await store.latest_chart(db, "US", 10)
+        results.append(check("new ranks served", [(a.music_id, a.rank) for a in chart], [("b", 1), ("a", 2)]))
+        results.append(check("rows kept per (music_id, country, day)", await count(db, TrendingAudio), 3))
+        history = await store.rank_history(db, "c", "US", chart[0].trending_date)
+        results.append(check("drop-off recorded in history", [h.rank for h in history], [3, None]))
+        results.append(check("only changes recorded", await count(db, TrendingAudioRank), 6))
+
+        # Failed refresh: previous chart still served, no retry within the backoff
+        FakeScraper.chart = []
+        calls = FakeScraper.calls
+        await store.refresh("US")
+        await store.ensure_fresh(db, "US")
+        results.append(check("failed refresh isn't retried immediately", FakeScraper.calls, calls + 1))
+        chart = await store.latest_chart(db, "US", 10)
+        results.append(check("previous chart served after failure", [a.music_id for a in chart], ["b", "a"]))
+
+        # A new store (restart) picks up the last refresh time from the database
+        restarted = TrendingAudioStore(scraper_factory=FakeScraper)
+        calls = FakeScraper.calls
+        await restarted.ensure_fresh(db, "US")
+        results.append(check("restart doesn't rescrape a fresh country", FakeScraper.calls, calls))
+
+    await async_engine.dispose()
+    return results
+
+
+def test_trending_audio_store() -> bool:
+    results = asyncio.run(run_checks())
+    print(f"\n{sum(results)}/{len(results)} trending audio checks passed")
+    return all(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if test_trending_audio_store() else 1)
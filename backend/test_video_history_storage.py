@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Checks the partitioned video_history table (video_history_storage.py): snapshots outside the
+monthly partitions land in the DEFAULT partition instead of failing, and creating their month
+later moves them into it.
+
+PostgreSQL only - partitioning isn't used on SQLite.
+
+Usage:
+    DATABASE_URL=postgresql://... python test_video_history_storage.py
+"""
+
+import sys
+from datetime import datetime
+
+from sqlalchemy import text
+
+from database import SessionLocal, engine, init_db, VideoHistory
+from testing import check
+from video_history_storage import DEFAULT_PARTITION, ensure_video_history_partitions, _partition_name
+
+# Well before any partition init_db() creates
+OLD_SNAPSHOT = datetime(2020, 3, 15)
+
+
+def stored_in(video_id: str) -> list:
+    with engine.connect() as conn:
+        return [row[0] for row in conn.execute(
+            text("SELECT tableoid::regclass::text FROM video_history WHERE video_id = :video_id"),
+            {"video_id": video_id}
+        )]
+
+
+def test_video_history_storage() -> bool:
+    if engine.dialect.name != "postgresql":
+        print("⚠️  video_history partitioning tests only run against PostgreSQL - skipping")
+        return True
+
+    init_db()
+    results = []
+
+    db = SessionLocal()
+    db.add(VideoHistory(video_id="partition_test", platform="tiktok", views=1, likes=0, comments=0,
+                        shares=0, saves=0, snapshot_date=OLD_SNAPSHOT))
+    db.commit()
+    db.close()
+    results.append(check("snapshot outside the partitions kept in the default one",
+                         stored_in("partition_test"), [DEFAULT_PARTITION]))
+
+    created = ensure_video_history_partitions(engine, since=OLD_SNAPSHOT)
+    results.append(check("creating its month moves it out of the default partition",
+                         (created > 0, stored_in("partition_test")), (True, [_partition_name(OLD_SNAPSHOT)])))
+
+    created = ensure_video_history_partitions(engine, since=OLD_SNAPSHOT)
+    results.append(check("ensuring again is a no-op",
+                         (created, stored_in("partition_test")), (0, [_partition_name(OLD_SNAPSHOT)])))
+
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM video_history WHERE video_id = 'partition_test'"))
+
+    passed = sum(results)
+    print(f"\n{passed}/{len(results)} video_history storage checks passed")
+    return all(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if test_video_history_storage() else 1)
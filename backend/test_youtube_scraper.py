@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Checks YouTube search paging and threading (scrapers/youtube_scraper.py) with a fake,
+blocking youtube-search-python client: pages up to the limit, duplicates dropped, the event
+loop keeps running during searches, searches run in parallel on the thread pool, page
+failures, and the scraper metrics recorded for each page request.
+
+Usage:
+    python test_youtube_scraper.py
+"""
+
+import asyncio
+import sys
+import time
+
+from prometheus_client import REGISTRY
+
+from scrapers import youtube_scraper
+from scrapers.youtube_scraper import YouTubeScraper
+from testing import check
+
+PAGE_SIZE = 20
+REQUEST_SECONDS = 0.1
+METRIC_LABELS = {"provider": "youtube", "host": "www.youtube.com"}
+
+
+def sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, {**METRIC_LABELS, **labels}) or 0.0
+
+
+class FakeSearch:
+    """Blocking like the real client: the constructor fetches page one, next() the following page"""
+    pages = 4
+    fail_page = None
+
+    def __init__(self, query, limit=20, timeout=None):
+        self.query = query
+        self.page = 0
+        self._fetch()
+
+    def _fetch(self):
+        time.sleep(REQUEST_SECONDS)
+        if self.page == FakeSearch.fail_page:
+            raise ConnectionError("connection reset")
+        # Overlapping pages: the first video of each page repeats the last of the page before
+        start = self.page * (PAGE_SIZE - 1)
+        self.components = [
+            {"type": "video", "id": f"{self.query}_{i}", "title": f"video {i}", "link": f"https://youtu.be/{i}",
+             "viewCount": {"text": "1,234 views"}, "duration": "1:30", "channel": {"name": "chan", "id": "c1"}}
+            for i in range(start, start + PAGE_SIZE)
+        ]
+
+    def result(self):
+        return {"result": self.components}
+
+    def next(self):
+        if self.page + 1 >= FakeSearch.pages:
+            return False
+        self.page += 1
+        self._fetch()
+        return True
+
+
+async def run_checks() -> list:
+    youtube_scraper.VideosSearch = FakeSearch
+    youtube_scraper.Hashtag = lambda query, limit=20, timeout=None: FakeSearch(query.lstrip("#"), limit, timeout)
+    scraper = YouTubeScraper()
+    results = []
+
+    requests_before = sample("scraper_request_duration_seconds_count")
+    videos = await scraper.search_term("cats", limit=50)
+    results.append(check("page requests recorded", sample("scraper_request_duration_seconds_count") - requests_before, 3))
+    ids = [v["id"] for v in videos]
+    results.append(check("pages fetched up to the limit", (len(ids), len(set(ids))), (50, 50)))
+    results.append(check("results in page order", ids[:3], ["cats_0", "cats_1", "cats_2"]))
+    results.append(check("videos parsed", (videos[0]["views"], videos[0]["duration"]), (1234, 90)))
+
+    videos = await scraper.search_hashtag("dogs", limit=500)
+    results.append(check("stops when results run out", len(videos), FakeSearch.pages * (PAGE_SIZE - 1) + 1))
+
+    # The loop keeps ticking while a blocking search runs
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    tick_task = asyncio.create_task(ticker())
+    await scraper.search_term("birds", limit=60)
+    tick_task.cancel()
+    results.append(check("event loop not blocked", ticks >= 15, True))
+
+    # Searches share the thread pool and run side by side
+    started = time.monotonic()
+    await asyncio.gather(*(scraper.search_term(f"q{i}", limit=20) for i in range(youtube_scraper.YOUTUBE_SEARCH_THREADS)))
+    results.append(check("concurrent searches run in parallel", time.monotonic() - started < 2 * REQUEST_SECONDS, True))
+
+    errors_before = sample("scraper_errors_total", reason="ConnectionError")
+    FakeSearch.fail_page = 2
+    videos = await scraper.search_term("fish", limit=100)
+    results.append(check("failed later page returns earlier pages", len(videos), 2 * (PAGE_SIZE - 1) + 1))
+
+    FakeSearch.fail_page = 0
+    try:
+        await scraper.search_term("fish", limit=10)
+        results.append(check("failed first page raises", "no error", "error"))
+    except ConnectionError:
+        results.append(check("failed first page raises", "error", "error"))
+    FakeSearch.fail_page = None
+    results.append(check("failed pages recorded as errors",
+                         sample("scraper_errors_total", reason="ConnectionError") - errors_before, 2))
+
+    return results
+
+
+def test_youtube_scraper() -> bool:
+    results = asyncio.run(run_checks())
+    passed = sum(results)
+    print(f"\n{passed}/{len(results)} YouTube scraper checks passed")
+    return all(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if test_youtube_scraper() else 1)
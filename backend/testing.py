@@ -0,0 +1,53 @@
+"""
+Shared scaffolding for the test_*.py scripts: the check() helper and a throwaway SQLite database.
+
+A script calls use_temp_database() before anything imports database.py, so it runs against a new
+file. Under pytest every script shares one process (and one engine): conftest.py points DATABASE_URL
+at the temporary file before collection and calls reset_temp_database() before each script, so
+each one still starts from an empty database.
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+
+_temp_path = None
+
+
+def check(name: str, actual, expected) -> bool:
+    ok = actual == expected
+    print(f"{'✅' if ok else '❌'} {name}")
+    if not ok:
+        print(f"   expected: {expected}\n   actual:   {actual}")
+    return ok
+
+
+def use_temp_database(name: str) -> str:
+    """Point DATABASE_URL at a throwaway SQLite file - call before importing database.py"""
+    global _temp_path
+    if _temp_path is None:
+        if "database" in sys.modules:
+            raise RuntimeError("database.py was imported before use_temp_database()")
+        _temp_path = os.path.join(tempfile.mkdtemp(), f"{name}.db")
+        os.environ["DATABASE_URL"] = f"sqlite:///{_temp_path}"
+    return _temp_path
+
+
+def reset_temp_database():
+    """Drop the temporary database and the in-memory stores built from it (the next script starts empty)"""
+    import database
+
+    if _temp_path is None or database.engine.url.database != _temp_path:
+        raise RuntimeError("Refusing to reset a database that use_temp_database() didn't create")
+
+    database.engine.dispose()
+    asyncio.run(database.async_engine.dispose())
+    for suffix in ("", "-journal", "-wal", "-shm"):
+        if os.path.exists(_temp_path + suffix):
+            os.remove(_temp_path + suffix)
+
+    for module_name in ("analytics_engine", "trending_audio_store"):
+        module = sys.modules.get(module_name)
+        if module is not None:
+            module.store = type(module.store)()
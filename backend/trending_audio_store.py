@@ -0,0 +1,213 @@
+"""
+Trending audio cache: one row per (music_id, country, trending_date) plus a compact rank history.
+
+GET /api/trending/audio reads charts from the database. A country's chart is refreshed from
+TikTok when its last refresh is older than the country's TTL - on a schedule for
+TRENDING_AUDIO_COUNTRIES (and every country requested since startup), on demand otherwise.
+Concurrent requests for the same country share a single refresh. A failed refresh keeps the
+previous chart and isn't retried for TRENDING_AUDIO_RETRY_MINUTES, so page views don't turn
+into external calls while TikTok is unreachable.
+"""
+
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import SessionLocal, TrendingAudio, TrendingAudioRank
+from scrapers.trending_audio_scraper import TrendingAudioScraper
+
+logger = logging.getLogger(__name__)
+
+TRENDING_AUDIO_TTL_MINUTES = int(os.getenv("TRENDING_AUDIO_TTL_MINUTES", "60"))
+TRENDING_AUDIO_RETRY_MINUTES = int(os.getenv("TRENDING_AUDIO_RETRY_MINUTES", "5"))
+TRENDING_AUDIO_COUNTRIES = [c.strip().upper() for c in os.getenv("TRENDING_AUDIO_COUNTRIES", "US").split(",") if c.strip()]
+CHART_SIZE = 100  # Fetch the full chart once so any ?limit= can be served from it
+
+# Audio fields taken from the scraper - trending_date / rank / scraped_at are set here
+AUDIO_FIELDS = ("platform", "title", "author", "play_url", "thumbnail", "total_videos", "total_views", "sample_video_ids")
+
+
+def parse_country_ttls(value: str) -> Dict[str, timedelta]:
+    """"US=30,IN=120" -> per-country TTL overrides in minutes"""
+    ttls = {}
+    for entry in value.split(","):
+        if "=" in entry:
+            country, minutes = entry.split("=", 1)
+            ttls[country.strip().upper()] = timedelta(minutes=int(minutes))
+    return ttls
+
+
+TRENDING_AUDIO_COUNTRY_TTL = parse_country_ttls(os.getenv("TRENDING_AUDIO_COUNTRY_TTL", ""))
+
+
+def chart_day(moment: datetime) -> datetime:
+    return datetime(moment.year, moment.month, moment.day)
+
+
+class TrendingAudioStore:
+    def __init__(self, session_factory=SessionLocal, scraper_factory=TrendingAudioScraper):
+        self._session_factory = session_factory
+        self._scraper_factory = scraper_factory
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._refreshed_at: Dict[str, datetime] = {}  # Last successful refresh per country
+        self._failed_at: Dict[str, datetime] = {}
+        self.countries = set(TRENDING_AUDIO_COUNTRIES)
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def ttl(self, country: str) -> timedelta:
+        return TRENDING_AUDIO_COUNTRY_TTL.get(country, timedelta(minutes=TRENDING_AUDIO_TTL_MINUTES))
+
+    def is_fresh(self, country: str, now: Optional[datetime] = None) -> bool:
+        now = now or datetime.utcnow()
+        refreshed = self._refreshed_at.get(country)
+        if refreshed and now - refreshed < self.ttl(country):
+            return True
+        failed = self._failed_at.get(country)
+        return bool(failed and now - failed < timedelta(minutes=TRENDING_AUDIO_RETRY_MINUTES))
+
+    async def ensure_fresh(self, db: AsyncSession, country: str):
+        """Refresh the country's chart if its TTL has expired (seeds the last refresh time from the DB)"""
+        if country not in self._refreshed_at:
+            last = (await db.execute(
+                select(func.max(TrendingAudio.scraped_at)).filter(TrendingAudio.country == country)
+            )).scalar()
+            if last:
+                self._refreshed_at.setdefault(country, last)
+
+        if not self.is_fresh(country):
+            await self.refresh(country)
+
+    async def refresh(self, country: str) -> int:
+        """Scrape and save the country's chart; concurrent callers wait on the same refresh"""
+        self.loop = asyncio.get_running_loop()
+        task = self._inflight.get(country)
+        if task is None:
+            task = asyncio.ensure_future(self._refresh(country))
+            self._inflight[country] = task
+            task.add_done_callback(lambda _: self._inflight.pop(country, None))
+        # shield: a client disconnecting mid-refresh shouldn't cancel it for everyone else
+        return await asyncio.shield(task)
+
+    async def _refresh(self, country: str) -> int:
+        try:
+            chart = await self._scraper_factory(country=country).get_trending_audio(limit=CHART_SIZE)
+            if not chart:
+                raise ValueError("scraper returned no trending audio")
+            saved = await asyncio.to_thread(self.save_chart, country, chart)
+        except Exception as e:
+            logger.error(f"Trending audio refresh failed for {country}: {str(e)}")
+            self._failed_at[country] = datetime.utcnow()
+            return 0
+
+        self._refreshed_at[country] = datetime.utcnow()
+        self._failed_at.pop(country, None)
+        self.countries.add(country)
+        logger.info(f"Refreshed trending audio for {country}: {saved} audios")
+        return saved
+
+    async def refresh_due(self):
+        """Refresh every tracked country whose TTL has expired"""
+        due = [country for country in sorted(self.countries) if not self.is_fresh(country)]
+        await asyncio.gather(*(self.refresh(country) for country in due))
+
+    def run_scheduled_refresh(self):
+        """Scheduler-thread entry point: run refresh_due on the server loop so it shares in-flight refreshes"""
+        if self.loop is None or self.loop.is_closed():
+            return
+        asyncio.run_coroutine_threadsafe(self.refresh_due(), self.loop).result()
+
+    # ============ STORAGE ============
+
+    def save_chart(self, country: str, chart: List[dict]) -> int:
+        """Upsert today's chart for a country and record rank changes. Returns the number of audios saved."""
+        try:
+            return self._save_chart(country, chart)
+        except IntegrityError:
+            # Another worker inserted the same day's rows first - the retry updates them
+            return self._save_chart(country, chart)
+
+    def _save_chart(self, country: str, chart: List[dict]) -> int:
+        now = datetime.utcnow()
+        day = chart_day(now)
+
+        # Ranks come from chart order; an audio listed twice keeps its best position
+        ranked = {}
+        for audio_data in chart:
+            if audio_data.get("music_id"):
+                ranked.setdefault(audio_data["music_id"], audio_data)
+
+        db = self._session_factory()
+        try:
+            existing = {
+                audio.music_id: audio
+                for audio in db.query(TrendingAudio).filter(
+                    TrendingAudio.country == country,
+                    TrendingAudio.trending_date == day
+                ).all()
+            }
+
+            for rank, (music_id, audio_data) in enumerate(ranked.items(), start=1):
+                audio = existing.get(music_id)
+                if audio is None:
+                    audio = TrendingAudio(music_id=music_id, country=country, trending_date=day)
+                    db.add(audio)
+                moved = audio.rank != rank or audio.total_videos != audio_data.get("total_videos")
+
+                # Always update metadata - play URLs are signed and expire
+                for field in AUDIO_FIELDS:
+                    if audio_data.get(field) is not None:
+                        setattr(audio, field, audio_data[field])
+                audio.rank = rank
+                audio.scraped_at = now
+
+                if moved:
+                    db.add(TrendingAudioRank(music_id=music_id, country=country, rank=rank,
+                                             total_videos=audio.total_videos, recorded_at=now))
+
+            # Audios that fell off today's chart keep their row but lose their rank
+            for music_id, audio in existing.items():
+                if music_id not in ranked and audio.rank is not None:
+                    audio.rank = None
+                    db.add(TrendingAudioRank(music_id=music_id, country=country, rank=None,
+                                             total_videos=audio.total_videos, recorded_at=now))
+
+            db.commit()
+            return len(ranked)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    @staticmethod
+    async def latest_chart(db: AsyncSession, country: str, limit: int) -> List[TrendingAudio]:
+        """The most recent day's chart for a country, in rank order"""
+        latest_day = select(func.max(TrendingAudio.trending_date)).filter(
+            TrendingAudio.country == country
+        ).scalar_subquery()
+        return (await db.execute(
+            select(TrendingAudio).filter(
+                TrendingAudio.country == country,
+                TrendingAudio.trending_date == latest_day,
+                TrendingAudio.rank.isnot(None)
+            ).order_by(TrendingAudio.rank).limit(limit)
+        )).scalars().all()
+
+    @staticmethod
+    async def rank_history(db: AsyncSession, music_id: str, country: str, since: datetime) -> List[TrendingAudioRank]:
+        return (await db.execute(
+            select(TrendingAudioRank).filter(
+                TrendingAudioRank.music_id == music_id,
+                TrendingAudioRank.country == country,
+                TrendingAudioRank.recorded_at >= since
+            ).order_by(TrendingAudioRank.recorded_at)
+        )).scalars().all()
+
+
+store = TrendingAudioStore()
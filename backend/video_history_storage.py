@@ -0,0 +1,327 @@
+"""
+VideoHistory storage management
+- Monthly range partitioning of video_history on PostgreSQL (PARTITION BY RANGE (snapshot_date))
+- Automatic creation of upcoming monthly partitions, plus a DEFAULT partition so snapshots outside
+  them (backfills, clock skew, a missed maintenance run) are still stored. Creating a month
+  moves its rows out of the default partition.
+- Retention policy: daily snapshots older than N days are downsampled into one row per video per week
+
+Run directly to convert an existing (unpartitioned) video_history table:
+    python video_history_storage.py migrate
+    python video_history_storage.py maintain
+"""
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+from typing import Optional
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+# How many months of partitions to keep created ahead of the current one
+PARTITION_MONTHS_AHEAD = int(os.getenv("VIDEO_HISTORY_PARTITION_MONTHS_AHEAD", "3"))
+
+# Daily snapshots older than this are collapsed into weekly rows
+VIDEO_HISTORY_RETENTION_DAYS = int(os.getenv("VIDEO_HISTORY_RETENTION_DAYS", "90"))
+
+PARTITIONED_TABLE_SQL = """
+    CREATE TABLE video_history (
+        id INTEGER NOT NULL DEFAULT nextval('video_history_id_seq'),
+        video_id VARCHAR NOT NULL,
+        platform VARCHAR NOT NULL,
+        views BIGINT DEFAULT 0,
+        likes BIGINT DEFAULT 0,
+        comments BIGINT DEFAULT 0,
+        shares BIGINT DEFAULT 0,
+        saves BIGINT DEFAULT 0,
+        snapshot_date TIMESTAMP NOT NULL,
+        created_at TIMESTAMP,
+        PRIMARY KEY (id, snapshot_date)
+    ) PARTITION BY RANGE (snapshot_date)
+"""
+
+# Same index names as the VideoHistory model so create_all() sees them as existing
+PARTITIONED_INDEXES_SQL = [
+    "CREATE INDEX IF NOT EXISTS ix_video_history_video_id ON video_history (video_id)",
+    "CREATE INDEX IF NOT EXISTS ix_video_history_snapshot_date ON video_history (snapshot_date)",
+    "CREATE INDEX IF NOT EXISTS idx_video_snapshot ON video_history (video_id, platform, snapshot_date)",
+]
+
+
+def is_postgres(engine: Engine) -> bool:
+    return engine.dialect.name == "postgresql"
+
+
+def _month_start(value: datetime) -> datetime:
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _next_month(value: datetime) -> datetime:
+    return (value.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def _partition_name(month: datetime) -> str:
+    return f"video_history_y{month.year}m{month.month:02d}"
+
+
+DEFAULT_PARTITION = "video_history_default"
+
+
+def is_video_history_partitioned(conn) -> bool:
+    """Check whether video_history is a partitioned (parent) table"""
+    result = conn.execute(text("""
+        SELECT 1
+        FROM pg_partitioned_table pt
+        JOIN pg_class c ON c.oid = pt.partrelid
+        WHERE c.relname = 'video_history'
+    """))
+    return result.fetchone() is not None
+
+
+def _create_default_partition(conn):
+    conn.execute(text(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF video_history DEFAULT"))
+
+
+def _create_month_partitions(conn, first_month: datetime, last_month: datetime) -> int:
+    """Create the missing monthly partitions in [first_month, last_month] (inclusive). Returns how many."""
+    month = _month_start(first_month)
+    last_month = _month_start(last_month)
+    created = 0
+    has_default = conn.execute(text(f"SELECT to_regclass('{DEFAULT_PARTITION}')")).scalar() is not None
+
+    while month <= last_month:
+        next_month = _next_month(month)
+        name = _partition_name(month)
+        if conn.execute(text(f"SELECT to_regclass('{name}')")).scalar() is not None:
+            month = next_month
+            continue
+        bounds = {"start": month, "end": next_month}
+        in_range = "snapshot_date >= :start AND snapshot_date < :end"
+
+        # A new partition can't be created while the default one holds rows in its range -
+        # park them in a temporary table and route them back through the parent afterwards
+        moved = 0
+        if has_default:
+            conn.execute(text(f"""
+                CREATE TEMP TABLE video_history_moved ON COMMIT DROP AS
+                SELECT * FROM {DEFAULT_PARTITION} WHERE {in_range}
+            """), bounds)
+            moved = conn.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE {in_range}"), bounds).rowcount
+
+        conn.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS {name}
+            PARTITION OF video_history
+            FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{next_month:%Y-%m-%d}')
+        """))
+
+        if has_default:
+            conn.execute(text("INSERT INTO video_history SELECT * FROM video_history_moved"))
+            conn.execute(text("DROP TABLE video_history_moved"))
+            if moved:
+                logger.info(f"Moved {moved} snapshots from {DEFAULT_PARTITION} into {name}")
+        created += 1
+        month = next_month
+
+    return created
+
+
+def create_partitioned_video_history(engine: Engine) -> bool:
+    """
+    Create video_history as a partitioned table on a fresh PostgreSQL database.
+    Called from init_db() before create_all(), which then skips the existing table.
+    Returns True if the table was created here.
+    """
+    if not is_postgres(engine):
+        return False
+
+    with engine.begin() as conn:
+        exists = conn.execute(text("SELECT to_regclass('video_history')")).scalar()
+        if exists:
+            return False
+
+        conn.execute(text("CREATE SEQUENCE IF NOT EXISTS video_history_id_seq"))
+        conn.execute(text(PARTITIONED_TABLE_SQL))
+        conn.execute(text("ALTER SEQUENCE video_history_id_seq OWNED BY video_history.id"))
+        for index_sql in PARTITIONED_INDEXES_SQL:
+            conn.execute(text(index_sql))
+
+        now = datetime.utcnow()
+        month = _month_start(now)
+        for _ in range(PARTITION_MONTHS_AHEAD):
+            month = _next_month(month)
+        _create_month_partitions(conn, now, month)
+        _create_default_partition(conn)
+
+    logger.info("Created partitioned video_history table")
+    return True
+
+
+def ensure_video_history_partitions(engine: Engine, months_ahead: int = PARTITION_MONTHS_AHEAD,
+                                    since: Optional[datetime] = None) -> int:
+    """
+    Make sure partitions exist for the current month and the next `months_ahead` months, and
+    the DEFAULT partition for anything outside them.
+    Pass `since` to also cover earlier months (e.g. before backfilling historical snapshots).
+    Returns the number of partitions created.
+    """
+    if not is_postgres(engine):
+        return 0
+
+    with engine.begin() as conn:
+        if not is_video_history_partitioned(conn):
+            return 0
+
+        now = datetime.utcnow()
+        last_month = _month_start(now)
+        for _ in range(months_ahead):
+            last_month = _next_month(last_month)
+
+        created = _create_month_partitions(conn, min(since, now) if since else now, last_month)
+        _create_default_partition(conn)
+        return created
+
+
+def migrate_video_history_to_partitions(engine: Engine):
+    """
+    Convert an existing unpartitioned video_history table into a monthly partitioned one.
+    Runs in a single transaction: rename old table, create partitioned parent, create partitions
+    covering all existing data, copy rows, drop the old table and recreate indexes.
+    """
+    if not is_postgres(engine):
+        print("⚠️  Partitioning is only supported on PostgreSQL - nothing to do")
+        return
+
+    with engine.begin() as conn:
+        if is_video_history_partitioned(conn):
+            print("✅ video_history is already partitioned!")
+            return
+
+        print("🔄 Converting video_history to monthly partitions...")
+
+        bounds = conn.execute(text("SELECT MIN(snapshot_date), MAX(snapshot_date), COUNT(*) FROM video_history")).fetchone()
+        min_date, max_date, row_count = bounds
+        now = datetime.utcnow()
+        min_date = min_date or now
+        max_date = max(max_date or now, now)
+        for _ in range(PARTITION_MONTHS_AHEAD):
+            max_date = _next_month(_month_start(max_date))
+
+        # Keep the id sequence alive when the old table is dropped
+        conn.execute(text("ALTER TABLE video_history RENAME TO video_history_unpartitioned"))
+        conn.execute(text("ALTER SEQUENCE video_history_id_seq OWNED BY NONE"))
+
+        conn.execute(text(PARTITIONED_TABLE_SQL))
+        partitions = _create_month_partitions(conn, min_date, max_date)
+        _create_default_partition(conn)
+
+        conn.execute(text("""
+            INSERT INTO video_history (
+                id, video_id, platform, views, likes, comments, shares, saves, snapshot_date, created_at
+            )
+            SELECT
+                id, video_id, platform, views, likes, comments, shares, saves, snapshot_date, created_at
+            FROM video_history_unpartitioned
+        """))
+
+        conn.execute(text("DROP TABLE video_history_unpartitioned"))
+        conn.execute(text("ALTER SEQUENCE video_history_id_seq OWNED BY video_history.id"))
+        for index_sql in PARTITIONED_INDEXES_SQL:
+            conn.execute(text(index_sql))
+
+    print(f"✅ Moved {row_count:,} snapshots into {partitions} monthly partitions")
+
+
+def _week_start_sql(dialect_name: str) -> str:
+    """SQL expression bucketing snapshot_date to the start (Monday) of its week"""
+    if dialect_name == "postgresql":
+        return "date_trunc('week', snapshot_date)"
+    # SQLite: move forward to Sunday, then back 6 days to Monday
+    return "date(snapshot_date, 'weekday 0', '-6 days')"
+
+
+def downsample_video_history(db: Session, older_than_days: int = VIDEO_HISTORY_RETENTION_DAYS) -> int:
+    """
+    Collapse daily snapshots older than `older_than_days` into one row per video per week.
+    The latest snapshot of each week is kept (it holds the week's closing totals) - growth is
+    derived from consecutive snapshots at read time, so it spreads over the week (growth.py).
+    A video's first snapshot is kept too, as the baseline for its first week's growth.
+    Weeks that already have a single row are left alone, so running this repeatedly is cheap
+    and idempotent.
+    Returns the number of deleted rows.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    # Align to a week boundary so a week is never split across the cutoff
+    cutoff = (cutoff - timedelta(days=cutoff.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
+
+    week_start = _week_start_sql(db.get_bind().dialect.name)
+    ranked = f"""
+        SELECT
+            id,
+            ROW_NUMBER() OVER (
+                PARTITION BY video_id, platform, {week_start}
+                ORDER BY snapshot_date DESC, id DESC
+            ) AS rn,
+            ROW_NUMBER() OVER (PARTITION BY video_id, platform ORDER BY snapshot_date, id) AS first_rn
+        FROM video_history
+        WHERE snapshot_date < :cutoff
+    """
+
+    result = db.execute(text(f"""
+        DELETE FROM video_history
+        WHERE snapshot_date < :cutoff
+          AND id IN (SELECT ranked.id FROM ({ranked}) AS ranked WHERE ranked.rn > 1 AND ranked.first_rn > 1)
+    """), {"cutoff": cutoff})
+
+    db.commit()
+    deleted = result.rowcount or 0
+    logger.info(f"Downsampled video_history before {cutoff.date()}: removed {deleted} daily rows")
+    return deleted
+
+
+def run_video_history_maintenance():
+    """Scheduled job: create upcoming partitions and apply the retention policy"""
+    from database import SessionLocal, engine
+    import metrics
+
+    db = SessionLocal()
+    started = time.perf_counter()
+    succeeded = False
+    try:
+        created = ensure_video_history_partitions(engine)
+        if created:
+            logger.info(f"Created {created} video_history partitions")
+        downsample_video_history(db)
+        succeeded = True
+    except Exception as e:
+        logger.error(f"Error in video_history maintenance: {str(e)}")
+        db.rollback()
+    finally:
+        db.close()
+        metrics.observe_job("video_history_maintenance", time.perf_counter() - started, succeeded)
+
+
+if __name__ == "__main__":
+    import sys
+    from database import engine
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "migrate"
+
+    try:
+        if command == "migrate":
+            migrate_video_history_to_partitions(engine)
+            ensure_video_history_partitions(engine)
+        elif command == "maintain":
+            run_video_history_maintenance()
+            print("✅ video_history maintenance completed")
+        else:
+            print("Usage: python video_history_storage.py [migrate|maintain]")
+            sys.exit(1)
+        print("\n🎉 Done!")
+    except Exception as e:
+        print(f"\n❌ Failed: {e}")
+        import traceback
+        traceback.print_exc()
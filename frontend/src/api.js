@@ -9,22 +9,38 @@ const api = axios.create({
   },
 });
 
-export const searchHashtag = async (query, platform = 'tiktok', limit = 50) => {
-  const response = await api.post('/api/search/hashtag', {
+const SEARCH_POLL_INTERVAL_MS = 1000;
+
+// Searches run as background jobs - wait for the job, then fetch its results
+const runSearch = async (path, query, platform, limit) => {
+  const response = await api.post(path, {
     query,
     platform,
     limit,
   });
-  return response.data;
+  const jobId = response.data.job_id;
+
+  let job = response.data;
+  while (job.status !== 'completed') {
+    if (job.status === 'failed') {
+      throw new Error(job.error_message || 'Search failed');
+    }
+    await new Promise(resolve => setTimeout(resolve, SEARCH_POLL_INTERVAL_MS));
+    job = (await api.get(`/api/search/jobs/${jobId}`)).data;
+  }
+
+  const results = await api.get(`/api/search/jobs/${jobId}/results`, {
+    params: { limit },
+  });
+  return results.data.videos;
+};
+
+export const searchHashtag = async (query, platform = 'tiktok', limit = 50) => {
+  return runSearch('/api/search/hashtag', query, platform, limit);
 };
 
 export const searchTerm = async (query, platform = 'tiktok', limit = 50) => {
-  const response = await api.post('/api/search/term', {
-    query,
-    platform,
-    limit,
-  });
-  return response.data;
+  return runSearch('/api/search/term', query, platform, limit);
 };
 
 export const getTrendingAudio = async (country = 'US', limit = 50) => {
@@ -210,8 +210,9 @@ function AnalyticsDashboard() {
     return 7; // Default
   }, [dateFilter, customDateFrom, customDateTo]);
 
-  const fetchAllData = useCallback(async () => {
-    setLoading(true);
+  const fetchAllData = useCallback(async ({ silent = false } = {}) => {
+    // Background refreshes (data_version events) keep the current panels on screen
+    if (!silent) setLoading(true);
     try {
       const days = getDaysForFilter();
 
@@ -270,7 +271,7 @@ function AnalyticsDashboard() {
     } catch (error) {
       console.error('Error fetching analytics:', error);
     } finally {
-      setLoading(false);
+      if (!silent) setLoading(false);
     }
   }, [metricType, selectedPlatform, activeCollectionId, displayedCount, getDaysForFilter]);
 
@@ -278,6 +279,25 @@ function AnalyticsDashboard() {
     fetchAllData();
   }, [fetchAllData]);
 
+  // Refetch when the backend reports new data (scrapes, daily refresh) instead of on a timer
+  const dataVersionRef = React.useRef(null);
+
+  useEffect(() => {
+    if (typeof EventSource === 'undefined') return undefined;
+
+    const source = new EventSource(`${API_URL}/api/events`);
+    source.addEventListener('data_version', (event) => {
+      const { version } = JSON.parse(event.data);
+      // The first event on each (re)connect is the current version - only refetch on a change
+      if (dataVersionRef.current !== null && dataVersionRef.current !== version) {
+        fetchAllData({ silent: true });
+      }
+      dataVersionRef.current = version;
+    });
+
+    return () => source.close();
+  }, [fetchAllData]);
+
   // Lazy load Mixpanel data separately (cached for 1 hour on backend)
   const mixpanelFetchedRef = React.useRef(false);
 
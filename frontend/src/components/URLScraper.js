@@ -4,12 +4,21 @@ import axios from 'axios';
 import VideoCard from './VideoCard';
 
 const API_BASE_URL = process.env.REACT_APP_API_URL || 'http://localhost:8000';
+const POLL_INTERVAL_MS = 2000;
+
+const STATUS_STYLES = {
+  pending: 'bg-gray-100 text-gray-700',
+  completed: 'bg-green-100 text-green-800',
+  skipped: 'bg-blue-100 text-blue-800',
+  failed: 'bg-red-100 text-red-800',
+};
 
 function URLScraper() {
   const [urls, setUrls] = useState(['']);
   const [results, setResults] = useState([]);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState('');
+  const [job, setJob] = useState(null);
 
   const addURLField = () => {
     setUrls([...urls, '']);
@@ -26,6 +35,76 @@ function URLScraper() {
     setUrls(newUrls);
   };
 
+  // Poll the scrape job until every URL has finished
+  const pollJob = async (jobId) => {
+    while (true) {
+      const response = await axios.get(`${API_BASE_URL}/api/scrape/jobs/${jobId}`);
+      setJob(response.data);
+
+      if (response.data.status === 'completed' || response.data.status === 'failed') {
+        return response.data;
+      }
+
+      await new Promise(resolve => setTimeout(resolve, POLL_INTERVAL_MS));
+    }
+  };
+
+  // Follow the job over Server-Sent Events; fall back to polling if the stream can't be opened
+  const watchJob = async (jobId) => {
+    if (typeof EventSource === 'undefined') {
+      return pollJob(jobId);
+    }
+
+    const initial = await axios.get(`${API_BASE_URL}/api/scrape/jobs/${jobId}`);
+    setJob(initial.data);
+    if (initial.data.status === 'completed' || initial.data.status === 'failed') {
+      return initial.data;
+    }
+
+    const streamed = await new Promise((resolve) => {
+      const source = new EventSource(`${API_BASE_URL}/api/events?job_id=${jobId}`);
+      let current = initial.data;
+
+      source.addEventListener('job_progress', (event) => {
+        const progress = JSON.parse(event.data);
+        current = { ...current, ...progress };
+        setJob(current);
+        if (progress.status === 'completed' || progress.status === 'failed') {
+          source.close();
+          resolve(current);
+        }
+      });
+
+      source.addEventListener('job_item', (event) => {
+        const item = JSON.parse(event.data);
+        current = {
+          ...current,
+          urls: current.urls.map(existing =>
+            existing.url === item.url ? { ...existing, ...item } : existing
+          ),
+        };
+        setJob(current);
+      });
+
+      // The job may have finished before the stream was subscribed - check once it's open
+      source.onopen = async () => {
+        const response = await axios.get(`${API_BASE_URL}/api/scrape/jobs/${jobId}`);
+        if (response.data.status === 'completed' || response.data.status === 'failed') {
+          source.close();
+          setJob(response.data);
+          resolve(response.data);
+        }
+      };
+
+      source.onerror = () => {
+        source.close();
+        resolve(null);
+      };
+    });
+
+    return streamed || pollJob(jobId);
+  };
+
   const handleScrape = async (e) => {
     e.preventDefault();
 
@@ -40,15 +119,23 @@ function URLScraper() {
     setLoading(true);
     setError('');
     setResults([]);
+    setJob(null);
 
     try {
       const response = await axios.post(`${API_BASE_URL}/api/scrape/urls`, {
         urls: validUrls
       });
 
-      setResults(response.data);
+      const finishedJob = await watchJob(response.data.job_id);
+      if (finishedJob.status === 'failed') {
+        setError(finishedJob.error_message || 'Scraping job failed.');
+        return;
+      }
+
+      const videosResponse = await axios.get(`${API_BASE_URL}/api/scrape/jobs/${response.data.job_id}/videos`);
+      setResults(videosResponse.data);
 
-      if (response.data.length === 0) {
+      if (videosResponse.data.length === 0) {
         setError('No videos could be scraped. Please check the URLs and try again.');
       }
 
@@ -67,6 +154,7 @@ function URLScraper() {
     setUrls(['']);
     setResults([]);
     setError('');
+    setJob(null);
   };
 
   return (
@@ -161,7 +249,7 @@ function URLScraper() {
               {loading ? (
                 <>
                   <Loader className="w-5 h-5 animate-spin" />
-                  Scraping... ({urls.filter(u => u.trim()).length} URLs)
+                  Scraping... ({job ? `${job.progress}/${job.total}` : urls.filter(u => u.trim()).length} URLs)
                 </>
               ) : (
                 <>
@@ -183,6 +271,33 @@ function URLScraper() {
         </form>
       </div>
 
+      {/* Per-URL Job Status */}
+      {job && (
+        <div className="bg-white rounded-lg shadow p-6">
+          <h2 className="text-xl font-bold text-gray-900 mb-4">
+            Job #{job.job_id}: {job.progress}/{job.total} URLs done
+          </h2>
+          <div className="space-y-2">
+            {job.urls.map((item) => (
+              <div key={item.url} className="flex items-center justify-between gap-3 text-sm">
+                <span className="truncate text-gray-700">{item.url}</span>
+                <span className="flex items-center gap-2 shrink-0">
+                  {item.status !== 'pending' && item.status !== 'failed' && (
+                    <span className="text-gray-500">{item.videos_found} videos</span>
+                  )}
+                  <span
+                    className={`px-2 py-1 text-xs rounded font-semibold ${STATUS_STYLES[item.status] || STATUS_STYLES.pending}`}
+                    title={item.error || ''}
+                  >
+                    {item.status}
+                  </span>
+                </span>
+              </div>
+            ))}
+          </div>
+        </div>
+      )}
+
       {/* Results */}
       {results.length > 0 && (
         <div className="bg-white rounded-lg shadow p-6">